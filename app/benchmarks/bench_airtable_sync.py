@@ -0,0 +1,95 @@
+"""
+Benchmark synchronizace do Airtable (src/jobs/airtable_sync.py)
+
+Proti lokálnímu Airtable (fake_airtable.py) s limitem požadavků za sekundu
+spustí plnou synchronizaci, opakovaný běh bez změn a běh po přidání nových
+transakcí a změně několika uživatelů. Pro každý běh vypíše čas, počet
+odeslaných řádků, požadavků na Airtable, odmítnutí 429 a čtení z databáze.
+
+Použití:
+    python benchmarks/bench_airtable_sync.py --users 200 --transactions 1000 --rate 50
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_airtable import FakeAirtable
+from benchmarks.fake_supabase import FakeSupabase
+from src.airtable import AirtableClient
+from src.jobs import airtable_sync
+
+def timestamp(offset):
+    # Řádky starší než AIRTABLE_SYNC_LAG, aby je synchronizace viděla
+    return (datetime.now(timezone.utc) - timedelta(hours=1) + timedelta(milliseconds=offset)).isoformat()
+
+def build_users(count):
+    return [
+        {
+            'id': str(uuid.uuid4()), 'email': f'user{i}@example.com', 'user_type': 'agent' if i % 3 else 'seller',
+            'full_name': f'Uživatel {i}', 'status': 'active', 'auth_provider': 'email',
+            'created_at': timestamp(i), 'last_login': None, 'updated_at': timestamp(i),
+        }
+        for i in range(count)
+    ]
+
+def build_transactions(users, count, start=0):
+    # Každých pět transakcí sdílí created_at (stejný okamžik, různá id)
+    return [
+        {
+            'id': str(uuid.uuid4()), 'agent_id': users[i % len(users)]['id'], 'amount': 100,
+            'transaction_type': 'purchase', 'description': 'Nákup kreditů', 'payment_id': None,
+            'balance_after': 100, 'created_at': timestamp(start + i // 5),
+        }
+        for i in range(count)
+    ]
+
+def run(name, supabase, client, fake):
+    supabase.reset_calls()
+    before = dict(client.stats())
+    rate_limited = fake.stats['rate_limited']
+    started = time.perf_counter()
+    result = airtable_sync.sync_all(client, supabase=supabase)
+    elapsed = time.perf_counter() - started
+    stats = client.stats()
+    print(
+        f"{name:14} {elapsed:7.2f}s {sum(result.values()):7d} "
+        f"{stats['requests'] - before['requests']:9d} {fake.stats['rate_limited'] - rate_limited:6d} "
+        f"{supabase.call_count:6d}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=200, help='počet uživatelů')
+    parser.add_argument('--transactions', type=int, default=1000, help='počet transakcí')
+    parser.add_argument('--rate', type=float, default=50, help='limit požadavků za sekundu (Airtable má 5)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='podíl požadavků, které skončí 503')
+    args = parser.parse_args()
+
+    users = build_users(args.users)
+    transactions = build_transactions(users, args.transactions)
+    supabase = FakeSupabase(tables={'users': users, 'credit_transactions': transactions})
+    fake = FakeAirtable(rate=args.rate, failure_rate=args.failure_rate).start()
+    client = AirtableClient('appBENCH', 'key', api_url=fake.url, rate=args.rate)
+
+    try:
+        print(f"{'běh':14} {'čas':>8} {'řádků':>7} {'požadavků':>9} {'429':>6} {'dotazů':>6}")
+        run('plná', supabase, client, fake)
+        run('beze změn', supabase, client, fake)
+
+        supabase.tables['credit_transactions'].extend(build_transactions(users, 50, start=args.transactions))
+        for user in users[:10]:
+            user['updated_at'] = timestamp(args.transactions + 100)
+        run('po změnách', supabase, client, fake)
+
+        synced = len(fake.records('appBENCH', airtable_sync.SYNC_TABLES['credit_transactions']['airtable_table']))
+        print(f"transakcí v Airtable: {synced} z {len(supabase.tables['credit_transactions'])}")
+    finally:
+        fake.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+"""
+Benchmark backendu pod souběžnou zátěží proti lokální náhradě Supabase
+
+Spustí Flask aplikaci v tomto procesu (pool klientů, metriky, blueprinty
+auth, properties a credits) a každý scénář zatíží postupně při několika
+úrovních souběžnosti. Každé vlákno má vlastního testovacího klienta
+a přihlášeného makléře. Měří propustnost, p50/p95/p99 latence a počet
+volání Supabase na požadavek.
+
+Použití:
+    python benchmarks/bench_backend.py --latency 0.02 --concurrency 1,8,32 --output bench.json
+    python benchmarks/bench_backend.py --baseline bench.json --max-regression 0.2
+
+S --baseline se výsledky porovnají s dřívějším JSON výstupem a skript skončí
+s kódem 1, pokud některý scénář zpomalil (p95) nebo ztratil propustnost
+víc, než dovoluje --max-regression.
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+JWT_SECRET = 'benchmark-secret'
+
+SCENARIOS = ('register', 'login', 'me', 'get_properties', 'purchase_credits', 'use_credits')
+
+PASSWORD = 'benchmark-heslo'
+
+def configure_environment(pool_size):
+    # Musí proběhnout před importem src.database (velikost poolu se čte při importu)
+    os.environ.update({
+        'SUPABASE_URL': 'http://fake-supabase.local',
+        'SUPABASE_KEY': 'fake-key',
+        'SUPABASE_JWT_SECRET': JWT_SECRET,
+        'SUPABASE_POOL_SIZE': str(pool_size),
+        'NOTIFICATIONS_ENABLED': '0',
+        'LISTING_INDEX_ENABLED': '0',
+    })
+
+def build_properties(count):
+    started = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            'id': str(uuid.uuid4()),
+            'seller_id': str(uuid.uuid4()),
+            'property_type': 'byt',
+            'description': f'Byt číslo {index}',
+            'street': 'Masarykova',
+            'house_number': str(index),
+            'city': 'Brno',
+            'postal_code': '60200',
+            'parcel_number': str(1000 + index),
+            'municipality': 'Brno',
+            'cadastral_area': 'Veveří',
+            'created_at': (started + timedelta(minutes=index)).isoformat(),
+            'updated_at': None,
+            'status': 'active',
+        }
+        for index in range(count)
+    ]
+
+def build_fake(args):
+    from benchmarks.fake_supabase import FakeSupabase, credit_functions
+
+    return FakeSupabase(
+        latency=args.latency,
+        jitter=args.jitter,
+        jwt_secret=JWT_SECRET,
+        tables={'properties': build_properties(args.rows)},
+        foreign_keys={
+            ('users', 'agent_profiles'): ('user_id', 'id'),
+            ('users', 'seller_profiles'): ('user_id', 'id'),
+            ('users', 'agent_credits'): ('agent_id', 'id'),
+        },
+        functions=credit_functions()
+    )
+
+def create_app(fake):
+    from flask import Flask
+    from src import database, metrics
+    from src.routes.auth import auth_bp
+    from src.routes.properties import properties_bp
+    from src.routes.credits import credits_bp
+
+    # Pool i samostatní klienti pro přihlášení dostanou náhradu místo skutečného klienta
+    database.create_client = lambda url, key: fake
+
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'benchmark'
+    database.init_app(app)
+    metrics.init_app(app)
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(properties_bp, url_prefix='/api/properties')
+    app.register_blueprint(credits_bp, url_prefix='/api/credits')
+    return app
+
+def add_agent(fake, balance):
+    # Makléř s profilem a kredity, založený bez round tripů
+    email = f'makler-{uuid.uuid4().hex[:12]}@example.cz'
+    user = fake.auth.add_user(email, PASSWORD)
+    fake.tables.setdefault('users', []).append({
+        'id': user['id'], 'email': email, 'user_type': 'agent', 'full_name': 'Makléř Benchmark',
+        'phone': '', 'status': 'active', 'auth_provider': 'email',
+    })
+    fake.tables.setdefault('agent_profiles', []).append({
+        'id': str(uuid.uuid4()), 'user_id': user['id'], 'average_rating': 0, 'successful_transactions': 0,
+    })
+    fake.tables.setdefault('agent_credits', []).append({
+        'id': str(uuid.uuid4()), 'agent_id': user['id'], 'balance': balance,
+    })
+    return email
+
+def login(client, email):
+    response = client.post('/api/auth/login', json={'email': email, 'password': PASSWORD})
+    if response.status_code != 200:
+        raise Exception(f'Přihlášení makléře selhalo: {response.get_json()}')
+
+class Worker:
+    """Jedno vlákno zátěže: vlastní testovací klient a přihlášený makléř"""
+
+    def __init__(self, app, fake, index, property_ids):
+        self.client = app.test_client()
+        self.email = add_agent(fake, balance=10 ** 9)
+        self.index = index
+        self.property_ids = property_ids
+        self.counter = 0
+        login(self.client, self.email)
+
+    def request(self, scenario):
+        self.counter += 1
+
+        if scenario == 'register':
+            return self.client.post('/api/auth/register', json={
+                'email': f'novy-{uuid.uuid4().hex}@example.cz',
+                'password': PASSWORD,
+                'user_type': 'agent',
+                'full_name': 'Nový Makléř',
+            })
+        if scenario == 'login':
+            return self.client.post('/api/auth/login', json={'email': self.email, 'password': PASSWORD})
+        if scenario == 'me':
+            return self.client.get('/api/auth/me')
+        if scenario == 'get_properties':
+            return self.client.get('/api/properties/properties?limit=20')
+        if scenario == 'purchase_credits':
+            return self.client.post('/api/credits/purchase', json={'amount': 10, 'payment_method': 'card'})
+        if scenario == 'use_credits':
+            # Každé odemčení jiného inzerátu, aby se neměřila jen rychlá cesta pro existující přístup
+            property_id = self.property_ids[(self.index * 7919 + self.counter) % len(self.property_ids)]
+            return self.client.post('/api/credits/use', json={'property_id': property_id})
+        raise ValueError(f'Neznámý scénář: {scenario}')
+
+def percentile(sorted_values, fraction):
+    # Nejbližší pořadí (nearest rank)
+    if not sorted_values:
+        return None
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+def run_level(workers, scenario, requests, fake):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    per_worker = max(1, requests // len(workers))
+    barrier = threading.Barrier(len(workers) + 1)
+
+    def run(worker):
+        nonlocal errors
+        local_latencies = []
+        local_errors = 0
+        barrier.wait()
+        for _ in range(per_worker):
+            started = time.perf_counter()
+            response = worker.request(scenario)
+            # Průběžně odesílané tělo (výpis inzerátů) se generuje až při čtení
+            response.get_data()
+            response.close()
+            local_latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                local_errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    threads = [threading.Thread(target=run, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+
+    fake.reset_calls()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 2),
+        'mean_ms': round(statistics.mean(latencies), 3),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'supabase_calls_per_request': round(fake.call_count / len(latencies), 2),
+    }
+
+def compare(results, baseline, max_regression):
+    """Seznam scénářů, které proti baseline zpomalily nebo ztratily propustnost"""
+    regressions = []
+    for scenario, levels in results['results'].items():
+        for level, result in levels.items():
+            before = baseline.get('results', {}).get(scenario, {}).get(level)
+            if not before:
+                continue
+            if result['p95_ms'] > before['p95_ms'] * (1 + max_regression):
+                regressions.append(f"{scenario} @ {level}: p95 {before['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms")
+            if result['throughput_rps'] < before['throughput_rps'] * (1 - max_regression):
+                regressions.append(
+                    f"{scenario} @ {level}: propustnost {before['throughput_rps']:.1f} -> {result['throughput_rps']:.1f} req/s"
+                )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.02, help='latence jednoho round tripu do Supabase (s)')
+    parser.add_argument('--jitter', type=float, default=0.005, help='náhodné prodloužení round tripu o 0 až jitter (s)')
+    parser.add_argument('--concurrency', default='1,8,32', help='úrovně souběžnosti oddělené čárkou')
+    parser.add_argument('--requests', type=int, default=200, help='požadavků na scénář a úroveň')
+    parser.add_argument('--rows', type=int, default=500, help='počet inzerátů v náhradě')
+    parser.add_argument('--pool-size', type=int, default=10, help='velikost poolu Supabase klientů (SUPABASE_POOL_SIZE)')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='jen vybrané scénáře (lze opakovat)')
+    parser.add_argument('--output', help='uložit výsledky jako JSON')
+    parser.add_argument('--baseline', help='JSON z dřívějšího běhu k porovnání')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='povolené zhoršení proti baseline (podíl)')
+    args = parser.parse_args()
+
+    configure_environment(args.pool_size)
+    fake = build_fake(args)
+    app = create_app(fake)
+
+    levels = [int(level) for level in args.concurrency.split(',')]
+    property_ids = [row['id'] for row in fake.tables['properties']]
+    workers = [Worker(app, fake, index, property_ids) for index in range(max(levels))]
+
+    results = {
+        'config': {
+            'latency': args.latency,
+            'jitter': args.jitter,
+            'requests': args.requests,
+            'rows': args.rows,
+            'pool_size': args.pool_size,
+            'concurrency': levels,
+            'python': sys.version.split()[0],
+            'started_at': datetime.now(timezone.utc).isoformat(),
+        },
+        'results': {},
+    }
+
+    print(f"{'scénář':18} {'vláken':>6} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'chyb':>5} {'volání':>7}")
+    for scenario in args.scenario or SCENARIOS:
+        results['results'][scenario] = {}
+        for level in levels:
+            result = run_level(workers[:level], scenario, args.requests, fake)
+            results['results'][scenario][str(level)] = result
+            print(
+                f"{scenario:18} {level:6d} {result['throughput_rps']:9.1f} {result['p50_ms']:7.1f}ms "
+                f"{result['p95_ms']:7.1f}ms {result['p99_ms']:7.1f}ms {result['errors']:5d} "
+                f"{result['supabase_calls_per_request']:7.2f}"
+            )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f'REGRESE: {regression}')
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
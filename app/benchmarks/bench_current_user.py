@@ -0,0 +1,116 @@
+"""
+Benchmark načítání přihlášeného uživatele (GET /api/auth/me)
+
+Porovnává původní průběh (set_session + get_user v Supabase Auth a tři
+postupné selecty) s lokálním ověřením tokenu a jedním vnořeným selectem,
+případně se souběžnými dotazy tam, kde vnořený select není k dispozici.
+Proti lokální náhradě Supabase s nastavenou latencí jednoho round tripu.
+
+Použití:
+    python benchmarks/bench_current_user.py --latency 0.03 --iterations 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+
+import jwt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_supabase import FakeSupabase
+
+JWT_SECRET = 'benchmark-secret'
+os.environ['SUPABASE_JWT_SECRET'] = JWT_SECRET
+
+from src import database
+from src.services import auth_service, token_service
+
+def build_fake(latency):
+    agent_id = str(uuid.uuid4())
+    fake = FakeSupabase(
+        latency=latency,
+        tables={
+            'users': [{'id': agent_id, 'email': 'makler@example.cz', 'user_type': 'agent', 'full_name': 'Jan Makléř', 'status': 'active'}],
+            'agent_profiles': [{'id': str(uuid.uuid4()), 'user_id': agent_id, 'average_rating': 4.5, 'successful_transactions': 12}],
+            'agent_credits': [{'id': str(uuid.uuid4()), 'agent_id': agent_id, 'balance': 40}],
+            'seller_profiles': [],
+        },
+        foreign_keys={
+            ('users', 'agent_profiles'): ('user_id', 'id'),
+            ('users', 'seller_profiles'): ('user_id', 'id'),
+            ('users', 'agent_credits'): ('agent_id', 'id'),
+        }
+    )
+    return fake, agent_id
+
+def make_token(user_id):
+    return jwt.encode(
+        {'sub': user_id, 'aud': 'authenticated', 'exp': int(time.time()) + 3600},
+        JWT_SECRET,
+        algorithm='HS256'
+    )
+
+def get_current_user_before(fake, user_id):
+    # Původní průběh: dva dotazy na Supabase Auth a tři postupné selecty
+    fake._round_trip('auth.set_session')
+    fake._round_trip('auth.get_user')
+    user_data = fake.table('users').select('*').eq('id', user_id).execute().data[0]
+    profile = fake.table('agent_profiles').select('*').eq('user_id', user_id).execute().data
+    credits = fake.table('agent_credits').select('*').eq('agent_id', user_id).execute().data
+    user_data['profile'] = profile[0]
+    user_data['credits'] = credits[0]
+    return user_data
+
+def measure(name, fake, iterations, call):
+    fake.reset_calls()
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        durations.append((time.perf_counter() - started) * 1000)
+
+    durations.sort()
+    return {
+        'name': name,
+        'mean_ms': statistics.mean(durations),
+        'p50_ms': durations[len(durations) // 2],
+        'p95_ms': durations[int(len(durations) * 0.95) - 1],
+        'round_trips': fake.call_count / iterations,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.03, help='latence jednoho round tripu v sekundách')
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    fake, user_id = build_fake(args.latency)
+    token = make_token(user_id)
+
+    auth_service.get_supabase = lambda: fake
+    token_service.get_supabase = lambda: fake
+    # Souběžné dotazy náhradní cesty si berou klienty z poolu
+    database.new_client = lambda url, key: fake
+    database._pool = database.SupabaseClientPool('http://fake', 'key')
+
+    results = [measure('před (Auth API + 3 selecty)', fake, args.iterations, lambda: get_current_user_before(fake, user_id))]
+
+    auth_service._embedded_select_supported = True
+    results.append(measure('vnořený select', fake, args.iterations, lambda: auth_service.get_current_user(token)))
+
+    auth_service._embedded_select_supported = False
+    token_service.invalidate_user_profile(user_id)
+    results.append(measure('souběžné dotazy (cache users)', fake, args.iterations, lambda: auth_service.get_current_user(token)))
+
+    print(f"{'varianta':32} {'průměr':>10} {'p50':>10} {'p95':>10} {'round tripů':>12}")
+    for result in results:
+        print(
+            f"{result['name']:32} {result['mean_ms']:8.2f}ms {result['p50_ms']:8.2f}ms "
+            f"{result['p95_ms']:8.2f}ms {result['round_trips']:12.2f}"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark prostorového indexu inzerátů (src/geo_index.py)
+
+Rozmístí --rows syntetických inzerátů kolem obcí z offline tabulky
+(src/geocoding.py), změří sestavení indexu, latenci dotazů v okruhu
+(p50/p95/p99) pro několik poloměrů a cenu jedné průběžné změny.
+Nepotřebuje databázi:
+    python benchmarks/bench_geo.py --rows 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.geo_index import GeoIndex
+from src.geocoding import _get_places, lookup
+
+CENTERS = ['Praha', 'Brno', 'Ostrava', 'Plzeň', 'Jihlava', 'Zlín', 'Liberec', 'Tábor']
+RADII_KM = [5, 15, 50, 300]
+
+def build_rows(count, jitter, seed=42):
+    # jitter 0: souřadnice obce jako u inzerátů dohledaných z PSČ; jinak rozptyl ve stupních
+    rng = random.Random(seed)
+    points = list(_get_places().by_postal_code.values())
+    rows = []
+    for index in range(count):
+        latitude, longitude = rng.choice(points)
+        rows.append({
+            'id': str(uuid.uuid4()),
+            'latitude': latitude + rng.uniform(-jitter, jitter),
+            'longitude': longitude + rng.uniform(-jitter, jitter),
+            'created_at': f'2024-01-01T00:00:00.{index:06d}+00:00',
+            'status': rng.choice(['active', 'active', 'active', 'sold']),
+        })
+    return rows
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--jitter', type=float, default=0.05, help='rozptyl souřadnic kolem obce ve stupních')
+    parser.add_argument('--rounds', type=int, default=20, help='počet průchodů sadou dotazů')
+    parser.add_argument('--output', help='uložit výsledky jako JSON')
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows, args.jitter)
+    centers = [lookup(municipality=name) for name in CENTERS]
+    index = GeoIndex()
+
+    started = time.perf_counter()
+    index.rebuild(iter(rows))
+    build_seconds = time.perf_counter() - started
+
+    def active(row):
+        return row['status'] == 'active'
+
+    per_radius = {}
+    for radius_km in RADII_KM:
+        latencies = []
+        for _ in range(args.rounds):
+            for center in centers:
+                started = time.perf_counter()
+                index.within_radius(center, radius_km, limit=50, where=active)
+                latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        per_radius[radius_km] = {
+            'p50_ms': round(percentile(latencies, 0.50), 3),
+            'p95_ms': round(percentile(latencies, 0.95), 3),
+            'p99_ms': round(percentile(latencies, 0.99), 3),
+        }
+
+    update_latencies = []
+    for row in random.Random(7).sample(rows, 500):
+        started = time.perf_counter()
+        index.upsert({**row, 'latitude': row['latitude'] + 0.01})
+        update_latencies.append((time.perf_counter() - started) * 1000)
+    update_latencies.sort()
+
+    results = {
+        'rows': args.rows,
+        'jitter': args.jitter,
+        **{key: value for key, value in index.stats().items() if key in ('cells', 'points')},
+        'build_seconds': round(build_seconds, 2),
+        'radius_km': per_radius,
+        'update_p50_ms': round(percentile(update_latencies, 0.50), 4),
+    }
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
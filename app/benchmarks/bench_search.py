@@ -0,0 +1,136 @@
+"""
+Benchmark fulltextového indexu inzerátů (src/search_index.py)
+
+Vygeneruje --rows syntetických inzerátů s českými texty, změří sestavení
+indexu, latenci dotazů bez cache výsledků (p50/p95/p99) a cenu jedné
+průběžné změny. Nepotřebuje databázi:
+    python benchmarks/bench_search.py --rows 100000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.search_index import SearchIndex
+
+CITIES = [
+    'Praha', 'Brno', 'Ostrava', 'Plzeň', 'Liberec', 'Olomouc', 'České Budějovice', 'Hradec Králové',
+    'Ústí nad Labem', 'Pardubice', 'Zlín', 'Havířov', 'Kladno', 'Most', 'Opava', 'Frýdek-Místek',
+    'Karviná', 'Jihlava', 'Teplice', 'Děčín', 'Karlovy Vary', 'Chomutov', 'Jablonec nad Nisou',
+    'Mladá Boleslav', 'Prostějov', 'Přerov', 'Česká Lípa', 'Třebíč', 'Třinec', 'Tábor', 'Znojmo',
+]
+STREETS = [
+    'Masarykova', 'Husova', 'Palackého', 'Nádražní', 'Komenského', 'Žižkova', 'Jiráskova', 'Školní',
+    'Sokolovská', 'Družstevní', 'Květná', 'Lidická', 'Smetanova', 'Tyršova', 'Havlíčkova', 'Zahradní',
+    'Na Výsluní', 'U Potoka', 'Čechova', 'Nerudova', 'Riegrova', 'Štefánikova', 'Dvořákova', 'Lesní',
+]
+WORDS = (
+    'prostorný světlý byt balkon lodžie terasa sklep garáž parkovací stání výtah cihlový panelový '
+    'rekonstrukce novostavba zahrada pozemek rodinný dům podkroví kuchyňská linka koupelna vana sprchový '
+    'kout dřevěné podlahy plovoucí podlaha plastová okna zateplení tichá lokalita klidná ulice centrum '
+    'města občanská vybavenost škola školka obchody MHD zastávka dálnice výhled les park řeka krb '
+    'tepelné čerpadlo plynový kotel fotovoltaika vlastní studna kanalizace pergola bazén dílna půda'
+).split()
+TYPES = ['byt', 'dům', 'pozemek', 'komerční']
+SYLLABLES = ['ka', 'po', 'ně', 'ři', 'lo', 'va', 'st', 'mí', 'še', 'dr', 'ho', 'lu', 'če', 'zá', 'by', 'te']
+
+def build_vocabulary(rng, size):
+    # Běžná slova inzerátů na začátku, za nimi vzácnější; četnost slov klesá podle Zipfova zákona
+    words = list(WORDS)
+    while len(words) < size:
+        words.append(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    return words, weights
+
+QUERIES = [
+    'byt balkon', 'dum zahrada', 'rodinný dům Brno', 'praha', 'garaz', 'zizkova', 'novostavba terasa',
+    'ceske budejovice', 'sklep vytah', 'krb', 'byt praha balk', 'tepelne cerpadlo', 'pozemek les',
+    'plast okna', 'ústí', 'rekonstrukce koupelna', 'hradec', 'na vysluni', 'byt', 'park reka vyhled',
+]
+
+def build_rows(count, seed=42, vocabulary_size=20000):
+    rng = random.Random(seed)
+    words, weights = build_vocabulary(rng, vocabulary_size)
+    return [
+        {
+            'id': str(uuid.uuid4()),
+            'property_type': rng.choice(TYPES),
+            'city': rng.choice(CITIES),
+            'street': rng.choice(STREETS),
+            'house_number': str(rng.randint(1, 200)),
+            'description': ' '.join(rng.choices(words, weights, k=rng.randint(20, 60))),
+            'created_at': f'2024-01-01T00:00:00.{index:06d}+00:00',
+            'status': 'active',
+        }
+        for index in range(count)
+    ]
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--vocabulary', type=int, default=20000, help='počet různých slov v popisech')
+    parser.add_argument('--rounds', type=int, default=20, help='počet průchodů sadou dotazů')
+    parser.add_argument('--output', help='uložit výsledky jako JSON')
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows, vocabulary_size=args.vocabulary)
+    index = SearchIndex()
+
+    started = time.perf_counter()
+    index.rebuild(iter(rows))
+    build_seconds = time.perf_counter() - started
+
+    latencies = {query: [] for query in QUERIES}
+    for _ in range(args.rounds):
+        for query in QUERIES:
+            # Bez cache výsledků: měří se skutečné vyhodnocení dotazu
+            index._changed()
+            started = time.perf_counter()
+            index.search(query, limit=20)
+            latencies[query].append((time.perf_counter() - started) * 1000)
+
+    all_latencies = sorted(value for values in latencies.values() for value in values)
+
+    started = time.perf_counter()
+    cached_rounds = 1000
+    for _ in range(cached_rounds):
+        index.search(QUERIES[0], limit=20)
+    cached_ms = (time.perf_counter() - started) * 1000 / cached_rounds
+
+    update_latencies = []
+    for row in random.Random(7).sample(rows, 500):
+        started = time.perf_counter()
+        index.upsert({**row, 'description': row['description'] + ' nová fotovoltaika'})
+        update_latencies.append((time.perf_counter() - started) * 1000)
+    update_latencies.sort()
+
+    results = {
+        'rows': args.rows,
+        'terms': index.stats()['terms'],
+        'build_seconds': round(build_seconds, 2),
+        'query_p50_ms': round(percentile(all_latencies, 0.50), 3),
+        'query_p95_ms': round(percentile(all_latencies, 0.95), 3),
+        'query_p99_ms': round(percentile(all_latencies, 0.99), 3),
+        'query_cached_ms': round(cached_ms, 4),
+        'update_p50_ms': round(percentile(update_latencies, 0.50), 3),
+        'per_query_median_ms': {query: round(statistics.median(values), 3) for query, values in latencies.items()},
+        'top_hit': {query: (index.search(query, limit=1)[0] or [{}])[0].get('city') for query in QUERIES},
+    }
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
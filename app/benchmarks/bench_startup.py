@@ -0,0 +1,147 @@
+"""
+Benchmark startu aplikace: import, create_app() a první požadavky
+
+Každé měření běží v novém procesu Pythonu, takže zahrnuje i import
+závislostí. Měří import src.main, vytvoření aplikace (create_app(),
+včetně případného zahřátí spojení), první a druhý požadavek na výpis
+inzerátů. Supabase nahrazuje lokální náhrada; každý klient poolu při
+prvním dotazu navíc počká --connect-latency, jako při navazování TCP
+a TLS spojení, takže je vidět, co zahřátí ušetří prvním požadavkům.
+
+Použití:
+    python benchmarks/bench_startup.py --repeat 5 --warmup 4 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STEPS = ('import_ms', 'create_app_ms', 'first_request_ms', 'second_request_ms')
+
+class ConnectingClient:
+    """Klient náhrady, jehož první dotaz čeká navíc na navázání spojení"""
+
+    def __init__(self, fake, connect_latency):
+        self._fake = fake
+        self._connect_latency = connect_latency
+        self._connected = False
+
+    def _connect(self):
+        if not self._connected:
+            time.sleep(self._connect_latency)
+            self._connected = True
+
+    def table(self, name):
+        self._connect()
+        return self._fake.table(name)
+
+    from_ = table
+
+    def rpc(self, name, params):
+        self._connect()
+        return self._fake.rpc(name, params)
+
+    def __getattr__(self, name):
+        return getattr(self._fake, name)
+
+def child(args):
+    # Jedno měření v čistém procesu; výsledek jako JSON na stdout
+    sys.path.insert(0, APP_DIR)
+    started = time.perf_counter()
+    import src.main
+    imported = time.perf_counter()
+
+    from benchmarks.bench_backend import build_properties
+    from benchmarks.fake_supabase import FakeSupabase
+    from src import database
+
+    fake = FakeSupabase(latency=args.latency, tables={'properties': build_properties(args.rows)})
+    database.create_client = lambda url, key: ConnectingClient(fake, args.connect_latency)
+
+    before_app = time.perf_counter()
+    app = src.main.create_app()
+    created = time.perf_counter()
+
+    client = app.test_client()
+    timings = []
+    for _ in range(2):
+        request_started = time.perf_counter()
+        response = client.get('/api/properties/properties?limit=20')
+        timings.append((time.perf_counter() - request_started) * 1000)
+        if response.status_code != 200:
+            raise Exception(f'Požadavek selhal: {response.status_code}')
+
+    print(json.dumps({
+        'import_ms': (imported - started) * 1000,
+        'create_app_ms': (created - before_app) * 1000,
+        'first_request_ms': timings[0],
+        'second_request_ms': timings[1],
+    }))
+
+def measure(args, warmup):
+    env = {
+        **os.environ,
+        'SUPABASE_URL': 'http://fake-supabase.local',
+        'SUPABASE_KEY': 'fake-key',
+        'SUPABASE_WARMUP': str(warmup),
+        'NOTIFICATIONS_ENABLED': '0',
+        'LISTING_INDEX_ENABLED': '0',
+        'RATE_LIMIT_ENABLED': '0',
+    }
+    command = [
+        sys.executable, os.path.abspath(__file__), '--child',
+        '--latency', str(args.latency), '--connect-latency', str(args.connect_latency), '--rows', str(args.rows),
+    ]
+    samples = []
+    for _ in range(args.repeat):
+        output = subprocess.run(command, env=env, cwd=APP_DIR, capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {step: round(statistics.median(sample[step] for sample in samples), 2) for step in STEPS}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.02, help='latence jednoho round tripu do Supabase (s)')
+    parser.add_argument('--connect-latency', type=float, default=0.1, help='navázání spojení při prvním dotazu klienta (s)')
+    parser.add_argument('--rows', type=int, default=500, help='počet inzerátů v náhradě')
+    parser.add_argument('--repeat', type=int, default=5, help='počet procesů na variantu (výsledkem je medián)')
+    parser.add_argument('--warmup', type=int, default=4, help='SUPABASE_WARMUP pro variantu se zahřátím')
+    parser.add_argument('--output', help='uložit výsledky jako JSON')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    results = {
+        'config': {
+            'latency': args.latency,
+            'connect_latency': args.connect_latency,
+            'rows': args.rows,
+            'repeat': args.repeat,
+            'python': sys.version.split()[0],
+        },
+        'results': {
+            'bez zahřátí': measure(args, 0),
+            f'zahřátí {args.warmup}': measure(args, args.warmup),
+        },
+    }
+
+    print(f"{'varianta':14} {'import':>9} {'create_app':>11} {'1. požad.':>10} {'2. požad.':>10}")
+    for name, result in results['results'].items():
+        print(
+            f"{name:14} {result['import_ms']:7.1f}ms {result['create_app_ms']:9.1f}ms "
+            f"{result['first_request_ms']:8.1f}ms {result['second_request_ms']:8.1f}ms"
+        )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
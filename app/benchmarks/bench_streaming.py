@@ -0,0 +1,83 @@
+"""
+Benchmark průběžně odesílaných JSON výpisů (src/streaming.py)
+
+Porovnává sestavení celé odpovědi najednou (seznam řádků, json.dumps
+a komprese celého těla, jako dřív s jsonify) s průběžným kódováním
+a kompresí po blocích z dávek PageStream. Měří čas, špičku alokované
+paměti (tracemalloc) a velikost odeslaných dat pro každé kódování.
+
+Použití:
+    python benchmarks/bench_streaming.py --rows 5000 --batch 200
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_backend import build_properties
+from src import streaming
+from src.pagination import PageStream
+
+def make_fetch(count):
+    # Dávky se vytvářejí až při čtení, jako odpovědi databáze
+    def fetch(cursor, limit):
+        start = int(cursor or 0)
+        rows = build_properties(min(limit, count - start))
+        next_start = start + len(rows)
+        return rows, str(next_start) if next_start < count else None
+    return fetch
+
+def whole(count, batch, encoding):
+    # Původní průběh: všechny řádky v seznamu, celé tělo v paměti, komprese najednou
+    fetch = make_fetch(count)
+    rows, cursor = [], None
+    while True:
+        page, cursor = fetch(cursor, batch)
+        rows.extend(page)
+        if not cursor:
+            break
+    body = json.dumps({'status': 'success', 'properties': rows, 'next_cursor': None}, ensure_ascii=False).encode('utf-8')
+    if encoding == 'gzip':
+        body = gzip.compress(body, streaming.GZIP_LEVEL)
+    elif encoding == 'br':
+        body = streaming.brotli.compress(body, quality=streaming.BROTLI_QUALITY)
+    return len(body)
+
+def streamed(count, batch, encoding):
+    page = PageStream(make_fetch(count), None, count, batch)
+    chunks = streaming._json_object_chunks({'status': 'success'}, 'properties', page, lambda: {'next_cursor': page.next_cursor})
+    return sum(len(chunk) for chunk in streaming._compress(chunks, encoding))
+
+def measure(fn, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn(*args)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'ms': round(elapsed * 1000, 1), 'peak_kb': round(peak / 1024, 1), 'bytes': size}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000, help='počet řádků výpisu')
+    parser.add_argument('--batch', type=int, default=200, help='velikost dávky čtené z databáze')
+    args = parser.parse_args()
+
+    encodings = [None, 'gzip'] + (['br'] if streaming.brotli is not None else [])
+    print(f"JSON: {'orjson' if streaming.orjson is not None else 'json'}")
+    print(f"{'varianta':10} {'kódování':9} {'čas':>9} {'špička':>11} {'data':>11}")
+    for encoding in encodings:
+        for name, fn in (('najednou', whole), ('průběžně', streamed)):
+            result = measure(fn, args.rows, args.batch, encoding)
+            print(
+                f"{name:10} {encoding or 'identity':9} {result['ms']:7.1f}ms "
+                f"{result['peak_kb']:9.1f}kB {result['bytes']:11d}"
+            )
+
+if __name__ == '__main__':
+    main()
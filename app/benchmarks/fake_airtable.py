@@ -0,0 +1,123 @@
+"""
+Lokální náhrada Airtable REST API pro benchmarky a ruční zkoušky synchronizace
+
+Přijímá hromadný upsert (PATCH /v0/<báze>/<tabulka> s performUpsert)
+se stejnými omezeními jako Airtable: nejvýše 10 záznamů v požadavku
+(jinak 422) a nejvýše rate požadavků za sekundu na bázi (jinak 429
+a Retry-After). Volitelně náhodně vrací 503, aby šlo vyzkoušet opakování.
+Záznamy drží v paměti a počítá požadavky.
+
+Použití:
+    server = FakeAirtable(rate=5).start()
+    client = AirtableClient('appTEST', 'key', api_url=server.url)
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+MAX_RECORDS = 10
+
+class FakeAirtable:
+    """
+    Args:
+        rate: Povolených požadavků za sekundu na bázi
+        retry_after: Hodnota Retry-After po 429 v sekundách (Airtable čeká 30)
+        failure_rate: Podíl požadavků, které skončí 503
+        latency: Doba zpracování jednoho požadavku v sekundách
+    """
+
+    def __init__(self, rate=5, retry_after=1, failure_rate=0.0, latency=0.0):
+        self.rate = rate
+        self.retry_after = retry_after
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.tables = {}
+        self.stats = {'requests': 0, 'records': 0, 'rate_limited': 0, 'failed': 0, 'rejected': 0}
+        self._recent = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/v0'
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_PATCH(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                status, payload, headers = fake._handle(self.path, json.loads(body or b'{}'))
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def records(self, base, table):
+        with self._lock:
+            return list(self.tables.get((base, table), {}).values())
+
+    def _handle(self, path, body):
+        _, _, base, table = urlparse(path).path.split('/', 3)
+        table = unquote(table)
+
+        with self._lock:
+            self.stats['requests'] += 1
+            # Okno poslední sekundy pro každou bázi
+            now = time.monotonic()
+            recent = [at for at in self._recent.get(base, []) if now - at < 1.0]
+            if len(recent) >= self.rate:
+                self._recent[base] = recent
+                self.stats['rate_limited'] += 1
+                return 429, {'errors': [{'error': 'RATE_LIMIT_REACHED'}]}, {'Retry-After': str(self.retry_after)}
+            recent.append(now)
+            self._recent[base] = recent
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.failure_rate and random.random() < self.failure_rate:
+            with self._lock:
+                self.stats['failed'] += 1
+            return 503, {'error': 'SERVICE_UNAVAILABLE'}, {}
+
+        records = body.get('records') or []
+        merge_on = (body.get('performUpsert') or {}).get('fieldsToMergeOn') or []
+        if len(records) > MAX_RECORDS or not merge_on:
+            with self._lock:
+                self.stats['rejected'] += 1
+            return 422, {'error': 'INVALID_REQUEST_UNKNOWN'}, {}
+
+        result = []
+        with self._lock:
+            stored = self.tables.setdefault((base, table), {})
+            for record in records:
+                fields = record['fields']
+                key = tuple(str(fields.get(name)) for name in merge_on)
+                existing = stored.get(key)
+                if existing is None:
+                    existing = stored[key] = {'id': 'rec' + uuid.uuid4().hex[:14], 'fields': {}}
+                existing['fields'].update(fields)
+                result.append(existing)
+            self.stats['records'] += len(records)
+        return 200, {'records': result}, {}
@@ -0,0 +1,538 @@
+"""
+Lokální náhrada Supabase klienta pro benchmarky
+
+Napodobuje tu část PostgREST rozhraní, kterou používají služby
+(table().select().eq().or_().insert().upsert().update().delete().order().limit().range()
+.execute() a rpc()), včetně vnořených selectů typu "*, agent_profiles(*)", a Supabase
+Auth (sign_up, sign_in_with_password, get_user, admin). Každé execute()
+počká nastavenou latenci (případně s náhodným rozptylem), takže výsledky
+odpovídají počtu síťových round tripů, a počítá volání, aby šlo porovnat
+jejich počet.
+"""
+import asyncio
+import random
+import re
+import threading
+import time
+import uuid
+from copy import deepcopy
+from datetime import datetime, timezone
+from functools import lru_cache
+from types import SimpleNamespace
+
+try:
+    from postgrest.exceptions import APIError
+except ImportError:  # benchmarky jdou spustit i bez balíčku supabase
+    APIError = Exception
+
+# Vnořený select: název_tabulky(sloupce)
+EMBED_PATTERN = re.compile(r'(\w+)\(([^()]*)\)')
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+class FakeAPIError(APIError):
+    # Služby rozlišují chyby databáze podle APIError.code, stejně jako u PostgRESTu
+    def __init__(self, message, code=None):
+        Exception.__init__(self, message)
+        self._raw_error = {'message': message, 'code': code}
+        self.message = message
+        self.code = code
+        self.hint = None
+        self.details = None
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.method = 'select'
+        self.columns = '*'
+        self.payload = None
+        self.filters = []
+        self.ordering = []
+        self.offset = 0
+        self.limit_count = None
+
+    # Čtení a zápis
+    def select(self, columns='*', count=None):
+        self.method = 'select'
+        self.columns = columns
+        return self
+
+    def insert(self, data):
+        self.method = 'insert'
+        self.payload = data
+        return self
+
+    def upsert(self, data, on_conflict='id'):
+        self.method = 'upsert'
+        self.payload = data
+        self.on_conflict = on_conflict
+        return self
+
+    def update(self, data):
+        self.method = 'update'
+        self.payload = data
+        return self
+
+    def delete(self):
+        self.method = 'delete'
+        return self
+
+    # Filtry
+    def eq(self, column, value):
+        self.filters.append(lambda row: _text(row.get(column)) == _text(value))
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(lambda row: _text(row.get(column)) != _text(value))
+        return self
+
+    def in_(self, column, values):
+        values = {_text(value) for value in values}
+        self.filters.append(lambda row: _text(row.get(column)) in values)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and _text(row.get(column)) > _text(value))
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and _text(row.get(column)) >= _text(value))
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and _text(row.get(column)) < _text(value))
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and _text(row.get(column)) <= _text(value))
+        return self
+
+    def or_(self, filters):
+        # PostgREST podmínka or=(...), např. keyset 'created_at.lt."…",and(created_at.eq."…",id.lt.…)'
+        self.filters.append(_logic_filter('or', filters))
+        return self
+
+    def order(self, column, desc=False):
+        # Víc sloupců v jednom parametru ('created_at.desc,id' s desc=True), jako v postgrest-py
+        if desc:
+            column += '.desc'
+        for part in column.split(','):
+            name, *modifiers = part.split('.')
+            self.ordering.append((name, 'desc' in modifiers))
+        return self
+
+    def limit(self, count):
+        self.limit_count = count
+        return self
+
+    def range(self, start, end):
+        self.offset = start
+        self.limit_count = end - start + 1
+        return self
+
+    def execute(self):
+        return self.client._execute(self)
+
+class FakeRPC:
+    def __init__(self, client, name, params):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        self.client._round_trip('rpc:' + self.name)
+        return self.client._call(self)
+
+class FakeSupabase:
+    """
+    Args:
+        latency: Doba jednoho round tripu v sekundách
+        tables: Počáteční obsah tabulek {název: [řádky]}
+        foreign_keys: {(tabulka, vnořená_tabulka): (sloupec_vnořené, sloupec_tabulky)}
+        functions: {název: funkce(client, **params)} pro rpc()
+        jitter: Náhodné prodloužení round tripu o 0 až jitter sekund
+        jwt_secret: Tajemství pro podpis tokenů z auth (jako SUPABASE_JWT_SECRET)
+    """
+
+    def __init__(self, latency=0.0, tables=None, foreign_keys=None, functions=None, jitter=0.0, jwt_secret=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.tables = {name: list(rows) for name, rows in (tables or {}).items()}
+        self.foreign_keys = dict(foreign_keys or {})
+        self.functions = dict(functions or {})
+        self.calls = {}
+        self._lock = threading.Lock()
+        self.auth = FakeAuth(self, jwt_secret)
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name, params):
+        return FakeRPC(self, name, params)
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls = {}
+
+    @property
+    def call_count(self):
+        return sum(self.calls.values())
+
+    def _count(self, name):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _delay(self):
+        return self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def _round_trip(self, name):
+        self._count(name)
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+
+    def _call(self, rpc):
+        handler = self.functions.get(rpc.name)
+        if handler is None:
+            raise FakeAPIError(f'Funkce {rpc.name} neexistuje', code='PGRST202')
+        return FakeResponse(handler(self, **rpc.params))
+
+    def _execute(self, query):
+        self._round_trip(query.table)
+        return self._apply(query)
+
+    def _apply(self, query):
+        with self._lock:
+            rows = self.tables.setdefault(query.table, [])
+
+            if query.method == 'insert':
+                payload = query.payload if isinstance(query.payload, list) else [query.payload]
+                inserted = []
+                for item in payload:
+                    row = {'id': str(uuid.uuid4()), 'created_at': _now(), **deepcopy(item)}
+                    rows.append(row)
+                    inserted.append(deepcopy(row))
+                return FakeResponse(inserted)
+
+            if query.method == 'upsert':
+                payload = query.payload if isinstance(query.payload, list) else [query.payload]
+                keys = query.on_conflict.split(',')
+                written = []
+                for item in payload:
+                    existing = next(
+                        (row for row in rows if all(_text(row.get(key)) == _text(item.get(key)) for key in keys)),
+                        None
+                    )
+                    if existing is None:
+                        existing = {'id': str(uuid.uuid4()), 'created_at': _now()}
+                        rows.append(existing)
+                    existing.update(deepcopy(item))
+                    written.append(deepcopy(existing))
+                return FakeResponse(written)
+
+            matched = [row for row in rows if all(condition(row) for condition in query.filters)]
+
+            if query.method == 'update':
+                for row in matched:
+                    row.update(deepcopy(query.payload))
+                return FakeResponse(deepcopy(matched))
+
+            if query.method == 'delete':
+                self.tables[query.table] = [row for row in rows if row not in matched]
+                return FakeResponse(deepcopy(matched))
+
+            for column, desc in reversed(query.ordering):
+                # Prázdné hodnoty na konec v obou směrech (nullslast)
+                present = [row for row in matched if row.get(column) is not None]
+                present.sort(key=lambda row: _sort_key(row.get(column)), reverse=desc)
+                matched = present + [row for row in matched if row.get(column) is None]
+            matched = matched[query.offset:]
+            if query.limit_count is not None:
+                matched = matched[:query.limit_count]
+
+            return FakeResponse([self._project(query.table, row, query.columns) for row in matched])
+
+    def _project(self, table, row, columns):
+        plain, embeds = _parse_columns(columns)
+
+        if '*' in plain:
+            result = {column: _copy(value) for column, value in row.items()}
+        else:
+            result = {column: _copy(row.get(column)) for column in plain}
+
+        for embedded_table, embedded_columns in embeds:
+            key = self.foreign_keys.get((table, embedded_table))
+            if key is None:
+                raise FakeAPIError(
+                    f"Could not find a relationship between '{table}' and '{embedded_table}'",
+                    code='PGRST200'
+                )
+            child_column, parent_column = key
+            children = [
+                child for child in self.tables.get(embedded_table, [])
+                if _text(child.get(child_column)) == _text(row.get(parent_column))
+            ]
+            result[embedded_table] = [self._project(embedded_table, child, embedded_columns) for child in children]
+
+        return result
+
+class AsyncFakeQuery(FakeQuery):
+    async def execute(self):
+        await self.client._async_round_trip(self.table)
+        return self.client._apply(self)
+
+class AsyncFakeRPC(FakeRPC):
+    async def execute(self):
+        await self.client._async_round_trip('rpc:' + self.name)
+        return self.client._call(self)
+
+class AsyncFakeSupabase(FakeSupabase):
+    """Varianta pro asynchronní cestu (AsyncPostgrestClient): execute() je korutina"""
+
+    def table(self, name):
+        return AsyncFakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name, params):
+        return AsyncFakeRPC(self, name, params)
+
+    async def _async_round_trip(self, name):
+        self._count(name)
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+
+class FakeAuthAdmin:
+    def __init__(self, auth):
+        self.auth = auth
+
+    def delete_user(self, user_id):
+        self.auth.client._round_trip('auth.admin.delete_user')
+        with self.auth._lock:
+            for email, user in list(self.auth.users.items()):
+                if user['id'] == user_id:
+                    del self.auth.users[email]
+
+    def sign_out(self, token):
+        self.auth.client._round_trip('auth.admin.sign_out')
+
+class FakeAuth:
+    """
+    Supabase Auth: uživatelé v paměti, přístupové tokeny podepsané HS256
+    stejně jako tokeny projektu (ověří je token_service.verify_token)
+    """
+
+    def __init__(self, client, jwt_secret=None):
+        self.client = client
+        self.jwt_secret = jwt_secret or 'fake-supabase-secret'
+        self.users = {}
+        self.admin = FakeAuthAdmin(self)
+        self._lock = threading.Lock()
+
+    def add_user(self, email, password, user_id=None):
+        """Založení uživatele bez round tripu (příprava dat benchmarku)"""
+        user = {'id': user_id or str(uuid.uuid4()), 'email': email, 'password': password}
+        with self._lock:
+            if email in self.users:
+                raise FakeAPIError('User already registered', code='user_already_exists')
+            self.users[email] = user
+        return user
+
+    def token(self, user_id, lifetime=3600):
+        import jwt
+
+        return jwt.encode(
+            {'sub': user_id, 'aud': 'authenticated', 'role': 'authenticated', 'exp': int(time.time()) + lifetime},
+            self.jwt_secret,
+            algorithm='HS256'
+        )
+
+    def _response(self, user):
+        return SimpleNamespace(
+            user=SimpleNamespace(id=user['id'], email=user['email']),
+            session=SimpleNamespace(access_token=self.token(user['id']), refresh_token=str(uuid.uuid4()))
+        )
+
+    def sign_up(self, credentials):
+        self.client._round_trip('auth.sign_up')
+        return self._response(self.add_user(credentials['email'], credentials['password']))
+
+    def sign_in_with_password(self, credentials):
+        self.client._round_trip('auth.sign_in_with_password')
+        user = self.users.get(credentials['email'])
+        if user is None or user['password'] != credentials['password']:
+            raise FakeAPIError('Invalid login credentials', code='invalid_credentials')
+        return self._response(user)
+
+    def get_user(self, jwt=None):
+        import jwt as pyjwt
+
+        self.client._round_trip('auth.get_user')
+        claims = pyjwt.decode(jwt, self.jwt_secret, algorithms=['HS256'], audience='authenticated')
+        for user in list(self.users.values()):
+            if user['id'] == claims['sub']:
+                return SimpleNamespace(user=SimpleNamespace(id=user['id'], email=user['email']))
+        raise FakeAPIError('User not found', code='user_not_found')
+
+    def set_session(self, access_token, refresh_token):
+        self.client._round_trip('auth.set_session')
+
+def credit_functions():
+    """
+    RPC kreditů (purchase_credits a use_credits z migrací 002, 003, 009 a 015) nad
+    tabulkami náhrady; odečtení i zápis do ledgeru proběhnou pod jedním zámkem
+    """
+
+    def balance_row(client, agent_id):
+        rows = client.tables.setdefault('agent_credits', [])
+        for row in rows:
+            if _text(row['agent_id']) == _text(agent_id):
+                return row
+        return None
+
+    def add_transaction(client, agent_id, amount, transaction_type, description, payment_id, balance):
+        transaction = {
+            'id': str(uuid.uuid4()),
+            'agent_id': agent_id,
+            'amount': amount,
+            'transaction_type': transaction_type,
+            'description': description,
+            'payment_id': payment_id,
+            'balance_after': balance,
+            'created_at': _now(),
+        }
+        client.tables.setdefault('credit_transactions', []).append(transaction)
+        return transaction
+
+    def purchase_credits(client, p_agent_id, p_amount, p_description, p_payment_id, p_idempotency_key=None):
+        with client._lock:
+            if p_idempotency_key is not None:
+                for transaction in client.tables.setdefault('credit_transactions', []):
+                    if _text(transaction['agent_id']) == _text(p_agent_id) and transaction.get('idempotency_key') == p_idempotency_key:
+                        if transaction['amount'] != p_amount:
+                            raise FakeAPIError('Idempotency-Key už byl použit pro nákup jiného počtu kreditů', code='22023')
+                        return {
+                            'transaction_id': transaction['id'],
+                            'amount': transaction['amount'],
+                            'balance': transaction['balance_after'],
+                            'payment_id': transaction['payment_id'],
+                            'replayed': True,
+                        }
+
+            row = balance_row(client, p_agent_id)
+            if row is None:
+                row = {'id': str(uuid.uuid4()), 'agent_id': p_agent_id, 'balance': 0}
+                client.tables['agent_credits'].append(row)
+            row['balance'] += p_amount
+            transaction = add_transaction(client, p_agent_id, p_amount, 'purchase', p_description, p_payment_id, row['balance'])
+            transaction['idempotency_key'] = p_idempotency_key
+            return {
+                'transaction_id': transaction['id'],
+                'amount': p_amount,
+                'balance': row['balance'],
+                'payment_id': p_payment_id,
+                'replayed': False,
+            }
+
+    def use_credits(client, p_agent_id, p_property_id, p_cost):
+        with client._lock:
+            accesses = client.tables.setdefault('contact_access', [])
+            for access in accesses:
+                if _text(access['agent_id']) == _text(p_agent_id) and _text(access['property_id']) == _text(p_property_id):
+                    return {'access_id': access['id'], 'property_id': p_property_id, 'status': 'active', 'granted_at': access['granted_at']}
+
+            row = balance_row(client, p_agent_id)
+            if row is None:
+                raise FakeAPIError('Nemáte žádné kredity', code='P0001')
+            if row['balance'] < p_cost:
+                raise FakeAPIError(
+                    f"Nedostatek kreditů. Potřebujete {p_cost} kreditů, máte {row['balance']} kreditů", code='P0001'
+                )
+
+            row['balance'] -= p_cost
+            transaction = add_transaction(client, p_agent_id, -p_cost, 'usage', 'Odemčení kontaktů', None, row['balance'])
+            access = {
+                'id': str(uuid.uuid4()),
+                'agent_id': p_agent_id,
+                'property_id': p_property_id,
+                'granted_at': _now(),
+                'status': 'active',
+                'credit_transaction_id': transaction['id'],
+            }
+            accesses.append(access)
+            return {'access_id': access['id'], 'property_id': p_property_id, 'status': 'active', 'granted_at': access['granted_at']}
+
+    return {'purchase_credits': purchase_credits, 'use_credits': use_credits}
+
+# Porovnání v podmínkách or_/and_ (sloupec.operátor.hodnota)
+LOGIC_OPERATORS = {
+    'eq': lambda a, b: a == b,
+    'neq': lambda a, b: a != b,
+    'gt': lambda a, b: a > b,
+    'gte': lambda a, b: a >= b,
+    'lt': lambda a, b: a < b,
+    'lte': lambda a, b: a <= b,
+}
+
+def _split_terms(filters):
+    # Čárky na nejvyšší úrovni (mimo závorky a uvozovky)
+    terms, depth, quoted, start = [], 0, False, 0
+    for index, char in enumerate(filters):
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        elif not quoted and depth == 0 and char == ',':
+            terms.append(filters[start:index])
+            start = index + 1
+    terms.append(filters[start:])
+    return [term.strip() for term in terms if term.strip()]
+
+def _logic_filter(kind, filters):
+    conditions = []
+    for term in _split_terms(filters):
+        nested = re.fullmatch(r'(and|or)\((.*)\)', term)
+        if nested:
+            conditions.append(_logic_filter(nested.group(1), nested.group(2)))
+            continue
+        column, operator, value = term.split('.', 2)
+        value = value.strip('"')
+        compare = LOGIC_OPERATORS[operator]
+        conditions.append(
+            lambda row, column=column, compare=compare, value=value:
+                row.get(column) is not None and compare(_text(row.get(column)), value)
+        )
+    combine = any if kind == 'or' else all
+    return lambda row: combine(condition(row) for condition in conditions)
+
+@lru_cache(maxsize=256)
+def _parse_columns(columns):
+    # (prosté sloupce, vnořené selecty) ze selectu; stejné selecty se opakují u každého řádku
+    embeds = tuple(EMBED_PATTERN.findall(columns))
+    plain = tuple(column.strip() for column in EMBED_PATTERN.sub('', columns).split(',') if column.strip())
+    return plain, embeds
+
+def _copy(value):
+    # Kopie jen měnitelných hodnot (JSON sloupce); řetězce a čísla se sdílejí
+    return deepcopy(value) if isinstance(value, (dict, list)) else value
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+def _sort_key(value):
+    # Čísla podle hodnoty, ostatní jako text (ISO data se tak řadí správně)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value, '')
+    return (1, 0, str(value))
+
+def _text(value):
+    return None if value is None else str(value)
@@ -0,0 +1,221 @@
+"""
+Zátěžový test: požadavky za sekundu na synchronní (WSGI) a asynchronní (ASGI) cestě
+
+Proti běžícím serverům:
+    gunicorn -w 1 --threads 8 'src.main:create_app()' -b 127.0.0.1:5000
+    hypercorn -w 1 src.asgi:app -b 127.0.0.1:8000
+    python benchmarks/load_test.py --sync-url http://127.0.0.1:5000 --async-url http://127.0.0.1:8000
+
+Bez běžících serverů (oba režimy se spustí v samostatných procesech proti
+lokální náhradě Supabase s latencí --fake-latency, synchronní cesta je omezená
+na --threads souběžných požadavků jako gthread worker):
+    python benchmarks/load_test.py --fake-latency 0.05 --threads 8 --concurrency 200
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_PATHS = ['/api/properties/properties?limit=20']
+
+def build_properties(count):
+    started = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            'id': str(uuid.uuid4()),
+            'seller_id': str(uuid.uuid4()),
+            'property_type': 'byt',
+            'description': f'Byt číslo {index}',
+            'street': 'Masarykova',
+            'house_number': str(index),
+            'city': 'Brno',
+            'postal_code': '60200',
+            'parcel_number': str(1000 + index),
+            'municipality': 'Brno',
+            'cadastral_area': 'Veveří',
+            'created_at': (started + timedelta(minutes=index)).isoformat(),
+            'updated_at': None,
+            'status': 'active',
+        }
+        for index in range(count)
+    ]
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def serve_sync(port, latency, rows, threads):
+    from flask import Flask
+    from werkzeug.serving import make_server
+    from benchmarks.fake_supabase import FakeSupabase
+    from src import database
+    from src.routes.auth import auth_bp
+    from src.routes.properties import properties_bp
+    from src.routes.credits import credits_bp
+
+    fake = FakeSupabase(latency=latency, tables={'properties': rows})
+    database.get_supabase = lambda: fake
+
+    app = Flask(__name__)
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(properties_bp, url_prefix='/api/properties')
+    app.register_blueprint(credits_bp, url_prefix='/api/credits')
+
+    # Stejně jako gthread worker obslouží najednou nejvýše `threads` požadavků
+    slots = threading.BoundedSemaphore(threads)
+
+    def limited_app(environ, start_response):
+        with slots:
+            return list(app(environ, start_response))
+
+    # Bez řádku v logu za každý požadavek
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    make_server('127.0.0.1', port, limited_app, threaded=True).serve_forever()
+
+def serve_async(port, latency, rows):
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+    from benchmarks.fake_supabase import AsyncFakeSupabase
+    from src.aio import auth_service, credit_service, property_service
+    from src.asgi import app
+
+    fake = AsyncFakeSupabase(latency=latency, tables={'properties': rows})
+    for module in (auth_service, credit_service, property_service):
+        module.get_postgrest = lambda: fake
+
+    # Naslouchající soket předaný přes fd://: hypercorn 0.14 si vlastní vytváří s proto=0
+    # a asyncio pak přijatým spojením nenastaví TCP_NODELAY, takže každá odpověď
+    # na keep-alive spojení čeká ~40 ms na zpožděné ACK klienta
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', port))
+    sock.listen(1024)
+    config = Config()
+    config.bind = [f'fd://{sock.detach()}']
+    config.accesslog = None
+
+    asyncio.run(serve(app, config))
+
+def start_server(target, *args):
+    # Každý server ve vlastním procesu, aby se o GIL nedělil s generátorem zátěže ani s druhým serverem
+    port = free_port()
+    process = multiprocessing.get_context('spawn').Process(target=target, args=(port, *args), daemon=True)
+    process.start()
+    return f'http://127.0.0.1:{port}', process
+
+async def wait_until_ready(base_url):
+    async with httpx.AsyncClient() as client:
+        for _ in range(200):
+            try:
+                await client.get(base_url + DEFAULT_PATHS[0])
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.05)
+    raise Exception(f'Server {base_url} nenaběhl')
+
+async def run_load(base_url, paths, concurrency, duration):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker(index):
+            nonlocal errors
+            request_number = index
+            while time.perf_counter() < deadline:
+                path = paths[request_number % len(paths)]
+                request_number += 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(index) for index in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] if latencies else None,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] if latencies else None,
+        'mean_ms': statistics.mean(latencies) if latencies else None,
+    }
+
+async def main_async(args):
+    targets = {}
+    processes = []
+
+    if args.fake_latency is not None:
+        rows = build_properties(args.rows)
+        targets['sync'], sync_process = start_server(serve_sync, args.fake_latency, rows, args.threads)
+        targets['async'], async_process = start_server(serve_async, args.fake_latency, rows)
+        processes = [sync_process, async_process]
+    else:
+        if args.sync_url:
+            targets['sync'] = args.sync_url.rstrip('/')
+        if args.async_url:
+            targets['async'] = args.async_url.rstrip('/')
+
+    if not targets:
+        raise SystemExit('Zadejte --sync-url/--async-url nebo --fake-latency')
+
+    results = {}
+    try:
+        for mode, base_url in targets.items():
+            await wait_until_ready(base_url)
+            results[mode] = await run_load(base_url, args.path or DEFAULT_PATHS, args.concurrency, args.duration)
+    finally:
+        for process in processes:
+            process.terminate()
+
+    print(f"{'režim':8} {'požadavků':>10} {'chyb':>6} {'req/s':>10} {'p50':>10} {'p95':>10}")
+    for mode, result in results.items():
+        print(
+            f"{mode:8} {result['requests']:10d} {result['errors']:6d} {result['rps']:10.1f} "
+            f"{result['p50_ms'] or 0:8.1f}ms {result['p95_ms'] or 0:8.1f}ms"
+        )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sync-url')
+    parser.add_argument('--async-url')
+    parser.add_argument('--fake-latency', type=float, help='spustit oba režimy lokálně s touto latencí Supabase (s)')
+    parser.add_argument('--threads', type=int, default=8, help='vláken synchronního workeru (jen s --fake-latency)')
+    parser.add_argument('--rows', type=int, default=500, help='počet inzerátů v lokální náhradě')
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=10.0, help='délka měření jednoho režimu (s)')
+    parser.add_argument('--path', action='append', help='cesta k zatížení (lze opakovat)')
+    parser.add_argument('--output', help='uložit výsledky jako JSON')
+    args = parser.parse_args()
+
+    asyncio.run(main_async(args))
+
+if __name__ == '__main__':
+    main()
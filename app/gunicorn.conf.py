@@ -0,0 +1,21 @@
+import os
+
+# Konfigurace gunicornu pro synchronní API, spuštění z adresáře app:
+#   gunicorn -c gunicorn.conf.py 'src.main:create_app()'
+# Aplikace se načte jednou v master procesu (preload_app) a workeři ji
+# zdědí forkem. Supabase klienti, úlohy na pozadí a zahřátí spojení
+# vznikají až ve workeru (init_worker), než začne přijímat požadavky.
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+# Vlákna workeru, typicky stejně jako klientů v poolu (SUPABASE_POOL_SIZE)
+threads = int(os.getenv('GUNICORN_THREADS', os.getenv('SUPABASE_POOL_SIZE', '10')))
+preload_app = True
+
+# create_app() v master procesu úlohy na pozadí nespouští
+os.environ.setdefault('APP_DEFER_WORKER_INIT', '1')
+
+
+def post_worker_init(worker):
+    from src.main import init_worker
+    init_worker()
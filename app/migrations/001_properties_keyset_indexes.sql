@@ -0,0 +1,22 @@
+-- Indexy pro stránkování seznamu nemovitostí podle (created_at, id)
+-- a pro filtry city, municipality, cadastral_area, property_type a status.
+-- Každý filtr má složený index zakončený klíčem stránkování, takže
+-- stránka se čte přímo z indexu bez řazení celé tabulky.
+
+create index if not exists properties_created_at_id_idx
+    on properties (created_at desc, id desc);
+
+create index if not exists properties_city_created_at_id_idx
+    on properties (city, created_at desc, id desc);
+
+create index if not exists properties_municipality_created_at_id_idx
+    on properties (municipality, created_at desc, id desc);
+
+create index if not exists properties_cadastral_area_created_at_id_idx
+    on properties (cadastral_area, created_at desc, id desc);
+
+create index if not exists properties_property_type_created_at_id_idx
+    on properties (property_type, created_at desc, id desc);
+
+create index if not exists properties_status_created_at_id_idx
+    on properties (status, created_at desc, id desc);
@@ -0,0 +1,89 @@
+-- Atomické odemčení kontaktů za kredity v jediném volání (RPC use_credits).
+-- Kontrola přístupu, kontrola zůstatku, zápis transakce, odečtení kreditů
+-- a záznam o přístupu proběhnou v jedné databázové transakci. Zamyká se
+-- pouze řádek agent_credits daného makléře, takže souběžná odemčení
+-- téhož makléře se seřadí a různí makléři se navzájem neblokují.
+
+-- Jeden přístup na makléře a nemovitost (pojistka proti dvojímu odemčení)
+create unique index if not exists contact_access_agent_property_key
+    on contact_access (agent_id, property_id);
+
+create or replace function use_credits(p_agent_id uuid, p_property_id uuid, p_cost integer)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_access_id uuid;
+    v_granted_at timestamptz;
+    v_balance integer;
+    v_transaction_id uuid;
+begin
+    -- Rychlá cesta bez zámku: přístup už existuje
+    select id, granted_at into v_access_id, v_granted_at
+    from contact_access
+    where agent_id = p_agent_id and property_id = p_property_id;
+
+    if found then
+        return jsonb_build_object(
+            'access_id', v_access_id,
+            'property_id', p_property_id,
+            'status', 'active',
+            'granted_at', v_granted_at
+        );
+    end if;
+
+    select balance into v_balance
+    from agent_credits
+    where agent_id = p_agent_id
+    for update;
+
+    if not found then
+        raise exception 'Nemáte žádné kredity';
+    end if;
+
+    -- Souběžný požadavek mohl přístup udělit, zatímco jsme čekali na zámek
+    select id, granted_at into v_access_id, v_granted_at
+    from contact_access
+    where agent_id = p_agent_id and property_id = p_property_id;
+
+    if found then
+        return jsonb_build_object(
+            'access_id', v_access_id,
+            'property_id', p_property_id,
+            'status', 'active',
+            'granted_at', v_granted_at
+        );
+    end if;
+
+    if v_balance < p_cost then
+        raise exception 'Nedostatek kreditů. Potřebujete % kreditů, máte % kreditů', p_cost, v_balance;
+    end if;
+
+    v_granted_at := now();
+
+    insert into credit_transactions (agent_id, amount, transaction_type, description, created_at)
+    values (p_agent_id, -p_cost, 'usage', 'Přístup ke kontaktům nemovitosti ' || p_property_id, v_granted_at)
+    returning id into v_transaction_id;
+
+    update agent_credits
+    set balance = balance - p_cost, updated_at = v_granted_at
+    where agent_id = p_agent_id;
+
+    insert into contact_access (agent_id, property_id, granted_at, status, credit_transaction_id)
+    values (p_agent_id, p_property_id, v_granted_at, 'active', v_transaction_id)
+    returning id into v_access_id;
+
+    return jsonb_build_object(
+        'access_id', v_access_id,
+        'property_id', p_property_id,
+        'status', 'active',
+        'granted_at', v_granted_at,
+        'credits_used', p_cost,
+        'credits_remaining', v_balance - p_cost
+    );
+end;
+$$;
+
+-- Funkce přijímá ID makléře jako parametr, smí ji proto volat jen backend
+revoke execute on function use_credits(uuid, uuid, integer) from public, anon, authenticated;
+grant execute on function use_credits(uuid, uuid, integer) to service_role;
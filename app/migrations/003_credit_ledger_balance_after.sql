@@ -0,0 +1,175 @@
+-- Ledger kreditů s průběžným zůstatkem a atomický nákup kreditů (RPC purchase_credits).
+-- Každý řádek credit_transactions nese balance_after, tedy zůstatek makléře
+-- po dané transakci. Aktuální zůstatek i historie se tak čtou bez SUM přes
+-- celý ledger. Zůstatek v agent_credits se mění jen přírůstkem na místě ve
+-- stejné databázové transakci, ve které se zapisuje řádek ledgeru.
+
+alter table credit_transactions add column if not exists balance_after integer;
+
+-- Doplnění průběžného zůstatku u existujících řádků
+update credit_transactions t
+set balance_after = s.running_balance
+from (
+    select id, sum(amount) over (partition by agent_id order by created_at, id) as running_balance
+    from credit_transactions
+) s
+where t.id = s.id and t.balance_after is null;
+
+create unique index if not exists agent_credits_agent_id_key
+    on agent_credits (agent_id);
+
+create index if not exists credit_transactions_agent_created_at_id_idx
+    on credit_transactions (agent_id, created_at desc, id desc);
+
+create or replace function purchase_credits(p_agent_id uuid, p_amount integer, p_description text, p_payment_id text)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_balance integer;
+    v_transaction_id uuid;
+    v_created_at timestamptz;
+begin
+    if p_amount <= 0 then
+        raise exception 'Počet kreditů musí být kladné číslo';
+    end if;
+
+    -- Přírůstek na místě; řádek zůstane zamčený až do konce transakce
+    insert into agent_credits (agent_id, balance, updated_at)
+    values (p_agent_id, p_amount, now())
+    on conflict (agent_id) do update
+        set balance = agent_credits.balance + excluded.balance,
+            updated_at = excluded.updated_at
+    returning balance into v_balance;
+
+    -- Čas až po získání zámku, aby pořadí v ledgeru odpovídalo pořadí změn zůstatku
+    v_created_at := clock_timestamp();
+
+    insert into credit_transactions (agent_id, amount, transaction_type, description, payment_id, created_at, balance_after)
+    values (p_agent_id, p_amount, 'purchase', p_description, p_payment_id, v_created_at, v_balance)
+    returning id into v_transaction_id;
+
+    return jsonb_build_object(
+        'transaction_id', v_transaction_id,
+        'balance', v_balance,
+        'created_at', v_created_at
+    );
+end;
+$$;
+
+-- use_credits z migrace 002, nově zapisuje i balance_after
+create or replace function use_credits(p_agent_id uuid, p_property_id uuid, p_cost integer)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_access_id uuid;
+    v_granted_at timestamptz;
+    v_balance integer;
+    v_transaction_id uuid;
+begin
+    -- Rychlá cesta bez zámku: přístup už existuje
+    select id, granted_at into v_access_id, v_granted_at
+    from contact_access
+    where agent_id = p_agent_id and property_id = p_property_id;
+
+    if found then
+        return jsonb_build_object(
+            'access_id', v_access_id,
+            'property_id', p_property_id,
+            'status', 'active',
+            'granted_at', v_granted_at
+        );
+    end if;
+
+    select balance into v_balance
+    from agent_credits
+    where agent_id = p_agent_id
+    for update;
+
+    if not found then
+        raise exception 'Nemáte žádné kredity';
+    end if;
+
+    -- Souběžný požadavek mohl přístup udělit, zatímco jsme čekali na zámek
+    select id, granted_at into v_access_id, v_granted_at
+    from contact_access
+    where agent_id = p_agent_id and property_id = p_property_id;
+
+    if found then
+        return jsonb_build_object(
+            'access_id', v_access_id,
+            'property_id', p_property_id,
+            'status', 'active',
+            'granted_at', v_granted_at
+        );
+    end if;
+
+    if v_balance < p_cost then
+        raise exception 'Nedostatek kreditů. Potřebujete % kreditů, máte % kreditů', p_cost, v_balance;
+    end if;
+
+    v_granted_at := clock_timestamp();
+
+    insert into credit_transactions (agent_id, amount, transaction_type, description, created_at, balance_after)
+    values (p_agent_id, -p_cost, 'usage', 'Přístup ke kontaktům nemovitosti ' || p_property_id, v_granted_at, v_balance - p_cost)
+    returning id into v_transaction_id;
+
+    update agent_credits
+    set balance = balance - p_cost, updated_at = v_granted_at
+    where agent_id = p_agent_id;
+
+    insert into contact_access (agent_id, property_id, granted_at, status, credit_transaction_id)
+    values (p_agent_id, p_property_id, v_granted_at, 'active', v_transaction_id)
+    returning id into v_access_id;
+
+    return jsonb_build_object(
+        'access_id', v_access_id,
+        'property_id', p_property_id,
+        'status', 'active',
+        'granted_at', v_granted_at,
+        'credits_used', p_cost,
+        'credits_remaining', v_balance - p_cost
+    );
+end;
+$$;
+
+-- Kontrola agent_credits proti ledgeru jedním množinovým dotazem pro všechny makléře.
+-- Vrací jen makléře, u nichž zůstatek nesouhlasí se součtem ledgeru nebo
+-- s balance_after posledního řádku.
+create or replace function reconcile_agent_credits()
+returns table (
+    agent_id uuid,
+    balance integer,
+    ledger_total bigint,
+    last_balance_after integer,
+    transaction_count bigint
+)
+language sql
+stable
+as $$
+    with ledger as (
+        select
+            t.agent_id,
+            sum(t.amount) as ledger_total,
+            (array_agg(t.balance_after order by t.created_at desc, t.id desc))[1] as last_balance_after,
+            count(*) as transaction_count
+        from credit_transactions t
+        group by t.agent_id
+    )
+    select
+        coalesce(c.agent_id, l.agent_id),
+        c.balance,
+        coalesce(l.ledger_total, 0),
+        l.last_balance_after,
+        coalesce(l.transaction_count, 0)
+    from agent_credits c
+    full outer join ledger l on l.agent_id = c.agent_id
+    where coalesce(c.balance, 0) <> coalesce(l.ledger_total, 0)
+       or (l.agent_id is not null and l.last_balance_after is distinct from c.balance);
+$$;
+
+revoke execute on function purchase_credits(uuid, integer, text, text) from public, anon, authenticated;
+grant execute on function purchase_credits(uuid, integer, text, text) to service_role;
+revoke execute on function reconcile_agent_credits() from public, anon, authenticated;
+grant execute on function reconcile_agent_credits() to service_role;
@@ -0,0 +1,40 @@
+-- Stránkovaná historie transakcí kreditů a souhrny počítané v databázi.
+-- Index (agent_id, created_at desc, id desc) z migrace 003 pokrývá stránkování
+-- bez filtru typu; s filtrem transaction_type se použije index níže.
+
+create index if not exists credit_transactions_agent_type_created_at_id_idx
+    on credit_transactions (agent_id, transaction_type, created_at desc, id desc);
+
+-- Součty transakcí makléře po měsících a typech v zadaném období.
+-- p_from je včetně, p_to je bez (null = bez omezení), p_type null = všechny typy.
+create or replace function credit_transaction_summary(
+    p_agent_id uuid,
+    p_from timestamptz default null,
+    p_to timestamptz default null,
+    p_type text default null
+)
+returns table (
+    month date,
+    transaction_type text,
+    transaction_count bigint,
+    total_amount bigint
+)
+language sql
+stable
+as $$
+    select
+        date_trunc('month', t.created_at)::date as month,
+        t.transaction_type::text,
+        count(*) as transaction_count,
+        sum(t.amount) as total_amount
+    from credit_transactions t
+    where t.agent_id = p_agent_id
+      and (p_from is null or t.created_at >= p_from)
+      and (p_to is null or t.created_at < p_to)
+      and (p_type is null or t.transaction_type::text = p_type)
+    group by 1, 2
+    order by 1 desc, 2;
+$$;
+
+revoke execute on function credit_transaction_summary(uuid, timestamptz, timestamptz, text) from public, anon, authenticated;
+grant execute on function credit_transaction_summary(uuid, timestamptz, timestamptz, text) to service_role;
@@ -0,0 +1,11 @@
+-- Souřadnice inzerátů pro vyhledávání v okolí (GET /api/properties/nearby).
+-- Vyplňuje je backend z PSČ a obce (src/geocoding.py); stávající inzeráty
+-- doplní python -m src.jobs.backfill_coordinates.
+
+alter table properties add column if not exists latitude double precision;
+alter table properties add column if not exists longitude double precision;
+
+-- Náhradní dotaz podle obdélníku, dokud není prostorový index workeru připravený
+create index if not exists properties_coordinates_idx
+    on properties (latitude, longitude)
+    where latitude is not null;
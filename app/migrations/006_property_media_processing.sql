@@ -0,0 +1,31 @@
+-- Média inzerátů nahrávaná po částech (POST /api/seller/properties/:id/media/uploads)
+-- a jejich odvozené verze. Řádek vzniká po přijetí celého souboru se stavem
+-- processing; url, thumbnail_url, web_url a poster_url doplňuje backend postupně.
+
+create table if not exists property_media (
+    id uuid primary key default gen_random_uuid(),
+    property_id uuid not null references properties (id) on delete cascade,
+    media_type text not null check (media_type in ('photo', 'video')),
+    url text,
+    "order" integer not null default 0,
+    created_at timestamptz not null default now()
+);
+
+alter table property_media alter column url drop not null;
+
+alter table property_media add column if not exists file_name text;
+alter table property_media add column if not exists content_type text;
+alter table property_media add column if not exists size_bytes bigint;
+alter table property_media add column if not exists storage_key text;
+alter table property_media add column if not exists thumbnail_url text;
+alter table property_media add column if not exists web_url text;
+alter table property_media add column if not exists poster_url text;
+alter table property_media add column if not exists width integer;
+alter table property_media add column if not exists height integer;
+alter table property_media add column if not exists processing_status text not null default 'ready'
+    check (processing_status in ('processing', 'ready', 'failed'));
+alter table property_media add column if not exists processing_error text;
+
+-- Galerie inzerátu v pořadí a další pořadové číslo při nahrání
+create index if not exists property_media_property_order_idx
+    on property_media (property_id, "order");
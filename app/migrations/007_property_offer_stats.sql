@@ -0,0 +1,196 @@
+-- Souhrn nabídek makléřů pro každý inzerát (GET /api/seller/properties/:id/offers).
+-- Řádek property_offer_stats se přepočítá při každé změně agent_offers, ale jen
+-- pro dotčené inzeráty a z indexu (property_id, ...), takže čtení souhrnu je
+-- jeden řádek bez ohledu na počet nabídek. check_property_offer_stats porovná
+-- uložené souhrny s tabulkou nabídek a nesouhlasící hromadně přepočítá.
+
+create table if not exists property_offer_stats (
+    property_id uuid primary key references properties (id) on delete cascade,
+    offer_count integer not null default 0,
+    pending_count integer not null default 0,
+    approved_count integer not null default 0,
+    rejected_count integer not null default 0,
+    commission_percentage_min double precision,
+    commission_percentage_median double precision,
+    commission_percentage_max double precision,
+    commission_amount_min bigint,
+    commission_amount_median double precision,
+    commission_amount_max bigint,
+    price_estimate_min_min bigint,
+    price_estimate_min_median double precision,
+    price_estimate_min_max bigint,
+    price_estimate_max_min bigint,
+    price_estimate_max_median double precision,
+    price_estimate_max_max bigint,
+    updated_at timestamptz not null default now()
+);
+
+-- Výpis nabídek inzerátu od nejnovějších a přepočet souhrnu jednoho inzerátu
+create index if not exists agent_offers_property_created_at_id_idx
+    on agent_offers (property_id, created_at desc, id desc);
+
+-- Souhrny počítané přímo z agent_offers (null = všechny inzeráty)
+create or replace function compute_property_offer_stats(p_property_ids uuid[] default null)
+returns setof property_offer_stats
+language sql
+stable
+as $$
+    select
+        o.property_id,
+        count(*)::integer,
+        (count(*) filter (where o.status = 'pending'))::integer,
+        (count(*) filter (where o.status = 'approved'))::integer,
+        (count(*) filter (where o.status = 'rejected'))::integer,
+        min(o.commission_percentage)::double precision,
+        percentile_cont(0.5) within group (order by o.commission_percentage),
+        max(o.commission_percentage)::double precision,
+        min(o.commission_amount)::bigint,
+        percentile_cont(0.5) within group (order by o.commission_amount),
+        max(o.commission_amount)::bigint,
+        min(o.price_estimate_min)::bigint,
+        percentile_cont(0.5) within group (order by o.price_estimate_min),
+        max(o.price_estimate_min)::bigint,
+        min(o.price_estimate_max)::bigint,
+        percentile_cont(0.5) within group (order by o.price_estimate_max),
+        max(o.price_estimate_max)::bigint,
+        now()
+    from agent_offers o
+    where p_property_ids is null or o.property_id = any(p_property_ids)
+    group by o.property_id;
+$$;
+
+-- Přepočet souhrnů vybraných inzerátů. Řádky souhrnů se zamknou v pořadí
+-- property_id, takže souběžné změny nabídek téhož inzerátu se seřadí a druhá
+-- transakce počítá až s nabídkami první.
+create or replace function refresh_property_offer_stats(p_property_ids uuid[])
+returns void
+language plpgsql
+as $$
+begin
+    insert into property_offer_stats (property_id)
+    select distinct changed.property_id
+    from unnest(p_property_ids) as changed (property_id)
+    where exists (select 1 from properties p where p.id = changed.property_id)
+    order by 1
+    on conflict (property_id) do nothing;
+
+    perform 1 from property_offer_stats
+    where property_id = any(p_property_ids)
+    order by property_id
+    for update;
+
+    delete from property_offer_stats s
+    where s.property_id = any(p_property_ids)
+      and not exists (select 1 from agent_offers o where o.property_id = s.property_id);
+
+    insert into property_offer_stats
+    select * from compute_property_offer_stats(p_property_ids)
+    on conflict (property_id) do update set
+        offer_count = excluded.offer_count,
+        pending_count = excluded.pending_count,
+        approved_count = excluded.approved_count,
+        rejected_count = excluded.rejected_count,
+        commission_percentage_min = excluded.commission_percentage_min,
+        commission_percentage_median = excluded.commission_percentage_median,
+        commission_percentage_max = excluded.commission_percentage_max,
+        commission_amount_min = excluded.commission_amount_min,
+        commission_amount_median = excluded.commission_amount_median,
+        commission_amount_max = excluded.commission_amount_max,
+        price_estimate_min_min = excluded.price_estimate_min_min,
+        price_estimate_min_median = excluded.price_estimate_min_median,
+        price_estimate_min_max = excluded.price_estimate_min_max,
+        price_estimate_max_min = excluded.price_estimate_max_min,
+        price_estimate_max_median = excluded.price_estimate_max_median,
+        price_estimate_max_max = excluded.price_estimate_max_max,
+        updated_at = excluded.updated_at;
+end;
+$$;
+
+-- Jeden přepočet na příkaz (i u hromadných změn), jen pro dotčené inzeráty
+create or replace function agent_offers_refresh_stats()
+returns trigger
+language plpgsql
+as $$
+declare
+    v_property_ids uuid[];
+begin
+    if tg_op = 'INSERT' then
+        select array_agg(distinct property_id) into v_property_ids from new_offers;
+    elsif tg_op = 'DELETE' then
+        select array_agg(distinct property_id) into v_property_ids from old_offers;
+    else
+        select array_agg(distinct property_id) into v_property_ids
+        from (select property_id from new_offers union select property_id from old_offers) changed;
+    end if;
+
+    if v_property_ids is not null then
+        perform refresh_property_offer_stats(v_property_ids);
+    end if;
+
+    return null;
+end;
+$$;
+
+drop trigger if exists agent_offers_stats_insert on agent_offers;
+create trigger agent_offers_stats_insert
+    after insert on agent_offers
+    referencing new table as new_offers
+    for each statement execute function agent_offers_refresh_stats();
+
+drop trigger if exists agent_offers_stats_update on agent_offers;
+create trigger agent_offers_stats_update
+    after update on agent_offers
+    referencing old table as old_offers new table as new_offers
+    for each statement execute function agent_offers_refresh_stats();
+
+drop trigger if exists agent_offers_stats_delete on agent_offers;
+create trigger agent_offers_stats_delete
+    after delete on agent_offers
+    referencing old table as old_offers
+    for each statement execute function agent_offers_refresh_stats();
+
+-- Kontrola uložených souhrnů proti agent_offers. Vrací nesouhlasící inzeráty;
+-- s p_fix = true je v jednom přepočtu opraví.
+create or replace function check_property_offer_stats(p_fix boolean default false)
+returns table (
+    property_id uuid,
+    stored_offer_count integer,
+    actual_offer_count integer
+)
+language plpgsql
+as $$
+declare
+    v_mismatches jsonb;
+    v_property_ids uuid[];
+begin
+    select coalesce(jsonb_agg(m), '[]'::jsonb) into v_mismatches
+    from (
+        select
+            coalesce(s.property_id, c.property_id) as property_id,
+            s.offer_count as stored_offer_count,
+            c.offer_count as actual_offer_count
+        from property_offer_stats s
+        full outer join compute_property_offer_stats() c on c.property_id = s.property_id
+        where to_jsonb(s) - 'updated_at' is distinct from to_jsonb(c) - 'updated_at'
+    ) m;
+
+    if p_fix then
+        select array_agg((r ->> 'property_id')::uuid) into v_property_ids
+        from jsonb_array_elements(v_mismatches) r;
+
+        if v_property_ids is not null then
+            perform refresh_property_offer_stats(v_property_ids);
+        end if;
+    end if;
+
+    return query
+    select r.property_id, r.stored_offer_count, r.actual_offer_count
+    from jsonb_to_recordset(v_mismatches) as r (property_id uuid, stored_offer_count integer, actual_offer_count integer);
+end;
+$$;
+
+-- Naplnění souhrnů pro nabídky vytvořené před touto migrací
+select refresh_property_offer_stats(array(select distinct property_id from agent_offers));
+
+revoke execute on function check_property_offer_stats(boolean) from public, anon, authenticated;
+grant execute on function check_property_offer_stats(boolean) to service_role;
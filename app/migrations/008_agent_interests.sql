@@ -0,0 +1,16 @@
+-- Zájmy makléřů pro notifikace o nových inzerátech (GET/PUT /api/agent/interests).
+-- Zájem je dvojice město a typ nemovitosti; null znamená libovolnou hodnotu.
+-- Worker si zájmy drží v paměti seskupené podle této dvojice (src/notifications.py),
+-- takže nový inzerát se porovná jen s několika skupinami, ne se všemi makléři.
+
+create table if not exists agent_interests (
+    id uuid primary key default gen_random_uuid(),
+    agent_id uuid not null references users (id) on delete cascade,
+    city text,
+    property_type text,
+    created_at timestamptz not null default now(),
+    constraint agent_interests_unique unique nulls not distinct (agent_id, city, property_type)
+);
+
+-- Postupné čtení všech zájmů při sestavení indexu (keyset podle created_at, id)
+create index if not exists agent_interests_keyset_idx on agent_interests (created_at desc, id desc);
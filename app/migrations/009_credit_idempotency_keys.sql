@@ -0,0 +1,104 @@
+-- Idempotentní nákup kreditů (hlavička Idempotency-Key u POST /api/credits/purchase).
+-- Odpovědi na opakované požadavky vrací už backend z cache (src/idempotency.py);
+-- unikátní klíč v ledgeru je pojistka pro případ, kdy opakování dorazí na jiný
+-- worker nebo po vypršení cache. Odemčení kontaktů (use_credits) má stejnou
+-- pojistku v unikátním indexu contact_access (agent_id, property_id) z migrace 002.
+
+alter table credit_transactions add column if not exists idempotency_key text;
+
+create unique index if not exists credit_transactions_idempotency_key
+    on credit_transactions (agent_id, idempotency_key)
+    where idempotency_key is not null;
+
+-- Nová signatura s klíčem; starou je potřeba odstranit, jinak by PostgREST
+-- nevěděl, kterou z přetížených funkcí volat
+drop function if exists purchase_credits(uuid, integer, text, text);
+
+create or replace function purchase_credits(
+    p_agent_id uuid,
+    p_amount integer,
+    p_description text,
+    p_payment_id text,
+    p_idempotency_key text default null
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_balance integer;
+    v_transaction credit_transactions%rowtype;
+    v_created_at timestamptz;
+begin
+    if p_amount <= 0 then
+        raise exception 'Počet kreditů musí být kladné číslo';
+    end if;
+
+    -- Rychlá cesta bez zámku: nákup s tímto klíčem už proběhl
+    if p_idempotency_key is not null then
+        select * into v_transaction
+        from credit_transactions
+        where agent_id = p_agent_id and idempotency_key = p_idempotency_key;
+
+        if found then
+            return jsonb_build_object(
+                'transaction_id', v_transaction.id,
+                'balance', v_transaction.balance_after,
+                'created_at', v_transaction.created_at,
+                'payment_id', v_transaction.payment_id,
+                'replayed', true
+            );
+        end if;
+    end if;
+
+    insert into agent_credits (agent_id, balance, updated_at)
+    values (p_agent_id, 0, now())
+    on conflict (agent_id) do nothing;
+
+    select balance into v_balance
+    from agent_credits
+    where agent_id = p_agent_id
+    for update;
+
+    -- Souběžný nákup se stejným klíčem mohl proběhnout, zatímco jsme čekali na zámek
+    if p_idempotency_key is not null then
+        select * into v_transaction
+        from credit_transactions
+        where agent_id = p_agent_id and idempotency_key = p_idempotency_key;
+
+        if found then
+            return jsonb_build_object(
+                'transaction_id', v_transaction.id,
+                'balance', v_transaction.balance_after,
+                'created_at', v_transaction.created_at,
+                'payment_id', v_transaction.payment_id,
+                'replayed', true
+            );
+        end if;
+    end if;
+
+    v_balance := v_balance + p_amount;
+    -- Čas až po získání zámku, aby pořadí v ledgeru odpovídalo pořadí změn zůstatku
+    v_created_at := clock_timestamp();
+
+    update agent_credits
+    set balance = v_balance, updated_at = v_created_at
+    where agent_id = p_agent_id;
+
+    insert into credit_transactions (
+        agent_id, amount, transaction_type, description, payment_id, created_at, balance_after, idempotency_key
+    )
+    values (p_agent_id, p_amount, 'purchase', p_description, p_payment_id, v_created_at, v_balance, p_idempotency_key)
+    returning * into v_transaction;
+
+    return jsonb_build_object(
+        'transaction_id', v_transaction.id,
+        'balance', v_balance,
+        'created_at', v_created_at,
+        'payment_id', p_payment_id,
+        'replayed', false
+    );
+end;
+$$;
+
+revoke execute on function purchase_credits(uuid, integer, text, text, text) from public, anon, authenticated;
+grant execute on function purchase_credits(uuid, integer, text, text, text) to service_role;
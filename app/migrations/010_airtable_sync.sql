@@ -0,0 +1,38 @@
+-- Průběžná synchronizace do Airtable pro reporting (python -m src.jobs.airtable_sync).
+-- Job čte jen řádky změněné od posledního běhu: každá tabulka má watermark,
+-- pozici (sloupec změny, id) posledního odeslaného řádku, a čte se od ní
+-- vzestupně po stránkách. credit_transactions se jen přidávají (created_at),
+-- users se mění (updated_at, nastavuje ho trigger).
+
+alter table users add column if not exists updated_at timestamptz;
+update users set updated_at = coalesce(last_login, created_at, now()) where updated_at is null;
+alter table users alter column updated_at set default now();
+alter table users alter column updated_at set not null;
+
+create or replace function set_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists users_set_updated_at on users;
+create trigger users_set_updated_at
+    before update on users
+    for each row execute function set_updated_at();
+
+-- Čtení změn od watermarku (keyset vzestupně podle sloupce změny a id)
+create index if not exists users_updated_at_id_idx on users (updated_at, id);
+create index if not exists credit_transactions_created_at_id_idx on credit_transactions (created_at, id);
+
+-- Watermark každé synchronizované tabulky
+create table if not exists airtable_sync_state (
+    table_name text primary key,
+    watermark timestamptz,
+    last_id uuid,
+    rows_synced bigint not null default 0,
+    updated_at timestamptz not null default now()
+);
@@ -0,0 +1,236 @@
+-- Denní souhrny pro statistiky administrátorů (GET /api/stats).
+-- Souhrny kreditů (makléř, typ transakce), odemčení kontaktů (makléř, město,
+-- typ nemovitosti) a nových inzerátů (město, katastrální území, typ nemovitosti)
+-- po dnech v pražském čase. Doplňuje je refresh_daily_rollups (python -m
+-- src.jobs.refresh_rollups, spouštět např. každých 5 minut): pro každý zdroj
+-- si pamatuje pozici (čas, id) posledního započteného řádku a přičte jen
+-- řádky za ní. Dotazy na období sčítají denní souhrny, zdrojové tabulky nečtou.
+
+alter table users add column if not exists is_admin boolean not null default false;
+
+create table if not exists daily_credit_stats (
+    day date not null,
+    agent_id uuid not null,
+    transaction_type text not null,
+    transaction_count bigint not null default 0,
+    total_amount bigint not null default 0,
+    primary key (day, agent_id, transaction_type)
+);
+
+create table if not exists daily_unlock_stats (
+    day date not null,
+    agent_id uuid not null,
+    city text not null default '',
+    property_type text not null default '',
+    unlock_count bigint not null default 0,
+    primary key (day, agent_id, city, property_type)
+);
+
+create table if not exists daily_listing_stats (
+    day date not null,
+    city text not null default '',
+    cadastral_area text not null default '',
+    property_type text not null default '',
+    listing_count bigint not null default 0,
+    primary key (day, city, cadastral_area, property_type)
+);
+
+-- Pozice posledního započteného řádku každého zdroje
+create table if not exists rollup_state (
+    source text primary key,
+    watermark timestamptz not null default '-infinity',
+    last_id uuid not null default '00000000-0000-0000-0000-000000000000',
+    rows_processed bigint not null default 0,
+    updated_at timestamptz not null default now()
+);
+
+insert into rollup_state (source)
+values ('credit_transactions'), ('contact_access'), ('properties')
+on conflict (source) do nothing;
+
+-- Čtení řádků za pozicí (credit_transactions (created_at, id) je z migrace 010,
+-- properties (created_at desc, id desc) z migrace 001)
+create index if not exists contact_access_granted_at_id_idx on contact_access (granted_at, id);
+
+-- Započtení nových řádků do denních souhrnů. Čtou se jen řádky starší než
+-- p_lag_seconds: řádek zapsaný právě teď může mít čas menší než řádek, který
+-- už byl započten, a za pozicí by se neobjevil. Řádek rollup_state se zamkne,
+-- takže souběžné běhy se seřadí a žádný řádek se nezapočte dvakrát. Pozdější
+-- změny města nebo typu inzerátu souhrny nepřepočítávají.
+create or replace function refresh_daily_rollups(p_lag_seconds integer default 30)
+returns table (source text, rows_processed bigint)
+language plpgsql
+as $$
+declare
+    v_until timestamptz := now() - make_interval(secs => p_lag_seconds);
+    v_state rollup_state;
+    v_watermark timestamptz;
+    v_last_id uuid;
+    v_count bigint;
+begin
+    -- Kredity
+    select * into v_state from rollup_state s where s.source = 'credit_transactions' for update;
+
+    with batch as (
+        select t.* from credit_transactions t
+        where (t.created_at, t.id) > (v_state.watermark, v_state.last_id)
+          and t.created_at < v_until
+    ), merged as (
+        insert into daily_credit_stats (day, agent_id, transaction_type, transaction_count, total_amount)
+        select (b.created_at at time zone 'Europe/Prague')::date, b.agent_id, b.transaction_type::text, count(*), sum(b.amount)
+        from batch b
+        group by 1, 2, 3
+        on conflict (day, agent_id, transaction_type) do update set
+            transaction_count = daily_credit_stats.transaction_count + excluded.transaction_count,
+            total_amount = daily_credit_stats.total_amount + excluded.total_amount
+    )
+    select b.created_at, b.id, count(*) over ()
+    into v_watermark, v_last_id, v_count
+    from batch b
+    order by b.created_at desc, b.id desc
+    limit 1;
+
+    if v_count is not null then
+        update rollup_state s set
+            watermark = v_watermark,
+            last_id = v_last_id,
+            rows_processed = s.rows_processed + v_count,
+            updated_at = now()
+        where s.source = 'credit_transactions';
+    end if;
+    source := 'credit_transactions';
+    rows_processed := coalesce(v_count, 0);
+    return next;
+
+    -- Odemčení kontaktů (město a typ podle inzerátu v době započtení)
+    v_count := null;
+    select * into v_state from rollup_state s where s.source = 'contact_access' for update;
+
+    with batch as (
+        select a.id, a.agent_id, a.granted_at, p.city, p.property_type
+        from contact_access a
+        left join properties p on p.id = a.property_id
+        where (a.granted_at, a.id) > (v_state.watermark, v_state.last_id)
+          and a.granted_at < v_until
+    ), merged as (
+        insert into daily_unlock_stats (day, agent_id, city, property_type, unlock_count)
+        select (b.granted_at at time zone 'Europe/Prague')::date, b.agent_id,
+               coalesce(b.city, ''), coalesce(b.property_type::text, ''), count(*)
+        from batch b
+        group by 1, 2, 3, 4
+        on conflict (day, agent_id, city, property_type) do update set
+            unlock_count = daily_unlock_stats.unlock_count + excluded.unlock_count
+    )
+    select b.granted_at, b.id, count(*) over ()
+    into v_watermark, v_last_id, v_count
+    from batch b
+    order by b.granted_at desc, b.id desc
+    limit 1;
+
+    if v_count is not null then
+        update rollup_state s set
+            watermark = v_watermark,
+            last_id = v_last_id,
+            rows_processed = s.rows_processed + v_count,
+            updated_at = now()
+        where s.source = 'contact_access';
+    end if;
+    source := 'contact_access';
+    rows_processed := coalesce(v_count, 0);
+    return next;
+
+    -- Nové inzeráty
+    v_count := null;
+    select * into v_state from rollup_state s where s.source = 'properties' for update;
+
+    with batch as (
+        select p.id, p.created_at, p.city, p.cadastral_area, p.property_type
+        from properties p
+        where (p.created_at, p.id) > (v_state.watermark, v_state.last_id)
+          and p.created_at < v_until
+    ), merged as (
+        insert into daily_listing_stats (day, city, cadastral_area, property_type, listing_count)
+        select (b.created_at at time zone 'Europe/Prague')::date, coalesce(b.city, ''),
+               coalesce(b.cadastral_area, ''), coalesce(b.property_type::text, ''), count(*)
+        from batch b
+        group by 1, 2, 3, 4
+        on conflict (day, city, cadastral_area, property_type) do update set
+            listing_count = daily_listing_stats.listing_count + excluded.listing_count
+    )
+    select b.created_at, b.id, count(*) over ()
+    into v_watermark, v_last_id, v_count
+    from batch b
+    order by b.created_at desc, b.id desc
+    limit 1;
+
+    if v_count is not null then
+        update rollup_state s set
+            watermark = v_watermark,
+            last_id = v_last_id,
+            rows_processed = s.rows_processed + v_count,
+            updated_at = now()
+        where s.source = 'properties';
+    end if;
+    source := 'properties';
+    rows_processed := coalesce(v_count, 0);
+    return next;
+end;
+$$;
+
+-- Součty denních souhrnů za období p_from až p_to (oba dny včetně) seskupené
+-- podle vybraných sloupců. p_rollup je credits, unlocks nebo listings; řádky
+-- vrací jako jsonb {sloupce seskupení..., součty...}, seřazené podle seskupení.
+create or replace function rollup_stats(p_rollup text, p_from date, p_to date, p_group_by text[] default '{}')
+returns setof jsonb
+language plpgsql
+stable
+as $$
+declare
+    v_table text;
+    v_dimensions text[];
+    v_measures text[];
+    v_group text;
+    v_sums text;
+begin
+    case p_rollup
+        when 'credits' then
+            v_table := 'daily_credit_stats';
+            v_dimensions := array['day', 'agent_id', 'transaction_type'];
+            v_measures := array['transaction_count', 'total_amount'];
+        when 'unlocks' then
+            v_table := 'daily_unlock_stats';
+            v_dimensions := array['day', 'agent_id', 'city', 'property_type'];
+            v_measures := array['unlock_count'];
+        when 'listings' then
+            v_table := 'daily_listing_stats';
+            v_dimensions := array['day', 'city', 'cadastral_area', 'property_type'];
+            v_measures := array['listing_count'];
+        else
+            raise exception 'Neznámý souhrn %', p_rollup using errcode = '22023';
+    end case;
+
+    if not coalesce(p_group_by, '{}') <@ v_dimensions then
+        raise exception 'Souhrn % nelze seskupit podle %', p_rollup, p_group_by using errcode = '22023';
+    end if;
+
+    select string_agg(format('coalesce(sum(%1$I), 0)::bigint as %1$I', m), ', ') into v_sums from unnest(v_measures) m;
+    select string_agg(format('%I', g), ', ') into v_group from unnest(p_group_by) g;
+
+    if v_group is null then
+        return query execute format(
+            'select to_jsonb(s) from (select %s from %I where day between $1 and $2) s',
+            v_sums, v_table
+        ) using p_from, p_to;
+    else
+        return query execute format(
+            'select to_jsonb(s) from (select %1$s, %2$s from %3$I where day between $1 and $2 group by %1$s order by %1$s) s',
+            v_group, v_sums, v_table
+        ) using p_from, p_to;
+    end if;
+end;
+$$;
+
+revoke execute on function refresh_daily_rollups(integer) from public, anon, authenticated;
+grant execute on function refresh_daily_rollups(integer) to service_role;
+revoke execute on function rollup_stats(text, date, date, text[]) from public, anon, authenticated;
+grant execute on function rollup_stats(text, date, date, text[]) to service_role;
@@ -0,0 +1,16 @@
+-- Průběžná aktualizace paměťových indexů inzerátů (src/services/property_service.py).
+-- Workery čtou inzeráty změněné od posledního čtení podle updated_at, proto
+-- ho musí mít každý řádek a nastavovat ho musí databáze při každé změně,
+-- i mimo aplikaci (trigger set_updated_at z migrace 010).
+
+update properties set updated_at = created_at where updated_at is null;
+alter table properties alter column updated_at set default now();
+alter table properties alter column updated_at set not null;
+
+drop trigger if exists properties_set_updated_at on properties;
+create trigger properties_set_updated_at
+    before update on properties
+    for each row execute function set_updated_at();
+
+-- Čtení změn od pozice (keyset vzestupně podle updated_at a id)
+create index if not exists properties_updated_at_id_idx on properties (updated_at, id);
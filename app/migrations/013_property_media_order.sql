@@ -0,0 +1,11 @@
+-- Pořadí média v galerii inzerátu přiděluje databáze ze sekvence. Dřív ho
+-- backend počítal jako největší pořadí + 1 a dvě souběžně dokončená nahrávání
+-- ke stejnému inzerátu dostala stejné číslo. Čísla jsou společná pro všechny
+-- inzeráty, v galerii jednoho inzerátu tak jen rostou (mezery nevadí).
+
+create sequence if not exists property_media_order_seq owned by property_media."order";
+
+-- Nová média za všechna stávající
+select setval('property_media_order_seq', coalesce((select max("order") from property_media), 0) + 1, false);
+
+alter table property_media alter column "order" set default nextval('property_media_order_seq');
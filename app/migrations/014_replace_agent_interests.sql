@@ -0,0 +1,46 @@
+-- Nahrazení zájmů makléře v jedné transakci (PUT /api/agent/interests).
+-- Dřív backend zájmy smazal a nové vložil dvěma voláními; když vložení selhalo,
+-- makléř zůstal bez zájmů a přestal dostávat notifikace. Zájmy, které zůstávají,
+-- si ponechají id i created_at; smažou se jen vypuštěné a vloží jen nové.
+
+create or replace function replace_agent_interests(p_agent_id uuid, p_interests jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_removed jsonb;
+    v_interests jsonb;
+begin
+    -- Souběžná nahrazení zájmů jednoho makléře se seřadí na zámku jeho řádku
+    perform 1 from users u where u.id = p_agent_id for update;
+
+    with wanted as (
+        select i->>'city' as city, i->>'property_type' as property_type
+        from jsonb_array_elements(coalesce(p_interests, '[]'::jsonb)) i
+    ), removed as (
+        delete from agent_interests a
+        where a.agent_id = p_agent_id
+          and not exists (
+              select 1 from wanted w
+              where w.city is not distinct from a.city
+                and w.property_type is not distinct from a.property_type
+          )
+        returning a.id
+    )
+    select coalesce(jsonb_agg(r.id), '[]'::jsonb) into v_removed from removed r;
+
+    insert into agent_interests (agent_id, city, property_type)
+    select p_agent_id, i->>'city', i->>'property_type'
+    from jsonb_array_elements(coalesce(p_interests, '[]'::jsonb)) i
+    on conflict on constraint agent_interests_unique do nothing;
+
+    select coalesce(jsonb_agg(to_jsonb(a) order by a.created_at, a.id), '[]'::jsonb) into v_interests
+    from agent_interests a
+    where a.agent_id = p_agent_id;
+
+    return jsonb_build_object('removed', v_removed, 'interests', v_interests);
+end;
+$$;
+
+revoke execute on function replace_agent_interests(uuid, jsonb) from public, anon, authenticated;
+grant execute on function replace_agent_interests(uuid, jsonb) to service_role;
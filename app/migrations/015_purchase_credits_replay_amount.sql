@@ -0,0 +1,106 @@
+-- Opakovaný nákup se stejným Idempotency-Key vracel uloženou transakci bez
+-- ohledu na počet kreditů v požadavku. Klíč použitý pro jiný počet kreditů je
+-- chyba klienta (errcode 22023 backend vrací jako 422) a odpověď nese počet
+-- kreditů z uložené transakce, ne z požadavku.
+
+create or replace function purchase_credits(
+    p_agent_id uuid,
+    p_amount integer,
+    p_description text,
+    p_payment_id text,
+    p_idempotency_key text default null
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_balance integer;
+    v_transaction credit_transactions%rowtype;
+    v_created_at timestamptz;
+begin
+    if p_amount <= 0 then
+        raise exception 'Počet kreditů musí být kladné číslo';
+    end if;
+
+    -- Rychlá cesta bez zámku: nákup s tímto klíčem už proběhl
+    if p_idempotency_key is not null then
+        select * into v_transaction
+        from credit_transactions
+        where agent_id = p_agent_id and idempotency_key = p_idempotency_key;
+
+        if found then
+            if v_transaction.amount <> p_amount then
+                raise exception 'Idempotency-Key už byl použit pro nákup jiného počtu kreditů'
+                    using errcode = '22023';
+            end if;
+
+            return jsonb_build_object(
+                'transaction_id', v_transaction.id,
+                'amount', v_transaction.amount,
+                'balance', v_transaction.balance_after,
+                'created_at', v_transaction.created_at,
+                'payment_id', v_transaction.payment_id,
+                'replayed', true
+            );
+        end if;
+    end if;
+
+    insert into agent_credits (agent_id, balance, updated_at)
+    values (p_agent_id, 0, now())
+    on conflict (agent_id) do nothing;
+
+    select balance into v_balance
+    from agent_credits
+    where agent_id = p_agent_id
+    for update;
+
+    -- Souběžný nákup se stejným klíčem mohl proběhnout, zatímco jsme čekali na zámek
+    if p_idempotency_key is not null then
+        select * into v_transaction
+        from credit_transactions
+        where agent_id = p_agent_id and idempotency_key = p_idempotency_key;
+
+        if found then
+            if v_transaction.amount <> p_amount then
+                raise exception 'Idempotency-Key už byl použit pro nákup jiného počtu kreditů'
+                    using errcode = '22023';
+            end if;
+
+            return jsonb_build_object(
+                'transaction_id', v_transaction.id,
+                'amount', v_transaction.amount,
+                'balance', v_transaction.balance_after,
+                'created_at', v_transaction.created_at,
+                'payment_id', v_transaction.payment_id,
+                'replayed', true
+            );
+        end if;
+    end if;
+
+    v_balance := v_balance + p_amount;
+    -- Čas až po získání zámku, aby pořadí v ledgeru odpovídalo pořadí změn zůstatku
+    v_created_at := clock_timestamp();
+
+    update agent_credits
+    set balance = v_balance, updated_at = v_created_at
+    where agent_id = p_agent_id;
+
+    insert into credit_transactions (
+        agent_id, amount, transaction_type, description, payment_id, created_at, balance_after, idempotency_key
+    )
+    values (p_agent_id, p_amount, 'purchase', p_description, p_payment_id, v_created_at, v_balance, p_idempotency_key)
+    returning * into v_transaction;
+
+    return jsonb_build_object(
+        'transaction_id', v_transaction.id,
+        'amount', v_transaction.amount,
+        'balance', v_balance,
+        'created_at', v_created_at,
+        'payment_id', p_payment_id,
+        'replayed', false
+    );
+end;
+$$;
+
+revoke execute on function purchase_credits(uuid, integer, text, text, text) from public, anon, authenticated;
+grant execute on function purchase_credits(uuid, integer, text, text, text) to service_role;
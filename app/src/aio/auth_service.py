@@ -0,0 +1,336 @@
+from typing import Tuple, Dict, Optional, Any
+import asyncio
+from postgrest.exceptions import APIError
+from src.aio.database import get_postgrest, auth_client
+from src.services.auth_service import CURRENT_USER_SELECT, first_embedded
+from src.services.token_service import (
+    verify_token, get_cached_user_profile, cache_user_profile, invalidate_user_profile, user_profile_read_started
+)
+
+# Asynchronní varianta src/services/auth_service.py pro ASGI režim (src/asgi.py)
+
+_embedded_select_supported = True
+
+async def get_user_profile(user_id: str) -> Dict[str, Any]:
+    """
+    Získání záznamu uživatele z tabulky users (s využitím sdílené cache)
+
+    Args:
+        user_id: ID uživatele
+
+    Returns:
+        Dict obsahující záznam uživatele
+
+    Raises:
+        Exception: Pokud uživatelský profil neexistuje
+    """
+    user_data = get_cached_user_profile(user_id)
+    if user_data is not None:
+        return user_data
+
+    started = user_profile_read_started()
+    user_response = await get_postgrest().from_("users").select("*").eq("id", user_id).execute()
+
+    if not user_response.data:
+        raise Exception("Uživatelský profil nebyl nalezen")
+
+    cache_user_profile(user_response.data[0], started)
+    return dict(user_response.data[0])
+
+async def get_user_from_token(token: str) -> Dict[str, Any]:
+    """Záznam uživatele podle přístupového tokenu (token se ověřuje lokálně)"""
+    claims = verify_token(token)
+    return await get_user_profile(claims["sub"])
+
+async def _create_user_records(user_id: str, user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Záznam v tabulce users a profil podle typu uživatele"""
+    postgrest = get_postgrest()
+    user_type = user_data["user_type"]
+
+    user_response = await postgrest.from_("users").insert(user_data).execute()
+
+    if user_type == "seller":
+        await postgrest.from_("seller_profiles").insert({
+            "user_id": user_id
+        }).execute()
+    elif user_type == "agent":
+        # Pro makléře vytvoříme profil a inicializujeme kredity (nezávislé zápisy běží souběžně)
+        await asyncio.gather(
+            postgrest.from_("agent_profiles").insert({
+                "user_id": user_id,
+                "average_rating": 0,
+                "successful_transactions": 0
+            }).execute(),
+            postgrest.from_("agent_credits").insert({
+                "agent_id": user_id,
+                "balance": 0
+            }).execute()
+        )
+
+    return user_response.data[0]
+
+async def register_user(email: str, password: str, user_type: str, full_name: str, phone: str = "") -> Dict[str, Any]:
+    """
+    Registrace nového uživatele
+
+    Args:
+        email: Email uživatele
+        password: Heslo uživatele
+        user_type: Typ uživatele (seller/agent)
+        full_name: Jméno a příjmení
+        phone: Telefonní číslo (volitelné)
+
+    Returns:
+        Dict obsahující informace o uživateli
+
+    Raises:
+        Exception: Pokud registrace selže
+    """
+    auth = auth_client()
+
+    try:
+        auth_response = await auth.sign_up({
+            "email": email,
+            "password": password
+        })
+
+        user_id = auth_response.user.id
+
+        await _create_user_records(user_id, {
+            "id": user_id,
+            "email": email,
+            "user_type": user_type,
+            "full_name": full_name,
+            "phone": phone,
+            "status": "active",
+            "auth_provider": "email"
+        })
+
+        return {
+            "id": user_id,
+            "email": email,
+            "user_type": user_type,
+            "full_name": full_name
+        }
+
+    except Exception as e:
+        # Pokud dojde k chybě, pokusíme se vyčistit případně vytvořené záznamy
+        if 'user_id' in locals():
+            try:
+                await auth.admin.delete_user(user_id)
+            except:
+                pass
+        raise Exception(f"Registrace selhala: {str(e)}")
+
+async def login_user(email: str, password: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Přihlášení uživatele pomocí emailu a hesla
+
+    Args:
+        email: Email uživatele
+        password: Heslo uživatele
+
+    Returns:
+        Tuple obsahující informace o uživateli a přístupový token
+
+    Raises:
+        Exception: Pokud přihlášení selže
+    """
+    try:
+        auth_response = await auth_client().sign_in_with_password({
+            "email": email,
+            "password": password
+        })
+
+        user_id = auth_response.user.id
+        token = auth_response.session.access_token
+
+        started = user_profile_read_started()
+        user_response = await get_postgrest().from_("users").select("*").eq("id", user_id).execute()
+
+        if not user_response.data:
+            raise Exception("Uživatelský profil nebyl nalezen")
+
+        cache_user_profile(user_response.data[0], started)
+        return user_response.data[0], token
+
+    except Exception as e:
+        raise Exception(f"Přihlášení selhalo: {str(e)}")
+
+async def login_with_google(google_token: str, user_type: Optional[str] = None) -> Tuple[Dict[str, Any], str, bool]:
+    """
+    Přihlášení nebo registrace uživatele pomocí Google
+
+    Args:
+        google_token: ID token z Google přihlášení
+        user_type: Typ uživatele (seller/agent) - pouze při první registraci
+
+    Returns:
+        Tuple obsahující informace o uživateli, přístupový token a příznak, zda jde o nového uživatele
+
+    Raises:
+        Exception: Pokud přihlášení selže
+    """
+    try:
+        auth_response = await auth_client().sign_in_with_id_token({
+            "provider": "google",
+            "token": google_token
+        })
+
+        user_id = auth_response.user.id
+        token = auth_response.session.access_token
+        is_new_user = auth_response.user.app_metadata.get("provider") == "google" and auth_response.user.created_at == auth_response.user.updated_at
+
+        if is_new_user:
+            if not user_type:
+                raise Exception("Pro nového uživatele je nutné specifikovat typ uživatele")
+
+            if user_type not in ["seller", "agent"]:
+                raise Exception("Neplatný typ uživatele. Povolené hodnoty: seller, agent")
+
+            user_data = await _create_user_records(user_id, {
+                "id": user_id,
+                "email": auth_response.user.email,
+                "user_type": user_type,
+                "full_name": auth_response.user.user_metadata.get("full_name", ""),
+                "status": "active",
+                "auth_provider": "google"
+            })
+        else:
+            user_data = await get_user_profile(user_id)
+
+        return user_data, token, is_new_user
+
+    except Exception as e:
+        raise Exception(f"Přihlášení přes Google selhalo: {str(e)}")
+
+async def logout_user(token: str) -> None:
+    """
+    Odhlášení uživatele
+
+    Args:
+        token: Přístupový token uživatele
+
+    Raises:
+        Exception: Pokud odhlášení selže
+    """
+    if not token:
+        return
+
+    try:
+        await auth_client().admin.sign_out(token)
+    except Exception as e:
+        raise Exception(f"Odhlášení selhalo: {str(e)}")
+
+async def _get_current_user_embedded(user_id: str) -> Dict[str, Any]:
+    started = user_profile_read_started()
+    user_response = await get_postgrest().from_("users").select(CURRENT_USER_SELECT).eq("id", user_id).execute()
+
+    if not user_response.data:
+        raise Exception("Uživatelský profil nebyl nalezen")
+
+    user_data = user_response.data[0]
+    seller_profile = first_embedded(user_data.pop("seller_profiles", None))
+    agent_profile = first_embedded(user_data.pop("agent_profiles", None))
+    agent_credits = first_embedded(user_data.pop("agent_credits", None))
+
+    cache_user_profile(user_data, started)
+    user_data = dict(user_data)
+
+    if user_data["user_type"] == "seller":
+        if seller_profile:
+            user_data["profile"] = seller_profile
+    elif user_data["user_type"] == "agent":
+        if agent_profile:
+            user_data["profile"] = agent_profile
+        if agent_credits:
+            user_data["credits"] = agent_credits
+
+    return user_data
+
+async def _get_current_user_parallel(user_id: str) -> Dict[str, Any]:
+    postgrest = get_postgrest()
+    user_data = await get_user_profile(user_id)
+
+    if user_data["user_type"] == "seller":
+        profile_response = await postgrest.from_("seller_profiles").select("*").eq("user_id", user_id).execute()
+        credits_response = None
+    elif user_data["user_type"] == "agent":
+        profile_response, credits_response = await asyncio.gather(
+            postgrest.from_("agent_profiles").select("*").eq("user_id", user_id).execute(),
+            postgrest.from_("agent_credits").select("*").eq("agent_id", user_id).execute()
+        )
+    else:
+        return user_data
+
+    if profile_response.data:
+        user_data["profile"] = profile_response.data[0]
+    if credits_response is not None and credits_response.data:
+        user_data["credits"] = credits_response.data[0]
+
+    return user_data
+
+async def get_current_user(token: str) -> Dict[str, Any]:
+    """
+    Získání informací o přihlášeném uživateli
+
+    Args:
+        token: Přístupový token uživatele
+
+    Returns:
+        Dict obsahující informace o uživateli
+
+    Raises:
+        Exception: Pokud získání informací selže
+    """
+    global _embedded_select_supported
+
+    try:
+        user_id = verify_token(token)["sub"]
+
+        if _embedded_select_supported:
+            try:
+                return await _get_current_user_embedded(user_id)
+            except APIError as e:
+                if e.code != "PGRST200":
+                    raise
+                _embedded_select_supported = False
+
+        return await _get_current_user_parallel(user_id)
+
+    except Exception as e:
+        raise Exception(f"Získání informací o uživateli selhalo: {str(e)}")
+
+async def update_current_user(token: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aktualizace základních údajů přihlášeného uživatele
+
+    Args:
+        token: Přístupový token uživatele
+        data: Dict s měněnými údaji (full_name, phone)
+
+    Returns:
+        Dict obsahující aktualizovaný záznam uživatele
+
+    Raises:
+        Exception: Pokud aktualizace selže
+    """
+    try:
+        user_id = verify_token(token)["sub"]
+
+        update_data = {key: data[key] for key in ("full_name", "phone") if key in data}
+
+        if not update_data:
+            raise Exception("Nejsou zadány žádné údaje ke změně")
+
+        user_response = await get_postgrest().from_("users").update(update_data).eq("id", user_id).execute()
+
+        invalidate_user_profile(user_id)
+
+        if not user_response.data:
+            raise Exception("Uživatelský profil nebyl nalezen")
+
+        return user_response.data[0]
+
+    except Exception as e:
+        raise Exception(f"Aktualizace uživatele selhala: {str(e)}")
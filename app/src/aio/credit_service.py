@@ -0,0 +1,191 @@
+from typing import Dict, Any, Optional
+import asyncio
+import uuid
+from postgrest.exceptions import APIError
+from src.aio.database import get_postgrest
+from src.aio.auth_service import get_user_from_token as get_user_profile_from_token
+from src.pagination import paginate, clamp_page_size
+from src.services.credit_service import ACCESS_COST, IDEMPOTENCY_CONFLICT_CODE, build_purchase_info
+from src.services.credit_service import (
+    DEFAULT_TRANSACTIONS_PAGE_SIZE, MAX_TRANSACTIONS_PAGE_SIZE, build_transactions_query, summary_params, build_summary
+)
+
+# Asynchronní varianta src/services/credit_service.py pro ASGI režim (src/asgi.py)
+
+async def get_user_from_token(token: str) -> Dict[str, Any]:
+    """
+    Získání informací o uživateli z tokenu
+
+    Args:
+        token: Přístupový token uživatele
+
+    Returns:
+        Dict obsahující informace o uživateli
+
+    Raises:
+        Exception: Pokud získání informací selže nebo uživatel není makléř
+    """
+    try:
+        user_data = await get_user_profile_from_token(token)
+
+        if user_data["user_type"] != "agent":
+            raise Exception("Pouze makléři mohou pracovat s kredity")
+
+        return user_data
+
+    except Exception as e:
+        raise Exception(f"Získání informací o uživateli selhalo: {str(e)}")
+
+async def get_agent_credits(token: str) -> Dict[str, Any]:
+    """
+    Získání aktuálního stavu kreditů makléře
+
+    Args:
+        token: Přístupový token uživatele
+
+    Returns:
+        Dict obsahující informace o kreditech
+
+    Raises:
+        Exception: Pokud získání informací selže
+    """
+    user_id = (await get_user_from_token(token))["id"]
+    postgrest = get_postgrest()
+
+    try:
+        credits_response = await postgrest.from_("agent_credits").select("*").eq("agent_id", user_id).execute()
+
+        if not credits_response.data:
+            # Pokud záznam neexistuje, vytvoříme ho
+            credits_response = await postgrest.from_("agent_credits").insert({
+                "agent_id": user_id,
+                "balance": 0
+            }).execute()
+
+        return credits_response.data[0]
+
+    except Exception as e:
+        raise Exception(f"Získání stavu kreditů selhalo: {str(e)}")
+
+async def purchase_credits(token: str, amount: int, payment_method: str, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Nákup kreditů
+
+    Args:
+        token: Přístupový token uživatele
+        amount: Počet kreditů k nákupu
+        payment_method: Metoda platby (card, bank_transfer)
+        idempotency_key: Klíč z hlavičky Idempotency-Key (viz synchronní varianta)
+
+    Returns:
+        Dict obsahující informace o platbě
+
+    Raises:
+        ValueError: Pokud byl idempotency_key už použit pro nákup jiného počtu kreditů
+        Exception: Pokud nákup selže
+    """
+    user_id = (await get_user_from_token(token))["id"]
+
+    try:
+        payment_id = str(uuid.uuid4())
+
+        transaction_response = await get_postgrest().rpc("purchase_credits", {
+            "p_agent_id": user_id,
+            "p_amount": amount,
+            "p_description": f"Nákup {amount} kreditů ({payment_method})",
+            "p_payment_id": payment_id,
+            "p_idempotency_key": idempotency_key
+        }).execute()
+
+        return build_purchase_info(transaction_response.data, payment_id, payment_method)
+
+    except APIError as e:
+        if e.code == IDEMPOTENCY_CONFLICT_CODE:
+            raise ValueError(e.message)
+        raise Exception(f"Nákup kreditů selhal: {e.message}")
+    except Exception as e:
+        raise Exception(f"Nákup kreditů selhal: {str(e)}")
+
+async def use_credits(token: str, property_id: str) -> Dict[str, Any]:
+    """
+    Použití kreditů pro získání přístupu ke kontaktům
+
+    Args:
+        token: Přístupový token uživatele
+        property_id: ID nemovitosti
+
+    Returns:
+        Dict obsahující informace o přístupu
+
+    Raises:
+        Exception: Pokud použití kreditů selže
+    """
+    user_id = (await get_user_from_token(token))["id"]
+
+    try:
+        access_response = await get_postgrest().rpc("use_credits", {
+            "p_agent_id": user_id,
+            "p_property_id": property_id,
+            "p_cost": ACCESS_COST
+        }).execute()
+
+        return access_response.data
+
+    except APIError as e:
+        raise Exception(f"Použití kreditů selhalo: {e.message}")
+    except Exception as e:
+        raise Exception(f"Použití kreditů selhalo: {str(e)}")
+
+async def get_credit_transactions(
+    token: str,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_TRANSACTIONS_PAGE_SIZE,
+    filters: Optional[Dict[str, Any]] = None,
+    include_summary: bool = True
+) -> Dict[str, Any]:
+    """
+    Získání stránky historie transakcí kreditů
+
+    Args:
+        token: Přístupový token uživatele
+        cursor: Kurzor další stránky (next_cursor z předchozí odpovědi)
+        limit: Počet transakcí na stránku
+        filters: Filtry z parse_transaction_filters
+        include_summary: Zda připojit souhrn po měsících a typech
+
+    Returns:
+        Dict s transactions, next_cursor a summary (None, pokud nebyl vyžádán)
+
+    Raises:
+        ValueError: Pokud kurzor není platný
+        Exception: Pokud získání informací selže
+    """
+    user_id = (await get_user_from_token(token))["id"]
+
+    postgrest = get_postgrest()
+    filters = filters or {}
+    limit = clamp_page_size(limit, MAX_TRANSACTIONS_PAGE_SIZE)
+
+    query = build_transactions_query(postgrest.from_("credit_transactions"), user_id, filters, cursor, limit)
+
+    try:
+        if include_summary:
+            transactions_response, summary_response = await asyncio.gather(
+                query.execute(),
+                postgrest.rpc("credit_transaction_summary", summary_params(user_id, filters)).execute()
+            )
+            summary = build_summary(summary_response.data)
+        else:
+            transactions_response = await query.execute()
+            summary = None
+
+        transactions, next_cursor = paginate(transactions_response.data, limit)
+
+        return {
+            "transactions": transactions,
+            "next_cursor": next_cursor,
+            "summary": summary
+        }
+
+    except Exception as e:
+        raise Exception(f"Získání historie transakcí selhalo: {str(e)}")
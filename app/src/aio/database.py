@@ -0,0 +1,64 @@
+import asyncio
+import os
+from typing import Dict
+
+from gotrue import AsyncGoTrueClient
+from postgrest import AsyncPostgrestClient
+
+from src.database import is_configured
+
+# Časový limit jednoho dotazu na PostgREST (v sekundách)
+POSTGREST_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+
+# Jeden asynchronní klient na event loop; httpx.AsyncClient zvládá souběžné
+# dotazy v rámci jedné smyčky, takže jeden worker může mít rozpracováno
+# stovky dotazů najednou bez dalších vláken
+_postgrest_clients: Dict[int, AsyncPostgrestClient] = {}
+
+
+def _service_headers() -> Dict[str, str]:
+    key = os.getenv("SUPABASE_KEY")
+    return {"apikey": key, "Authorization": f"Bearer {key}"}
+
+
+def get_postgrest() -> AsyncPostgrestClient:
+    """Získání asynchronního PostgREST klienta pro aktuální event loop"""
+    if not is_configured():
+        raise Exception("Supabase klient není inicializován")
+
+    loop_id = id(asyncio.get_running_loop())
+    client = _postgrest_clients.get(loop_id)
+
+    if client is None:
+        client = AsyncPostgrestClient(
+            f"{os.getenv('SUPABASE_URL').rstrip('/')}/rest/v1",
+            headers=_service_headers(),
+            timeout=POSTGREST_TIMEOUT
+        )
+        _postgrest_clients[loop_id] = client
+
+    return client
+
+
+def auth_client() -> AsyncGoTrueClient:
+    """
+    Asynchronní klient Supabase Auth pro jednu operaci (přihlášení, registrace)
+
+    Klient si po přihlášení drží session uživatele, proto se nesdílí.
+    """
+    if not is_configured():
+        raise Exception("Supabase klient není inicializován")
+
+    return AsyncGoTrueClient(
+        url=f"{os.getenv('SUPABASE_URL').rstrip('/')}/auth/v1",
+        headers=_service_headers(),
+        auto_refresh_token=False,
+        persist_session=False
+    )
+
+
+async def close_clients() -> None:
+    """Uzavření HTTP spojení při ukončení workeru"""
+    for client in list(_postgrest_clients.values()):
+        await client.aclose()
+    _postgrest_clients.clear()
@@ -0,0 +1,83 @@
+from src.aio.database import get_postgrest
+from src.services.property_service import (
+    DEFAULT_PAGE_SIZE, DEFAULT_SEARCH_LIMIT, build_properties_query, paginate, clamp_page_size, property_columns,
+    build_search_query, search_index, get_cached_property, cache_property, property_generation, invalidate_property, with_updated_at,
+    address_changed, ADDRESS_FIELDS,
+    index_properties, notify_created, unindex_property, with_coordinates, PROPERTY_STATUSES, geo_index, build_nearby_query, fallback_rows, rank_nearby, nearby_result
+)
+from src.services.property_service import find_nearby_properties as sync_find_nearby_properties
+from src.geocoding import bounding_box
+
+# Asynchronní varianta src/services/property_service.py pro ASGI režim (src/asgi.py).
+# Cache detailu inzerátu je sdílená se synchronní cestou.
+
+async def create_property(data):
+    response = await get_postgrest().from_('properties').insert(with_coordinates(data)).execute()
+    index_properties(response.data)
+    notify_created(response.data)
+    return response.data
+
+async def get_properties(filters=None, fields=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    limit = clamp_page_size(limit)
+    query = build_properties_query(get_postgrest().from_('properties'), filters, fields, cursor, limit)
+    response = await query.execute()
+    return paginate(response.data, limit)
+
+async def get_property_with_etag(id):
+    entry = get_cached_property(id)
+    if entry is None:
+        generation = property_generation(id)
+        response = await get_postgrest().from_('properties').select('*').eq('id', id).execute()
+        if not response.data:
+            return None, None
+        entry = cache_property(response.data[0], generation)
+    return entry['data'], entry['etag']
+
+async def update_property(id, data):
+    current = None
+    if address_changed(data):
+        rows = (await get_postgrest().from_('properties').select(','.join(ADDRESS_FIELDS)).eq('id', id).execute()).data
+        current = rows[0] if rows else None
+    response = await get_postgrest().from_('properties').update(with_updated_at(data, current)).eq('id', id).execute()
+    invalidate_property(id)
+    index_properties(response.data)
+    return response.data
+
+async def delete_property(id):
+    response = await get_postgrest().from_('properties').delete().eq('id', id).execute()
+    invalidate_property(id)
+    unindex_property(id)
+    return response.data
+
+async def search_properties(q, fields=None, limit=DEFAULT_SEARCH_LIMIT, offset=0):
+    # Z indexu jako synchronní cesta; náhradní dotaz do databáze jen než je index připravený
+    limit = clamp_page_size(limit)
+    offset = max(0, int(offset))
+    columns = property_columns(fields)
+
+    if not search_index.ready:
+        query = build_search_query(get_postgrest().from_('properties'), q, fields, limit, offset)
+        if query is None:
+            return [], False
+        rows = (await query.execute()).data
+        return rows[:limit], len(rows) > limit
+
+    rows, has_more = search_index.search(q, limit=limit, offset=offset)
+    return [{**{column: row.get(column) for column in columns}, 'score': row['score']} for row in rows], has_more
+
+async def find_nearby_properties(center, radius_km=None, bbox=None, status='active', fields=None, limit=DEFAULT_PAGE_SIZE, offset=0):
+    # Z prostorového indexu jako synchronní cesta; do databáze jen než je index připravený
+    if geo_index.ready:
+        return sync_find_nearby_properties(center, radius_km, bbox, status, fields, limit, offset)
+
+    limit = clamp_page_size(limit)
+    offset = max(0, int(offset))
+    if status and status not in PROPERTY_STATUSES:
+        raise ValueError(f'Neplatný stav: {status}')
+    if center is None:
+        center = ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
+
+    query = build_nearby_query(get_postgrest().from_('properties'), bbox or bounding_box(center, radius_km), status, fields)
+    rows, truncated = fallback_rows((await query.execute()).data)
+    ranked, has_more = rank_nearby(rows, center, radius_km, limit, offset)
+    return nearby_result(ranked, fields), has_more, truncated
@@ -0,0 +1,166 @@
+from quart import Blueprint, request, jsonify, session
+from src.aio.auth_service import register_user, login_user, login_with_google, logout_user, get_current_user, update_current_user
+
+# Asynchronní varianta src/routes/auth.py
+auth_bp = Blueprint('auth', __name__)
+
+@auth_bp.route('/register', methods=['POST'])
+async def register():
+    """
+    Registrace nového uživatele
+    ---
+    Očekává JSON s:
+    - email: email uživatele
+    - password: heslo uživatele
+    - user_type: typ uživatele (seller/agent)
+    - full_name: jméno a příjmení
+    - phone: telefonní číslo (volitelné)
+    """
+    data = await request.get_json()
+    
+    # Validace vstupních dat
+    required_fields = ['email', 'password', 'user_type', 'full_name']
+    for field in required_fields:
+        if field not in data:
+            return jsonify({'status': 'error', 'message': f'Chybí povinné pole: {field}'}), 400
+    
+    # Validace typu uživatele
+    if data['user_type'] not in ['seller', 'agent']:
+        return jsonify({'status': 'error', 'message': 'Neplatný typ uživatele. Povolené hodnoty: seller, agent'}), 400
+    
+    try:
+        user = await register_user(
+            email=data['email'],
+            password=data['password'],
+            user_type=data['user_type'],
+            full_name=data['full_name'],
+            phone=data.get('phone', '')
+        )
+        return jsonify({
+            'status': 'success',
+            'message': 'Uživatel byl úspěšně zaregistrován',
+            'user': user
+        }), 201
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@auth_bp.route('/login', methods=['POST'])
+async def login():
+    """
+    Přihlášení uživatele
+    ---
+    Očekává JSON s:
+    - email: email uživatele
+    - password: heslo uživatele
+    """
+    data = await request.get_json()
+    
+    # Validace vstupních dat
+    if 'email' not in data or 'password' not in data:
+        return jsonify({'status': 'error', 'message': 'Chybí email nebo heslo'}), 400
+    
+    try:
+        user, token = await login_user(data['email'], data['password'])
+        
+        # Uložení tokenu do session
+        session['token'] = token
+        
+        return jsonify({
+            'status': 'success',
+            'message': 'Přihlášení proběhlo úspěšně',
+            'user': user,
+            'token': token
+        }), 200
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 401
+
+@auth_bp.route('/google', methods=['POST'])
+async def google_login():
+    """
+    Přihlášení přes Google
+    ---
+    Očekává JSON s:
+    - token: ID token z Google přihlášení
+    - user_type: typ uživatele (seller/agent) - pouze při první registraci
+    """
+    data = await request.get_json()
+    
+    if 'token' not in data:
+        return jsonify({'status': 'error', 'message': 'Chybí Google token'}), 400
+    
+    try:
+        user, token, is_new_user = await login_with_google(
+            google_token=data['token'],
+            user_type=data.get('user_type')
+        )
+        
+        # Uložení tokenu do session
+        session['token'] = token
+        
+        return jsonify({
+            'status': 'success',
+            'message': 'Přihlášení přes Google proběhlo úspěšně',
+            'user': user,
+            'token': token,
+            'is_new_user': is_new_user
+        }), 200
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 401
+
+@auth_bp.route('/logout', methods=['POST'])
+async def logout():
+    """
+    Odhlášení uživatele
+    """
+    try:
+        await logout_user(session.get('token'))
+        session.pop('token', None)
+        return jsonify({
+            'status': 'success',
+            'message': 'Odhlášení proběhlo úspěšně'
+        }), 200
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@auth_bp.route('/me', methods=['GET'])
+async def me():
+    """
+    Získání informací o přihlášeném uživateli
+    """
+    token = session.get('token')
+    if not token:
+        return jsonify({'status': 'error', 'message': 'Uživatel není přihlášen'}), 401
+    
+    try:
+        user = await get_current_user(token)
+        return jsonify({
+            'status': 'success',
+            'user': user
+        }), 200
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 401
+
+@auth_bp.route('/me', methods=['PUT'])
+async def update_me():
+    """
+    Aktualizace údajů přihlášeného uživatele
+    ---
+    Očekává JSON s:
+    - full_name: jméno a příjmení (volitelné)
+    - phone: telefonní číslo (volitelné)
+    """
+    token = session.get('token')
+    if not token:
+        return jsonify({'status': 'error', 'message': 'Uživatel není přihlášen'}), 401
+    
+    data = await request.get_json()
+    
+    try:
+        user = await update_current_user(token, data)
+        return jsonify({
+            'status': 'success',
+            'message': 'Údaje byly aktualizovány',
+            'user': user
+        }), 200
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
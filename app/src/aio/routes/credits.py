@@ -0,0 +1,140 @@
+from quart import Blueprint, request, jsonify, session
+from src.aio.credit_service import get_agent_credits, purchase_credits, use_credits, get_credit_transactions
+from src.services.credit_service import parse_transaction_filters, DEFAULT_TRANSACTIONS_PAGE_SIZE
+
+# Asynchronní varianta src/routes/credits.py
+credits_bp = Blueprint('credits', __name__)
+
+@credits_bp.route('/balance', methods=['GET'])
+async def get_balance():
+    """
+    Získání aktuálního stavu kreditů makléře
+    """
+    token = session.get('token')
+    if not token:
+        return jsonify({'status': 'error', 'message': 'Uživatel není přihlášen'}), 401
+    
+    try:
+        credits = await get_agent_credits(token)
+        return jsonify({
+            'status': 'success',
+            'credits': credits
+        }), 200
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@credits_bp.route('/purchase', methods=['POST'])
+async def purchase():
+    """
+    Nákup kreditů
+    ---
+    Očekává JSON s:
+    - amount: počet kreditů k nákupu
+    - payment_method: metoda platby (card, bank_transfer)
+    """
+    token = session.get('token')
+    if not token:
+        return jsonify({'status': 'error', 'message': 'Uživatel není přihlášen'}), 401
+    
+    data = await request.get_json()
+    
+    # Validace vstupních dat
+    if 'amount' not in data:
+        return jsonify({'status': 'error', 'message': 'Chybí počet kreditů k nákupu'}), 400
+    
+    if 'payment_method' not in data:
+        return jsonify({'status': 'error', 'message': 'Chybí metoda platby'}), 400
+    
+    if data['payment_method'] not in ['card', 'bank_transfer']:
+        return jsonify({'status': 'error', 'message': 'Neplatná metoda platby. Povolené hodnoty: card, bank_transfer'}), 400
+    
+    try:
+        amount = int(data['amount'])
+        if amount <= 0:
+            return jsonify({'status': 'error', 'message': 'Počet kreditů musí být kladné číslo'}), 400
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Počet kreditů musí být číslo'}), 400
+    
+    try:
+        payment_info = await purchase_credits(
+            token=token,
+            amount=amount,
+            payment_method=data['payment_method'],
+            idempotency_key=request.headers.get('Idempotency-Key')
+        )
+        
+        return jsonify({
+            'status': 'success',
+            'message': 'Platba byla zahájena',
+            'payment_info': payment_info
+        }), 200
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 422
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@credits_bp.route('/use', methods=['POST'])
+async def use():
+    """
+    Použití kreditů pro získání přístupu ke kontaktům
+    ---
+    Očekává JSON s:
+    - property_id: ID nemovitosti
+    """
+    token = session.get('token')
+    if not token:
+        return jsonify({'status': 'error', 'message': 'Uživatel není přihlášen'}), 401
+    
+    data = await request.get_json()
+    
+    # Validace vstupních dat
+    if 'property_id' not in data:
+        return jsonify({'status': 'error', 'message': 'Chybí ID nemovitosti'}), 400
+    
+    try:
+        access_info = await use_credits(
+            token=token,
+            property_id=data['property_id']
+        )
+        
+        return jsonify({
+            'status': 'success',
+            'message': 'Přístup ke kontaktům byl udělen',
+            'access_info': access_info
+        }), 200
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@credits_bp.route('/transactions', methods=['GET'])
+async def transactions():
+    """
+    Získání historie transakcí kreditů (parametry jako v src/routes/credits.py)
+    """
+    token = session.get('token')
+    if not token:
+        return jsonify({'status': 'error', 'message': 'Uživatel není přihlášen'}), 401
+    
+    try:
+        filters = parse_transaction_filters(
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to'),
+            transaction_type=request.args.get('type')
+        )
+        limit = request.args.get('limit', DEFAULT_TRANSACTIONS_PAGE_SIZE, type=int)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    try:
+        history = await get_credit_transactions(
+            token,
+            cursor=request.args.get('cursor'),
+            limit=limit,
+            filters=filters,
+            include_summary=request.args.get('summary', '1') != '0'
+        )
+        return jsonify({
+            'status': 'success',
+            **history
+        }), 200
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
@@ -0,0 +1,136 @@
+from quart import Blueprint, Response, request, jsonify
+from src.aio.property_service import create_property, get_properties, get_property_with_etag, update_property, delete_property
+from src.aio.property_service import search_properties, find_nearby_properties
+from src.services.property_service import FILTER_FIELDS, DEFAULT_PAGE_SIZE, DEFAULT_SEARCH_LIMIT, get_cached_property_etag
+from src.services.property_service import parse_nearby_area
+
+# Asynchronní varianta src/routes/properties.py (hromadný import a export zůstávají na synchronní cestě)
+properties_bp = Blueprint('properties', __name__)
+
+@properties_bp.route('/properties', methods=['POST'])
+async def create_property_route():
+    data = await request.get_json()
+    result = await create_property(data)
+    return jsonify(result), 201
+
+@properties_bp.route('/properties', methods=['GET'])
+async def get_properties_route():
+    filters = {field: request.args[field] for field in FILTER_FIELDS if request.args.get(field)}
+    fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+    
+    try:
+        properties, next_cursor = await get_properties(
+            filters=filters,
+            fields=fields or None,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return jsonify({
+        'status': 'success',
+        'properties': properties,
+        'next_cursor': next_cursor
+    }), 200
+
+@properties_bp.route('/search', methods=['GET'])
+async def search_properties_route():
+    """
+    Fulltextové vyhledávání inzerátů
+    ---
+    Parametry dotazu:
+    - q: hledaný text (bez ohledu na velikost písmen a diakritiku)
+    - fields: sloupce ve výsledku
+    - limit, offset: stránkování výsledků seřazených podle relevance
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'status': 'error', 'message': 'Chybí hledaný text (q)'}), 400
+    
+    fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+    limit = request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    
+    try:
+        properties, has_more = await search_properties(q, fields=fields or None, limit=limit, offset=offset)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return jsonify({
+        'status': 'success',
+        'properties': properties,
+        'next_offset': offset + len(properties) if has_more else None
+    }), 200
+
+@properties_bp.route('/properties/nearby', methods=['GET'])
+async def nearby_properties_route():
+    """
+    Inzeráty v okolí místa, od nejbližších
+    ---
+    Parametry dotazu:
+    - lat, lon: střed hledání, nebo postal_code / municipality dohledané v tabulce obcí
+    - radius_km: poloměr v km (výchozí 10)
+    - bbox: místo poloměru obdélník min_lon,min_lat,max_lon,max_lat
+    - status: stav inzerátu (výchozí active)
+    - fields, limit, offset: sloupce a stránkování
+    """
+    args = request.args
+    fields = [field.strip() for field in args.get('fields', '').split(',') if field.strip()]
+    limit = args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    offset = args.get('offset', 0, type=int)
+    
+    try:
+        center, radius_km, bbox = parse_nearby_area(
+            lat=args.get('lat'),
+            lon=args.get('lon'),
+            postal_code=args.get('postal_code'),
+            municipality=args.get('municipality'),
+            radius_km=args.get('radius_km'),
+            bbox=args.get('bbox')
+        )
+        properties, has_more, truncated = await find_nearby_properties(
+            center, radius_km=radius_km, bbox=bbox, status=args.get('status', 'active'),
+            fields=fields or None, limit=limit, offset=offset
+        )
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return jsonify({
+        'status': 'success',
+        'properties': properties,
+        'center': {'latitude': center[0], 'longitude': center[1]} if center else None,
+        'radius_km': radius_km,
+        'next_offset': offset + len(properties) if has_more else None,
+        # Prostorový index ještě není připravený a v oblasti je víc inzerátů, než se přečetlo
+        'truncated': truncated
+    }), 200
+
+@properties_bp.route('/properties/<id>', methods=['GET'])
+async def get_property_route(id):
+    # Klient má aktuální verzi a inzerát je v cache: odpověď bez dotazu do databáze
+    if request.if_none_match:
+        etag = get_cached_property_etag(id)
+        if etag and request.if_none_match.contains(etag):
+            response = Response('', status=304)
+            response.set_etag(etag)
+            return response
+    
+    property, etag = await get_property_with_etag(id)
+    if property is None:
+        return jsonify(property), 200
+    
+    response = jsonify(property)
+    response.set_etag(etag)
+    return await response.make_conditional(request)
+
+@properties_bp.route('/properties/<id>', methods=['PUT'])
+async def update_property_route(id):
+    data = await request.get_json()
+    result = await update_property(id, data)
+    return jsonify(result), 200
+
+@properties_bp.route('/properties/<id>', methods=['DELETE'])
+async def delete_property_route(id):
+    result = await delete_property(id)
+    return jsonify(result), 200
@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, Optional, Sequence
+
+# Klient Airtable REST API pro zápis reportingových dat. Airtable přijme
+# nejvýše 10 záznamů v jednom požadavku a 5 požadavků za sekundu na bázi;
+# po překročení vrací 429 a další požadavky odmítá 30 sekund.
+
+AIRTABLE_API_URL = os.getenv('AIRTABLE_API_URL', 'https://api.airtable.com/v0')
+# Záznamů v jednom požadavku (víc Airtable nepřijme)
+MAX_BATCH_SIZE = 10
+# Požadavků za sekundu na bázi
+AIRTABLE_RATE_LIMIT = float(os.getenv('AIRTABLE_RATE_LIMIT', '5'))
+AIRTABLE_MAX_RETRIES = int(os.getenv('AIRTABLE_MAX_RETRIES', '5'))
+# Čekání po 429 bez hlavičky Retry-After (v sekundách)
+AIRTABLE_RATE_LIMIT_BACKOFF = float(os.getenv('AIRTABLE_RATE_LIMIT_BACKOFF', '30'))
+AIRTABLE_TIMEOUT = float(os.getenv('AIRTABLE_TIMEOUT', '30'))
+
+# Stavové kódy, po kterých má smysl požadavek zopakovat
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+logger = logging.getLogger(__name__)
+
+
+class AirtableError(Exception):
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class RequestPacer:
+    """
+    Rozestupy mezi požadavky pro všechna vlákna klienta (nejvýše rate za sekundu)
+
+    Po 429 se všechny další požadavky pozdrží o dobu, kterou Airtable žádá.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+class AirtableClient:
+    """
+    Hromadný upsert záznamů do jedné báze Airtable
+
+    Záznamy se dělí do dávek po MAX_BATCH_SIZE, požadavky se rozestupují
+    podle AIRTABLE_RATE_LIMIT a po 429, chybě serveru nebo síťové chybě
+    se opakují s rostoucí prodlevou.
+    """
+
+    def __init__(self, base_id: str, api_key: str, api_url: str = AIRTABLE_API_URL,
+                 rate: float = AIRTABLE_RATE_LIMIT, max_retries: int = AIRTABLE_MAX_RETRIES):
+        self.base_url = f"{api_url.rstrip('/')}/{base_id}"
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.pacer = RequestPacer(rate)
+        self._stats = {'requests': 0, 'records': 0, 'retries': 0, 'rate_limited': 0}
+        self._stats_lock = threading.Lock()
+
+    def upsert(self, table: str, records: Sequence[Dict[str, Any]], merge_on: Sequence[str] = ('id',)) -> int:
+        """
+        Vložení nebo aktualizace záznamů podle polí merge_on
+
+        Args:
+            table: Název nebo ID tabulky v Airtable
+            records: Pole záznamů (dict název pole -> hodnota)
+            merge_on: Pole, podle kterých se pozná existující záznam
+
+        Returns:
+            Počet zapsaných záznamů
+
+        Raises:
+            AirtableError: Pokud Airtable záznamy odmítne nebo dojdou pokusy
+        """
+        written = 0
+        for start in range(0, len(records), MAX_BATCH_SIZE):
+            written += self.upsert_batch(table, records[start:start + MAX_BATCH_SIZE], merge_on)
+        return written
+
+    def upsert_batch(self, table: str, records: Sequence[Dict[str, Any]], merge_on: Sequence[str] = ('id',)) -> int:
+        if len(records) > MAX_BATCH_SIZE:
+            raise AirtableError(f'Nejvýše {MAX_BATCH_SIZE} záznamů v jednom požadavku')
+
+        body = {
+            'performUpsert': {'fieldsToMergeOn': list(merge_on)},
+            'records': [{'fields': record} for record in records],
+            'typecast': True,
+        }
+        response = self._request('PATCH', f"{self.base_url}/{urllib.parse.quote(table, safe='')}", body)
+        self._count('records', len(records))
+        return len(response.get('records', records))
+
+    def _request(self, method: str, url: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        data = json.dumps(body, default=str).encode('utf-8')
+        for attempt in range(self.max_retries + 1):
+            self.pacer.wait()
+            self._count('requests')
+            request = urllib.request.Request(
+                url,
+                data=data,
+                headers={'Authorization': f'Bearer {self.api_key}', 'Content-Type': 'application/json'},
+                method=method
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=AIRTABLE_TIMEOUT) as response:
+                    return json.loads(response.read() or b'{}')
+            except urllib.error.HTTPError as e:
+                detail = e.read().decode('utf-8', 'replace')
+                if e.code not in RETRY_STATUSES or attempt == self.max_retries:
+                    raise AirtableError(f'Airtable odmítl požadavek ({e.code}): {detail}', e.code)
+                if e.code == 429:
+                    self._count('rate_limited')
+                    retry_after = e.headers.get('Retry-After')
+                    self.pacer.pause(float(retry_after) if retry_after else AIRTABLE_RATE_LIMIT_BACKOFF)
+                else:
+                    time.sleep(min(2 ** attempt, 30))
+            except (urllib.error.URLError, TimeoutError) as e:
+                if attempt == self.max_retries:
+                    raise AirtableError(f'Airtable není dostupný: {str(e)}')
+                time.sleep(min(2 ** attempt, 30))
+
+            self._count('retries')
+            logger.warning('Požadavek na Airtable selhal, pokus %d z %d', attempt + 1, self.max_retries)
+
+        raise AirtableError('Airtable není dostupný')
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += value
+
+
+def create_client() -> Optional[AirtableClient]:
+    """Klient podle AIRTABLE_BASE_ID a AIRTABLE_API_KEY (None, pokud nejsou nastavené)"""
+    base_id = os.getenv('AIRTABLE_BASE_ID')
+    api_key = os.getenv('AIRTABLE_API_KEY')
+    if not base_id or not api_key:
+        return None
+    return AirtableClient(base_id, api_key)
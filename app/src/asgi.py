@@ -0,0 +1,67 @@
+import asyncio
+import os
+import sys
+from quart import Quart, jsonify
+from dotenv import load_dotenv
+
+# Přidání cesty pro správné importy
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+# Načtení proměnných prostředí
+load_dotenv()
+
+# Asynchronní režim API pro ASGI server, např.:
+#   hypercorn --workers 2 src.asgi:app
+# Handlery čekají na Supabase bez blokování vlákna, takže jeden worker
+# obslouží stovky souběžných dotazů. Synchronní režim (src/main.py) zůstává.
+app = Quart(__name__)
+app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'default-secret-key')
+
+from src.database import is_configured
+from src.aio.database import close_clients
+
+# Registrace blueprintů
+from src.aio.routes.auth import auth_bp
+from src.aio.routes.properties import properties_bp
+from src.aio.routes.credits import credits_bp
+
+app.register_blueprint(auth_bp, url_prefix='/api/auth')
+app.register_blueprint(properties_bp, url_prefix='/api/properties')
+app.register_blueprint(credits_bp, url_prefix='/api/credits')
+
+@app.before_serving
+async def start_worker():
+    # Úlohy na pozadí (indexy inzerátů, notifikace) a zahřátí spojení jako
+    # v synchronním režimu; before_serving běží v každém workeru zvlášť.
+    # init_worker blokuje (zahřátí poolu), proto mimo smyčku událostí.
+    from src.main import init_worker
+    await asyncio.to_thread(init_worker)
+
+@app.after_serving
+async def shutdown():
+    await close_clients()
+
+# Základní route pro kontrolu stavu API
+@app.route('/api/health', methods=['GET'])
+async def health_check():
+    return jsonify({
+        'status': 'ok',
+        'message': 'API je funkční',
+        'mode': 'asgi',
+        'supabase_connected': is_configured()
+    })
+
+# Obsluha chyb
+@app.errorhandler(404)
+async def not_found(error):
+    return jsonify({
+        'status': 'error',
+        'message': 'Požadovaný zdroj nebyl nalezen'
+    }), 404
+
+@app.errorhandler(500)
+async def server_error(error):
+    return jsonify({
+        'status': 'error',
+        'message': 'Interní chyba serveru'
+    }), 500
@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class TTLCache:
+    """
+    Vláknově bezpečná LRU cache s omezenou velikostí a expirací záznamů
+
+    Po dosažení maximální velikosti se vyřazuje nejdéle nepoužitý záznam,
+    záznamy starší než TTL se při čtení považují za neexistující.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisCache:
+    """
+    Sdílená cache v Redisu (nebo kompatibilním serveru) pro všechny workery
+
+    Hodnoty se ukládají jako JSON pod klíčem s prefixem jmenného prostoru.
+    """
+
+    def __init__(self, url: str, namespace: str, ttl: float = 60.0):
+        if redis is None:
+            raise Exception("Pro sdílenou cache je potřeba nainstalovat balíček redis")
+
+        self.ttl = ttl
+        self.prefix = f"realitni:{namespace}:"
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        raw = self._client.get(self.prefix + str(key))
+        return default if raw is None else json.loads(raw)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires = self.ttl if ttl is None else ttl
+        self._client.set(self.prefix + str(key), json.dumps(value), px=int(expires * 1000))
+
+    def delete(self, key: Hashable) -> None:
+        self._client.delete(self.prefix + str(key))
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+
+class TieredCache:
+    """
+    Dvouúrovňová cache: lokální LRU v procesu a za ní sdílená cache
+
+    Lokální úroveň má krátké TTL, aby invalidace provedená v jiném workeru
+    (smazáním ze sdílené cache) začala platit nejpozději po jeho uplynutí.
+    """
+
+    def __init__(self, local: TTLCache, shared: Any):
+        self.local = local
+        self.shared = shared
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        value = self.shared.get(key)
+        if value is None:
+            return default
+
+        self.local.set(key, value)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self.shared.set(key, value, ttl)
+        self.local.set(key, value)
+
+    def delete(self, key: Hashable) -> None:
+        self.shared.delete(key)
+        self.local.delete(key)
+
+    def clear(self) -> None:
+        self.shared.clear()
+        self.local.clear()
+
+
+class InvalidationLog:
+    """
+    Invalidace klíčů cache za posledních `horizon` sekund
+
+    Čtení z databáze si před dotazem vezme start() a přečtený záznam zapíše
+    přes store_if_current(), tedy jen pokud klíč od začátku čtení nikdo
+    neinvalidoval. Starší invalidace se zapomínají, takže log neroste s počtem
+    různých klíčů; čtení delší než horizon se proto do cache nezapíše vůbec.
+    """
+
+    def __init__(self, horizon: float = 30.0):
+        self.horizon = horizon
+        self._sequence = 0
+        # klíč -> (pořadí invalidace, čas), od nejstarší
+        self._invalidated: "OrderedDict[Hashable, Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self) -> Tuple[int, float]:
+        with self._lock:
+            return self._sequence, time.monotonic()
+
+    def invalidate(self, key: Hashable) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._sequence += 1
+            self._invalidated[key] = (self._sequence, now)
+            self._invalidated.move_to_end(key)
+            while self._invalidated:
+                _, invalidated_at = next(iter(self._invalidated.values()))
+                if now - invalidated_at <= self.horizon:
+                    break
+                self._invalidated.popitem(last=False)
+
+    def store_if_current(self, key: Hashable, started: Tuple[int, float], store: Callable[[], None]) -> bool:
+        """Zavolá store() pod zámkem, pokud klíč od started nikdo neinvalidoval"""
+        sequence, started_at = started
+        with self._lock:
+            if time.monotonic() - started_at > self.horizon:
+                return False
+            entry = self._invalidated.get(key)
+            if entry is not None and entry[0] > sequence:
+                return False
+            store()
+            return True
+
+    def __len__(self) -> int:
+        return len(self._invalidated)
+
+
+def create_cache(namespace: str, maxsize: int, ttl: float, local_ttl: float = 5.0) -> Any:
+    """
+    Vytvoření cache pro daný jmenný prostor
+
+    Bez nastavené proměnné CACHE_REDIS_URL vrací jen lokální TTLCache.
+    S ní vrací TieredCache, kde lokální úroveň drží záznamy nejvýše local_ttl.
+    """
+    redis_url = os.getenv("CACHE_REDIS_URL")
+    if not redis_url:
+        return TTLCache(maxsize=maxsize, ttl=ttl)
+
+    return TieredCache(
+        TTLCache(maxsize=maxsize, ttl=min(ttl, local_ttl)),
+        RedisCache(redis_url, namespace, ttl)
+    )
@@ -0,0 +1,191 @@
+import heapq
+import math
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from src.geocoding import Point, bounding_box, distance_km
+from src.indexing import IncrementalIndex
+
+# Velikost buňky mřížky ve stupních (~11 km severojižně, ~7 km východozápadně v ČR)
+CELL_SIZE = 0.1
+
+Cell = Tuple[int, int]
+
+
+def _cell(latitude: float, longitude: float) -> Cell:
+    return math.floor(latitude / CELL_SIZE), math.floor(longitude / CELL_SIZE)
+
+
+def _cell_distance(center: Point, cell: Cell) -> float:
+    # Dolní odhad vzdálenosti středu od buňky: vzdálenost k nejbližšímu bodu jejího obdélníku
+    # (s rezervou 1 %, nejbližší bod na kouli se od něj nepatrně liší)
+    latitude = min(max(center[0], cell[0] * CELL_SIZE), (cell[0] + 1) * CELL_SIZE)
+    longitude = min(max(center[1], cell[1] * CELL_SIZE), (cell[1] + 1) * CELL_SIZE)
+    return distance_km(center, (latitude, longitude)) * 0.99
+
+
+class _GeoState:
+    def __init__(self):
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.points: Dict[str, Point] = {}
+        # Inzeráty se stejnými souřadnicemi (souřadnice obce nebo PSČ) sdílí jeden bod
+        self.ids_by_point: Dict[Point, Set[str]] = {}
+        self.cells: Dict[Cell, Set[Point]] = {}
+
+    def add(self, row: Dict[str, Any]) -> None:
+        id = str(row['id'])
+        self.remove(id)
+
+        latitude, longitude = row.get('latitude'), row.get('longitude')
+        if latitude is None or longitude is None:
+            return
+
+        point = (float(latitude), float(longitude))
+        self.rows[id] = row
+        self.points[id] = point
+        ids = self.ids_by_point.get(point)
+        if ids is None:
+            ids = self.ids_by_point[point] = set()
+            self.cells.setdefault(_cell(*point), set()).add(point)
+        ids.add(id)
+
+    def remove(self, id: str) -> None:
+        point = self.points.pop(id, None)
+        if point is None:
+            return
+
+        del self.rows[id]
+        ids = self.ids_by_point[point]
+        ids.discard(id)
+        if ids:
+            return
+
+        del self.ids_by_point[point]
+        cell = _cell(*point)
+        points = self.cells[cell]
+        points.discard(point)
+        if not points:
+            del self.cells[cell]
+
+
+class GeoIndex(IncrementalIndex):
+    """
+    Prostorový index inzerátů se souřadnicemi (pravidelná mřížka)
+
+    Inzeráty jsou rozdělené do buněk podle zeměpisné šířky a délky; dotaz
+    prochází jen buňky, které zasahují do hledané oblasti, a vzdálenost
+    počítá jen pro inzeráty v nich.
+    """
+
+    def _new_state(self) -> _GeoState:
+        return _GeoState()
+
+    def _apply_upsert(self, state: _GeoState, row: Dict[str, Any]) -> None:
+        # update_property vrací jen změněný řádek, ale může jít o částečná data
+        state.add({**state.rows.get(str(row['id']), {}), **row})
+
+    def _apply_remove(self, state: _GeoState, id: str) -> None:
+        state.remove(id)
+
+    def within_radius(
+        self,
+        center: Point,
+        radius_km: float,
+        limit: int = 50,
+        offset: int = 0,
+        where: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Tuple[List[Tuple[Dict[str, Any], float]], bool]:
+        """
+        Inzeráty do vzdálenosti radius_km od středu, od nejbližších
+
+        Returns:
+            Tuple (seznam dvojic (řádek, vzdálenost v km), zda existují další)
+        """
+        return self._query(center, bounding_box(center, radius_km), radius_km, limit, offset, where)
+
+    def within_bbox(
+        self,
+        bbox: Tuple[float, float, float, float],
+        center: Optional[Point] = None,
+        limit: int = 50,
+        offset: int = 0,
+        where: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Tuple[List[Tuple[Dict[str, Any], float]], bool]:
+        """
+        Inzeráty v obdélníku (min_lat, min_lon, max_lat, max_lon), od nejbližších ke středu
+
+        Bez zadaného středu se vzdálenost měří od středu obdélníku.
+        """
+        if center is None:
+            center = ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
+        return self._query(center, bbox, None, limit, offset, where)
+
+    def _query(self, center, bbox, radius_km, limit, offset, where):
+        min_lat, min_lon, max_lat, max_lon = bbox
+        min_cell = _cell(min_lat, min_lon)
+        max_cell = _cell(max_lat, max_lon)
+        needed = offset + limit + 1
+
+        with self._lock:
+            state = self._state
+
+            # Méně buněk v oblasti než obsazených buněk: procházet oblast, jinak obsazené buňky
+            area = (max_cell[0] - min_cell[0] + 1) * (max_cell[1] - min_cell[1] + 1)
+            if area <= len(state.cells):
+                cells = [
+                    (row, column)
+                    for row in range(min_cell[0], max_cell[0] + 1)
+                    for column in range(min_cell[1], max_cell[1] + 1)
+                    if (row, column) in state.cells
+                ]
+            else:
+                cells = [
+                    cell for cell in state.cells
+                    if min_cell[0] <= cell[0] <= max_cell[0] and min_cell[1] <= cell[1] <= max_cell[1]
+                ]
+
+            # Buňky od nejbližší; jakmile je nalezeno dost inzerátů a další buňka je
+            # dál než needed-tý nejbližší z nich, zbytek oblasti už nic nezmění
+            cells.sort(key=lambda cell: _cell_distance(center, cell))
+            candidates = []
+            # Max-halda vzdáleností needed nejbližších odpovídajících inzerátů
+            nearest: List[float] = []
+            for cell in cells:
+                if len(nearest) >= needed and _cell_distance(center, cell) > -nearest[0]:
+                    break
+
+                for point in state.cells[cell]:
+                    if not (min_lat <= point[0] <= max_lat and min_lon <= point[1] <= max_lon):
+                        continue
+                    distance = distance_km(center, point)
+                    if radius_km is not None and distance > radius_km:
+                        continue
+                    if len(nearest) >= needed and distance > -nearest[0]:
+                        continue
+
+                    rows = [state.rows[id] for id in state.ids_by_point[point]]
+                    if where is not None:
+                        rows = [row for row in rows if where(row)]
+                    if not rows:
+                        continue
+
+                    candidates.append((distance, point, rows))
+                    for _ in range(min(len(rows), needed)):
+                        if len(nearest) < needed:
+                            heapq.heappush(nearest, -distance)
+                        elif distance < -nearest[0]:
+                            heapq.heapreplace(nearest, -distance)
+                        else:
+                            break
+
+            # Body od nejbližšího; inzeráty v jednom bodě od nejnovějších
+            found = []
+            for distance, point, rows in sorted(candidates, key=lambda item: (item[0], item[1])):
+                rows.sort(key=lambda row: (row.get('created_at') or '', str(row['id'])), reverse=True)
+                found.extend((row, distance) for row in rows[:needed - len(found)])
+                if len(found) >= needed:
+                    break
+
+            return found[offset:offset + limit], len(found) > offset + limit
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), 'cells': len(self._state.cells), 'points': len(self._state.ids_by_point)}
@@ -0,0 +1,121 @@
+import csv
+import math
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from src.search_index import fold
+
+# Offline tabulka PSČ a obcí se souřadnicemi (postal_code,municipality,latitude,longitude).
+# Výchozí tabulka pokrývá větší obce; úplnou tabulku všech PSČ lze podstrčit přes GEO_PLACES_PATH.
+GEO_PLACES_PATH = os.getenv(
+    'GEO_PLACES_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'places_cz.csv')
+)
+
+EARTH_RADIUS_KM = 6371.0088
+
+Point = Tuple[float, float]
+
+_places = None
+_places_lock = threading.Lock()
+
+
+class _Places:
+    def __init__(self, path: str):
+        self.by_postal_code: Dict[str, Point] = {}
+        self.by_municipality: Dict[str, Point] = {}
+        # Průměr souřadnic PSČ se stejným začátkem (PSČ jsou rozdělená podle území)
+        self.by_prefix: Dict[str, Point] = {}
+
+        sums: Dict[str, list] = {}
+        municipality_sums: Dict[str, list] = {}
+
+        with open(path, encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                point = (float(row['latitude']), float(row['longitude']))
+                postal_code = normalize_postal_code(row['postal_code'])
+                if postal_code:
+                    self.by_postal_code[postal_code] = point
+                    for length in (2, 3):
+                        totals = sums.setdefault(postal_code[:length], [0.0, 0.0, 0])
+                        totals[0] += point[0]
+                        totals[1] += point[1]
+                        totals[2] += 1
+
+                name = fold(row['municipality'].strip())
+                totals = municipality_sums.setdefault(name, [0.0, 0.0, 0])
+                totals[0] += point[0]
+                totals[1] += point[1]
+                totals[2] += 1
+
+        self.by_prefix = {prefix: (lat / count, lon / count) for prefix, (lat, lon, count) in sums.items()}
+        self.by_municipality = {
+            name: (lat / count, lon / count) for name, (lat, lon, count) in municipality_sums.items()
+        }
+
+
+def _get_places() -> _Places:
+    global _places
+    if _places is None:
+        with _places_lock:
+            if _places is None:
+                _places = _Places(GEO_PLACES_PATH)
+    return _places
+
+
+def normalize_postal_code(value: Optional[str]) -> Optional[str]:
+    # '602 00' -> '60200'; None, pokud nejde o pětimístné PSČ
+    digits = ''.join(char for char in str(value or '') if char.isdigit())
+    return digits if len(digits) == 5 else None
+
+
+def lookup(postal_code: Optional[str] = None, municipality: Optional[str] = None) -> Optional[Point]:
+    """
+    Souřadnice (zeměpisná šířka, délka) pro PSČ nebo obec z offline tabulky
+
+    Pořadí: přesné PSČ, název obce (bez ohledu na diakritiku), průměr PSČ
+    se stejnými prvními třemi a pak dvěma číslicemi. None, pokud nic nesedí.
+    """
+    places = _get_places()
+    code = normalize_postal_code(postal_code)
+
+    if code and code in places.by_postal_code:
+        return places.by_postal_code[code]
+
+    if municipality:
+        point = places.by_municipality.get(fold(municipality.strip()))
+        if point:
+            return point
+
+    if code:
+        for length in (3, 2):
+            point = places.by_prefix.get(code[:length])
+            if point:
+                return point
+
+    return None
+
+
+def coordinates_for(row: Dict) -> Dict[str, Optional[float]]:
+    """Sloupce latitude a longitude pro inzerát podle jeho PSČ a obce"""
+    point = lookup(row.get('postal_code'), row.get('municipality') or row.get('city'))
+    if point is None:
+        return {'latitude': None, 'longitude': None}
+    return {'latitude': point[0], 'longitude': point[1]}
+
+
+def distance_km(a: Point, b: Point) -> float:
+    """Vzdálenost dvou bodů po povrchu Země (haversine)"""
+    lat1, lon1 = map(math.radians, a)
+    lat2, lon2 = map(math.radians, b)
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+def bounding_box(center: Point, radius_km: float) -> Tuple[float, float, float, float]:
+    """Obdélník (min_lat, min_lon, max_lat, max_lon) opsaný kruhu o poloměru radius_km"""
+    lat, lon = center
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    delta_lon = math.degrees(radius_km / (EARTH_RADIUS_KM * max(math.cos(math.radians(lat)), 0.01)))
+    return lat - delta_lat, lon - delta_lon, lat + delta_lat, lon + delta_lon
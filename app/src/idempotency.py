@@ -0,0 +1,254 @@
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import Flask, Response, current_app, jsonify, request, session
+
+from src.cache import TTLCache
+from src.services.token_service import verify_token
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Idempotentní POST požadavky (hlavička Idempotency-Key). První požadavek s klíčem
+# se provede a jeho úspěšná odpověď se uloží; opakování vrátí uloženou odpověď
+# bez práce s databází. Opakování, které dorazí, zatímco první požadavek ještě
+# běží, počká na jeho výsledek.
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+# Jak dlouho se drží uložené odpovědi (v sekundách)
+IDEMPOTENCY_TTL = float(os.getenv('IDEMPOTENCY_TTL', str(24 * 3600)))
+# Nejdéle tak dlouho smí běžet první požadavek; pak klíč propadne (pád workeru)
+IDEMPOTENCY_LEASE = float(os.getenv('IDEMPOTENCY_LEASE', '60'))
+# Jak dlouho opakování čeká na dokončení prvního požadavku, než vrátí 409
+IDEMPOTENCY_WAIT = float(os.getenv('IDEMPOTENCY_WAIT', '10'))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv('IDEMPOTENCY_CACHE_SIZE', '100000'))
+
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+
+PENDING = 'pending'
+DONE = 'done'
+
+
+class LocalIdempotencyStore:
+    """Uložené odpovědi v paměti workeru, běžící požadavky jako threading.Event"""
+
+    def __init__(self, maxsize: int = IDEMPOTENCY_CACHE_SIZE, ttl: float = IDEMPOTENCY_TTL):
+        self._done = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._running: Dict[str, Tuple[threading.Event, str]] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, key: str, fingerprint: str, wait: float) -> Optional[Dict[str, Any]]:
+        """
+        Rezervace klíče
+
+        Returns:
+            None, pokud má požadavek proběhnout; jinak záznam klíče: uloženou
+            odpověď (state done), nebo stále běžící požadavek (state pending)
+        """
+        deadline = time.monotonic() + wait
+        while True:
+            with self._lock:
+                entry = self._done.get(key)
+                if entry is not None:
+                    return entry
+
+                running = self._running.get(key)
+                if running is None:
+                    self._running[key] = (threading.Event(), fingerprint)
+                    return None
+
+            event, running_fingerprint = running
+            remaining = deadline - time.monotonic()
+            if running_fingerprint != fingerprint or remaining <= 0 or not event.wait(remaining):
+                return {'state': PENDING, 'fingerprint': running_fingerprint}
+
+    def finish(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._done.set(key, entry)
+            running = self._running.pop(key, None)
+        if running:
+            running[0].set()
+
+    def abandon(self, key: str) -> None:
+        # Neúspěšný požadavek se neukládá, opakování ho provede znovu
+        with self._lock:
+            running = self._running.pop(key, None)
+        if running:
+            running[0].set()
+
+
+class RedisIdempotencyStore:
+    """
+    Sdílené úložiště pro všechny workery
+
+    Rezervace je SET NX se záznamem pending a expirací IDEMPOTENCY_LEASE,
+    opakování se dotazuje, dokud se záznam nezmění na done.
+    """
+
+    def __init__(self, url: str, ttl: float = IDEMPOTENCY_TTL, lease: float = IDEMPOTENCY_LEASE):
+        self.ttl = ttl
+        self.lease = lease
+        self.prefix = 'realitni:idempotency:'
+        self._client = redis.Redis.from_url(url)
+
+    def begin(self, key: str, fingerprint: str, wait: float) -> Optional[Dict[str, Any]]:
+        deadline = time.monotonic() + wait
+        pending = json.dumps({'state': PENDING, 'fingerprint': fingerprint})
+        while True:
+            if self._client.set(self.prefix + key, pending, nx=True, px=int(self.lease * 1000)):
+                return None
+
+            raw = self._client.get(self.prefix + key)
+            if raw is None:
+                continue
+
+            entry = json.loads(raw)
+            if entry['state'] == DONE or entry['fingerprint'] != fingerprint or time.monotonic() >= deadline:
+                return entry
+            time.sleep(POLL_INTERVAL)
+
+    def finish(self, key: str, entry: Dict[str, Any]) -> None:
+        self._client.set(self.prefix + key, json.dumps(entry), px=int(self.ttl * 1000))
+
+    def abandon(self, key: str) -> None:
+        self._client.delete(self.prefix + key)
+
+
+def shared_store_url() -> Optional[str]:
+    """
+    Adresa Redisu pro sdílené úložiště (CACHE_REDIS_URL), nebo None
+
+    Raises:
+        Exception: Pokud je Redis nastavený, ale chybí balíček redis; úložiště
+            v paměti workeru by opakování na jiném workeru nepoznalo
+    """
+    redis_url = os.getenv('CACHE_REDIS_URL')
+    if redis_url and redis is None:
+        raise Exception("Pro sdílené Idempotency-Key (CACHE_REDIS_URL) je potřeba nainstalovat balíček redis")
+    return redis_url or None
+
+
+def create_store() -> Any:
+    # Sdílené úložiště, pokud je nastavený Redis pro cache (CACHE_REDIS_URL)
+    redis_url = shared_store_url()
+    if redis_url:
+        return RedisIdempotencyStore(redis_url)
+    return LocalIdempotencyStore()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> Any:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_store()
+    return _store
+
+
+def init_app(app: Flask) -> None:
+    # Chybějící balíček redis se ohlásí při startu, ne až prvním požadavkem s klíčem
+    shared_store_url()
+
+
+def get_idempotency_key() -> Optional[str]:
+    """
+    Hodnota hlavičky Idempotency-Key aktuálního požadavku
+
+    Raises:
+        ValueError: Pokud klíč není platný
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None:
+        return None
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable():
+        raise ValueError(f'Neplatná hlavička {IDEMPOTENCY_HEADER}')
+    return key
+
+
+def _error(message: str, status: int) -> Response:
+    response = jsonify({'status': 'error', 'message': message})
+    response.status_code = status
+    return response
+
+
+def idempotent(scope: str) -> Callable:
+    """
+    Dekorátor route: s hlavičkou Idempotency-Key se požadavek provede
+    nejvýše jednou a opakování dostanou uloženou odpověď
+
+    Klíč platí pro přihlášeného uživatele a danou operaci. Stejný klíč
+    s jiným tělem požadavku vrací 422, opakování během stále běžícího
+    prvního požadavku po IDEMPOTENCY_WAIT sekundách 409. Ukládají se jen
+    úspěšné odpovědi (2xx); po chybě lze požadavek se stejným klíčem zopakovat.
+    """
+
+    def decorator(view: Callable) -> Callable:
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                key = get_idempotency_key()
+            except ValueError as e:
+                return _error(str(e), 400)
+
+            token = session.get('token')
+            if key is None or not token:
+                return view(*args, **kwargs)
+
+            try:
+                user_id = verify_token(token)['sub']
+            except Exception:
+                # Neplatné přihlášení ohlásí sama route
+                return view(*args, **kwargs)
+
+            store_key = f'{scope}:{user_id}:{key}'
+            fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+            store = get_store()
+
+            entry = store.begin(store_key, fingerprint, IDEMPOTENCY_WAIT)
+            if entry is not None:
+                if entry['fingerprint'] != fingerprint:
+                    return _error(f'{IDEMPOTENCY_HEADER} už byl použit pro jiný požadavek', 422)
+                if entry['state'] == PENDING:
+                    response = _error('Požadavek se stejným klíčem se ještě zpracovává', 409)
+                    response.headers['Retry-After'] = '1'
+                    return response
+
+                response = Response(entry['body'], status=entry['status'], mimetype=entry['mimetype'])
+                response.headers['Idempotent-Replayed'] = 'true'
+                return response
+
+            try:
+                response = current_app.make_response(view(*args, **kwargs))
+            except BaseException:
+                store.abandon(store_key)
+                raise
+
+            if 200 <= response.status_code < 300:
+                store.finish(store_key, {
+                    'state': DONE,
+                    'fingerprint': fingerprint,
+                    'status': response.status_code,
+                    'mimetype': response.mimetype,
+                    'body': response.get_data(as_text=True),
+                })
+            else:
+                store.abandon(store_key)
+            return response
+
+        return wrapper
+
+    return decorator
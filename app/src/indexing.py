@@ -0,0 +1,121 @@
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class IncrementalIndex:
+    """
+    Základ paměťových indexů inzerátů (výpis makléřům, fulltext, ...)
+
+    Index se naplní celý přes rebuild() z postupného čtení tabulky a pak se
+    udržuje po jednotlivých změnách přes upsert()/remove(). Přestavba staví
+    nový stav mimo zámek, dotazy mezitím obsluhuje starý; změny, které
+    přijdou během přestavby, se do nového stavu přehrají před výměnou.
+
+    Podtřídy implementují _new_state(), _apply_upsert() a _apply_remove(),
+    případně _finish() (dokončení stavu po hromadném naplnění) a _changed()
+    (zahození odvozených cache).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._state = self._finish(self._new_state())
+        # Změny zaznamenané během přestavby
+        self._journal: Optional[List[Tuple[str, Any]]] = None
+        self.ready = False
+        self.built_at: Optional[float] = None
+        self.rebuilds = 0
+
+    def _new_state(self) -> Any:
+        raise NotImplementedError
+
+    def _apply_upsert(self, state: Any, row: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _apply_remove(self, state: Any, id: str) -> None:
+        raise NotImplementedError
+
+    def _finish(self, state: Any) -> Any:
+        return state
+
+    def _changed(self) -> None:
+        pass
+
+    def rebuild(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Sestavení indexu z řádků tabulky; vrací počet zaindexovaných záznamů"""
+        return rebuild_indexes([self], rows)[0]
+
+    def _begin_rebuild(self) -> Any:
+        with self._lock:
+            self._journal = []
+        return self._new_state()
+
+    def _abort_rebuild(self) -> None:
+        with self._lock:
+            self._journal = None
+
+    def _commit_rebuild(self, state: Any) -> int:
+        with self._lock:
+            for operation, value in self._journal:
+                if operation == 'upsert':
+                    self._apply_upsert(state, value)
+                else:
+                    self._apply_remove(state, value)
+            self._journal = None
+            self._state = state
+            self._changed()
+            self.ready = True
+            self.built_at = time.time()
+            self.rebuilds += 1
+            return len(self)
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        row = dict(row)
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append(('upsert', row))
+            self._apply_upsert(self._state, row)
+            self._changed()
+
+    def remove(self, id: str) -> None:
+        id = str(id)
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append(('remove', id))
+            self._apply_remove(self._state, id)
+            self._changed()
+
+    def __contains__(self, id: str) -> bool:
+        return str(id) in self._state.rows
+
+    def __len__(self) -> int:
+        return len(self._state.rows)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'ready': self.ready,
+            'size': len(self),
+            'built_at': self.built_at,
+            'rebuilds': self.rebuilds
+        }
+
+
+def rebuild_indexes(indexes: Sequence[IncrementalIndex], rows: Iterable[Dict[str, Any]]) -> List[int]:
+    """
+    Sestavení několika indexů z jednoho průchodu řádky tabulky
+
+    Každý index dostane vlastní kopii řádku. Vrací počty zaindexovaných
+    záznamů ve stejném pořadí jako indexes.
+    """
+    states = [index._begin_rebuild() for index in indexes]
+    try:
+        for row in rows:
+            for index, state in zip(indexes, states):
+                index._apply_upsert(state, dict(row))
+        states = [index._finish(state) for index, state in zip(indexes, states)]
+    except Exception:
+        for index in indexes:
+            index._abort_rebuild()
+        raise
+
+    return [index._commit_rebuild(state) for index, state in zip(indexes, states)]
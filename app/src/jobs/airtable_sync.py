@@ -0,0 +1,183 @@
+"""
+Průběžná synchronizace uživatelů a kreditních transakcí do Airtable
+
+Každá tabulka má v airtable_sync_state watermark, pozici (sloupec změny, id)
+posledního odeslaného řádku. Job čte jen řádky za ní, vzestupně po stránkách,
+a zapisuje je do Airtable upsertem podle id v dávkách po 10 záznamech
+(víc Airtable v jednom požadavku nepřijme), nejvýše AIRTABLE_RATE_LIMIT
+požadavků za sekundu. Watermark se posune až po zapsání celé stránky, takže
+po chybě se stránka odešle znovu; upsert podle id je opakovatelný.
+
+Čtou se jen řádky starší než AIRTABLE_SYNC_LAG sekund: transakce zapsaná
+právě teď může mít created_at menší než řádek, který už job přečetl, a za
+watermarkem by se neobjevila. Smazané řádky se nepřenášejí.
+
+Použití:
+    python -m src.jobs.airtable_sync [--once] [--table users]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from src.airtable import MAX_BATCH_SIZE, AirtableClient, create_client
+from src.database import pooled_client
+from src.services.credit_service import get_supabase
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = int(os.getenv('AIRTABLE_SYNC_PAGE_SIZE', '500'))
+# Souběžných požadavků na Airtable (rozestupy mezi nimi hlídá klient)
+AIRTABLE_CONCURRENCY = int(os.getenv('AIRTABLE_CONCURRENCY', '3'))
+# Prodleva mezi běhy v nepřetržitém režimu (v sekundách)
+AIRTABLE_SYNC_INTERVAL = float(os.getenv('AIRTABLE_SYNC_INTERVAL', '60'))
+# Čtou se jen řádky starší než tato doba (v sekundách), viz popis modulu
+AIRTABLE_SYNC_LAG = float(os.getenv('AIRTABLE_SYNC_LAG', '30'))
+
+# Synchronizované tabulky: sloupec změny (watermark), přenášená pole a tabulka v Airtable
+SYNC_TABLES = {
+    'users': {
+        'watermark': 'updated_at',
+        'fields': [
+            'id', 'email', 'user_type', 'full_name', 'status', 'auth_provider',
+            'created_at', 'last_login', 'updated_at'
+        ],
+        'airtable_table': os.getenv('AIRTABLE_USERS_TABLE', 'Users'),
+    },
+    'credit_transactions': {
+        'watermark': 'created_at',
+        'fields': [
+            'id', 'agent_id', 'amount', 'transaction_type', 'description',
+            'payment_id', 'balance_after', 'created_at'
+        ],
+        'airtable_table': os.getenv('AIRTABLE_CREDIT_TRANSACTIONS_TABLE', 'Credit transactions'),
+    },
+}
+
+def _load_state(supabase, table: str) -> Dict[str, Any]:
+    response = supabase.table('airtable_sync_state').select('*').eq('table_name', table).execute()
+    if response.data:
+        return response.data[0]
+    return {'table_name': table, 'watermark': None, 'last_id': None, 'rows_synced': 0}
+
+def _save_state(supabase, state: Dict[str, Any]) -> None:
+    supabase.table('airtable_sync_state').upsert({
+        'table_name': state['table_name'],
+        'watermark': state['watermark'],
+        'last_id': state['last_id'],
+        'rows_synced': state['rows_synced'],
+        'updated_at': datetime.now(timezone.utc).isoformat(),
+    }, on_conflict='table_name').execute()
+
+def _fetch_changes(supabase, table: str, config: Dict[str, Any], state: Dict[str, Any], until: str) -> List[Dict[str, Any]]:
+    # Řádky za watermarkem (sloupec změny, id), seřazené vzestupně
+    column = config['watermark']
+    query = supabase.table(table).select(','.join(config['fields'])).lt(column, until)
+    if state['watermark']:
+        watermark, last_id = state['watermark'], state['last_id']
+        query = query.or_(
+            f'{column}.gt."{watermark}",and({column}.eq."{watermark}",id.gt.{last_id})'
+        )
+    # Řazení podle obou sloupců klíče musí být v jednom parametru order
+    return query.order(f'{column},id').limit(PAGE_SIZE).execute().data or []
+
+def _write_page(client: AirtableClient, executor: ThreadPoolExecutor, airtable_table: str,
+                rows: List[Dict[str, Any]]) -> int:
+    batches = [rows[start:start + MAX_BATCH_SIZE] for start in range(0, len(rows), MAX_BATCH_SIZE)]
+    # Výjimka kterékoli dávky ukončí běh dřív, než se posune watermark
+    return sum(executor.map(lambda batch: client.upsert_batch(airtable_table, batch), batches))
+
+def sync_table(table: str, client: AirtableClient, executor: ThreadPoolExecutor, supabase=None) -> int:
+    """
+    Odeslání změn jedné tabulky od posledního watermarku
+
+    Args:
+        table: Název tabulky (klíč SYNC_TABLES)
+        client: Klient Airtable
+        executor: Vlákna pro souběžné odesílání dávek
+        supabase: Supabase klient (výchozí get_supabase())
+
+    Returns:
+        Počet odeslaných řádků
+
+    Raises:
+        Exception: Pokud čtení, zápis do Airtable nebo uložení watermarku selže
+    """
+    supabase = supabase or get_supabase()
+    config = SYNC_TABLES[table]
+    until = (datetime.now(timezone.utc) - timedelta(seconds=AIRTABLE_SYNC_LAG)).isoformat()
+    synced = 0
+
+    try:
+        state = _load_state(supabase, table)
+        while True:
+            rows = _fetch_changes(supabase, table, config, state, until)
+            if not rows:
+                break
+
+            _write_page(client, executor, config['airtable_table'], rows)
+
+            last = rows[-1]
+            state['watermark'] = last[config['watermark']]
+            state['last_id'] = last['id']
+            state['rows_synced'] = (state.get('rows_synced') or 0) + len(rows)
+            _save_state(supabase, state)
+            synced += len(rows)
+
+            if len(rows) < PAGE_SIZE:
+                break
+    except Exception as e:
+        raise Exception(f"Synchronizace tabulky {table} do Airtable selhala: {str(e)}")
+
+    return synced
+
+def sync_all(client: AirtableClient, tables: Optional[List[str]] = None, supabase=None) -> Dict[str, int]:
+    """
+    Jeden běh synchronizace vybraných tabulek (výchozí všechny z SYNC_TABLES)
+
+    Returns:
+        Dict název tabulky -> počet odeslaných řádků
+    """
+    result = {}
+    with ThreadPoolExecutor(max_workers=AIRTABLE_CONCURRENCY, thread_name_prefix='airtable') as executor:
+        for table in tables or list(SYNC_TABLES):
+            result[table] = sync_table(table, client, executor, supabase)
+    return result
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Synchronizace změn do Airtable')
+    parser.add_argument('--once', action='store_true', help='jeden běh místo nepřetržité synchronizace')
+    parser.add_argument('--table', action='append', choices=list(SYNC_TABLES), help='jen vybraná tabulka (lze opakovat)')
+    args = parser.parse_args()
+
+    client = create_client()
+    if client is None:
+        logger.error("Chybí AIRTABLE_BASE_ID nebo AIRTABLE_API_KEY")
+        return 1
+
+    while True:
+        try:
+            # Každý běh si klienta půjčí z poolu a po dokončení ho vrátí
+            with pooled_client() as supabase:
+                result = sync_all(client, args.table, supabase)
+            logger.info(
+                "Synchronizace dokončena: %s, požadavků %d, opakování %d",
+                ", ".join(f"{table} {count}" for table, count in result.items()),
+                client.stats()['requests'], client.stats()['retries']
+            )
+        except Exception as e:
+            logger.error("%s", str(e))
+            if args.once:
+                return 1
+
+        if args.once:
+            return 0
+        time.sleep(AIRTABLE_SYNC_INTERVAL)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    sys.exit(main())
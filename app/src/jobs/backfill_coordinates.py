@@ -0,0 +1,62 @@
+"""
+Doplnění souřadnic inzerátům bez latitude a longitude
+
+Souřadnice se dohledají z PSČ a obce v offline tabulce (src/geocoding.py)
+a zapíšou po jednom inzerátu. Inzeráty, které se dohledat nepodařilo,
+pouze nahlásí.
+
+Použití:
+    python -m src.jobs.backfill_coordinates
+"""
+import logging
+import sys
+from typing import Dict
+
+from src.geocoding import coordinates_for
+from src.pagination import apply_keyset, paginate
+from src.services.credit_service import get_supabase
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 500
+
+def backfill_coordinates() -> Dict[str, int]:
+    """
+    Doplnění souřadnic všem inzerátům, které je nemají
+
+    Returns:
+        Dict s počty updated a unresolved
+
+    Raises:
+        Exception: Pokud čtení nebo zápis selže
+    """
+    supabase = get_supabase()
+    result = {"updated": 0, "unresolved": 0}
+    cursor = None
+
+    try:
+        while True:
+            query = supabase.table("properties").select("id,created_at,postal_code,municipality,city").is_("latitude", "null")
+            rows, cursor = paginate(apply_keyset(query, cursor, PAGE_SIZE).execute().data, PAGE_SIZE)
+
+            for row in rows:
+                coordinates = coordinates_for(row)
+                if coordinates["latitude"] is None:
+                    logger.warning("Inzerát %s: souřadnice pro PSČ %s nenalezeny", row["id"], row.get("postal_code"))
+                    result["unresolved"] += 1
+                    continue
+                supabase.table("properties").update(coordinates).eq("id", row["id"]).execute()
+                result["updated"] += 1
+
+            if not cursor:
+                break
+    except Exception as e:
+        raise Exception(f"Doplnění souřadnic selhalo: {str(e)}")
+
+    return result
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    result = backfill_coordinates()
+    logger.info("Doplněno souřadnic: %d, nedohledáno: %d", result["updated"], result["unresolved"])
+    sys.exit(0)
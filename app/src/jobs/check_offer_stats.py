@@ -0,0 +1,32 @@
+"""
+Kontrola souhrnů nabídek inzerátů proti tabulce agent_offers
+
+Porovná řádky property_offer_stats s hodnotami spočítanými znovu z nabídek
+(databázová funkce check_property_offer_stats). S --fix nesouhlasící
+souhrny hromadně přepočítá.
+
+Použití:
+    python -m src.jobs.check_offer_stats [--fix]
+"""
+import argparse
+import logging
+import sys
+
+from src.services.offer_service import check_offer_stats
+
+logger = logging.getLogger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kontrola souhrnů nabídek inzerátů")
+    parser.add_argument("--fix", action="store_true", help="nesouhlasící souhrny přepočítat")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    mismatches = check_offer_stats(fix=args.fix)
+    for row in mismatches:
+        logger.warning(
+            "Nesoulad souhrnu nabídek inzerátu %s: uloženo %s nabídek, skutečně %s",
+            row["property_id"], row["stored_offer_count"], row["actual_offer_count"]
+        )
+    logger.info("Kontrola dokončena, nesouhlasících inzerátů: %d%s", len(mismatches), " (opraveno)" if args.fix and mismatches else "")
+    sys.exit(1 if mismatches and not args.fix else 0)
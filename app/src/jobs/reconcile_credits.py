@@ -0,0 +1,50 @@
+"""
+Kontrola zůstatků kreditů proti ledgeru
+
+Porovná agent_credits.balance se součtem credit_transactions a s hodnotou
+balance_after posledního řádku ledgeru pro všechny makléře najednou
+(databázová funkce reconcile_agent_credits). Nesoulad pouze hlásí, zůstatky
+neopravuje.
+
+Použití:
+    python -m src.jobs.reconcile_credits
+"""
+import logging
+import sys
+from typing import Any, Dict, List
+
+from src.services.credit_service import get_supabase
+
+logger = logging.getLogger(__name__)
+
+def reconcile_credits() -> List[Dict[str, Any]]:
+    """
+    Nalezení makléřů, jejichž zůstatek neodpovídá ledgeru
+
+    Returns:
+        List záznamů s agent_id, balance, ledger_total, last_balance_after a transaction_count
+
+    Raises:
+        Exception: Pokud kontrola selže
+    """
+    supabase = get_supabase()
+
+    try:
+        response = supabase.rpc("reconcile_agent_credits", {}).execute()
+    except Exception as e:
+        raise Exception(f"Kontrola zůstatků kreditů selhala: {str(e)}")
+
+    mismatches = response.data or []
+    for row in mismatches:
+        logger.warning(
+            "Nesoulad kreditů makléře %s: zůstatek %s, součet ledgeru %s, poslední balance_after %s",
+            row["agent_id"], row["balance"], row["ledger_total"], row["last_balance_after"]
+        )
+
+    return mismatches
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    mismatches = reconcile_credits()
+    logger.info("Kontrola dokončena, nesouhlasících makléřů: %d", len(mismatches))
+    sys.exit(1 if mismatches else 0)
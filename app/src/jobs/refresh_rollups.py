@@ -0,0 +1,50 @@
+"""
+Doplnění denních souhrnů pro statistiky (GET /api/stats)
+
+Započte do denních souhrnů kreditů, odemčení kontaktů a nových inzerátů
+jen řádky přidané od posledního běhu (databázová funkce refresh_daily_rollups).
+Opakovaný běh nic nezapočte dvakrát, takže job lze spouštět často, např.
+z cronu každých 5 minut.
+
+Použití:
+    python -m src.jobs.refresh_rollups
+"""
+import logging
+import os
+import sys
+from typing import Dict
+
+from src.services.credit_service import get_supabase
+
+logger = logging.getLogger(__name__)
+
+# Započítávají se jen řádky starší než tato doba (v sekundách), viz migrace 011
+ROLLUP_LAG = int(os.getenv("ROLLUP_LAG", "30"))
+
+def refresh_rollups() -> Dict[str, int]:
+    """
+    Započtení nových řádků do denních souhrnů
+
+    Returns:
+        Dict zdrojová tabulka -> počet nově započtených řádků
+
+    Raises:
+        Exception: Pokud doplnění selže
+    """
+    supabase = get_supabase()
+
+    try:
+        response = supabase.rpc("refresh_daily_rollups", {"p_lag_seconds": ROLLUP_LAG}).execute()
+    except Exception as e:
+        raise Exception(f"Doplnění denních souhrnů selhalo: {str(e)}")
+
+    return {row["source"]: row["rows_processed"] for row in response.data or []}
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    result = refresh_rollups()
+    logger.info(
+        "Denní souhrny doplněny: %s",
+        ", ".join(f"{source} {count}" for source, count in result.items())
+    )
+    sys.exit(0)
@@ -0,0 +1,200 @@
+import heapq
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.indexing import IncrementalIndex
+
+# Fasety, podle kterých makléři filtrují výpis aktivních inzerátů
+FACET_FIELDS = ('city', 'municipality', 'cadastral_area', 'property_type')
+
+# Klíč řazení (created_at, id) - stejný jako u keyset stránkování v databázi.
+# created_at z PostgREST je ISO text v UTC, takže se řadí správně i jako řetězec.
+SortKey = Tuple[str, str]
+
+# Počet zapamatovaných výsledků facet_counts(); při každé změně indexu se zahodí
+FACET_CACHE_SIZE = 256
+
+
+class _IndexState:
+    """Data jednoho sestavení indexu; při přestavbě se vymění celé najednou"""
+
+    def __init__(self, facets: Tuple[str, ...]):
+        self.facets = facets
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.keys: Dict[str, SortKey] = {}
+        # Všechny klíče vzestupně; výpis od nejnovějších jde od konce
+        self.order: List[SortKey] = []
+        # Posting listy: faseta -> hodnota -> množina ID inzerátů
+        self.postings: Dict[str, Dict[str, Set[str]]] = {facet: {} for facet in facets}
+
+    def add(self, row: Dict[str, Any]) -> None:
+        id = str(row['id'])
+        self.remove(id)
+
+        key = (row['created_at'], id)
+        self.rows[id] = row
+        self.keys[id] = key
+        insort(self.order, key)
+
+        for facet in self.facets:
+            value = row.get(facet)
+            if value is not None:
+                self.postings[facet].setdefault(value, set()).add(id)
+
+    def remove(self, id: str) -> None:
+        row = self.rows.pop(id, None)
+        if row is None:
+            return
+
+        key = self.keys.pop(id)
+        del self.order[bisect_left(self.order, key)]
+
+        for facet in self.facets:
+            value = row.get(facet)
+            ids = self.postings[facet].get(value)
+            if ids is not None:
+                ids.discard(id)
+                if not ids:
+                    del self.postings[facet][value]
+
+
+class ListingIndex(IncrementalIndex):
+    """
+    Paměťový fasetový index aktivních inzerátů
+
+    Pro každou fasetu drží posting listy (hodnota -> množina ID), filtr je
+    průnik těchto množin od nejmenší. Výsledek se vrací seřazený od
+    nejnovějších se stejným kurzorem jako keyset stránkování v databázi.
+    """
+
+    def __init__(self, facets: Tuple[str, ...] = FACET_FIELDS):
+        self.facets = facets
+        self._facet_cache: Dict[frozenset, Dict[str, Dict[str, int]]] = {}
+        super().__init__()
+
+    def _new_state(self) -> _IndexState:
+        return _IndexState(self.facets)
+
+    def _apply_upsert(self, state: _IndexState, row: Dict[str, Any]) -> None:
+        id = str(row['id'])
+        # update_property vrací jen změněný řádek, ale může jít o částečná data
+        merged = {**state.rows.get(id, {}), **row}
+        if merged.get('status') == 'active' and merged.get('created_at'):
+            state.add(merged)
+        else:
+            state.remove(id)
+
+    def _apply_remove(self, state: _IndexState, id: str) -> None:
+        state.remove(id)
+
+    def _changed(self) -> None:
+        self._facet_cache.clear()
+
+    # Dotazy
+
+    def search(
+        self,
+        filters: Optional[Dict[str, str]] = None,
+        after: Optional[SortKey] = None,
+        limit: int = 50
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Inzeráty odpovídající filtrům, od nejnovějších
+
+        Args:
+            filters: {faseta: hodnota}
+            after: Klíč (created_at, id) posledního řádku předchozí stránky
+            limit: Počet řádků
+
+        Returns:
+            Tuple (řádky, zda existuje další stránka)
+        """
+        with self._lock:
+            state = self._state
+            matched = self._match(state, filters or {})
+            end = bisect_left(state.order, after) if after else len(state.order)
+
+            if matched is None:
+                keys = state.order[max(0, end - limit - 1):end][::-1]
+            elif (limit + 1) * len(state.order) <= len(matched) ** 2:
+                # Průchod pořadím narazí na shodu zhruba každých len(order)/len(matched) kroků
+                keys = self._scan(state, matched, end, limit + 1)
+            else:
+                keys = heapq.nlargest(
+                    limit + 1,
+                    (state.keys[id] for id in matched if not after or state.keys[id] < after)
+                )
+
+            rows = [state.rows[id] for _, id in keys[:limit]]
+            return rows, len(keys) > limit
+
+    def facet_counts(self, filters: Optional[Dict[str, str]] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Počty inzerátů pro každou hodnotu každé fasety
+
+        Počty fasety se počítají s ostatními filtry, ne s filtrem té fasety
+        samotné, aby šlo zobrazit i alternativy k vybrané hodnotě.
+        """
+        filters = filters or {}
+        cache_key = frozenset(filters.items())
+
+        with self._lock:
+            counts = self._facet_cache.get(cache_key)
+            if counts is not None:
+                return counts
+
+            state = self._state
+            counts = {}
+            for facet in self.facets:
+                others = {field: value for field, value in filters.items() if field != facet}
+                base = self._match(state, others)
+                if base is None:
+                    counts[facet] = {value: len(ids) for value, ids in state.postings[facet].items()}
+                else:
+                    # Průnik množin běží v C a prochází vždy menší z nich
+                    counts[facet] = {
+                        value: count for value, ids in state.postings[facet].items()
+                        if (count := len(ids & base))
+                    }
+
+            if len(self._facet_cache) >= FACET_CACHE_SIZE:
+                self._facet_cache.clear()
+            self._facet_cache[cache_key] = counts
+            return counts
+
+    def _match(self, state: _IndexState, filters: Dict[str, str]) -> Optional[Set[str]]:
+        # Průnik posting listů od nejmenšího; None znamená bez filtru (všechny inzeráty).
+        # Pro jediný filtr se vrací přímo posting list, volající ho nesmí měnit.
+        if not filters:
+            return None
+
+        postings = []
+        for field, value in filters.items():
+            ids = state.postings[field].get(value)
+            if not ids:
+                return set()
+            postings.append(ids)
+
+        if len(postings) == 1:
+            return postings[0]
+
+        postings.sort(key=len)
+        return postings[0].intersection(*postings[1:])
+
+    def _scan(self, state: _IndexState, matched: Set[str], end: int, count: int) -> List[SortKey]:
+        # Průchod globálním pořadím od kurzoru; vyplatí se pro málo selektivní filtry,
+        # pro selektivní je levnější vybrat nejnovější přímo ze shod (nlargest)
+        keys = []
+        for position in range(end - 1, -1, -1):
+            key = state.order[position]
+            if key[1] in matched:
+                keys.append(key)
+                if len(keys) == count:
+                    break
+        return keys
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            'facet_values': {facet: len(values) for facet, values in self._state.postings.items()}
+        }
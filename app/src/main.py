@@ -1,60 +1,190 @@
 import os
 import sys
-from flask import Flask, jsonify
+import threading
+from flask import Flask, abort, jsonify, send_from_directory
 from dotenv import load_dotenv
-from supabase import create_client, Client
 
 # Přidání cesty pro správné importy
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-# Načtení proměnných prostředí
-load_dotenv()
-
-# Inicializace Flask aplikace
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'default-secret-key')
-
-# Inicializace Supabase klienta
-supabase_url = os.getenv('SUPABASE_URL')
-supabase_key = os.getenv('SUPABASE_KEY')
-supabase: Client = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
-
-# Registrace blueprintů
-from src.routes.auth import auth_bp
-from src.routes.properties import properties_bp
-from src.routes.agents import agents_bp
-from src.routes.sellers import sellers_bp
-from src.routes.credits import credits_bp
-
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(properties_bp, url_prefix='/api/properties')
-app.register_blueprint(agents_bp, url_prefix='/api/agent')
-app.register_blueprint(sellers_bp, url_prefix='/api/seller')
-app.register_blueprint(credits_bp, url_prefix='/api/credits')
-
-# Základní route pro kontrolu stavu API
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    return jsonify({
-        'status': 'ok',
-        'message': 'API je funkční',
-        'supabase_connected': supabase is not None
-    })
-
-# Obsluha chyb
-@app.errorhandler(404)
-def not_found(error):
-    return jsonify({
-        'status': 'error',
-        'message': 'Požadovaný zdroj nebyl nalezen'
-    }), 404
-
-@app.errorhandler(500)
-def server_error(error):
-    return jsonify({
-        'status': 'error',
-        'message': 'Interní chyba serveru'
-    }), 500
+# Aplikaci vytváří create_app(); import modulu nic neinicializuje. Supabase
+# klienti (src/database.py) vznikají až při prvním dotazu v každém procesu
+# a po forku se zahodí, takže si je workeři nesdílejí. Pro gunicorn s --preload
+# viz gunicorn.conf.py: úlohy na pozadí a zahřátí spojení spouští až worker.
+
+# Počet klientů poolu, jejichž spojení se otevřou po startu workeru (0 = bez zahřátí)
+SUPABASE_WARMUP = int(os.getenv('SUPABASE_WARMUP', '0'))
+
+# Proces, ve kterém už běží úlohy na pozadí (indexy inzerátů, notifikace)
+_worker_pid = None
+_worker_lock = threading.Lock()
+_app_lock = threading.Lock()
+
+
+def init_worker():
+    """
+    Start úloh na pozadí a zahřátí spojení se Supabase, jednou v každém procesu
+
+    Při předběžném načtení aplikace (gunicorn --preload) se volá v každém
+    workeru po forku (post_worker_init), jinak přímo z create_app().
+    """
+    global _worker_pid
+
+    with _worker_lock:
+        if _worker_pid == os.getpid():
+            return
+        _worker_pid = os.getpid()
+
+    from src.database import is_configured, get_pool
+    if not is_configured():
+        return
+
+    # Naplnění indexů inzerátů pro výpis makléřům, vyhledávání a okolí (na pozadí)
+    from src.services.property_service import start_property_indexes
+    start_property_indexes()
+
+    # Rozesílání notifikací makléřům a prodávajícím (na pozadí)
+    from src.notifications import start_notifications
+    start_notifications()
+
+    if SUPABASE_WARMUP > 0:
+        get_pool().warm_up(SUPABASE_WARMUP)
+
+
+def _reset_after_fork():
+    global _worker_lock, _app_lock
+    _worker_lock = threading.Lock()
+    _app_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _ensure_worker():
+    # Pojistka pro servery, které forkují bez post_worker_init
+    if _worker_pid != os.getpid():
+        init_worker()
+
+
+def create_app(config=None):
+    """
+    Vytvoření Flask aplikace
+
+    Args:
+        config: Hodnoty, které přepíší výchozí app.config
+
+    Returns:
+        Flask aplikace
+    """
+    # Načtení proměnných prostředí
+    load_dotenv()
+
+    # Inicializace Flask aplikace
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'default-secret-key')
+    if config:
+        app.config.update(config)
+
+    # Supabase klienti (pool klientů pro každý worker, viz src/database.py)
+    from src.database import init_app as init_database, is_configured, get_pool
+    init_database(app)
+
+    # Latence požadavků a volání Supabase (GET /api/metrics, hlavička Server-Timing)
+    from src.metrics import init_app as init_metrics, register_gauges
+    init_metrics(app)
+
+    # Limity požadavků na uživatele a endpoint a strop souběžných volání Supabase (429 + Retry-After)
+    from src.rate_limit import init_app as init_rate_limit, rate_limit_stats
+    init_rate_limit(app)
+
+    # Idempotentní POST požadavky (hlavička Idempotency-Key, src/idempotency.py)
+    from src.idempotency import init_app as init_idempotency
+    init_idempotency(app)
+
+    # Registrace blueprintů
+    from src.routes.auth import auth_bp
+    from src.routes.properties import properties_bp
+    from src.routes.agents import agents_bp
+    from src.routes.sellers import sellers_bp
+    from src.routes.credits import credits_bp
+    from src.routes.stats import stats_bp
+
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(properties_bp, url_prefix='/api/properties')
+    app.register_blueprint(agents_bp, url_prefix='/api/agent')
+    app.register_blueprint(sellers_bp, url_prefix='/api/seller')
+    app.register_blueprint(credits_bp, url_prefix='/api/credits')
+    app.register_blueprint(stats_bp, url_prefix='/api/stats')
+
+    from src.services.property_service import listing_index, search_index, geo_index
+    from src.notifications import notification_stats
+    from src.singleflight import singleflight_stats
+
+    register_gauges('supabase_pool', lambda: get_pool().stats() if is_configured() else None)
+    register_gauges('notifications', notification_stats)
+    register_gauges('rate_limit', rate_limit_stats)
+    register_gauges('singleflight', singleflight_stats)
+
+    # Soubory médií z lokálního úložiště (v produkci je servíruje přímo webový server)
+    from src.storage import STORAGE_BACKEND, MEDIA_ROOT, MEDIA_URL
+    if STORAGE_BACKEND == 'local':
+        @app.route(f"{MEDIA_URL.rstrip('/')}/<path:key>", methods=['GET'])
+        def media_file(key):
+            # Rozpracovaná nahrávání (.uploads) nejsou veřejná
+            if key.startswith('.'):
+                abort(404)
+            return send_from_directory(MEDIA_ROOT, key, max_age=86400)
+
+    # Základní route pro kontrolu stavu API
+    @app.route('/api/health', methods=['GET'])
+    def health_check():
+        return jsonify({
+            'status': 'ok',
+            'message': 'API je funkční',
+            'supabase_connected': is_configured(),
+            'supabase_pool': get_pool().stats() if is_configured() else None,
+            'listing_index': listing_index.stats(),
+            'search_index': search_index.stats(),
+            'geo_index': geo_index.stats(),
+            'notifications': notification_stats(),
+            'rate_limit': rate_limit_stats(),
+            'singleflight': singleflight_stats()
+        })
+
+    # Obsluha chyb
+    @app.errorhandler(404)
+    def not_found(error):
+        return jsonify({
+            'status': 'error',
+            'message': 'Požadovaný zdroj nebyl nalezen'
+        }), 404
+
+    @app.errorhandler(500)
+    def server_error(error):
+        return jsonify({
+            'status': 'error',
+            'message': 'Interní chyba serveru'
+        }), 500
+
+    # S předběžným načtením běží create_app() v master procesu, workeři se spustí až po forku
+    if os.getenv('APP_DEFER_WORKER_INIT') == '1':
+        app.before_request(_ensure_worker)
+    else:
+        init_worker()
+
+    return app
+
+
+def __getattr__(name):
+    # Zpětná kompatibilita `src.main:app`: aplikace vznikne až při prvním přístupu
+    if name == 'app':
+        with _app_lock:
+            if 'app' not in globals():
+                globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', debug=True)
+    create_app().run(host='0.0.0.0', debug=True)
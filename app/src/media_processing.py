@@ -0,0 +1,80 @@
+import os
+import shutil
+import subprocess
+from typing import Any, Dict
+
+# Generování odvozených verzí médií. Funkce běží v samostatných procesech
+# (ProcessPoolExecutor v src/services/media_service.py), proto pracují jen
+# se soubory na disku a vrací malé slovníky.
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+FFMPEG = os.getenv('FFMPEG_PATH') or shutil.which('ffmpeg')
+
+# Odvozené verze podle typu média: název -> nejdelší strana v pixelech
+DERIVATIVES = {
+    'photo': {'thumbnail': 320, 'web': 1600},
+    'video': {'poster': 1280},
+}
+
+JPEG_QUALITY = {'thumbnail': 80, 'web': 85, 'poster': 85}
+
+# Čas snímku plakátu videa v sekundách (krátká videa berou první snímek)
+POSTER_TIME = 1.0
+FFMPEG_TIMEOUT = 120
+
+
+def available_derivatives(media_type: str) -> Dict[str, int]:
+    """Odvozené verze, které lze v tomto prostředí vytvořit (fotky potřebují Pillow, videa ffmpeg)"""
+    if media_type == 'photo' and Image is None:
+        return {}
+    if media_type == 'video' and not FFMPEG:
+        return {}
+    return DERIVATIVES.get(media_type, {})
+
+
+def make_derivative(media_type: str, name: str, source: str, target: str) -> Dict[str, Any]:
+    """
+    Vytvoření jedné odvozené verze jako JPEG
+
+    Returns:
+        Dict s width a height výsledného obrázku
+    """
+    max_size = DERIVATIVES[media_type][name]
+    quality = JPEG_QUALITY[name]
+
+    if media_type == 'video':
+        _video_frame(source, target, max_size, quality)
+        if Image is None:
+            return {'width': None, 'height': None}
+        with Image.open(target) as image:
+            return {'width': image.width, 'height': image.height}
+
+    with Image.open(source) as image:
+        # U JPEG dekódovat rovnou ve zmenšeném měřítku; fotky z telefonů mají otočení jen v EXIF
+        image.draft('RGB', (max_size, max_size))
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+        image.save(target, 'JPEG', quality=quality, optimize=True, progressive=True)
+        return {'width': image.width, 'height': image.height}
+
+
+def _video_frame(source: str, target: str, max_size: int, quality: int) -> None:
+    # Kvalita JPEG pro ffmpeg: 2 (nejlepší) až 31
+    qscale = str(max(2, min(31, round((100 - quality) / 3))))
+    scale = f"scale='min({max_size},iw)':'min({max_size},ih)':force_original_aspect_ratio=decrease"
+
+    for seek in (POSTER_TIME, 0):
+        subprocess.run(
+            [FFMPEG, '-v', 'error', '-y', '-ss', str(seek), '-i', source,
+             '-frames:v', '1', '-vf', scale, '-q:v', qscale, target],
+            check=True, timeout=FFMPEG_TIMEOUT,
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+        if os.path.exists(target) and os.path.getsize(target) > 0:
+            return
+
+    raise Exception('Z videa se nepodařilo získat snímek')
+
@@ -0,0 +1,335 @@
+import bisect
+import hmac
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from flask import Flask, Response, g, has_request_context, request
+
+from src.rate_limit import supabase_slot
+
+# Metriky ve formátu Prometheus (GET /api/metrics) a hlavička Server-Timing.
+# Každý worker počítá své metriky v paměti zvlášť (jako cache a indexy), takže
+# /api/metrics vrací hodnoty workeru, který požadavek obsloužil.
+
+# Token pro čtení metrik (Authorization: Bearer ...); bez něj jsou metriky veřejné
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Hranice histogramů latence v sekundách
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Hranice histogramu počtu volání Supabase na jeden požadavek
+CALLS_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21)
+
+# Metody query builderu, které určují druh dotazu
+OPERATIONS = ('select', 'insert', 'update', 'upsert', 'delete')
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: LabelValues = (), value: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Štítky -> [počty v jednotlivých intervalech (poslední je +Inf), součet, počet]
+        self._values: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: LabelValues, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            values = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self._values.items())
+
+        for labels, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else _number(bound)
+                bucket_labels = _labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {count}')
+        return lines
+
+
+REQUEST_LABELS = ('blueprint', 'endpoint', 'method')
+
+request_duration = Histogram(
+    'http_request_duration_seconds', 'Doba zpracování požadavku', REQUEST_LABELS
+)
+requests_total = Counter(
+    'http_requests_total', 'Počet požadavků podle stavového kódu', REQUEST_LABELS + ('status',)
+)
+span_duration = Histogram(
+    'app_span_duration_seconds', 'Doba úseků požadavku (např. ověření uživatele)', ('span',)
+)
+supabase_call_duration = Histogram(
+    'supabase_call_duration_seconds', 'Doba jednoho volání PostgREST', ('table', 'operation')
+)
+supabase_calls_total = Counter(
+    'supabase_calls_total', 'Počet volání PostgREST', ('table', 'operation', 'outcome')
+)
+supabase_rows_total = Counter(
+    'supabase_rows_total', 'Počet řádků vrácených z PostgREST', ('table', 'operation')
+)
+supabase_request_calls = Histogram(
+    'supabase_request_calls', 'Počet volání PostgREST v jednom požadavku', REQUEST_LABELS, CALLS_BUCKETS
+)
+supabase_request_duration = Histogram(
+    'supabase_request_duration_seconds', 'Součet doby volání PostgREST v jednom požadavku', REQUEST_LABELS
+)
+
+METRICS = [
+    request_duration, requests_total, span_duration,
+    supabase_call_duration, supabase_calls_total, supabase_rows_total,
+    supabase_request_calls, supabase_request_duration,
+]
+
+# Okamžité hodnoty (pool klientů, fronta notifikací, ...): prefix -> funkce vracející dict čísel
+_gauges: Dict[str, Callable[[], Optional[Dict[str, Any]]]] = {}
+
+
+def register_gauges(prefix: str, collect: Callable[[], Optional[Dict[str, Any]]]) -> None:
+    """Číselné hodnoty z collect() se vypíší jako gauge <prefix>_<klíč>"""
+    _gauges[prefix] = collect
+
+
+def _render_gauges() -> List[str]:
+    lines = []
+    for prefix, collect in _gauges.items():
+        try:
+            values = collect() or {}
+        except Exception:
+            continue
+        for key, value in values.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            lines.append(f'# TYPE {prefix}_{key} gauge')
+            lines.append(f'{prefix}_{key} {_number(value)}')
+    return lines
+
+
+def render() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    lines.extend(_render_gauges())
+    return '\n'.join(lines) + '\n'
+
+
+def record_supabase_call(table: str, operation: str, duration: float, rows: int, error: bool = False) -> None:
+    supabase_call_duration.observe((table, operation), duration)
+    supabase_calls_total.inc((table, operation, 'error' if error else 'ok'))
+    if rows:
+        supabase_rows_total.inc((table, operation), rows)
+
+    if has_request_context():
+        calls = g.get('supabase_calls')
+        if calls is not None:
+            calls.append((table, duration, rows))
+
+
+@contextmanager
+def timed(span: str) -> Iterator[None]:
+    """Měření úseku požadavku; objeví se v Server-Timing a v app_span_duration_seconds"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - started
+        span_duration.observe((span,), duration)
+        if has_request_context():
+            spans = g.get('metrics_spans')
+            if spans is not None:
+                spans[span] = spans.get(span, 0.0) + duration
+
+
+class TracedQuery:
+    """
+    Obal query builderu postgrest, který měří execute() a drží ho
+    pod stropem souběžných volání Supabase (src/rate_limit.py)
+
+    Řetězení (select, eq, order, ...) vrací další buildery, které se obalí
+    také, takže kód služeb se nemění.
+    """
+
+    def __init__(self, builder: Any, table: str, operation: str):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._builder, name)
+        if not callable(attribute):
+            # Vlastnosti jako not_ vracejí builder
+            if hasattr(attribute, 'execute'):
+                return TracedQuery(attribute, self._table, self._operation)
+            return attribute
+
+        operation = name if name in OPERATIONS else self._operation
+
+        def call(*args, **kwargs):
+            result = attribute(*args, **kwargs)
+            if hasattr(result, 'execute'):
+                return TracedQuery(result, self._table, operation)
+            return result
+
+        return call
+
+    def execute(self) -> Any:
+        # Čekání na místo pod stropem souběžných volání se do doby volání nepočítá
+        with supabase_slot():
+            started = time.perf_counter()
+            try:
+                response = self._builder.execute()
+            except Exception:
+                record_supabase_call(self._table, self._operation, time.perf_counter() - started, 0, error=True)
+                raise
+
+        data = getattr(response, 'data', None)
+        rows = len(data) if isinstance(data, list) else int(bool(data))
+        record_supabase_call(self._table, self._operation, time.perf_counter() - started, rows)
+        return response
+
+
+class TracedClient:
+    """Supabase klient, jehož dotazy do tabulek a RPC se započítávají do metrik"""
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    def table(self, table_name: str) -> TracedQuery:
+        return TracedQuery(self._client.table(table_name), table_name, 'select')
+
+    def from_(self, table_name: str) -> TracedQuery:
+        return self.table(table_name)
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None) -> TracedQuery:
+        return TracedQuery(self._client.rpc(fn, params or {}), f'rpc:{fn}', 'rpc')
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+def _request_labels() -> LabelValues:
+    if request.url_rule is None:
+        return ('', '<unmatched>', request.method)
+    endpoint = request.endpoint or ''
+    return (request.blueprint or '', endpoint.rsplit('.', 1)[-1], request.method)
+
+
+def _server_timing(total: float, spans: Dict[str, float], calls: List[Tuple[str, float, int]]) -> str:
+    entries = [f'app;dur={total * 1000:.1f}']
+    entries.extend(f'{name};dur={duration * 1000:.1f}' for name, duration in spans.items())
+    if calls:
+        entries.append(
+            f'supabase;dur={sum(duration for _, duration, _ in calls) * 1000:.1f};'
+            f'desc="calls={len(calls)} rows={sum(rows for _, _, rows in calls)}"'
+        )
+        tables: Dict[str, List[float]] = {}
+        for table, duration, _ in calls:
+            tables.setdefault(table, []).append(duration)
+        for table, durations in tables.items():
+            name = 'db-' + ''.join(c if c.isalnum() or c in '-_' else '-' for c in table)
+            entries.append(f'{name};dur={sum(durations) * 1000:.1f};desc="{len(durations)}"')
+    return ', '.join(entries)
+
+
+def _before_request() -> None:
+    g.metrics_started = time.perf_counter()
+    g.metrics_spans = {}
+    g.supabase_calls = []
+
+
+def _record_request(labels: LabelValues, status: int, total: float, calls: List[Tuple[str, float, int]]) -> None:
+    request_duration.observe(labels, total)
+    requests_total.inc(labels + (str(status),))
+    supabase_request_calls.observe(labels, len(calls))
+    supabase_request_duration.observe(labels, sum(duration for _, duration, _ in calls))
+
+
+def _after_request(response: Response) -> Response:
+    started = g.get('metrics_started')
+    if started is None:
+        return response
+
+    total = time.perf_counter() - started
+    labels = _request_labels()
+    calls = g.get('supabase_calls')
+    if calls is None:
+        calls = []
+
+    response.headers['Server-Timing'] = _server_timing(total, g.get('metrics_spans') or {}, calls)
+
+    if response.is_streamed:
+        # Tělo (json_list_response, CSV a NDJSON exporty) se generuje až po
+        # after_request a jeho volání Supabase se dál připisují do calls. Doba
+        # a volání požadavku se proto zapíší až po odeslání celého těla;
+        # Server-Timing odchází před tělem a pokrývá jen dobu do jeho začátku.
+        status = response.status_code
+        response.call_on_close(lambda: _record_request(labels, status, time.perf_counter() - started, calls))
+    else:
+        _record_request(labels, response.status_code, total, calls)
+    return response
+
+
+def metrics_view():
+    if METRICS_TOKEN:
+        authorization = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(authorization, f'Bearer {METRICS_TOKEN}'):
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+def init_app(app: Flask, path: str = '/api/metrics') -> None:
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule(path, 'metrics', metrics_view, methods=['GET'])
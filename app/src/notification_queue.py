@@ -0,0 +1,222 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+# Trvalá lokální fronta notifikací v SQLite (WAL). Soubor sdílí všichni workeři
+# na jednom stroji; zpracování si události a digesty rezervují na dobu lease,
+# takže je nezpracují dva workeři zároveň a po pádu workeru se vrátí do fronty.
+
+SCHEMA = """
+create table if not exists events (
+    id integer primary key autoincrement,
+    kind text not null,
+    payload text not null,
+    created_at real not null,
+    available_at real not null,
+    attempts integer not null default 0,
+    claimed_until real not null default 0
+);
+create index if not exists events_available_idx on events (available_at, id);
+
+create table if not exists pending (
+    id integer primary key autoincrement,
+    recipient_id text not null,
+    kind text not null,
+    payload text not null,
+    created_at real not null,
+    attempts integer not null default 0,
+    due_at real not null,
+    claimed_until real not null default 0
+);
+create index if not exists pending_recipient_idx on pending (recipient_id, id);
+create index if not exists pending_due_idx on pending (due_at);
+"""
+
+# Nejvýše tolik parametrů v jednom dotazu s IN (...)
+IN_CHUNK_SIZE = 500
+
+
+class NotificationQueue:
+    """
+    Fronta událostí (events) a nedoručených notifikací příjemců (pending)
+
+    Události se zapisují v požadavku (put je jeden INSERT), rozesílání
+    na příjemce i doručení probíhá na pozadí. Notifikace jednoho příjemce
+    čekají v pending, dokud nejstarší z nich není starší než okno slučování;
+    pak se doručí všechny najednou jako jeden digest.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Jedno spojení na vlákno; po forku procesu se otevře nové
+        db = getattr(self._local, 'db', None)
+        if db is None or getattr(self._local, 'pid', None) != os.getpid():
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute('pragma journal_mode=wal')
+            db.execute('pragma synchronous=normal')
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # Zápisová transakce hned od začátku, aby se souběžní workeři seřadili
+        db = self._connect()
+        db.execute('begin immediate')
+        try:
+            yield db
+            db.execute('commit')
+        except BaseException:
+            db.execute('rollback')
+            raise
+
+    def put(self, kind: str, payload: Dict[str, Any]) -> None:
+        self.put_many([(kind, payload)])
+
+    def put_many(self, events: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        now = time.time()
+        rows = [(kind, json.dumps(payload, default=str), now, now) for kind, payload in events]
+        if rows:
+            with self._transaction() as db:
+                db.executemany(
+                    'insert into events (kind, payload, created_at, available_at) values (?, ?, ?, ?)', rows
+                )
+        return len(rows)
+
+    def claim_events(self, limit: int, lease: float) -> List[Dict[str, Any]]:
+        """Rezervace nejvýše limit dostupných událostí na lease sekund"""
+        now = time.time()
+        with self._transaction() as db:
+            rows = db.execute(
+                'select id, kind, payload, created_at, attempts from events '
+                'where available_at <= ? and claimed_until <= ? order by id limit ?',
+                (now, now, limit)
+            ).fetchall()
+            db.executemany(
+                'update events set claimed_until = ?, attempts = attempts + 1 where id = ?',
+                [(now + lease, row[0]) for row in rows]
+            )
+
+        return [
+            {'id': id, 'kind': kind, 'payload': json.loads(payload), 'created_at': created_at, 'attempts': attempts + 1}
+            for id, kind, payload, created_at, attempts in rows
+        ]
+
+    def fan_out(self, event_ids: List[int], notifications: List[Tuple[str, str, Dict[str, Any]]], window: float) -> None:
+        """
+        Převod zpracovaných událostí na notifikace příjemců v jedné transakci
+
+        notifications jsou trojice (příjemce, druh, data). Notifikace se doručí
+        nejpozději za window sekund od nejstarší čekající notifikace příjemce.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            recipients = list({recipient_id for recipient_id, _, _ in notifications})
+            # Příjemce, který už na digest čeká, dostane novou notifikaci ve stejném digestu
+            due = {}
+            for start in range(0, len(recipients), IN_CHUNK_SIZE):
+                chunk = recipients[start:start + IN_CHUNK_SIZE]
+                due.update(db.execute(
+                    f"select recipient_id, min(due_at) from pending where recipient_id in ({','.join('?' * len(chunk))}) "
+                    'group by recipient_id',
+                    chunk
+                ))
+
+            db.executemany(
+                'insert into pending (recipient_id, kind, payload, created_at, due_at) values (?, ?, ?, ?, ?)',
+                [
+                    (recipient_id, kind, json.dumps(payload, default=str), now, due.get(recipient_id, now + window))
+                    for recipient_id, kind, payload in notifications
+                ]
+            )
+            db.executemany('delete from events where id = ?', [(id,) for id in event_ids])
+
+    def release_events(self, event_ids: List[int], delay: float) -> None:
+        # Neúspěšné zpracování: událost se vrátí do fronty se zpožděním
+        with self._transaction() as db:
+            db.executemany(
+                'update events set claimed_until = 0, available_at = ? where id = ?',
+                [(time.time() + delay, id) for id in event_ids]
+            )
+
+    def claim_digests(self, limit: int, lease: float, max_batch: int) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Rezervace digestů k doručení: příjemci, jejichž okno slučování uplynulo,
+        nebo kteří nasbírali aspoň max_batch notifikací
+
+        Returns:
+            Dict příjemce -> seznam jeho notifikací od nejstarší
+        """
+        now = time.time()
+        with self._transaction() as db:
+            recipients = [
+                row[0] for row in db.execute(
+                    'select recipient_id from pending where claimed_until <= ? '
+                    'group by recipient_id having min(due_at) <= ? or count(*) >= ? limit ?',
+                    (now, now, max_batch, limit)
+                )
+            ]
+            digests: Dict[str, List[Dict[str, Any]]] = {}
+            for recipient_id in recipients:
+                rows = db.execute(
+                    'select id, kind, payload, created_at, attempts from pending '
+                    'where recipient_id = ? and claimed_until <= ? order by id',
+                    (recipient_id, now)
+                ).fetchall()
+                digests[recipient_id] = [
+                    {'id': id, 'kind': kind, 'payload': json.loads(payload), 'created_at': created_at, 'attempts': attempts}
+                    for id, kind, payload, created_at, attempts in rows
+                ]
+                db.executemany(
+                    'update pending set claimed_until = ? where id = ?', [(now + lease, row[0]) for row in rows]
+                )
+
+        return digests
+
+    def ack_digest(self, notification_ids: List[int]) -> None:
+        with self._transaction() as db:
+            db.executemany('delete from pending where id = ?', [(id,) for id in notification_ids])
+
+    def retry_digest(self, notification_ids: List[int], delay: float, max_attempts: int) -> int:
+        """Nedoručený digest zpět do fronty; po max_attempts pokusech se zahodí. Vrací počet zahozených."""
+        now = time.time()
+        with self._transaction() as db:
+            db.executemany(
+                'update pending set claimed_until = 0, attempts = attempts + 1, due_at = ? where id = ?',
+                [(now + delay, id) for id in notification_ids]
+            )
+            dropped = 0
+            for start in range(0, len(notification_ids), IN_CHUNK_SIZE):
+                chunk = notification_ids[start:start + IN_CHUNK_SIZE]
+                dropped += db.execute(
+                    f"delete from pending where attempts >= ? and id in ({','.join('?' * len(chunk))})",
+                    [max_attempts, *chunk]
+                ).rowcount
+        return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        db = self._connect()
+        events, oldest_event = db.execute('select count(*), min(created_at) from events').fetchone()
+        pending, recipients, oldest_pending = db.execute(
+            'select count(*), count(distinct recipient_id), min(created_at) from pending'
+        ).fetchone()
+        return {
+            'queue_depth': events,
+            'queue_lag_seconds': round(now - oldest_event, 3) if oldest_event else 0.0,
+            'pending_notifications': pending,
+            'pending_recipients': recipients,
+            'pending_lag_seconds': round(now - oldest_pending, 3) if oldest_pending else 0.0,
+        }
@@ -0,0 +1,451 @@
+import importlib
+import json
+import logging
+import os
+import smtplib
+import threading
+import time
+import urllib.request
+from collections import deque
+from email.message import EmailMessage
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.indexing import IncrementalIndex
+from src.notification_queue import NotificationQueue
+from src.search_index import fold
+
+# Notifikace o nových inzerátech (makléřům podle jejich zájmů) a nových
+# nabídkách (prodávajícímu). Požadavek jen zapíše událost do lokální fronty,
+# rozeslání a doručení obstarává vlákno na pozadí v každém workeru.
+NOTIFICATIONS_ENABLED = os.getenv('NOTIFICATIONS_ENABLED', '1') == '1'
+NOTIFICATION_QUEUE_PATH = os.getenv(
+    'NOTIFICATION_QUEUE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'var', 'notifications.sqlite3')
+)
+
+# Sender: log (výchozí), smtp, webhook nebo vlastní třída jako 'modul:Třída'
+NOTIFICATION_SENDER = os.getenv('NOTIFICATION_SENDER', 'log')
+
+# Okno slučování: notifikace jednoho příjemce za tuto dobu (v sekundách) přijdou v jednom digestu
+NOTIFICATION_COALESCE_WINDOW = float(os.getenv('NOTIFICATION_COALESCE_WINDOW', '300'))
+# Digest s tolika notifikacemi se odešle hned, bez čekání na konec okna
+NOTIFICATION_MAX_DIGEST = int(os.getenv('NOTIFICATION_MAX_DIGEST', '50'))
+
+EVENT_BATCH_SIZE = 100
+DIGEST_BATCH_SIZE = 100
+# Jak dlouho má worker rezervovanou dávku (pak ji může převzít jiný)
+CLAIM_LEASE = 120.0
+POLL_INTERVAL = 1.0
+RETRY_DELAY = 30.0
+MAX_ATTEMPTS = 5
+# Přestavba indexu zájmů makléřů (změny z jiných workerů)
+INTERESTS_REFRESH = float(os.getenv('NOTIFICATION_INTERESTS_REFRESH', '300'))
+
+# Pro propustnost se počítají události za posledních N sekund
+THROUGHPUT_WINDOW = 60.0
+
+# Hodnota zájmu makléře bez omezení (libovolné město nebo typ)
+ANY = '*'
+
+logger = logging.getLogger(__name__)
+
+
+class _InterestState:
+    def __init__(self):
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        # (město, typ nemovitosti) -> ID zájmů; ANY místo hodnoty, kterou makléř neomezil
+        self.buckets: Dict[Tuple[str, str], Set[str]] = {}
+
+    @staticmethod
+    def bucket(row: Dict[str, Any]) -> Tuple[str, str]:
+        city = row.get('city')
+        return fold(city.strip()) if city else ANY, row.get('property_type') or ANY
+
+    def add(self, row: Dict[str, Any]) -> None:
+        id = str(row['id'])
+        self.remove(id)
+        self.rows[id] = row
+        self.buckets.setdefault(self.bucket(row), set()).add(id)
+
+    def remove(self, id: str) -> None:
+        row = self.rows.pop(id, None)
+        if row is None:
+            return
+        key = self.bucket(row)
+        ids = self.buckets[key]
+        ids.discard(id)
+        if not ids:
+            del self.buckets[key]
+
+
+class InterestIndex(IncrementalIndex):
+    """
+    Zájmy makléřů (agent_interests) předpočítané do skupin podle města a typu
+
+    Pro nový inzerát stačí projít nejvýše osm skupin: jeho město nebo obec
+    a typ, každé z nich i bez omezení.
+    """
+
+    def _new_state(self) -> _InterestState:
+        return _InterestState()
+
+    def _apply_upsert(self, state: _InterestState, row: Dict[str, Any]) -> None:
+        state.add(row)
+
+    def _apply_remove(self, state: _InterestState, id: str) -> None:
+        state.remove(id)
+
+    def match(self, listing: Dict[str, Any]) -> Set[str]:
+        """ID makléřů, jejichž zájmy odpovídají inzerátu"""
+        cities = {fold(value.strip()) for value in (listing.get('city'), listing.get('municipality')) if value}
+        types = {listing.get('property_type') or ANY}
+
+        with self._lock:
+            state = self._state
+            agents = set()
+            for city in cities | {ANY}:
+                for property_type in types | {ANY}:
+                    for id in state.buckets.get((city, property_type), ()):
+                        agents.add(str(state.rows[id]['agent_id']))
+            return agents
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), 'buckets': len(self._state.buckets)}
+
+
+class LogSender:
+    """Digesty jen do logu (vývoj a testování)"""
+
+    def send_batch(self, messages: List[Dict[str, Any]]) -> Set[str]:
+        for message in messages:
+            logger.info('Notifikace pro %s: %s (%d)', message['to'] or message['recipient_id'],
+                        message['subject'], len(message['notifications']))
+        return set()
+
+
+class SmtpSender:
+    """Digesty e-mailem, celá dávka jedním SMTP spojením"""
+
+    def __init__(self):
+        self.host = os.getenv('SMTP_HOST', 'localhost')
+        self.port = int(os.getenv('SMTP_PORT', '587'))
+        self.username = os.getenv('SMTP_USERNAME')
+        self.password = os.getenv('SMTP_PASSWORD')
+        self.sender = os.getenv('SMTP_FROM', 'notifikace@realitni-propojeni.cz')
+
+    def send_batch(self, messages: List[Dict[str, Any]]) -> Set[str]:
+        failed = set()
+        with smtplib.SMTP(self.host, self.port, timeout=30) as smtp:
+            smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            for message in messages:
+                if not message['to']:
+                    continue
+                email = EmailMessage()
+                email['From'] = self.sender
+                email['To'] = message['to']
+                email['Subject'] = message['subject']
+                email.set_content(message['body'])
+                try:
+                    smtp.send_message(email)
+                except smtplib.SMTPRecipientsRefused:
+                    logger.warning('Adresa %s odmítnuta', message['to'])
+                except smtplib.SMTPException:
+                    failed.add(message['recipient_id'])
+        return failed
+
+
+class WebhookSender:
+    """Celá dávka jako jeden JSON POST (např. na bránu push notifikací)"""
+
+    def __init__(self):
+        self.url = os.environ['NOTIFICATION_WEBHOOK_URL']
+
+    def send_batch(self, messages: List[Dict[str, Any]]) -> Set[str]:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({'messages': messages}, default=str).encode(),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=30):
+            return set()
+
+
+SENDERS = {'log': LogSender, 'smtp': SmtpSender, 'webhook': WebhookSender}
+
+
+def create_sender(name: str = NOTIFICATION_SENDER):
+    if name in SENDERS:
+        return SENDERS[name]()
+    module, _, attribute = name.partition(':')
+    if not attribute:
+        raise Exception(f'Neznámý sender notifikací: {name}')
+    return getattr(importlib.import_module(module), attribute)()
+
+
+# Druh události -> (předmět digestu, řádek jedné notifikace)
+DIGEST_TEMPLATES = {
+    'property_created': (
+        'Nové inzeráty podle vašich kritérií',
+        lambda data: f"{data.get('property_type', '')} {data.get('street', '')} {data.get('house_number', '')}, "
+                     f"{data.get('city', '')} ({data.get('id')})"
+    ),
+    'offer_created': (
+        'Nové nabídky makléřů k vašemu inzerátu',
+        lambda data: f"Provize {data.get('commission_percentage')} % / {data.get('commission_amount')} Kč, "
+                     f"odhad {data.get('price_estimate_min')}–{data.get('price_estimate_max')} Kč (inzerát {data.get('property_id')})"
+    ),
+}
+
+
+def build_digest(recipient: Dict[str, Any], notifications: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Jedna zpráva za všechny čekající notifikace příjemce, seskupené podle druhu"""
+    sections = []
+    subjects = []
+    for kind, (subject, line) in DIGEST_TEMPLATES.items():
+        items = [n['payload'] for n in notifications if n['kind'] == kind]
+        if items:
+            subjects.append(f'{subject} ({len(items)})')
+            sections.append(f'{subject}:\n' + '\n'.join(f'- {line(item)}' for item in items))
+
+    return {
+        'recipient_id': recipient['id'],
+        'to': recipient.get('email'),
+        'name': recipient.get('full_name'),
+        'subject': '; '.join(subjects),
+        'body': '\n\n'.join(sections),
+        'notifications': [{'kind': n['kind'], 'data': n['payload']} for n in notifications],
+    }
+
+
+class NotificationMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            'events_enqueued': 0,
+            'events_processed': 0,
+            'events_failed': 0,
+            'notifications_created': 0,
+            'digests_sent': 0,
+            'digests_failed': 0,
+            'notifications_dropped': 0,
+        }
+        self._processed: deque = deque()
+        self._sent: deque = deque()
+
+    def count(self, name: str, value: int = 1) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.counters[name] += value
+            if name == 'events_processed':
+                self._processed.append((now, value))
+            elif name == 'digests_sent':
+                self._sent.append((now, value))
+
+    def _rate(self, samples: deque, now: float) -> float:
+        while samples and samples[0][0] < now - THROUGHPUT_WINDOW:
+            samples.popleft()
+        return round(sum(value for _, value in samples) / THROUGHPUT_WINDOW, 3)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                **self.counters,
+                'events_per_second': self._rate(self._processed, now),
+                'digests_per_second': self._rate(self._sent, now),
+            }
+
+
+class Notifier:
+    """
+    Rozesílání a doručování notifikací na pozadí
+
+    Vlákno dokola: rezervuje dávku událostí, najde k nim příjemce a uloží
+    jejich notifikace (fan_out), pak doručí digesty příjemců, jejichž okno
+    slučování uplynulo, jednou dávkou přes sender.
+    """
+
+    def __init__(
+        self,
+        queue: NotificationQueue,
+        interests: InterestIndex,
+        load_interests: Callable[[], Iterable[Dict[str, Any]]],
+        load_recipients: Callable[[List[str]], List[Dict[str, Any]]],
+        sender=None
+    ):
+        self.queue = queue
+        self.interests = interests
+        self.load_interests = load_interests
+        self.load_recipients = load_recipients
+        self.sender = sender or create_sender()
+        self.metrics = NotificationMetrics()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def notify(self, kind: str, payload: Dict[str, Any]) -> None:
+        self.notify_many([(kind, payload)])
+
+    def notify_many(self, events: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        count = self.queue.put_many(events)
+        self.metrics.count('events_enqueued', count)
+        self._wakeup.set()
+
+    def recipients_for(self, event: Dict[str, Any]) -> List[Tuple[str, str, Dict[str, Any]]]:
+        kind, data = event['kind'], event['payload']
+        if kind == 'property_created':
+            # Koncepty a jiné neaktivní inzeráty se makléřům neoznamují
+            if data.get('status', 'active') != 'active':
+                return []
+            agents = self.interests.match(data)
+            return [(agent_id, kind, data) for agent_id in sorted(agents)]
+        if kind == 'offer_created':
+            return [(str(data['seller_id']), kind, data)] if data.get('seller_id') else []
+        logger.warning('Neznámý druh notifikace: %s', kind)
+        return []
+
+    def process_events(self) -> int:
+        events = self.queue.claim_events(EVENT_BATCH_SIZE, CLAIM_LEASE)
+        if not events:
+            return 0
+
+        if not self.interests.ready:
+            self.queue.release_events([event['id'] for event in events], POLL_INTERVAL * 5)
+            return 0
+
+        notifications = []
+        done = []
+        for event in events:
+            try:
+                notifications.extend(self.recipients_for(event))
+                done.append(event['id'])
+            except Exception:
+                logger.exception('Zpracování notifikace %s selhalo', event['id'])
+                self.metrics.count('events_failed')
+                if event['attempts'] >= MAX_ATTEMPTS:
+                    done.append(event['id'])
+                else:
+                    self.queue.release_events([event['id']], RETRY_DELAY)
+
+        self.queue.fan_out(done, notifications, NOTIFICATION_COALESCE_WINDOW)
+        self.metrics.count('events_processed', len(done))
+        self.metrics.count('notifications_created', len(notifications))
+        return len(events)
+
+    def deliver_digests(self) -> int:
+        digests = self.queue.claim_digests(DIGEST_BATCH_SIZE, CLAIM_LEASE, NOTIFICATION_MAX_DIGEST)
+        if not digests:
+            return 0
+
+        recipients = {str(user['id']): user for user in self.load_recipients(list(digests))}
+        messages = [
+            build_digest(recipients.get(recipient_id, {'id': recipient_id}), notifications)
+            for recipient_id, notifications in digests.items()
+        ]
+
+        try:
+            failed = self.sender.send_batch(messages)
+        except Exception:
+            logger.exception('Odeslání dávky notifikací selhalo')
+            failed = set(digests)
+
+        for recipient_id, notifications in digests.items():
+            ids = [notification['id'] for notification in notifications]
+            if recipient_id in failed:
+                self.metrics.count('digests_failed')
+                dropped = self.queue.retry_digest(ids, RETRY_DELAY, MAX_ATTEMPTS)
+                self.metrics.count('notifications_dropped', dropped)
+            else:
+                self.queue.ack_digest(ids)
+        self.metrics.count('digests_sent', len(digests) - len(failed & set(digests)))
+        return len(digests)
+
+    def refresh_interests(self) -> None:
+        started = time.monotonic()
+        size = self.interests.rebuild(self.load_interests())
+        logger.info('Index zájmů makléřů sestaven: %d zájmů za %.2f s', size, time.monotonic() - started)
+
+    def run(self) -> None:
+        refreshed_at = 0.0
+        while True:
+            try:
+                if time.monotonic() - refreshed_at > INTERESTS_REFRESH:
+                    refreshed_at = time.monotonic()
+                    self.refresh_interests()
+
+                busy = self.process_events() + self.deliver_digests()
+            except Exception:
+                logger.exception('Zpracování fronty notifikací selhalo')
+                busy = 0
+
+            if not busy:
+                self._wakeup.wait(POLL_INTERVAL)
+                self._wakeup.clear()
+
+    def start(self) -> threading.Thread:
+        self._thread = threading.Thread(target=self.run, name='notifications', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.queue.stats(),
+            **self.metrics.stats(),
+            'interests': self.interests.stats(),
+            'running': bool(self._thread and self._thread.is_alive()),
+        }
+
+
+interest_index = InterestIndex()
+
+_notifier: Optional[Notifier] = None
+_notifier_lock = threading.Lock()
+
+
+def get_notifier() -> Notifier:
+    # Fronta a sender se vytvoří až při prvním použití ve workeru
+    global _notifier
+    if _notifier is None:
+        with _notifier_lock:
+            if _notifier is None:
+                from src.services import notification_service
+                _notifier = Notifier(
+                    NotificationQueue(NOTIFICATION_QUEUE_PATH),
+                    interest_index,
+                    notification_service.iter_agent_interests,
+                    notification_service.get_recipients
+                )
+    return _notifier
+
+
+def notify(kind: str, payload: Dict[str, Any]) -> None:
+    notify_many([(kind, payload)])
+
+
+def notify_many(events: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+    """
+    Zápis událostí do fronty notifikací
+
+    Chyba fronty nesmí shodit požadavek, který událost vyvolal; jen se zaloguje.
+    """
+    if not NOTIFICATIONS_ENABLED:
+        return
+    try:
+        get_notifier().notify_many(events)
+    except Exception:
+        logger.exception('Zápis notifikace do fronty selhal')
+
+
+def start_notifications() -> Optional[threading.Thread]:
+    """Spuštění rozesílání notifikací na pozadí (jednou za worker)"""
+    if not NOTIFICATIONS_ENABLED:
+        return None
+    return get_notifier().start()
+
+
+def notification_stats() -> Optional[Dict[str, Any]]:
+    if not NOTIFICATIONS_ENABLED or _notifier is None:
+        return None
+    return _notifier.stats()
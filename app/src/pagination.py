@@ -0,0 +1,69 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+# Keyset stránkování podle (created_at, id) od nejnovějších záznamů.
+# Kurzor je pozice posledního vráceného řádku, zakódovaná do URL-safe base64.
+
+def encode_cursor(row):
+    raw = json.dumps([row['created_at'], row['id']]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor):
+    # Kurzor posílá klient a hodnoty se skládají do filtru dotazu, proto se
+    # přijme jen čas ve formátu ISO 8601 a UUID (jinak by šlo podstrčit vlastní podmínky)
+    try:
+        created_at, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(created_at, str) or not isinstance(id, str):
+            raise ValueError
+        datetime.fromisoformat(created_at)
+        id = str(uuid.UUID(id))
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError('Neplatný kurzor stránkování')
+    return created_at, id
+
+def apply_keyset(query, cursor, limit):
+    # Řádky za kurzorem, seřazené od nejnovějších; čte se o řádek víc kvůli next_cursor
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        query = query.or_(
+            f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{id})'
+        )
+
+    # Řazení podle obou sloupců klíče musí být v jednom parametru order
+    return query.order('created_at.desc,id', desc=True).limit(limit + 1)
+
+def paginate(rows, limit):
+    # Dotaz čte o řádek navíc; pokud přišel, existuje další stránka
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def clamp_page_size(limit, max_page_size):
+    return max(1, min(int(limit), max_page_size))
+
+class PageStream:
+    # Řádky jedné stránky čtené z databáze po menších dávkách (pro průběžně
+    # odesílané odpovědi). fetch(cursor, limit) vrací (řádky, next_cursor) jako
+    # paginate(). První dávka se načte hned, aby se chyby (např. neplatný kurzor)
+    # projevily dřív, než se začne odesílat odpověď. Po projití řádků je
+    # v next_cursor kurzor další stránky, nebo None.
+
+    def __init__(self, fetch, cursor, limit, batch_size):
+        self._fetch = fetch
+        self._batch_size = batch_size
+        self._remaining = limit
+        self._rows, self.next_cursor = self._next_batch(cursor)
+
+    def _next_batch(self, cursor):
+        rows, next_cursor = self._fetch(cursor, min(self._batch_size, self._remaining))
+        self._remaining -= len(rows)
+        return rows, next_cursor
+
+    def __iter__(self):
+        while True:
+            rows, self._rows = self._rows, []
+            yield from rows
+            if not self.next_cursor or self._remaining <= 0:
+                return
+            self._rows, self.next_cursor = self._next_batch(self.next_cursor)
@@ -0,0 +1,508 @@
+import base64
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from flask import Flask, Response, g, has_request_context, jsonify, request, session
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Omezení počtu požadavků (token bucket na uživatele a endpoint) a strop
+# souběžných volání Supabase. Stav sdílí všichni workeři na jednom stroji
+# přes soubor namapovaný do paměti (mmap) zamykaný flock, takže limit platí
+# pro stroj, ne pro jednotlivý worker. Bez fcntl (Windows) nebo s prázdnou
+# RATE_LIMIT_SHM_PATH má každý worker vlastní stav v paměti.
+
+# Token buckety lze vypnout (strop volání Supabase řídí SUPABASE_MAX_CONCURRENCY)
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '1') != '0'
+RATE_LIMIT_SHM_PATH = os.getenv(
+    'RATE_LIMIT_SHM_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'var', 'rate_limit.shm')
+)
+
+
+def parse_limit(value: Optional[str]) -> Optional[Tuple[float, float]]:
+    """'rychlost/zásobník' (tokenů za sekundu / nejvýše najednou), '0' nebo 'off' limit vypne"""
+    if not value or value.strip() in ('0', 'off'):
+        return None
+    rate, _, burst = value.strip().partition('/')
+    rate = float(rate)
+    return rate, float(burst) if burst else max(1.0, rate)
+
+
+def parse_endpoint_limits(value: Optional[str]) -> Dict[str, Optional[Tuple[float, float]]]:
+    """'credits.use=1/10;properties.get_properties_route=5/30' -> {endpoint: limit}"""
+    limits = {}
+    for item in (value or '').split(';'):
+        if item.strip():
+            endpoint, _, limit = item.partition('=')
+            limits[endpoint.strip()] = parse_limit(limit)
+    return limits
+
+
+# Počet reverzních proxy před aplikací; adresa klienta se pak čte z X-Forwarded-For
+# (ProxyFix). Nepřihlášení mají bucket podle adresy klienta (remote_addr). Za proxy,
+# které RATE_LIMIT_TRUSTED_PROXIES nezná, je remote_addr adresa proxy a všichni
+# nepřihlášení by sdíleli jeden bucket; tam jde limit vypnout RATE_LIMIT_ANONYMOUS=0.
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv('RATE_LIMIT_TRUSTED_PROXIES', '0'))
+RATE_LIMIT_ANONYMOUS = os.getenv('RATE_LIMIT_ANONYMOUS', '1') != '0'
+
+# Limit jednoho uživatele (nepřihlášeného podle IP) na jednom endpointu
+DEFAULT_USER_LIMIT = parse_limit(os.getenv('RATE_LIMIT_USER', '10/30'))
+# Výjimky pro drahé endpointy (zápisy, kredity, exporty)
+USER_LIMITS = {
+    'properties.get_properties_route': (5.0, 30.0),
+    'properties.search_properties_route': (5.0, 30.0),
+    'properties.bulk_create_properties_route': (0.2, 3.0),
+    'properties.export_properties_route': (0.1, 2.0),
+    'credits.purchase': (0.2, 5.0),
+    'credits.use': (1.0, 10.0),
+    'credits.export_transactions': (0.1, 2.0),
+    **parse_endpoint_limits(os.getenv('RATE_LIMIT_ENDPOINTS')),
+}
+# Limit jednoho endpointu pro všechny uživatele dohromady
+DEFAULT_ENDPOINT_LIMIT = parse_limit(os.getenv('RATE_LIMIT_ENDPOINT', '200/400'))
+ENDPOINT_LIMITS = parse_endpoint_limits(os.getenv('RATE_LIMIT_ENDPOINTS_TOTAL'))
+
+# Endpointy bez limitu
+EXEMPT_ENDPOINTS = {'health_check', 'metrics', 'media_file'}
+
+# Nejvýše tolik volání Supabase najednou ze všech workerů stroje (0 = bez stropu)
+SUPABASE_MAX_CONCURRENCY = int(os.getenv('SUPABASE_MAX_CONCURRENCY', '32'))
+# Nejvýše tolik požadavků jednoho workeru čeká na volné místo; další se odmítnou hned
+SUPABASE_QUEUE_SIZE = int(os.getenv('SUPABASE_QUEUE_SIZE', '64'))
+# Jak dlouho požadavek na volné místo čeká, než se odmítne (v sekundách)
+SUPABASE_QUEUE_TIMEOUT = float(os.getenv('SUPABASE_QUEUE_TIMEOUT', '5'))
+# Retry-After při přetížení (v sekundách)
+OVERLOAD_RETRY_AFTER = int(os.getenv('RATE_LIMIT_OVERLOAD_RETRY_AFTER', '1'))
+
+# Rozložení sdíleného stavu: hlavička, sloty workerů (pid, rozpracovaná volání)
+# a hašovací tabulka bucketů (klíč, tokeny, čas posledního doplnění)
+MAGIC = b'rlimit01'
+HEADER = struct.Struct('<8sq')
+WORKER = struct.Struct('<qq')
+BUCKET = struct.Struct('<Qdd')
+MAX_WORKERS = 256
+BUCKET_SLOTS = int(os.getenv('RATE_LIMIT_BUCKETS', '65536'))
+# Kolik sousedních slotů se prohledá; když jsou všechny obsazené, přepíše se nejdéle nepoužitý
+PROBE_LENGTH = 8
+
+WORKERS_OFFSET = HEADER.size
+BUCKETS_OFFSET = WORKERS_OFFSET + MAX_WORKERS * WORKER.size
+
+# Jak často nejvýše hledat sloty ukončených workerů, když je strop plný (v sekundách)
+RECLAIM_INTERVAL = 1.0
+POLL_MIN = 0.0005
+POLL_MAX = 0.01
+
+
+class Overloaded(Exception):
+    """Supabase je na stropu souběžných volání a fronta je plná nebo čekání vypršelo"""
+
+
+def bucket_key(*parts: str) -> int:
+    # 0 označuje prázdný slot
+    digest = hashlib.blake2b('|'.join(parts).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+class LimiterState:
+    """
+    Buckety a počitadlo rozpracovaných volání Supabase
+
+    Operace jsou krátké (pár struct.unpack_from/pack_into) a běží pod zámkem
+    vláken workeru a flock souboru, takže jsou atomické pro celý stroj.
+    """
+
+    def __init__(self, path: Optional[str], buckets: int = BUCKET_SLOTS):
+        self.path = path if path and fcntl is not None else None
+        self.buckets = buckets
+        self.size = BUCKETS_OFFSET + buckets * BUCKET.size
+        self._lock = threading.Lock()
+        self._file = None
+        self._slot: Optional[int] = None
+        self._last_reclaim = 0.0
+
+        if self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._open_shared()
+        else:
+            self._buffer = bytearray(self.size)
+            HEADER.pack_into(self._buffer, 0, MAGIC, 0)
+            self._slot = 0
+            WORKER.pack_into(self._buffer, WORKERS_OFFSET, os.getpid(), 0)
+
+    def _open_shared(self) -> None:
+        # Soubor jiné velikosti (jiné RATE_LIMIT_BUCKETS, starší verze) může mít
+        # namapovaný běžící worker a zmenšení nebo přepsání by mu přineslo SIGBUS
+        # nebo ztrátu bucketů. Proto se pod flock nahradí novým souborem
+        # (os.replace); běžící workeři dál používají starý, dokud neskončí.
+        while True:
+            file = open(self.path, 'a+b')
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                stat = os.fstat(file.fileno())
+                try:
+                    current = os.stat(self.path)
+                except FileNotFoundError:
+                    current = None
+                if current is None or (current.st_dev, current.st_ino) != (stat.st_dev, stat.st_ino):
+                    # Soubor mezitím nahradil jiný worker
+                    continue
+                if stat.st_size == 0:
+                    # Nový soubor zatím nikdo nenamapoval, zvětšení je bezpečné
+                    file.truncate(self.size)
+                elif stat.st_size != self.size:
+                    self._replace_file()
+                    continue
+
+                self._buffer = mmap.mmap(file.fileno(), self.size)
+                self._file = file
+                if HEADER.unpack_from(self._buffer, 0)[0] != MAGIC:
+                    self._buffer[:] = bytes(self.size)
+                    HEADER.pack_into(self._buffer, 0, MAGIC, 0)
+                self._register()
+                return
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+                if self._file is not file:
+                    file.close()
+
+    def _replace_file(self) -> None:
+        temporary = f'{self.path}.{os.getpid()}.new'
+        with open(temporary, 'wb') as file:
+            file.truncate(self.size)
+        os.replace(temporary, self.path)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        # flock nevylučuje vlákna jednoho procesu (sdílí popisovač souboru), proto i threading.Lock
+        with self._lock:
+            if self._file is None:
+                yield
+                return
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def _register(self) -> None:
+        # Slot workeru pro počet jeho rozpracovaných volání; volný nebo po ukončeném workeru
+        pid = os.getpid()
+        for index in range(MAX_WORKERS):
+            offset = WORKERS_OFFSET + index * WORKER.size
+            slot_pid, count = WORKER.unpack_from(self._buffer, offset)
+            if slot_pid == 0 or slot_pid == pid or not _alive(slot_pid):
+                self._release_slot(offset, count)
+                WORKER.pack_into(self._buffer, offset, pid, 0)
+                self._slot = offset
+                return
+        # Víc workerů než slotů: volání se počítají jen do součtu
+        self._slot = None
+
+    def _release_slot(self, offset: int, count: int) -> None:
+        if count:
+            magic, total = HEADER.unpack_from(self._buffer, 0)
+            HEADER.pack_into(self._buffer, 0, magic, max(0, total - count))
+        WORKER.pack_into(self._buffer, offset, 0, 0)
+
+    def take(self, limits: Sequence[Tuple[int, float, float]], now: float) -> float:
+        """
+        Odebrání jednoho tokenu z každého bucketu (klíč, rychlost, zásobník)
+
+        Token se odebere ze všech bucketů, nebo z žádného.
+
+        Returns:
+            0, pokud je požadavek povolen; jinak počet sekund do doplnění tokenu
+        """
+        buffer = self._buffer
+        with self._locked():
+            entries = []
+            wait = 0.0
+            for key, rate, burst in limits:
+                offset, tokens, updated = self._find(key, burst, now)
+                tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / rate)
+                entries.append((offset, key, tokens))
+
+            if wait:
+                return wait
+            for offset, key, tokens in entries:
+                BUCKET.pack_into(buffer, offset, key, tokens - 1, now)
+        return 0.0
+
+    def _find(self, key: int, burst: float, now: float) -> Tuple[int, float, float]:
+        buffer = self._buffer
+        start = key % self.buckets
+        victim = None
+        victim_updated = math.inf
+        for probe in range(PROBE_LENGTH):
+            offset = BUCKETS_OFFSET + ((start + probe) % self.buckets) * BUCKET.size
+            slot_key, tokens, updated = BUCKET.unpack_from(buffer, offset)
+            if slot_key == key:
+                return offset, tokens, updated
+            if slot_key == 0:
+                victim = offset
+                break
+            if updated < victim_updated:
+                victim, victim_updated = offset, updated
+
+        # Nový bucket je plný; zapíše se hned, aby ho další klíč téhož volání nepřepsal
+        BUCKET.pack_into(buffer, victim, key, burst, now)
+        return victim, burst, now
+
+    def try_acquire_call(self, limit: int) -> bool:
+        buffer = self._buffer
+        with self._locked():
+            magic, total = HEADER.unpack_from(buffer, 0)
+            if total >= limit:
+                return False
+            HEADER.pack_into(buffer, 0, magic, total + 1)
+            if self._slot is not None:
+                pid, count = WORKER.unpack_from(buffer, self._slot)
+                WORKER.pack_into(buffer, self._slot, pid, count + 1)
+        return True
+
+    def release_call(self) -> None:
+        buffer = self._buffer
+        with self._locked():
+            magic, total = HEADER.unpack_from(buffer, 0)
+            HEADER.pack_into(buffer, 0, magic, max(0, total - 1))
+            if self._slot is not None:
+                pid, count = WORKER.unpack_from(buffer, self._slot)
+                WORKER.pack_into(buffer, self._slot, pid, max(0, count - 1))
+
+    def reclaim(self) -> None:
+        """Vrácení míst po ukončených workerech (pád uprostřed volání Supabase)"""
+        now = time.monotonic()
+        if self._file is None or now - self._last_reclaim < RECLAIM_INTERVAL:
+            return
+        self._last_reclaim = now
+        with self._locked():
+            for index in range(MAX_WORKERS):
+                offset = WORKERS_OFFSET + index * WORKER.size
+                pid, count = WORKER.unpack_from(self._buffer, offset)
+                if pid and offset != self._slot and not _alive(pid):
+                    self._release_slot(offset, count)
+
+    def inflight(self) -> int:
+        return HEADER.unpack_from(self._buffer, 0)[1]
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+_state: Optional[LimiterState] = None
+_state_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {
+    'rate_limited': 0,
+    'overloaded': 0,
+    'queued': 0,
+    'queue_wait_time_total_ms': 0.0,
+    'queue_wait_time_max_ms': 0.0,
+}
+# Požadavky tohoto workeru, které právě čekají na volné místo u Supabase
+_waiting = 0
+
+
+def get_state() -> LimiterState:
+    global _state
+    if _state is None:
+        with _state_lock:
+            if _state is None:
+                try:
+                    _state = LimiterState(RATE_LIMIT_SHM_PATH)
+                except OSError:
+                    _state = LimiterState(None)
+    return _state
+
+
+def _reset_after_fork() -> None:
+    # Každý worker potřebuje vlastní popisovač souboru (flock) a vlastní slot
+    global _state, _state_lock, _stats_lock, _waiting
+    _state = None
+    _state_lock = threading.Lock()
+    _stats_lock = threading.Lock()
+    _waiting = 0
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _count(name: str, value: float = 1) -> None:
+    with _stats_lock:
+        _stats[name] += value
+
+
+@contextmanager
+def supabase_slot() -> Iterator[None]:
+    """
+    Místo pro jedno volání Supabase v rámci stropu SUPABASE_MAX_CONCURRENCY
+
+    Když je strop plný, volání čeká ve frontě workeru. V požadavku se při plné
+    frontě nebo po SUPABASE_QUEUE_TIMEOUT vyhodí Overloaded a odpověď
+    požadavku bude 429; úlohy na pozadí čekají bez omezení.
+
+    Raises:
+        Overloaded: Pokud se na místo nedočká
+    """
+    global _waiting
+
+    if SUPABASE_MAX_CONCURRENCY <= 0:
+        yield
+        return
+
+    state = get_state()
+    if not state.try_acquire_call(SUPABASE_MAX_CONCURRENCY):
+        in_request = has_request_context()
+        with _stats_lock:
+            if in_request and _waiting >= SUPABASE_QUEUE_SIZE:
+                _stats['overloaded'] += 1
+                full = True
+            else:
+                _waiting += 1
+                _stats['queued'] += 1
+                full = False
+        if full:
+            _shed()
+
+        started = time.perf_counter()
+        deadline = started + SUPABASE_QUEUE_TIMEOUT if in_request else math.inf
+        delay = POLL_MIN
+        try:
+            while True:
+                state.reclaim()
+                time.sleep(delay)
+                if state.try_acquire_call(SUPABASE_MAX_CONCURRENCY):
+                    break
+                if time.perf_counter() >= deadline:
+                    _count('overloaded')
+                    _shed()
+                delay = min(delay * 2, POLL_MAX)
+        finally:
+            waited_ms = (time.perf_counter() - started) * 1000
+            with _stats_lock:
+                _waiting -= 1
+                _stats['queue_wait_time_total_ms'] += waited_ms
+                _stats['queue_wait_time_max_ms'] = max(_stats['queue_wait_time_max_ms'], waited_ms)
+
+    try:
+        yield
+    finally:
+        state.release_call()
+
+
+def _shed() -> None:
+    # Služby chyby volání přebalují do Exception, proto se přetížení poznamená i v g
+    if has_request_context():
+        g.rate_limit_overloaded = True
+    raise Overloaded('Server je přetížený')
+
+
+def rate_limit_stats() -> Dict[str, float]:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['waiting'] = _waiting
+    stats['supabase_inflight'] = get_state().inflight() if SUPABASE_MAX_CONCURRENCY > 0 else 0
+    stats['supabase_max_concurrency'] = SUPABASE_MAX_CONCURRENCY
+    return stats
+
+
+def _user_id() -> Optional[str]:
+    # Token v session je podepsaný klíčem aplikace, sub stačí přečíst bez ověření
+    token = session.get('token')
+    if token:
+        try:
+            payload = token.split('.')[1]
+            return json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))['sub']
+        except (ValueError, KeyError, IndexError, TypeError):
+            pass
+    if not RATE_LIMIT_ANONYMOUS:
+        return None
+    return f'ip:{request.remote_addr}'
+
+
+def request_limits(endpoint: str) -> List[Tuple[int, float, float]]:
+    limits = []
+    user_limit = USER_LIMITS.get(endpoint, DEFAULT_USER_LIMIT)
+    user_id = _user_id() if user_limit else None
+    if user_id:
+        limits.append((bucket_key(endpoint, user_id), *user_limit))
+    endpoint_limit = ENDPOINT_LIMITS.get(endpoint, DEFAULT_ENDPOINT_LIMIT)
+    if endpoint_limit:
+        limits.append((bucket_key(endpoint, '*'), *endpoint_limit))
+    return limits
+
+
+def _too_many(message: str, retry_after: float) -> Response:
+    response = jsonify({'status': 'error', 'message': message})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def _overloaded() -> Response:
+    return _too_many('Server je přetížený, zkuste to prosím později', OVERLOAD_RETRY_AFTER)
+
+
+def _before_request() -> Optional[Response]:
+    endpoint = request.endpoint
+    if endpoint is None or endpoint in EXEMPT_ENDPOINTS:
+        return None
+
+    # Při plné frontě na Supabase se nový požadavek odmítne, než začne pracovat
+    if SUPABASE_MAX_CONCURRENCY > 0 and _waiting >= SUPABASE_QUEUE_SIZE:
+        _count('overloaded')
+        return _overloaded()
+
+    limits = request_limits(endpoint) if RATE_LIMIT_ENABLED else None
+    if limits:
+        retry_after = get_state().take(limits, time.time())
+        if retry_after:
+            _count('rate_limited')
+            return _too_many('Příliš mnoho požadavků, zkuste to prosím později', retry_after)
+    return None
+
+
+def _after_request(response: Response) -> Response:
+    # Route odmítnuté volání Supabase ohlásila jako chybu služby
+    if g.get('rate_limit_overloaded'):
+        return _overloaded()
+    return response
+
+
+def init_app(app: Flask) -> None:
+    if RATE_LIMIT_TRUSTED_PROXIES > 0:
+        app.wsgi_app = ProxyFix(
+            app.wsgi_app,
+            x_for=RATE_LIMIT_TRUSTED_PROXIES,
+            x_proto=RATE_LIMIT_TRUSTED_PROXIES,
+            x_host=RATE_LIMIT_TRUSTED_PROXIES
+        )
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.register_error_handler(Overloaded, lambda error: _overloaded())
@@ -0,0 +1,228 @@
+from flask import Blueprint, request, jsonify, session
+from src.services.token_service import get_user_from_token
+from src.services.property_service import get_agent_feed, get_property, FILTER_FIELDS, DEFAULT_PAGE_SIZE
+from src.services.offer_service import create_offer, get_agent_offers, get_agent_offer, update_offer, delete_offer
+from src.services.offer_service import DEFAULT_OFFERS_PAGE_SIZE
+from src.services.notification_service import get_agent_interests, set_agent_interests
+
+agents_bp = Blueprint('agents', __name__)
+
+def get_agent_or_error():
+    """
+    Přihlášený makléř ze session
+
+    Vrací dvojici (uživatel, None) nebo (None, chybová odpověď).
+    """
+    token = session.get('token')
+    if not token:
+        return None, (jsonify({'status': 'error', 'message': 'Uživatel není přihlášen'}), 401)
+
+    try:
+        user_data = get_user_from_token(token)
+    except Exception as e:
+        return None, (jsonify({'status': 'error', 'message': str(e)}), 401)
+
+    if user_data['user_type'] != 'agent':
+        return None, (jsonify({'status': 'error', 'message': 'Přístup je povolen pouze makléřům'}), 403)
+
+    return user_data, None
+
+@agents_bp.route('/properties', methods=['GET'])
+def get_properties_route():
+    """
+    Výpis dostupných inzerátů pro makléře
+    ---
+    Parametry dotazu:
+    - city, municipality, cadastral_area, property_type: filtry (fasety)
+    - status: stav inzerátu (výchozí active)
+    - fields, cursor, limit: jako u /api/properties/properties
+    - facets: 0 vynechá počty inzerátů podle faset
+    """
+    _, error = get_agent_or_error()
+    if error:
+        return error
+
+    filters = {field: request.args[field] for field in FILTER_FIELDS if request.args.get(field)}
+    fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+
+    try:
+        properties, next_cursor, facets = get_agent_feed(
+            filters=filters,
+            fields=fields or None,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+            include_facets=request.args.get('facets', '1') != '0'
+        )
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    return jsonify({
+        'status': 'success',
+        'properties': properties,
+        'next_cursor': next_cursor,
+        'facets': facets
+    }), 200
+
+@agents_bp.route('/properties/<id>', methods=['GET'])
+def get_property_route(id):
+    """
+    Detail inzerátu pro makléře
+    """
+    _, error = get_agent_or_error()
+    if error:
+        return error
+
+    property = get_property(id)
+    if property is None:
+        return jsonify({'status': 'error', 'message': 'Inzerát nebyl nalezen'}), 404
+
+    return jsonify({
+        'status': 'success',
+        'property': property
+    }), 200
+
+@agents_bp.route('/offers', methods=['POST'])
+def create_offer_route():
+    """
+    Vytvoření nabídky k inzerátu
+    ---
+    Očekává JSON s:
+    - property_id: ID inzerátu
+    - commission_percentage, commission_amount: provize v procentech a v Kč
+    - price_estimate_min, price_estimate_max: odhad ceny
+    - included_services, additional_services, video_presentation_url (nepovinné)
+    """
+    _, error = get_agent_or_error()
+    if error:
+        return error
+
+    try:
+        offer = create_offer(session.get('token'), request.get_json())
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+    return jsonify({'status': 'success', 'offer': offer}), 201
+
+@agents_bp.route('/offers', methods=['GET'])
+def get_offers_route():
+    """
+    Vlastní nabídky makléře od nejnovějších (stránkování cursor, limit)
+    """
+    _, error = get_agent_or_error()
+    if error:
+        return error
+
+    try:
+        offers, next_cursor = get_agent_offers(
+            session.get('token'),
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', DEFAULT_OFFERS_PAGE_SIZE, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+    return jsonify({
+        'status': 'success',
+        'offers': offers,
+        'next_cursor': next_cursor
+    }), 200
+
+@agents_bp.route('/offers/<id>', methods=['GET'])
+def get_offer_route(id):
+    _, error = get_agent_or_error()
+    if error:
+        return error
+
+    try:
+        offer = get_agent_offer(session.get('token'), id)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+    if offer is None:
+        return jsonify({'status': 'error', 'message': 'Nabídka nebyla nalezena'}), 404
+
+    return jsonify({'status': 'success', 'offer': offer}), 200
+
+@agents_bp.route('/offers/<id>', methods=['PUT'])
+def update_offer_route(id):
+    """
+    Úprava vlastní nabídky (jen ve stavu pending)
+    """
+    _, error = get_agent_or_error()
+    if error:
+        return error
+
+    try:
+        offer = update_offer(session.get('token'), id, request.get_json())
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+    if offer is None:
+        return jsonify({'status': 'error', 'message': 'Nabídka nebyla nalezena'}), 404
+
+    return jsonify({'status': 'success', 'offer': offer}), 200
+
+@agents_bp.route('/offers/<id>', methods=['DELETE'])
+def delete_offer_route(id):
+    _, error = get_agent_or_error()
+    if error:
+        return error
+
+    try:
+        deleted = delete_offer(session.get('token'), id)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+    if not deleted:
+        return jsonify({'status': 'error', 'message': 'Nabídka nebyla nalezena'}), 404
+
+    return jsonify({'status': 'success', 'message': 'Nabídka byla smazána'}), 200
+
+@agents_bp.route('/interests', methods=['GET'])
+def get_interests_route():
+    """
+    Zájmy makléře, podle kterých dostává notifikace o nových inzerátech
+    """
+    _, error = get_agent_or_error()
+    if error:
+        return error
+
+    try:
+        interests = get_agent_interests(session.get('token'))
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+    return jsonify({'status': 'success', 'interests': interests}), 200
+
+@agents_bp.route('/interests', methods=['PUT'])
+def set_interests_route():
+    """
+    Nahrazení zájmů makléře
+    ---
+    Očekává JSON s:
+    - interests: seznam objektů s nepovinnými poli city a property_type
+      (chybějící pole znamená libovolné město nebo typ)
+
+    Notifikace o nových inzerátech se slučují do digestů, nejvýše jeden
+    za NOTIFICATION_COALESCE_WINDOW sekund.
+    """
+    _, error = get_agent_or_error()
+    if error:
+        return error
+
+    data = request.get_json() or {}
+
+    try:
+        interests = set_agent_interests(session.get('token'), data.get('interests'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+    return jsonify({'status': 'success', 'interests': interests}), 200
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify, session
-from src.services.auth_service import register_user, login_user, login_with_google, logout_user, get_current_user
+from src.services.auth_service import register_user, login_user, login_with_google, logout_user, get_current_user, update_current_user
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -138,3 +138,28 @@ def me():
         }), 200
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 401
+
+@auth_bp.route('/me', methods=['PUT'])
+def update_me():
+    """
+    Aktualizace údajů přihlášeného uživatele
+    ---
+    Očekává JSON s:
+    - full_name: jméno a příjmení (volitelné)
+    - phone: telefonní číslo (volitelné)
+    """
+    token = session.get('token')
+    if not token:
+        return jsonify({'status': 'error', 'message': 'Uživatel není přihlášen'}), 401
+    
+    data = request.get_json()
+    
+    try:
+        user = update_current_user(token, data)
+        return jsonify({
+            'status': 'success',
+            'message': 'Údaje byly aktualizovány',
+            'user': user
+        }), 200
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
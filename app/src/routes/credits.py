@@ -1,8 +1,23 @@
-from flask import Blueprint, request, jsonify, session
-from src.services.credit_service import get_agent_credits, purchase_credits, use_credits, get_credit_transactions
+import csv
+import io
+from flask import Blueprint, Response, request, jsonify, session, stream_with_context
+from src.services.credit_service import get_agent_credits, purchase_credits, use_credits, stream_credit_transactions
+from src.services.credit_service import iter_credit_transactions, parse_transaction_filters, DEFAULT_TRANSACTIONS_PAGE_SIZE
+from src.idempotency import idempotent, get_idempotency_key
+from src.streaming import json_list_response
 
 credits_bp = Blueprint('credits', __name__)
 
+# Sloupce CSV exportu historie transakcí
+TRANSACTION_EXPORT_COLUMNS = ['created_at', 'transaction_type', 'amount', 'balance_after', 'description', 'payment_id', 'id']
+
+def transaction_filters_from_args():
+    return parse_transaction_filters(
+        date_from=request.args.get('from'),
+        date_to=request.args.get('to'),
+        transaction_type=request.args.get('type')
+    )
+
 @credits_bp.route('/balance', methods=['GET'])
 def get_balance():
     """
@@ -22,6 +37,7 @@ def get_balance():
         return jsonify({'status': 'error', 'message': str(e)}), 400
 
 @credits_bp.route('/purchase', methods=['POST'])
+@idempotent('purchase_credits')
 def purchase():
     """
     Nákup kreditů
@@ -29,6 +45,9 @@ def purchase():
     Očekává JSON s:
     - amount: počet kreditů k nákupu
     - payment_method: metoda platby (card, bank_transfer)
+
+    S hlavičkou Idempotency-Key (např. UUID vygenerované klientem) vrátí
+    opakovaný požadavek původní odpověď a kredity se nepřipíšou dvakrát.
     """
     token = session.get('token')
     if not token:
@@ -57,7 +76,8 @@ def purchase():
         payment_info = purchase_credits(
             token=token,
             amount=amount,
-            payment_method=data['payment_method']
+            payment_method=data['payment_method'],
+            idempotency_key=get_idempotency_key()
         )
         
         return jsonify({
@@ -65,16 +85,21 @@ def purchase():
             'message': 'Platba byla zahájena',
             'payment_info': payment_info
         }), 200
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 422
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 400
 
 @credits_bp.route('/use', methods=['POST'])
+@idempotent('use_credits')
 def use():
     """
     Použití kreditů pro získání přístupu ke kontaktům
     ---
     Očekává JSON s:
     - property_id: ID nemovitosti
+
+    Podporuje hlavičku Idempotency-Key jako /purchase.
     """
     token = session.get('token')
     if not token:
@@ -104,16 +129,75 @@ def use():
 def transactions():
     """
     Získání historie transakcí kreditů
+    ---
+    Parametry dotazu:
+    - from, to: období (YYYY-MM-DD, oba dny včetně)
+    - type: typ transakce (purchase, usage)
+    - cursor: next_cursor z předchozí stránky
+    - limit: počet transakcí na stránku
+    - summary: 0 vynechá souhrn po měsících a typech
+
+    Transakce se čtou z databáze po dávkách a odesílají průběžně,
+    komprimované podle Accept-Encoding.
     """
     token = session.get('token')
     if not token:
         return jsonify({'status': 'error', 'message': 'Uživatel není přihlášen'}), 401
     
     try:
-        transactions = get_credit_transactions(token)
-        return jsonify({
-            'status': 'success',
-            'transactions': transactions
-        }), 200
+        filters = transaction_filters_from_args()
+        limit = request.args.get('limit', DEFAULT_TRANSACTIONS_PAGE_SIZE, type=int)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    try:
+        history = stream_credit_transactions(
+            token,
+            cursor=request.args.get('cursor'),
+            limit=limit,
+            filters=filters,
+            include_summary=request.args.get('summary', '1') != '0'
+        )
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    page = history['transactions']
+    return json_list_response(
+        {'status': 'success', 'summary': history['summary']},
+        'transactions',
+        page,
+        lambda: {'next_cursor': page.next_cursor}
+    )
+
+@credits_bp.route('/transactions/export', methods=['GET'])
+def export_transactions():
+    """
+    Export historie transakcí jako CSV
+    ---
+    Podporuje stejné filtry jako /transactions. Transakce se čtou po stránkách
+    a odesílají průběžně, takže paměť nezávisí na délce historie.
+    """
+    token = session.get('token')
+    if not token:
+        return jsonify({'status': 'error', 'message': 'Uživatel není přihlášen'}), 401
+    
+    try:
+        filters = transaction_filters_from_args()
+        rows = iter_credit_transactions(token, filters=filters)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=TRANSACTION_EXPORT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    
+    response = Response(stream_with_context(generate()), mimetype='text/csv')
+    response.headers['Content-Disposition'] = 'attachment; filename=credit_transactions.csv'
+    return response
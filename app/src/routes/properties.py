@@ -1,5 +1,13 @@
-from flask import Blueprint, request, jsonify
-from src.services.property_service import create_property, get_properties, get_property, update_property, delete_property
+import csv
+import io
+import json
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from src.services.property_service import create_property, update_property, delete_property, FILTER_FIELDS, DEFAULT_PAGE_SIZE
+from src.services.property_service import bulk_create_properties, iter_properties, PROPERTY_FIELDS, DEFAULT_BULK_CHUNK_SIZE
+from src.services.property_service import get_property_with_etag, get_cached_property_etag
+from src.services.property_service import search_properties, DEFAULT_SEARCH_LIMIT
+from src.services.property_service import find_nearby_properties, parse_nearby_area, stream_properties
+from src.streaming import json_list_response
 
 properties_bp = Blueprint('properties', __name__)
 
@@ -11,13 +19,201 @@ def create_property_route():
 
 @properties_bp.route('/properties', methods=['GET'])
 def get_properties_route():
-    properties = get_properties()
-    return jsonify(properties), 200
+    """
+    Stránkovaný výpis inzerátů
+    ---
+    Stránka (limit až MAX_STREAM_PAGE_SIZE) se čte z databáze po dávkách
+    a odesílá průběžně, komprimovaná podle Accept-Encoding.
+    """
+    filters = {field: request.args[field] for field in FILTER_FIELDS if request.args.get(field)}
+    fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+    
+    try:
+        page = stream_properties(
+            filters=filters,
+            fields=fields or None,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return json_list_response({'status': 'success'}, 'properties', page, lambda: {'next_cursor': page.next_cursor})
+
+def _iter_ndjson_rows(stream):
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, f'Neplatný JSON: {str(e)}'
+
+def _iter_csv_rows(stream):
+    # Číslo řádku 1 je hlavička
+    for line_number, row in enumerate(csv.DictReader(stream), start=2):
+        if None in row:
+            yield line_number, 'Řádek má více hodnot než hlavička'
+        else:
+            yield line_number, row
+
+@properties_bp.route('/bulk', methods=['POST'])
+def bulk_create_properties_route():
+    """
+    Hromadný import inzerátů
+    ---
+    Tělo požadavku je NDJSON (application/x-ndjson, jeden inzerát na řádek)
+    nebo CSV s hlavičkou (text/csv). Velikost dávky určuje parametr chunk_size.
+    """
+    content_type = request.mimetype
+    stream = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+    
+    if content_type in ('application/x-ndjson', 'application/jsonl'):
+        rows = _iter_ndjson_rows(stream)
+    elif content_type == 'text/csv':
+        rows = _iter_csv_rows(stream)
+    else:
+        return jsonify({'status': 'error', 'message': 'Nepodporovaný formát. Povolené hodnoty: application/x-ndjson, text/csv'}), 415
+    
+    result = bulk_create_properties(rows, chunk_size=request.args.get('chunk_size', DEFAULT_BULK_CHUNK_SIZE, type=int))
+    
+    return jsonify({'status': 'success', **result}), 200
+
+@properties_bp.route('/export', methods=['GET'])
+def export_properties_route():
+    """
+    Export inzerátů jako NDJSON (výchozí) nebo CSV (format=csv)
+    ---
+    Podporuje stejné filtry a fields jako výpis. Data se čtou po stránkách
+    a odesílají průběžně, takže paměť nezávisí na počtu inzerátů.
+    """
+    filters = {field: request.args[field] for field in FILTER_FIELDS if request.args.get(field)}
+    fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+    export_format = request.args.get('format', 'ndjson')
+    
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'status': 'error', 'message': 'Neplatný formát. Povolené hodnoty: ndjson, csv'}), 400
+    
+    if any(field not in PROPERTY_FIELDS for field in fields):
+        return jsonify({'status': 'error', 'message': 'Neznámé sloupce ve fields'}), 400
+    
+    rows = iter_properties(filters=filters, fields=fields or None)
+    
+    if export_format == 'csv':
+        columns = list(dict.fromkeys(['id', 'created_at', *fields])) if fields else list(PROPERTY_FIELDS)
+        
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        
+        mimetype = 'text/csv'
+    else:
+        def generate():
+            for row in rows:
+                yield json.dumps(row, ensure_ascii=False) + '\n'
+        
+        mimetype = 'application/x-ndjson'
+    
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=properties.{export_format}'
+    return response
+
+@properties_bp.route('/search', methods=['GET'])
+def search_properties_route():
+    """
+    Fulltextové vyhledávání aktivních inzerátů
+    ---
+    Parametry dotazu:
+    - q: hledaný text (bez ohledu na velikost písmen a diakritiku)
+    - fields: sloupce ve výsledku
+    - limit, offset: stránkování výsledků seřazených podle relevance
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'status': 'error', 'message': 'Chybí hledaný text (q)'}), 400
+    
+    fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+    limit = request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    
+    try:
+        properties, has_more = search_properties(q, fields=fields or None, limit=limit, offset=offset)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return jsonify({
+        'status': 'success',
+        'properties': properties,
+        'next_offset': offset + len(properties) if has_more else None
+    }), 200
+
+@properties_bp.route('/properties/nearby', methods=['GET'])
+def nearby_properties_route():
+    """
+    Inzeráty v okolí místa, od nejbližších
+    ---
+    Parametry dotazu:
+    - lat, lon: střed hledání, nebo postal_code / municipality dohledané v tabulce obcí
+    - radius_km: poloměr v km (výchozí 10)
+    - bbox: místo poloměru obdélník min_lon,min_lat,max_lon,max_lat
+    - status: stav inzerátu (výchozí active)
+    - fields, limit, offset: sloupce a stránkování
+    """
+    args = request.args
+    fields = [field.strip() for field in args.get('fields', '').split(',') if field.strip()]
+    limit = args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    offset = args.get('offset', 0, type=int)
+    
+    try:
+        center, radius_km, bbox = parse_nearby_area(
+            lat=args.get('lat'),
+            lon=args.get('lon'),
+            postal_code=args.get('postal_code'),
+            municipality=args.get('municipality'),
+            radius_km=args.get('radius_km'),
+            bbox=args.get('bbox')
+        )
+        properties, has_more, truncated = find_nearby_properties(
+            center, radius_km=radius_km, bbox=bbox, status=args.get('status', 'active'),
+            fields=fields or None, limit=limit, offset=offset
+        )
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return jsonify({
+        'status': 'success',
+        'properties': properties,
+        'center': {'latitude': center[0], 'longitude': center[1]} if center else None,
+        'radius_km': radius_km,
+        'next_offset': offset + len(properties) if has_more else None,
+        # Prostorový index ještě není připravený a v oblasti je víc inzerátů, než se přečetlo
+        'truncated': truncated
+    }), 200
 
 @properties_bp.route('/properties/<id>', methods=['GET'])
 def get_property_route(id):
-    property = get_property(id)
-    return jsonify(property), 200
+    # Klient má aktuální verzi a inzerát je v cache: odpověď bez dotazu do databáze
+    if request.if_none_match:
+        etag = get_cached_property_etag(id)
+        if etag and request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+    
+    property, etag = get_property_with_etag(id)
+    if property is None:
+        return jsonify(property), 200
+    
+    response = jsonify(property)
+    response.set_etag(etag)
+    return response.make_conditional(request)
 
 @properties_bp.route('/properties/<id>', methods=['PUT'])
 def update_property_route(id):
@@ -28,4 +224,4 @@ def update_property_route(id):
 @properties_bp.route('/properties/<id>', methods=['DELETE'])
 def delete_property_route(id):
     result = delete_property(id)
-    return jsonify(result), 200
\ No newline at end of file
+    return jsonify(result), 200
\ No newline at end of file
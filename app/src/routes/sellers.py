@@ -0,0 +1,246 @@
+from flask import Blueprint, request, jsonify, session
+from src.services.token_service import get_user_from_token
+from src.services.property_service import get_property
+from src.services.media_service import create_upload, get_upload, write_chunk, abort_upload, store_file
+from src.services.media_service import get_property_media, delete_media, UploadConflict
+from src.services.offer_service import get_property_offers, get_offer_stats, DEFAULT_OFFERS_PAGE_SIZE
+
+sellers_bp = Blueprint('sellers', __name__)
+
+def get_seller_or_error():
+    """
+    Přihlášený prodávající ze session
+
+    Vrací dvojici (uživatel, None) nebo (None, chybová odpověď).
+    """
+    token = session.get('token')
+    if not token:
+        return None, (jsonify({'status': 'error', 'message': 'Uživatel není přihlášen'}), 401)
+
+    try:
+        user_data = get_user_from_token(token)
+    except Exception as e:
+        return None, (jsonify({'status': 'error', 'message': str(e)}), 401)
+
+    if user_data['user_type'] != 'seller':
+        return None, (jsonify({'status': 'error', 'message': 'Přístup je povolen pouze prodávajícím'}), 403)
+
+    return user_data, None
+
+def get_own_property_or_error(id):
+    """
+    Inzerát přihlášeného prodávajícího
+
+    Vrací dvojici (inzerát, None) nebo (None, chybová odpověď).
+    """
+    user, error = get_seller_or_error()
+    if error:
+        return None, error
+
+    property = get_property(id)
+    if property is None:
+        return None, (jsonify({'status': 'error', 'message': 'Inzerát nebyl nalezen'}), 404)
+
+    if str(property.get('seller_id')) != str(user['id']):
+        return None, (jsonify({'status': 'error', 'message': 'Inzerát patří jinému prodávajícímu'}), 403)
+
+    return property, None
+
+def get_upload_or_error(id, upload_id):
+    upload = get_upload(upload_id)
+    if upload is None or upload['property_id'] != id:
+        return None, (jsonify({'status': 'error', 'message': 'Nahrávání nebylo nalezeno'}), 404)
+    return upload, None
+
+@sellers_bp.route('/properties/<id>/offers', methods=['GET'])
+def get_offers_route(id):
+    """
+    Nabídky makléřů k vlastnímu inzerátu se souhrnem
+    ---
+    Parametry dotazu:
+    - sort: created_at, commission_percentage, commission_amount, price_estimate_min,
+      price_estimate_max; s '-' sestupně (výchozí -created_at)
+    - status: pending, approved nebo rejected
+    - limit, offset: stránkování
+    - stats: 0 vynechá souhrn (počty, min, medián a max)
+    """
+    _, error = get_own_property_or_error(id)
+    if error:
+        return error
+
+    limit = request.args.get('limit', DEFAULT_OFFERS_PAGE_SIZE, type=int)
+    offset = request.args.get('offset', 0, type=int)
+
+    try:
+        offers, has_more = get_property_offers(
+            id,
+            sort=request.args.get('sort'),
+            status=request.args.get('status'),
+            limit=limit,
+            offset=offset
+        )
+        stats = get_offer_stats(id) if request.args.get('stats', '1') != '0' else None
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+    return jsonify({
+        'status': 'success',
+        'offers': offers,
+        'next_offset': offset + len(offers) if has_more else None,
+        'stats': stats
+    }), 200
+
+@sellers_bp.route('/properties/<id>/media', methods=['GET'])
+def get_media_route(id):
+    """
+    Média inzerátu v pořadí galerie
+    ---
+    processing_status je processing, dokud se generují náhledy
+    (thumbnail_url, web_url u fotek, poster_url u videí).
+    """
+    _, error = get_own_property_or_error(id)
+    if error:
+        return error
+
+    try:
+        media = get_property_media(id)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    return jsonify({'status': 'success', 'media': media}), 200
+
+@sellers_bp.route('/properties/<id>/media', methods=['POST'])
+def upload_media_route(id):
+    """
+    Nahrání médií jedním požadavkem (multipart, pole files)
+    ---
+    Vhodné pro fotky; velká videa se nahrávají po částech přes /media/uploads.
+    """
+    _, error = get_own_property_or_error(id)
+    if error:
+        return error
+
+    files = request.files.getlist('files')
+    if not files:
+        return jsonify({'status': 'error', 'message': 'Chybí soubory (files)'}), 400
+
+    media = []
+    try:
+        for file in files:
+            media.append(store_file(id, file.stream, file.filename, file.mimetype))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e), 'media': media}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e), 'media': media}), 500
+
+    return jsonify({'status': 'success', 'media': media}), 201
+
+@sellers_bp.route('/properties/<id>/media/<media_id>', methods=['DELETE'])
+def delete_media_route(id, media_id):
+    _, error = get_own_property_or_error(id)
+    if error:
+        return error
+
+    try:
+        deleted = delete_media(id, media_id)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    if not deleted:
+        return jsonify({'status': 'error', 'message': 'Médium nebylo nalezeno'}), 404
+
+    return jsonify({'status': 'success', 'message': 'Médium bylo smazáno'}), 200
+
+@sellers_bp.route('/properties/<id>/media/uploads', methods=['POST'])
+def create_upload_route(id):
+    """
+    Založení nahrávání souboru po částech
+    ---
+    Očekává JSON s:
+    - filename: název souboru
+    - size: velikost souboru v bajtech
+    - content_type: MIME typ (image/jpeg, image/png, image/webp, image/heic, video/mp4, video/quicktime, video/webm)
+
+    Kusy se pak posílají přes PUT /media/uploads/<upload_id> s hlavičkou
+    Upload-Offset; přerušené nahrávání se naváže od offsetu z GET.
+    """
+    _, error = get_own_property_or_error(id)
+    if error:
+        return error
+
+    data = request.get_json() or {}
+    for field in ('filename', 'size', 'content_type'):
+        if field not in data:
+            return jsonify({'status': 'error', 'message': f'Chybí povinné pole: {field}'}), 400
+
+    try:
+        upload = create_upload(id, data['filename'], data['size'], data['content_type'])
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    return jsonify({'status': 'success', 'upload': upload}), 201
+
+@sellers_bp.route('/properties/<id>/media/uploads/<upload_id>', methods=['GET'])
+def get_upload_route(id, upload_id):
+    _, error = get_own_property_or_error(id)
+    if error:
+        return error
+
+    upload, error = get_upload_or_error(id, upload_id)
+    if error:
+        return error
+
+    response = jsonify({'status': 'success', 'upload': upload})
+    response.headers['Upload-Offset'] = str(upload['offset'])
+    return response, 200
+
+@sellers_bp.route('/properties/<id>/media/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk_route(id, upload_id):
+    """
+    Nahrání jednoho kusu souboru
+    ---
+    Tělo požadavku jsou surová data kusu (application/octet-stream),
+    hlavička Upload-Offset (nebo parametr offset) je jeho pozice v souboru.
+    Po posledním kusu vrací 201 a nový záznam média.
+    """
+    _, error = get_own_property_or_error(id)
+    if error:
+        return error
+
+    upload, error = get_upload_or_error(id, upload_id)
+    if error:
+        return error
+
+    offset = request.headers.get('Upload-Offset', request.args.get('offset'))
+    if offset is None or not offset.isdigit():
+        return jsonify({'status': 'error', 'message': 'Chybí nebo je neplatný Upload-Offset'}), 400
+
+    try:
+        result = write_chunk(upload, int(offset), request.stream, request.content_length)
+    except UploadConflict as e:
+        response = jsonify({'status': 'error', 'message': str(e), 'offset': e.offset})
+        response.headers['Upload-Offset'] = str(e.offset)
+        return response, 409
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+    response = jsonify({'status': 'success', **result})
+    response.headers['Upload-Offset'] = str(result['offset'])
+    return response, 201 if 'media' in result else 200
+
+@sellers_bp.route('/properties/<id>/media/uploads/<upload_id>', methods=['DELETE'])
+def abort_upload_route(id, upload_id):
+    _, error = get_own_property_or_error(id)
+    if error:
+        return error
+
+    _, error = get_upload_or_error(id, upload_id)
+    if error:
+        return error
+
+    abort_upload(upload_id)
+    return jsonify({'status': 'success', 'message': 'Nahrávání bylo zrušeno'}), 200
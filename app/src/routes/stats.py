@@ -0,0 +1,94 @@
+from flask import Blueprint, request, jsonify, session
+from src.services.token_service import get_user_from_token
+from src.services.stats_service import parse_stats_range, parse_group_by, get_rollup_stats, get_stats_overview
+
+stats_bp = Blueprint('stats', __name__)
+
+def get_admin_or_error():
+    """
+    Přihlášený administrátor ze session
+
+    Vrací dvojici (uživatel, None) nebo (None, chybová odpověď).
+    """
+    token = session.get('token')
+    if not token:
+        return None, (jsonify({'status': 'error', 'message': 'Uživatel není přihlášen'}), 401)
+
+    try:
+        user_data = get_user_from_token(token)
+    except Exception as e:
+        return None, (jsonify({'status': 'error', 'message': str(e)}), 401)
+
+    if not user_data.get('is_admin'):
+        return None, (jsonify({'status': 'error', 'message': 'Přístup je povolen pouze administrátorům'}), 403)
+
+    return user_data, None
+
+@stats_bp.route('', methods=['GET'])
+def overview():
+    """
+    Přehled statistik za období
+    ---
+    Parametry dotazu:
+    - from, to: období (YYYY-MM-DD, oba dny včetně, výchozí posledních 30 dní)
+
+    Vrací součty kreditů po typech transakcí, počet odemčení kontaktů
+    a počet nových inzerátů. Čte jen denní souhrny (aktualizuje je
+    job src.jobs.refresh_rollups), nejnovější změny v nich chybí.
+    """
+    _, error = get_admin_or_error()
+    if error:
+        return error
+
+    try:
+        period = parse_stats_range(request.args.get('from'), request.args.get('to'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    try:
+        stats = get_stats_overview(period)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    return jsonify({
+        'status': 'success',
+        'from': period['from'],
+        'to': period['to'],
+        **stats
+    }), 200
+
+@stats_bp.route('/<rollup>', methods=['GET'])
+def rollup_stats(rollup):
+    """
+    Součty jednoho souhrnu za období
+    ---
+    Cesta: credits, unlocks nebo listings
+    Parametry dotazu:
+    - from, to: období (YYYY-MM-DD, oba dny včetně, výchozí posledních 30 dní)
+    - group_by: sloupce seskupení oddělené čárkou
+      (credits: day, agent_id, transaction_type;
+       unlocks: day, agent_id, city, property_type;
+       listings: day, city, cadastral_area, property_type)
+    """
+    _, error = get_admin_or_error()
+    if error:
+        return error
+
+    try:
+        period = parse_stats_range(request.args.get('from'), request.args.get('to'))
+        group_by = parse_group_by(rollup, request.args.get('group_by'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    try:
+        rows = get_rollup_stats(rollup, period, group_by)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    return jsonify({
+        'status': 'success',
+        'from': period['from'],
+        'to': period['to'],
+        'group_by': group_by,
+        'rows': rows
+    }), 200
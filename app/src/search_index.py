@@ -0,0 +1,374 @@
+import heapq
+import math
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.indexing import IncrementalIndex
+
+# Prohledávané sloupce a jejich váha ve skóre (shoda ve městě je silnější než v popisu)
+SEARCH_FIELDS = {'city': 3, 'street': 2, 'description': 1}
+
+# Parametry BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Prefixové hledání: minimální délka prefixu, počet rozvinutých termů a jejich váha
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_TERMS = 50
+PREFIX_WEIGHT = 0.7
+
+# Kolik kandidátů nejvzácnějšího slova se nejvýše prověří, když už je výsledek plný.
+# Kandidáti jdou od nejvyššího příspěvku, takže další by pořadí změnily jen málo;
+# omezení drží latenci dotazu s častými slovy v jednotkách milisekund.
+MAX_CANDIDATES = 2000
+
+# Počet zapamatovaných výsledků dotazů; při každé změně indexu se zahodí
+QUERY_CACHE_SIZE = 512
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def _build_fold_table() -> Dict[int, str]:
+    # Odstranění diakritiky pro latinku (včetně č, ř, ů, ...) přes str.translate, bez průchodu po znacích
+    table = {}
+    for code in range(0xC0, 0x250):
+        decomposed = unicodedata.normalize('NFKD', chr(code))
+        base = ''.join(char for char in decomposed if not unicodedata.combining(char))
+        if base and base != chr(code):
+            table[code] = base
+    return table
+
+
+_FOLD_TABLE = _build_fold_table()
+
+
+def fold(text: str) -> str:
+    """Malá písmena bez diakritiky: 'Čeňkova Ulice' -> 'cenkova ulice'"""
+    return text.lower().translate(_FOLD_TABLE)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_PATTERN.findall(fold(text)) if text else []
+
+
+class _SearchState:
+    """
+    Invertovaný index jednoho sestavení
+
+    Inzeráty mají číselné sloty a termy číselná ID, posting listy i termy
+    inzerátu jsou kompaktní pole (array), ne slovníky objektů - jinak by
+    miliony dvojic term-inzerát zabraly stovky MB. Posting list termu je
+    seřazený podle příspěvku BM25 sestupně, takže dotaz může číst nejlepší
+    kandidáty jako první a skončit, jakmile zbytek nemůže předstihnout
+    dosavadní výsledky.
+    """
+
+    def __init__(self):
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.slot_of: Dict[str, int] = {}
+        self.ids: List[Optional[str]] = []
+        self.free_slots: List[int] = []
+
+        self.term_ids: Dict[str, int] = {}
+        self.terms: Dict[int, str] = {}
+        self.next_term_id = 0
+        # Seřazený slovník termů pro prefixové hledání; None během hromadného plnění
+        self.vocabulary: Optional[List[str]] = None
+
+        # Termy inzerátu (ID termů vzestupně) a jejich vážené četnosti, podle slotu
+        self.doc_terms: List[array] = []
+        self.doc_frequencies: List[array] = []
+        self.doc_length: List[int] = []
+        self.total_length = 0
+        # Průměrná délka pro BM25 z posledního sestavení (příspěvky v posting listech z ní vycházejí)
+        self.average_length = 1.0
+
+        # ID termu -> (sloty, záporné příspěvky vzestupně); při hromadném plnění (sloty, četnosti)
+        self.postings: Dict[int, Tuple[array, array]] = {}
+        self.bulk = True
+
+    # Zápis
+
+    def add(self, row: Dict[str, Any]) -> None:
+        id = str(row['id'])
+        self.remove(id)
+
+        counts: Counter = Counter()
+        for field, weight in SEARCH_FIELDS.items():
+            for term in tokenize(row.get(field)):
+                counts[term] += weight
+
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            slot = len(self.ids)
+            self.ids.append(None)
+            self.doc_terms.append(array('I'))
+            self.doc_frequencies.append(array('H'))
+            self.doc_length.append(0)
+
+        terms = sorted((self._term_id(term), min(frequency, 0xFFFF)) for term, frequency in counts.items())
+        length = sum(frequency for _, frequency in terms)
+
+        self.rows[id] = row
+        self.slot_of[id] = slot
+        self.ids[slot] = id
+        self.doc_terms[slot] = array('I', (term_id for term_id, _ in terms))
+        self.doc_frequencies[slot] = array('H', (frequency for _, frequency in terms))
+        self.doc_length[slot] = length
+        self.total_length += length
+
+        for term_id, frequency in terms:
+            slots, values = self.postings[term_id]
+            if self.bulk:
+                slots.append(slot)
+                values.append(frequency)
+            else:
+                negative = -self.contribution(frequency, length)
+                position = bisect_right(values, negative)
+                values.insert(position, negative)
+                slots.insert(position, slot)
+
+    def remove(self, id: str) -> None:
+        slot = self.slot_of.pop(id, None)
+        if slot is None:
+            return
+
+        del self.rows[id]
+        self.ids[slot] = None
+        self.total_length -= self.doc_length[slot]
+
+        length = self.doc_length[slot]
+        for term_id, frequency in zip(self.doc_terms[slot], self.doc_frequencies[slot]):
+            slots, values = self.postings[term_id]
+            # Pozice podle příspěvku (stejný výpočet jako při vložení), pak mezi stejnými hodnotami
+            position = bisect_left(values, -self.contribution(frequency, length))
+            while slots[position] != slot:
+                position += 1
+            del slots[position]
+            del values[position]
+            if not slots:
+                self._drop_term(term_id)
+
+        self.doc_terms[slot] = array('I')
+        self.doc_frequencies[slot] = array('H')
+        self.doc_length[slot] = 0
+        self.free_slots.append(slot)
+
+    def finish(self) -> None:
+        """Převod posting listů z hromadného plnění na seřazené příspěvky BM25"""
+        self.average_length = self.total_length / len(self.rows) if self.rows else 1.0
+        contribution = self.contribution
+        doc_length = self.doc_length
+
+        for term_id, (slots, frequencies) in self.postings.items():
+            pairs = sorted(
+                (-contribution(frequency, doc_length[slot]), slot)
+                for slot, frequency in zip(slots, frequencies)
+            )
+            self.postings[term_id] = (array('I', (slot for _, slot in pairs)), array('d', (value for value, _ in pairs)))
+
+        self.vocabulary = sorted(self.term_ids)
+        self.bulk = False
+
+    def _term_id(self, term: str) -> int:
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            term_id = self.next_term_id
+            self.next_term_id += 1
+            self.term_ids[term] = term_id
+            self.terms[term_id] = term
+            self.postings[term_id] = (array('I'), array('H' if self.bulk else 'd'))
+            if self.vocabulary is not None:
+                insort(self.vocabulary, term)
+        return term_id
+
+    def _drop_term(self, term_id: int) -> None:
+        del self.postings[term_id]
+        term = self.terms.pop(term_id)
+        del self.term_ids[term]
+        if self.vocabulary is not None:
+            del self.vocabulary[bisect_left(self.vocabulary, term)]
+
+    # Čtení
+
+    def contribution(self, frequency: int, length: int) -> float:
+        # Část skóre BM25 bez IDF (ta je pro celý posting list stejná)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / self.average_length)
+        return frequency * (BM25_K1 + 1) / (frequency + norm)
+
+    def idf(self, term_id: int) -> float:
+        frequency = len(self.postings[term_id][0])
+        return math.log(1 + (len(self.rows) - frequency + 0.5) / (frequency + 0.5))
+
+    def expand(self, token: str, prefix: bool = True) -> Dict[int, float]:
+        """Termy odpovídající tokenu dotazu s vahou (přesná shoda 1.0, prefix PREFIX_WEIGHT)"""
+        expansions = {self.term_ids[token]: 1.0} if token in self.term_ids else {}
+
+        if (prefix or not expansions) and len(token) >= MIN_PREFIX_LENGTH:
+            start = bisect_left(self.vocabulary, token)
+            end = bisect_left(self.vocabulary, token + '\uffff', start)
+            candidates = self.vocabulary[start:end]
+            if len(candidates) > MAX_PREFIX_TERMS:
+                # Nejčastější termy s daným prefixem
+                candidates = heapq.nlargest(
+                    MAX_PREFIX_TERMS, candidates, key=lambda term: len(self.postings[self.term_ids[term]][0])
+                )
+            for term in candidates:
+                expansions.setdefault(self.term_ids[term], PREFIX_WEIGHT)
+
+        return expansions
+
+
+class SearchIndex(IncrementalIndex):
+    """
+    Fulltextový index aktivních inzerátů (popis, ulice, město)
+
+    Text se převádí na malá písmena bez diakritiky, takže 'zizkov' najde
+    'Žižkov'. Každé slovo dotazu musí být nalezeno; poslední slovo a slova
+    bez přesné shody stačí jako prefix slova v inzerátu ('balk' najde
+    'balkon'). Výsledky se řadí podle BM25 s váhami sloupců.
+    """
+
+    def __init__(self):
+        # Klíč: slova dotazu; hodnota: (počet vyžádaných výsledků, výsledky jako (skóre, slot))
+        self._query_cache: "OrderedDict[Tuple[str, ...], Tuple[int, List[Tuple[float, int]]]]" = OrderedDict()
+        super().__init__()
+
+    def _new_state(self) -> _SearchState:
+        return _SearchState()
+
+    def _apply_upsert(self, state: _SearchState, row: Dict[str, Any]) -> None:
+        id = str(row['id'])
+        # update_property vrací jen změněný řádek, ale může jít o částečná data
+        merged = {**state.rows.get(id, {}), **row}
+        if merged.get('status') == 'active':
+            state.add(merged)
+        else:
+            state.remove(id)
+
+    def _apply_remove(self, state: _SearchState, id: str) -> None:
+        state.remove(id)
+
+    def _finish(self, state: _SearchState) -> _SearchState:
+        state.finish()
+        return state
+
+    def _changed(self) -> None:
+        self._query_cache.clear()
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Vyhledání inzerátů podle textu
+
+        Args:
+            query: Hledaný text
+            limit: Počet výsledků
+            offset: Počet přeskočených výsledků
+
+        Returns:
+            Tuple (řádky s klíčem score, zda existují další výsledky)
+        """
+        tokens = tuple(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return [], False
+
+        # O výsledek víc, aby šlo poznat další stránku
+        needed = offset + limit + 1
+
+        with self._lock:
+            state = self._state
+            cached = self._query_cache.get(tokens)
+            # Použitelné, pokud obsahuje dost výsledků, nebo už obsahuje všechny
+            if cached is not None and (cached[0] >= needed or len(cached[1]) < cached[0]):
+                self._query_cache.move_to_end(tokens)
+                ranked = cached[1]
+            else:
+                ranked = self._top(state, tokens, needed)
+                self._query_cache[tokens] = (needed, ranked)
+                if len(self._query_cache) > QUERY_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+
+            page = ranked[offset:offset + limit]
+            rows = [{**state.rows[state.ids[slot]], 'score': round(score, 4)} for score, slot in page]
+            return rows, len(ranked) > offset + limit
+
+    def _top(self, state: _SearchState, tokens: Tuple[str, ...], count: int) -> List[Tuple[float, int]]:
+        """
+        Nejlepších count inzerátů obsahujících všechna slova dotazu
+
+        Kandidáti se čtou z posting listů nejvzácnějšího slova od nejvyššího
+        příspěvku; ostatní slova se dohledají v termech kandidáta. Čtení
+        skončí, jakmile ani maximální možný příspěvek ostatních slov nestačí
+        na nejhorší z dosavadních count výsledků.
+        """
+        weighted = []
+        for position, token in enumerate(tokens):
+            # Jako prefix se bere poslední (právě psané) slovo a slova bez přesné shody
+            expansions = state.expand(token, prefix=position == len(tokens) - 1)
+            if not expansions:
+                return []
+            terms = [(term_id, weight * state.idf(term_id)) for term_id, weight in expansions.items()]
+            size = sum(len(state.postings[term_id][0]) for term_id, _ in terms)
+            weighted.append((size, terms))
+
+        weighted.sort(key=lambda item: item[0])
+        driver = weighted[0][1]
+        others = [terms for _, terms in weighted[1:]]
+
+        # Nejvyšší možný příspěvek ostatních slov dohromady
+        remaining = sum(
+            max(weight * -state.postings[term_id][1][0] for term_id, weight in terms)
+            for terms in others
+        )
+
+        heap: List[Tuple[float, int]] = []
+        seen = set()
+        doc_terms = state.doc_terms
+        doc_frequencies = state.doc_frequencies
+        doc_length = state.doc_length
+        contribution = state.contribution
+
+        for negative, slot in heapq.merge(*(self._stream(state, term_id, weight) for term_id, weight in driver)):
+            if len(heap) >= count and (-negative + remaining <= heap[0][0] or len(seen) >= MAX_CANDIDATES):
+                break
+            # Stejný inzerát z dalšího rozvinutí prefixu má nižší příspěvek
+            if slot in seen:
+                continue
+            seen.add(slot)
+
+            score = -negative
+            slot_terms = doc_terms[slot]
+            for terms in others:
+                best = 0.0
+                for term_id, weight in terms:
+                    position = bisect_left(slot_terms, term_id)
+                    if position < len(slot_terms) and slot_terms[position] == term_id:
+                        value = weight * contribution(doc_frequencies[slot][position], doc_length[slot])
+                        if value > best:
+                            best = value
+                if not best:
+                    break
+                score += best
+            else:
+                # Při shodném skóre vyhrává nižší slot (dřív v posting listu), aby stránky
+                # s různým počtem výsledků měly stejné pořadí
+                item = (score, -slot)
+                if len(heap) < count:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+
+        return [(score, -negative_slot) for score, negative_slot in sorted(heap, reverse=True)]
+
+    @staticmethod
+    def _stream(state: _SearchState, term_id: int, weight: float) -> Iterator[Tuple[float, int]]:
+        slots, values = state.postings[term_id]
+        return ((weight * value, slot) for value, slot in zip(values, slots))
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), 'terms': len(self._state.term_ids)}
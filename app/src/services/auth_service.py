@@ -1,275 +1,386 @@
-from typing import Tuple, Dict, Optional, Any
-import os
-from supabase import Client
-from flask import current_app
-
-# Import Supabase klienta z hlavní aplikace
-def get_supabase() -> Client:
-    """Získání instance Supabase klienta"""
-    from src.main import supabase
-    if not supabase:
-        raise Exception("Supabase klient není inicializován")
-    return supabase
-
-def register_user(email: str, password: str, user_type: str, full_name: str, phone: str = "") -> Dict[str, Any]:
-    """
-    Registrace nového uživatele
-    
-    Args:
-        email: Email uživatele
-        password: Heslo uživatele
-        user_type: Typ uživatele (seller/agent)
-        full_name: Jméno a příjmení
-        phone: Telefonní číslo (volitelné)
-        
-    Returns:
-        Dict obsahující informace o uživateli
-        
-    Raises:
-        Exception: Pokud registrace selže
-    """
-    supabase = get_supabase()
-    
-    try:
-        # Registrace uživatele v Supabase Auth
-        auth_response = supabase.auth.sign_up({
-            "email": email,
-            "password": password
-        })
-        
-        user_id = auth_response.user.id
-        
-        # Vytvoření záznamu v tabulce users
-        user_data = {
-            "id": user_id,
-            "email": email,
-            "user_type": user_type,
-            "full_name": full_name,
-            "phone": phone,
-            "status": "active",
-            "auth_provider": "email"
-        }
-        
-        user_response = supabase.table("users").insert(user_data).execute()
-        
-        # Vytvoření profilu podle typu uživatele
-        if user_type == "seller":
-            supabase.table("seller_profiles").insert({
-                "user_id": user_id
-            }).execute()
-        elif user_type == "agent":
-            # Pro makléře vytvoříme profil a inicializujeme kredity
-            supabase.table("agent_profiles").insert({
-                "user_id": user_id,
-                "average_rating": 0,
-                "successful_transactions": 0
-            }).execute()
-            
-            supabase.table("agent_credits").insert({
-                "agent_id": user_id,
-                "balance": 0
-            }).execute()
-        
-        return {
-            "id": user_id,
-            "email": email,
-            "user_type": user_type,
-            "full_name": full_name
-        }
-    
-    except Exception as e:
-        # Pokud dojde k chybě, pokusíme se vyčistit případně vytvořené záznamy
-        if 'user_id' in locals():
-            try:
-                supabase.auth.admin.delete_user(user_id)
-            except:
-                pass
-        raise Exception(f"Registrace selhala: {str(e)}")
-
-def login_user(email: str, password: str) -> Tuple[Dict[str, Any], str]:
-    """
-    Přihlášení uživatele pomocí emailu a hesla
-    
-    Args:
-        email: Email uživatele
-        password: Heslo uživatele
-        
-    Returns:
-        Tuple obsahující informace o uživateli a přístupový token
-        
-    Raises:
-        Exception: Pokud přihlášení selže
-    """
-    supabase = get_supabase()
-    
-    try:
-        # Přihlášení uživatele v Supabase Auth
-        auth_response = supabase.auth.sign_in_with_password({
-            "email": email,
-            "password": password
-        })
-        
-        user_id = auth_response.user.id
-        token = auth_response.session.access_token
-        
-        # Získání detailů uživatele z tabulky users
-        user_response = supabase.table("users").select("*").eq("id", user_id).execute()
-        
-        if not user_response.data:
-            raise Exception("Uživatelský profil nebyl nalezen")
-        
-        user_data = user_response.data[0]
-        
-        return user_data, token
-    
-    except Exception as e:
-        raise Exception(f"Přihlášení selhalo: {str(e)}")
-
-def login_with_google(google_token: str, user_type: Optional[str] = None) -> Tuple[Dict[str, Any], str, bool]:
-    """
-    Přihlášení nebo registrace uživatele pomocí Google
-    
-    Args:
-        google_token: ID token z Google přihlášení
-        user_type: Typ uživatele (seller/agent) - pouze při první registraci
-        
-    Returns:
-        Tuple obsahující informace o uživateli, přístupový token a příznak, zda jde o nového uživatele
-        
-    Raises:
-        Exception: Pokud přihlášení selže
-    """
-    supabase = get_supabase()
-    
-    try:
-        # Přihlášení uživatele v Supabase Auth pomocí Google tokenu
-        auth_response = supabase.auth.sign_in_with_id_token({
-            "provider": "google",
-            "token": google_token
-        })
-        
-        user_id = auth_response.user.id
-        token = auth_response.session.access_token
-        is_new_user = auth_response.user.app_metadata.get("provider") == "google" and auth_response.user.created_at == auth_response.user.updated_at
-        
-        # Pokud jde o nového uživatele, vytvoříme záznam v tabulce users
-        if is_new_user:
-            if not user_type:
-                raise Exception("Pro nového uživatele je nutné specifikovat typ uživatele")
-            
-            if user_type not in ["seller", "agent"]:
-                raise Exception("Neplatný typ uživatele. Povolené hodnoty: seller, agent")
-            
-            user_data = {
-                "id": user_id,
-                "email": auth_response.user.email,
-                "user_type": user_type,
-                "full_name": auth_response.user.user_metadata.get("full_name", ""),
-                "status": "active",
-                "auth_provider": "google"
-            }
-            
-            user_response = supabase.table("users").insert(user_data).execute()
-            
-            # Vytvoření profilu podle typu uživatele
-            if user_type == "seller":
-                supabase.table("seller_profiles").insert({
-                    "user_id": user_id
-                }).execute()
-            elif user_type == "agent":
-                # Pro makléře vytvoříme profil a inicializujeme kredity
-                supabase.table("agent_profiles").insert({
-                    "user_id": user_id,
-                    "average_rating": 0,
-                    "successful_transactions": 0
-                }).execute()
-                
-                supabase.table("agent_credits").insert({
-                    "agent_id": user_id,
-                    "balance": 0
-                }).execute()
-            
-            user_data = user_response.data[0]
-        else:
-            # Získání detailů uživatele z tabulky users
-            user_response = supabase.table("users").select("*").eq("id", user_id).execute()
-            
-            if not user_response.data:
-                raise Exception("Uživatelský profil nebyl nalezen")
-            
-            user_data = user_response.data[0]
-        
-        return user_data, token, is_new_user
-    
-    except Exception as e:
-        raise Exception(f"Přihlášení přes Google selhalo: {str(e)}")
-
-def logout_user(token: str) -> None:
-    """
-    Odhlášení uživatele
-    
-    Args:
-        token: Přístupový token uživatele
-        
-    Raises:
-        Exception: Pokud odhlášení selže
-    """
-    if not token:
-        return
-    
-    supabase = get_supabase()
-    
-    try:
-        supabase.auth.sign_out()
-    except Exception as e:
-        raise Exception(f"Odhlášení selhalo: {str(e)}")
-
-def get_current_user(token: str) -> Dict[str, Any]:
-    """
-    Získání informací o přihlášeném uživateli
-    
-    Args:
-        token: Přístupový token uživatele
-        
-    Returns:
-        Dict obsahující informace o uživateli
-        
-    Raises:
-        Exception: Pokud získání informací selže
-    """
-    supabase = get_supabase()
-    
-    try:
-        # Nastavení tokenu pro autentizaci
-        supabase.auth.set_session(token)
-        
-        # Získání aktuálního uživatele
-        auth_user = supabase.auth.get_user()
-        user_id = auth_user.user.id
-        
-        # Získání detailů uživatele z tabulky users
-        user_response = supabase.table("users").select("*").eq("id", user_id).execute()
-        
-        if not user_response.data:
-            raise Exception("Uživatelský profil nebyl nalezen")
-        
-        user_data = user_response.data[0]
-        
-        # Získání dodatečných informací podle typu uživatele
-        if user_data["user_type"] == "seller":
-            profile_response = supabase.table("seller_profiles").select("*").eq("user_id", user_id).execute()
-            if profile_response.data:
-                user_data["profile"] = profile_response.data[0]
-        elif user_data["user_type"] == "agent":
-            profile_response = supabase.table("agent_profiles").select("*").eq("user_id", user_id).execute()
-            if profile_response.data:
-                user_data["profile"] = profile_response.data[0]
-            
-            credits_response = supabase.table("agent_credits").select("*").eq("agent_id", user_id).execute()
-            if credits_response.data:
-                user_data["credits"] = credits_response.data[0]
-        
-        return user_data
-    
-    except Exception as e:
-        raise Exception(f"Získání informací o uživateli selhalo: {str(e)}")
+from typing import Tuple, Dict, Optional, Any
+import os
+from concurrent.futures import ThreadPoolExecutor
+from supabase import Client
+from src import database
+from postgrest.exceptions import APIError
+from flask import current_app
+from src.services.token_service import (
+    verify_token, get_user_from_token, get_user_profile, cache_user_profile, invalidate_user_profile,
+    user_profile_read_started
+)
+
+# Uživatel, profil prodávajícího/makléře a kredity v jednom dotazu (vztahy přes cizí klíče)
+CURRENT_USER_SELECT = "*, seller_profiles(*), agent_profiles(*), agent_credits(*)"
+
+# Omezený pool pro souběžné dotazy, pokud vnořený select není k dispozici
+def _new_lookup_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=int(os.getenv("PROFILE_LOOKUP_WORKERS", "8")),
+        thread_name_prefix="profile-lookup"
+    )
+
+_lookup_executor = _new_lookup_executor()
+_embedded_select_supported = True
+
+def _reset_after_fork() -> None:
+    # Vlákna poolu rodiče v potomkovi neběží, pool by jen čekal
+    global _lookup_executor
+    _lookup_executor = _new_lookup_executor()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+# Supabase klient pro aktuální požadavek (z poolu v src/database.py)
+def get_supabase() -> Client:
+    """Získání instance Supabase klienta"""
+    return database.get_supabase()
+
+def register_user(email: str, password: str, user_type: str, full_name: str, phone: str = "") -> Dict[str, Any]:
+    """
+    Registrace nového uživatele
+    
+    Args:
+        email: Email uživatele
+        password: Heslo uživatele
+        user_type: Typ uživatele (seller/agent)
+        full_name: Jméno a příjmení
+        phone: Telefonní číslo (volitelné)
+        
+    Returns:
+        Dict obsahující informace o uživateli
+        
+    Raises:
+        Exception: Pokud registrace selže
+    """
+    supabase = get_supabase()
+    
+    try:
+        # Registrace uživatele v Supabase Auth (klient se session se do poolu nevrací)
+        with database.auth_client() as auth:
+            auth_response = auth.auth.sign_up({
+                "email": email,
+                "password": password
+            })
+        
+        user_id = auth_response.user.id
+        
+        # Vytvoření záznamu v tabulce users
+        user_data = {
+            "id": user_id,
+            "email": email,
+            "user_type": user_type,
+            "full_name": full_name,
+            "phone": phone,
+            "status": "active",
+            "auth_provider": "email"
+        }
+        
+        user_response = supabase.table("users").insert(user_data).execute()
+        
+        # Vytvoření profilu podle typu uživatele
+        if user_type == "seller":
+            supabase.table("seller_profiles").insert({
+                "user_id": user_id
+            }).execute()
+        elif user_type == "agent":
+            # Pro makléře vytvoříme profil a inicializujeme kredity
+            supabase.table("agent_profiles").insert({
+                "user_id": user_id,
+                "average_rating": 0,
+                "successful_transactions": 0
+            }).execute()
+            
+            supabase.table("agent_credits").insert({
+                "agent_id": user_id,
+                "balance": 0
+            }).execute()
+        
+        return {
+            "id": user_id,
+            "email": email,
+            "user_type": user_type,
+            "full_name": full_name
+        }
+    
+    except Exception as e:
+        # Pokud dojde k chybě, pokusíme se vyčistit případně vytvořené záznamy
+        if 'user_id' in locals():
+            try:
+                supabase.auth.admin.delete_user(user_id)
+            except:
+                pass
+        raise Exception(f"Registrace selhala: {str(e)}")
+
+def login_user(email: str, password: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Přihlášení uživatele pomocí emailu a hesla
+    
+    Args:
+        email: Email uživatele
+        password: Heslo uživatele
+        
+    Returns:
+        Tuple obsahující informace o uživateli a přístupový token
+        
+    Raises:
+        Exception: Pokud přihlášení selže
+    """
+    supabase = get_supabase()
+    
+    try:
+        # Přihlášení uživatele v Supabase Auth (klient se session se do poolu nevrací)
+        with database.auth_client() as auth:
+            auth_response = auth.auth.sign_in_with_password({
+                "email": email,
+                "password": password
+            })
+        
+        user_id = auth_response.user.id
+        token = auth_response.session.access_token
+        
+        # Získání detailů uživatele z tabulky users
+        user_response = supabase.table("users").select("*").eq("id", user_id).execute()
+        
+        if not user_response.data:
+            raise Exception("Uživatelský profil nebyl nalezen")
+        
+        user_data = user_response.data[0]
+        
+        return user_data, token
+    
+    except Exception as e:
+        raise Exception(f"Přihlášení selhalo: {str(e)}")
+
+def login_with_google(google_token: str, user_type: Optional[str] = None) -> Tuple[Dict[str, Any], str, bool]:
+    """
+    Přihlášení nebo registrace uživatele pomocí Google
+    
+    Args:
+        google_token: ID token z Google přihlášení
+        user_type: Typ uživatele (seller/agent) - pouze při první registraci
+        
+    Returns:
+        Tuple obsahující informace o uživateli, přístupový token a příznak, zda jde o nového uživatele
+        
+    Raises:
+        Exception: Pokud přihlášení selže
+    """
+    supabase = get_supabase()
+    
+    try:
+        # Přihlášení uživatele v Supabase Auth pomocí Google tokenu (klient se session se do poolu nevrací)
+        with database.auth_client() as auth:
+            auth_response = auth.auth.sign_in_with_id_token({
+                "provider": "google",
+                "token": google_token
+            })
+        
+        user_id = auth_response.user.id
+        token = auth_response.session.access_token
+        is_new_user = auth_response.user.app_metadata.get("provider") == "google" and auth_response.user.created_at == auth_response.user.updated_at
+        
+        # Pokud jde o nového uživatele, vytvoříme záznam v tabulce users
+        if is_new_user:
+            if not user_type:
+                raise Exception("Pro nového uživatele je nutné specifikovat typ uživatele")
+            
+            if user_type not in ["seller", "agent"]:
+                raise Exception("Neplatný typ uživatele. Povolené hodnoty: seller, agent")
+            
+            user_data = {
+                "id": user_id,
+                "email": auth_response.user.email,
+                "user_type": user_type,
+                "full_name": auth_response.user.user_metadata.get("full_name", ""),
+                "status": "active",
+                "auth_provider": "google"
+            }
+            
+            user_response = supabase.table("users").insert(user_data).execute()
+            
+            # Vytvoření profilu podle typu uživatele
+            if user_type == "seller":
+                supabase.table("seller_profiles").insert({
+                    "user_id": user_id
+                }).execute()
+            elif user_type == "agent":
+                # Pro makléře vytvoříme profil a inicializujeme kredity
+                supabase.table("agent_profiles").insert({
+                    "user_id": user_id,
+                    "average_rating": 0,
+                    "successful_transactions": 0
+                }).execute()
+                
+                supabase.table("agent_credits").insert({
+                    "agent_id": user_id,
+                    "balance": 0
+                }).execute()
+            
+            user_data = user_response.data[0]
+        else:
+            # Získání detailů uživatele z tabulky users
+            user_response = supabase.table("users").select("*").eq("id", user_id).execute()
+            
+            if not user_response.data:
+                raise Exception("Uživatelský profil nebyl nalezen")
+            
+            user_data = user_response.data[0]
+        
+        return user_data, token, is_new_user
+    
+    except Exception as e:
+        raise Exception(f"Přihlášení přes Google selhalo: {str(e)}")
+
+def logout_user(token: str) -> None:
+    """
+    Odhlášení uživatele
+    
+    Args:
+        token: Přístupový token uživatele
+        
+    Raises:
+        Exception: Pokud odhlášení selže
+    """
+    if not token:
+        return
+    
+    supabase = get_supabase()
+    
+    try:
+        # Token se předá v hlavičce požadavku, na sdíleném klientovi se nic neukládá
+        supabase.auth.admin.sign_out(token)
+    except Exception as e:
+        raise Exception(f"Odhlášení selhalo: {str(e)}")
+
+def first_embedded(value: Any) -> Optional[Dict[str, Any]]:
+    """Vnořený záznam vrací PostgREST jako objekt (vztah 1:1) nebo jako seznam"""
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+def _get_current_user_embedded(supabase: Client, user_id: str) -> Dict[str, Any]:
+    """Uživatel, profil podle role a kredity jedním vnořeným selectem"""
+    started = user_profile_read_started()
+    user_response = supabase.table("users").select(CURRENT_USER_SELECT).eq("id", user_id).execute()
+    
+    if not user_response.data:
+        raise Exception("Uživatelský profil nebyl nalezen")
+    
+    user_data = user_response.data[0]
+    seller_profile = first_embedded(user_data.pop("seller_profiles", None))
+    agent_profile = first_embedded(user_data.pop("agent_profiles", None))
+    agent_credits = first_embedded(user_data.pop("agent_credits", None))
+    
+    # Čerstvě načtený záznam rovnou obnoví cache uživatelů
+    cache_user_profile(user_data, started)
+    user_data = dict(user_data)
+    
+    if user_data["user_type"] == "seller":
+        if seller_profile:
+            user_data["profile"] = seller_profile
+    elif user_data["user_type"] == "agent":
+        if agent_profile:
+            user_data["profile"] = agent_profile
+        if agent_credits:
+            user_data["credits"] = agent_credits
+    
+    return user_data
+
+def _lookup_first(table: str, column: str, value: str) -> Optional[Dict[str, Any]]:
+    # Běží ve vlákně _lookup_executor s vlastním klientem z poolu (klient patří jen jednomu vláknu)
+    with database.get_pool().client() as client:
+        response = client.table(table).select("*").eq(column, value).execute()
+    return response.data[0] if response.data else None
+
+def _get_current_user_separate(user_id: str) -> Dict[str, Any]:
+    """Náhradní cesta bez vnořeného selectu: profil a kredity se načítají souběžně"""
+    user_data = get_user_profile(user_id)
+    
+    lookups = {}
+    if user_data["user_type"] == "seller":
+        lookups["profile"] = _lookup_executor.submit(_lookup_first, "seller_profiles", "user_id", user_id)
+    elif user_data["user_type"] == "agent":
+        lookups["profile"] = _lookup_executor.submit(_lookup_first, "agent_profiles", "user_id", user_id)
+        lookups["credits"] = _lookup_executor.submit(_lookup_first, "agent_credits", "agent_id", user_id)
+    
+    for key, future in lookups.items():
+        row = future.result()
+        if row:
+            user_data[key] = row
+    
+    return user_data
+
+def get_current_user(token: str) -> Dict[str, Any]:
+    """
+    Získání informací o přihlášeném uživateli
+    
+    Args:
+        token: Přístupový token uživatele
+        
+    Returns:
+        Dict obsahující informace o uživateli
+        
+    Raises:
+        Exception: Pokud získání informací selže
+    """
+    global _embedded_select_supported
+    
+    supabase = get_supabase()
+    
+    try:
+        # Lokální ověření tokenu bez volání Supabase Auth
+        user_id = verify_token(token)["sub"]
+        
+        if _embedded_select_supported:
+            try:
+                return _get_current_user_embedded(supabase, user_id)
+            except APIError as e:
+                # Databáze nezná vztahy mezi tabulkami, vnořený select už nezkoušíme
+                if e.code != "PGRST200":
+                    raise
+                _embedded_select_supported = False
+        
+        return _get_current_user_separate(user_id)
+    
+    except Exception as e:
+        raise Exception(f"Získání informací o uživateli selhalo: {str(e)}")
+
+def update_current_user(token: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aktualizace základních údajů přihlášeného uživatele
+    
+    Args:
+        token: Přístupový token uživatele
+        data: Dict s měněnými údaji (full_name, phone)
+        
+    Returns:
+        Dict obsahující aktualizovaný záznam uživatele
+        
+    Raises:
+        Exception: Pokud aktualizace selže
+    """
+    supabase = get_supabase()
+    
+    try:
+        user_data = get_user_from_token(token)
+        user_id = user_data["id"]
+        
+        # Povolujeme měnit pouze údaje, které si uživatel spravuje sám
+        update_data = {key: data[key] for key in ("full_name", "phone") if key in data}
+        
+        if not update_data:
+            raise Exception("Nejsou zadány žádné údaje ke změně")
+        
+        user_response = supabase.table("users").update(update_data).eq("id", user_id).execute()
+        
+        # Záznam v cache už neodpovídá databázi
+        invalidate_user_profile(user_id)
+        
+        if not user_response.data:
+            raise Exception("Uživatelský profil nebyl nalezen")
+        
+        return user_response.data[0]
+    
+    except Exception as e:
+        raise Exception(f"Aktualizace uživatele selhala: {str(e)}")
@@ -1,16 +1,36 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator
 import os
 import uuid
 from supabase import Client
-from datetime import datetime
+from src import database
+from postgrest.exceptions import APIError
+from datetime import date, timedelta
+from src.pagination import apply_keyset, paginate, clamp_page_size, PageStream
+from src.services import token_service
 
-# Import Supabase klienta z hlavní aplikace
+# Cena za jeden kredit (v Kč)
+CREDIT_PRICE = 50
+
+# Cena za přístup ke kontaktům (v kreditech)
+ACCESS_COST = 5
+
+# Typy transakcí v ledgeru
+TRANSACTION_TYPES = ("purchase", "usage")
+
+# SQLSTATE, kterým purchase_credits odmítne Idempotency-Key použitý pro jiný počet kreditů
+# (migrations/015_purchase_credits_replay_amount.sql)
+IDEMPOTENCY_CONFLICT_CODE = "22023"
+
+DEFAULT_TRANSACTIONS_PAGE_SIZE = 50
+MAX_TRANSACTIONS_PAGE_SIZE = 200
+
+# Nejvýše tolik transakcí v jedné stránce průběžně odesílaného výpisu (čte se po MAX_TRANSACTIONS_PAGE_SIZE)
+MAX_STREAM_TRANSACTIONS_PAGE_SIZE = int(os.getenv("LIST_STREAM_MAX_LIMIT", "5000"))
+
+# Supabase klient pro aktuální požadavek (z poolu v src/database.py)
 def get_supabase() -> Client:
     """Získání instance Supabase klienta"""
-    from src.main import supabase
-    if not supabase:
-        raise Exception("Supabase klient není inicializován")
-    return supabase
+    return database.get_supabase()
 
 def get_user_from_token(token: str) -> Dict[str, Any]:
     """
@@ -25,23 +45,9 @@ def get_user_from_token(token: str) -> Dict[str, Any]:
     Raises:
         Exception: Pokud získání informací selže nebo uživatel není makléř
     """
-    supabase = get_supabase()
-    
     try:
-        # Nastavení tokenu pro autentizaci
-        supabase.auth.set_session(token)
-        
-        # Získání aktuálního uživatele
-        auth_user = supabase.auth.get_user()
-        user_id = auth_user.user.id
-        
-        # Získání detailů uživatele z tabulky users
-        user_response = supabase.table("users").select("*").eq("id", user_id).execute()
-        
-        if not user_response.data:
-            raise Exception("Uživatelský profil nebyl nalezen")
-        
-        user_data = user_response.data[0]
+        # Lokální ověření tokenu a načtení uživatele z cache
+        user_data = token_service.get_user_from_token(token)
         
         # Kontrola, zda je uživatel makléř
         if user_data["user_type"] != "agent":
@@ -88,7 +94,25 @@ def get_agent_credits(token: str) -> Dict[str, Any]:
     except Exception as e:
         raise Exception(f"Získání stavu kreditů selhalo: {str(e)}")
 
-def purchase_credits(token: str, amount: int, payment_method: str) -> Dict[str, Any]:
+def build_purchase_info(transaction: Dict[str, Any], payment_id: str, payment_method: str) -> Dict[str, Any]:
+    """
+    Informace o platbě z výsledku funkce purchase_credits
+
+    Počet kreditů a cena se berou z uložené transakce, aby opakovaný požadavek
+    se stejným Idempotency-Key vrátil přesně to, co bylo zaplaceno.
+    """
+    return {
+        "payment_id": transaction.get("payment_id") or payment_id,
+        "amount": transaction["amount"],
+        "total_price": transaction["amount"] * CREDIT_PRICE,
+        "currency": "CZK",
+        "payment_method": payment_method,
+        "status": "completed",  # V reálné implementaci by zde byl odkaz na platební bránu
+        "transaction_id": transaction["transaction_id"],
+        "balance": transaction["balance"]
+    }
+
+def purchase_credits(token: str, amount: int, payment_method: str, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
     """
     Nákup kreditů
     
@@ -96,11 +120,14 @@ def purchase_credits(token: str, amount: int, payment_method: str) -> Dict[str,
         token: Přístupový token uživatele
         amount: Počet kreditů k nákupu
         payment_method: Metoda platby (card, bank_transfer)
+        idempotency_key: Klíč z hlavičky Idempotency-Key; nákup se stejným
+            klíčem databáze neprovede podruhé a vrátí původní transakci
         
     Returns:
         Dict obsahující informace o platbě
         
     Raises:
+        ValueError: Pokud byl idempotency_key už použit pro nákup jiného počtu kreditů
         Exception: Pokud nákup selže
     """
     user_data = get_user_from_token(token)
@@ -108,12 +135,6 @@ def purchase_credits(token: str, amount: int, payment_method: str) -> Dict[str,
     
     supabase = get_supabase()
     
-    # Cena za jeden kredit (v Kč)
-    CREDIT_PRICE = 50
-    
-    # Výpočet celkové ceny
-    total_price = amount * CREDIT_PRICE
-    
     try:
         # Vytvoření platby (zde by byla integrace s platební bránou)
         # Pro demonstrační účely simulujeme úspěšnou platbu
@@ -121,46 +142,23 @@ def purchase_credits(token: str, amount: int, payment_method: str) -> Dict[str,
         # Generování ID platby
         payment_id = str(uuid.uuid4())
         
-        # Vytvoření záznamu o transakci
-        transaction_data = {
-            "agent_id": user_id,
-            "amount": amount,
-            "transaction_type": "purchase",
-            "description": f"Nákup {amount} kreditů ({payment_method})",
-            "payment_id": payment_id,
-            "created_at": datetime.now().isoformat()
-        }
-        
-        transaction_response = supabase.table("credit_transactions").insert(transaction_data).execute()
-        
-        # Aktualizace stavu kreditů
-        credits_response = supabase.table("agent_credits").select("*").eq("agent_id", user_id).execute()
-        
-        if not credits_response.data:
-            # Pokud záznam neexistuje, vytvoříme ho
-            credits_data = {
-                "agent_id": user_id,
-                "balance": amount
-            }
-            
-            supabase.table("agent_credits").insert(credits_data).execute()
-        else:
-            current_balance = credits_response.data[0]["balance"]
-            new_balance = current_balance + amount
-            
-            supabase.table("agent_credits").update({"balance": new_balance}).eq("agent_id", user_id).execute()
+        # Zápis do ledgeru a navýšení zůstatku proběhne atomicky v databázi
+        # (migrations/003_credit_ledger_balance_after.sql)
+        transaction_response = supabase.rpc("purchase_credits", {
+            "p_agent_id": user_id,
+            "p_amount": amount,
+            "p_description": f"Nákup {amount} kreditů ({payment_method})",
+            "p_payment_id": payment_id,
+            "p_idempotency_key": idempotency_key
+        }).execute()
         
         # Vrácení informací o platbě
-        return {
-            "payment_id": payment_id,
-            "amount": amount,
-            "total_price": total_price,
-            "currency": "CZK",
-            "payment_method": payment_method,
-            "status": "completed",  # V reálné implementaci by zde byl odkaz na platební bránu
-            "transaction_id": transaction_response.data[0]["id"]
-        }
+        return build_purchase_info(transaction_response.data, payment_id, payment_method)
     
+    except APIError as e:
+        if e.code == IDEMPOTENCY_CONFLICT_CODE:
+            raise ValueError(e.message)
+        raise Exception(f"Nákup kreditů selhal: {e.message}")
     except Exception as e:
         raise Exception(f"Nákup kreditů selhal: {str(e)}")
 
@@ -183,95 +181,226 @@ def use_credits(token: str, property_id: str) -> Dict[str, Any]:
     
     supabase = get_supabase()
     
-    # Cena za přístup ke kontaktům (v kreditech)
-    ACCESS_COST = 5
-    
     try:
-        # Kontrola, zda již nemá přístup
-        access_response = supabase.table("contact_access").select("*").eq("agent_id", user_id).eq("property_id", property_id).execute()
-        
-        if access_response.data:
-            return {
-                "access_id": access_response.data[0]["id"],
-                "property_id": property_id,
-                "status": "active",
-                "granted_at": access_response.data[0]["granted_at"]
-            }
-        
-        # Kontrola stavu kreditů
-        credits_response = supabase.table("agent_credits").select("*").eq("agent_id", user_id).execute()
-        
-        if not credits_response.data:
-            raise Exception("Nemáte žádné kredity")
-        
-        current_balance = credits_response.data[0]["balance"]
-        
-        if current_balance < ACCESS_COST:
-            raise Exception(f"Nedostatek kreditů. Potřebujete {ACCESS_COST} kreditů, máte {current_balance} kreditů")
+        # Celé odemčení proběhne atomicky v databázi (migrations/002_use_credits_function.sql)
+        access_response = supabase.rpc("use_credits", {
+            "p_agent_id": user_id,
+            "p_property_id": property_id,
+            "p_cost": ACCESS_COST
+        }).execute()
+        
+        return access_response.data
+    
+    except APIError as e:
+        raise Exception(f"Použití kreditů selhalo: {e.message}")
+    except Exception as e:
+        raise Exception(f"Použití kreditů selhalo: {str(e)}")
+
+def parse_transaction_filters(date_from: Optional[str] = None, date_to: Optional[str] = None, transaction_type: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Kontrola filtrů historie transakcí
+    
+    Args:
+        date_from: První den období (YYYY-MM-DD, včetně)
+        date_to: Poslední den období (YYYY-MM-DD, včetně)
+        transaction_type: Typ transakce (purchase/usage)
         
-        # Vytvoření záznamu o transakci
-        transaction_data = {
-            "agent_id": user_id,
-            "amount": -ACCESS_COST,  # Záporná hodnota pro odečtení kreditů
-            "transaction_type": "usage",
-            "description": f"Přístup ke kontaktům nemovitosti {property_id}",
-            "created_at": datetime.now().isoformat()
-        }
+    Returns:
+        Dict s hranicemi období jako ISO časy (to je bez) a typem transakce
         
-        transaction_response = supabase.table("credit_transactions").insert(transaction_data).execute()
-        transaction_id = transaction_response.data[0]["id"]
+    Raises:
+        ValueError: Pokud filtr není platný
+    """
+    try:
+        start = date.fromisoformat(date_from) if date_from else None
+        end = date.fromisoformat(date_to) + timedelta(days=1) if date_to else None
+    except ValueError:
+        raise ValueError("Neplatné datum. Očekávaný formát: YYYY-MM-DD")
+    
+    if start and end and start >= end:
+        raise ValueError("Začátek období musí být před jeho koncem")
+    
+    if transaction_type and transaction_type not in TRANSACTION_TYPES:
+        raise ValueError(f"Neplatný typ transakce. Povolené hodnoty: {', '.join(TRANSACTION_TYPES)}")
+    
+    return {
+        "from": start.isoformat() if start else None,
+        "to": end.isoformat() if end else None,
+        "type": transaction_type or None
+    }
+
+def build_transactions_query(table: Any, user_id: str, filters: Dict[str, Any], cursor: Optional[str], limit: int) -> Any:
+    """Dotaz na stránku transakcí makléře (sdílí synchronní i asynchronní cesta)"""
+    query = table.select("*").eq("agent_id", user_id)
+    
+    if filters.get("from"):
+        query = query.gte("created_at", filters["from"])
+    if filters.get("to"):
+        query = query.lt("created_at", filters["to"])
+    if filters.get("type"):
+        query = query.eq("transaction_type", filters["type"])
+    
+    return apply_keyset(query, cursor, limit)
+
+def summary_params(user_id: str, filters: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "p_agent_id": user_id,
+        "p_from": filters.get("from"),
+        "p_to": filters.get("to"),
+        "p_type": filters.get("type")
+    }
+
+def build_summary(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Souhrn z výsledku credit_transaction_summary (řádky měsíc × typ)
+    
+    Agregace přes ledger počítá databáze, zde se jen skládají malé výsledky
+    do součtů po měsících a po typech.
+    """
+    by_type: Dict[str, Dict[str, int]] = {}
+    for row in rows:
+        totals = by_type.setdefault(row["transaction_type"], {"transaction_count": 0, "total_amount": 0})
+        totals["transaction_count"] += row["transaction_count"]
+        totals["total_amount"] += row["total_amount"]
+    
+    return {
+        "by_month": rows,
+        "by_type": by_type,
+        "total_amount": sum(totals["total_amount"] for totals in by_type.values()),
+        "transaction_count": sum(totals["transaction_count"] for totals in by_type.values())
+    }
+
+def get_credit_transactions(
+    token: str,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_TRANSACTIONS_PAGE_SIZE,
+    filters: Optional[Dict[str, Any]] = None,
+    include_summary: bool = True
+) -> Dict[str, Any]:
+    """
+    Získání stránky historie transakcí kreditů
+    
+    Args:
+        token: Přístupový token uživatele
+        cursor: Kurzor další stránky (next_cursor z předchozí odpovědi)
+        limit: Počet transakcí na stránku
+        filters: Filtry z parse_transaction_filters
+        include_summary: Zda připojit souhrn po měsících a typech
         
-        # Aktualizace stavu kreditů
-        new_balance = current_balance - ACCESS_COST
-        supabase.table("agent_credits").update({"balance": new_balance}).eq("agent_id", user_id).execute()
+    Returns:
+        Dict s transactions, next_cursor a summary (None, pokud nebyl vyžádán)
         
-        # Vytvoření záznamu o přístupu
-        access_data = {
-            "agent_id": user_id,
-            "property_id": property_id,
-            "granted_at": datetime.now().isoformat(),
-            "status": "active",
-            "credit_transaction_id": transaction_id
-        }
+    Raises:
+        ValueError: Pokud kurzor není platný
+        Exception: Pokud získání informací selže
+    """
+    user_data = get_user_from_token(token)
+    user_id = user_data["id"]
+    
+    supabase = get_supabase()
+    filters = filters or {}
+    limit = clamp_page_size(limit, MAX_TRANSACTIONS_PAGE_SIZE)
+    
+    query = build_transactions_query(supabase.table("credit_transactions"), user_id, filters, cursor, limit)
+    
+    try:
+        transactions, next_cursor = paginate(query.execute().data, limit)
         
-        access_response = supabase.table("contact_access").insert(access_data).execute()
+        summary = None
+        if include_summary:
+            summary_response = supabase.rpc("credit_transaction_summary", summary_params(user_id, filters)).execute()
+            summary = build_summary(summary_response.data)
         
-        # Vrácení informací o přístupu
         return {
-            "access_id": access_response.data[0]["id"],
-            "property_id": property_id,
-            "status": "active",
-            "granted_at": access_data["granted_at"],
-            "credits_used": ACCESS_COST,
-            "credits_remaining": new_balance
+            "transactions": transactions,
+            "next_cursor": next_cursor,
+            "summary": summary
         }
     
     except Exception as e:
-        raise Exception(f"Použití kreditů selhalo: {str(e)}")
+        raise Exception(f"Získání historie transakcí selhalo: {str(e)}")
 
-def get_credit_transactions(token: str) -> List[Dict[str, Any]]:
+def stream_credit_transactions(
+    token: str,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_TRANSACTIONS_PAGE_SIZE,
+    filters: Optional[Dict[str, Any]] = None,
+    include_summary: bool = True
+) -> Dict[str, Any]:
     """
-    Získání historie transakcí kreditů
+    Stránka historie transakcí kreditů pro průběžné odeslání
+    
+    Jako get_credit_transactions, ale limit může být až
+    MAX_STREAM_TRANSACTIONS_PAGE_SIZE a transakce se čtou z databáze
+    po dávkách MAX_TRANSACTIONS_PAGE_SIZE.
     
     Args:
         token: Přístupový token uživatele
+        cursor: Kurzor další stránky (next_cursor z předchozí odpovědi)
+        limit: Počet transakcí na stránku
+        filters: Filtry z parse_transaction_filters
+        include_summary: Zda připojit souhrn po měsících a typech
         
     Returns:
-        List obsahující informace o transakcích
+        Dict s transactions (PageStream, next_cursor je známý po projití)
+        a summary (None, pokud nebyl vyžádán)
         
     Raises:
+        ValueError: Pokud kurzor není platný
         Exception: Pokud získání informací selže
     """
-    user_data = get_user_from_token(token)
-    user_id = user_data["id"]
+    user_id = get_user_from_token(token)["id"]
+    filters = filters or {}
+    limit = clamp_page_size(limit, MAX_STREAM_TRANSACTIONS_PAGE_SIZE)
     
-    supabase = get_supabase()
+    def fetch(cursor: Optional[str], batch_size: int) -> Any:
+        query = build_transactions_query(get_supabase().table("credit_transactions"), user_id, filters, cursor, batch_size)
+        return paginate(query.execute().data, batch_size)
     
     try:
-        # Získání transakcí makléře
-        transactions_response = supabase.table("credit_transactions").select("*").eq("agent_id", user_id).order("created_at", desc=True).execute()
+        transactions = PageStream(fetch, cursor, limit, MAX_TRANSACTIONS_PAGE_SIZE)
         
-        return transactions_response.data
+        summary = None
+        if include_summary:
+            summary_response = get_supabase().rpc("credit_transaction_summary", summary_params(user_id, filters)).execute()
+            summary = build_summary(summary_response.data)
+        
+        return {
+            "transactions": transactions,
+            "summary": summary
+        }
     
+    except ValueError:
+        raise
     except Exception as e:
         raise Exception(f"Získání historie transakcí selhalo: {str(e)}")
+
+def iter_credit_transactions(token: str, filters: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Postupné čtení celé historie transakcí po stránkách (pro export)
+    
+    Args:
+        token: Přístupový token uživatele
+        filters: Filtry z parse_transaction_filters
+        
+    Returns:
+        Iterátor transakcí od nejnovějších; v paměti je vždy jen jedna stránka
+        
+    Raises:
+        Exception: Pokud uživatel není makléř (ověřuje se hned, ne až při čtení)
+    """
+    user_id = get_user_from_token(token)["id"]
+    filters = filters or {}
+    
+    def pages() -> Iterator[Dict[str, Any]]:
+        cursor = None
+        while True:
+            query = build_transactions_query(
+                get_supabase().table("credit_transactions"), user_id, filters, cursor, MAX_TRANSACTIONS_PAGE_SIZE
+            )
+            transactions, cursor = paginate(query.execute().data, MAX_TRANSACTIONS_PAGE_SIZE)
+            yield from transactions
+            if not cursor:
+                break
+    
+    return pages()
@@ -0,0 +1,496 @@
+from typing import Dict, List, Any, Optional, BinaryIO
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from supabase import Client
+from src import database
+from src.media_processing import available_derivatives, make_derivative
+from src.storage import get_storage, MEDIA_ROOT, COPY_BLOCK_SIZE
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Rozpracovaná nahrávání: <MEDIA_UPLOAD_DIR>/<upload_id>.json (popis) a .part (dosud přijatá data).
+# Adresář musí být sdílený mezi workery, aby šlo nahrávání navázat na libovolném z nich.
+MEDIA_UPLOAD_DIR = os.getenv("MEDIA_UPLOAD_DIR", os.path.join(MEDIA_ROOT, ".uploads"))
+
+# Největší povolený soubor a doporučená velikost jednoho kusu pro klienta (v bajtech)
+MEDIA_MAX_SIZE = int(os.getenv("MEDIA_MAX_SIZE", str(2 * 1024 ** 3)))
+MEDIA_CHUNK_SIZE = int(os.getenv("MEDIA_CHUNK_SIZE", str(8 * 1024 ** 2)))
+
+# Nedokončená nahrávání starší než tato doba (v sekundách) se mažou
+MEDIA_UPLOAD_TTL = float(os.getenv("MEDIA_UPLOAD_TTL", str(24 * 3600)))
+
+# Procesy pro generování náhledů a vlákna pro ukládání výsledků do úložiště
+MEDIA_WORKERS = int(os.getenv("MEDIA_WORKERS", str(max(1, min(4, (os.cpu_count() or 2) - 1)))))
+MEDIA_STORE_THREADS = int(os.getenv("MEDIA_STORE_THREADS", "4"))
+
+# Povolené typy souborů: content type -> (typ média, přípona)
+MEDIA_CONTENT_TYPES = {
+    "image/jpeg": ("photo", ".jpg"),
+    "image/png": ("photo", ".png"),
+    "image/webp": ("photo", ".webp"),
+    "image/heic": ("photo", ".heic"),
+    "video/mp4": ("video", ".mp4"),
+    "video/quicktime": ("video", ".mov"),
+    "video/webm": ("video", ".webm"),
+}
+
+# Sloupce property_media s URL odvozených verzí
+DERIVATIVE_COLUMNS = {"thumbnail": "thumbnail_url", "web": "web_url", "poster": "poster_url"}
+
+logger = logging.getLogger(__name__)
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_store_pool: Optional[ThreadPoolExecutor] = None
+_pools_lock = threading.Lock()
+_last_cleanup = 0.0
+
+
+class UploadConflict(Exception):
+    """Kus nenavazuje na již přijatá data nebo do nahrávání právě zapisuje jiný požadavek"""
+
+    def __init__(self, message: str, offset: int):
+        super().__init__(message)
+        self.offset = offset
+
+
+# Supabase klient pro aktuální požadavek (z poolu v src/database.py)
+def get_supabase() -> Client:
+    """Získání instance Supabase klienta"""
+    return database.get_supabase()
+
+def _get_pools():
+    global _process_pool, _store_pool
+
+    if _process_pool is None:
+        with _pools_lock:
+            if _process_pool is None:
+                _store_pool = ThreadPoolExecutor(MEDIA_STORE_THREADS, thread_name_prefix="media-store")
+                # Nové procesy místo forku: fork vícevláknového workeru (vlákna poolů,
+                # pool klientů Supabase) může v potomkovi zdědit zamčené zámky
+                _process_pool = ProcessPoolExecutor(MEDIA_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+    return _process_pool, _store_pool
+
+def _reset_pools_after_fork():
+    # Procesy a vlákna poolů rodiče v potomkovi neběží, vytvoří se znovu
+    global _process_pool, _store_pool, _pools_lock
+    _process_pool = None
+    _store_pool = None
+    _pools_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+def _session_path(upload_id: str) -> str:
+    # upload_id je vždy UUID, jiná hodnota nesmí vést mimo adresář nahrávání
+    return os.path.join(MEDIA_UPLOAD_DIR, str(uuid.UUID(upload_id)))
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def create_upload(property_id: str, filename: str, size: int, content_type: str) -> Dict[str, Any]:
+    """
+    Založení nahrávání souboru po částech
+
+    Args:
+        property_id: ID inzerátu
+        filename: Původní název souboru
+        size: Celková velikost souboru v bajtech
+        content_type: MIME typ souboru
+
+    Returns:
+        Dict s upload_id, offset (přijatá data) a doporučeným chunk_size
+
+    Raises:
+        ValueError: Pokud typ nebo velikost souboru nejsou povolené
+    """
+    if content_type not in MEDIA_CONTENT_TYPES:
+        raise ValueError(f"Nepodporovaný typ souboru: {content_type}")
+    if not isinstance(size, int) or size <= 0:
+        raise ValueError("Neplatná velikost souboru")
+    if size > MEDIA_MAX_SIZE:
+        raise ValueError(f"Soubor je větší než povolených {MEDIA_MAX_SIZE} bajtů")
+
+    cleanup_stale_uploads()
+    os.makedirs(MEDIA_UPLOAD_DIR, exist_ok=True)
+
+    upload = {
+        "upload_id": str(uuid.uuid4()),
+        "property_id": property_id,
+        "filename": os.path.basename(filename or "")[:255],
+        "size": size,
+        "content_type": content_type,
+        "media_type": MEDIA_CONTENT_TYPES[content_type][0],
+        "created_at": time.time(),
+    }
+
+    path = _session_path(upload["upload_id"])
+    open(f"{path}.part", "wb").close()
+    _write_json(f"{path}.json", upload)
+
+    return {**upload, "offset": 0, "chunk_size": MEDIA_CHUNK_SIZE}
+
+def get_upload(upload_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Stav nahrávání pro navázání po přerušení
+
+    Returns:
+        Dict s popisem nahrávání a offset (počet přijatých bajtů), nebo None
+    """
+    try:
+        path = _session_path(upload_id)
+        with open(f"{path}.json", encoding="utf-8") as f:
+            upload = json.load(f)
+        return {**upload, "offset": os.path.getsize(f"{path}.part"), "chunk_size": MEDIA_CHUNK_SIZE}
+    except (ValueError, OSError):
+        return None
+
+def write_chunk(upload: Dict[str, Any], offset: int, stream: BinaryIO, length: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Zápis jednoho kusu souboru na disk
+
+    Data se kopírují z proudu požadavku po blocích, v paměti je vždy jen
+    jeden blok. Když klient spojení přeruší, přijatá část zůstává a nahrávání
+    pokračuje od ní. Posledním kusem se nahrávání dokončí.
+
+    Args:
+        upload: Nahrávání z get_upload
+        offset: Pozice kusu v souboru, musí navazovat na přijatá data
+        stream: Proud s daty kusu
+        length: Délka kusu (Content-Length), pokud je známá
+
+    Returns:
+        Dict s offset a po dokončení i media (nový řádek property_media)
+
+    Raises:
+        UploadConflict: Pokud kus nenavazuje nebo do nahrávání zapisuje jiný požadavek
+        ValueError: Pokud by soubor přesáhl ohlášenou velikost
+    """
+    path = _session_path(upload["upload_id"])
+
+    with open(f"{path}.part", "r+b") as f:
+        if fcntl is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadConflict("Do nahrávání právě zapisuje jiný požadavek", upload["offset"])
+
+        current = os.fstat(f.fileno()).st_size
+        if offset != current:
+            raise UploadConflict(f"Kus musí začínat na pozici {current}", current)
+
+        remaining = upload["size"] - current
+        if length is not None and length > remaining:
+            raise ValueError(f"Kus přesahuje ohlášenou velikost souboru o {length - remaining} bajtů")
+
+        f.seek(current)
+        written = 0
+        while length is None or written < length:
+            block = stream.read(min(COPY_BLOCK_SIZE, length - written) if length is not None else COPY_BLOCK_SIZE)
+            if not block:
+                break
+            if written + len(block) > remaining:
+                f.truncate(current + written)
+                raise ValueError("Kus přesahuje ohlášenou velikost souboru")
+            f.write(block)
+            written += len(block)
+        f.flush()
+
+        offset = current + written
+        if offset < upload["size"]:
+            return {"offset": offset}
+
+        # Dokončení ještě pod zámkem, aby soubor nepřevzaly dva požadavky
+        media = complete_upload(upload, f"{path}.part")
+        os.remove(f"{path}.json")
+        return {"offset": offset, "media": media}
+
+def abort_upload(upload_id: str) -> None:
+    path = _session_path(upload_id)
+    for suffix in (".json", ".part"):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+def cleanup_stale_uploads(max_age: float = MEDIA_UPLOAD_TTL) -> int:
+    """
+    Smazání opuštěných nahrávání a pracovních adresářů nedoběhlého zpracování
+    (pád workeru během _MediaJob), nejvýše jednou za hodinu na worker
+    """
+    global _last_cleanup
+
+    now = time.time()
+    if now - _last_cleanup < 3600 or not os.path.isdir(MEDIA_UPLOAD_DIR):
+        return 0
+    _last_cleanup = now
+
+    removed = 0
+    for name in os.listdir(MEDIA_UPLOAD_DIR):
+        path = os.path.join(MEDIA_UPLOAD_DIR, name)
+        try:
+            if name.endswith(".part") and now - os.path.getmtime(path) > max_age:
+                abort_upload(name[:-len(".part")])
+                removed += 1
+            elif name.startswith("media-") and os.path.isdir(path) and now - os.path.getmtime(path) > max_age:
+                media_id = str(uuid.UUID(name[len("media-"):]))
+                shutil.rmtree(path)
+                _fail_abandoned_media(media_id)
+                removed += 1
+        except (ValueError, OSError):
+            continue
+
+    return removed
+
+def _fail_abandoned_media(media_id: str) -> None:
+    # Zpracování už nedoběhne, řádek nesmí zůstat ve stavu processing
+    try:
+        with database.pooled_client():
+            get_supabase().table("property_media").update({
+                "processing_status": "failed",
+                "processing_error": "Zpracování bylo přerušeno",
+            }).eq("id", media_id).eq("processing_status", "processing").execute()
+    except Exception:
+        logger.warning("Stav přerušeného zpracování média %s se nepodařilo zapsat", media_id)
+
+def store_file(property_id: str, stream: BinaryIO, filename: str, content_type: str) -> Dict[str, Any]:
+    """
+    Uložení celého souboru jedním požadavkem (multipart formulář)
+
+    Soubor se stejně jako při nahrávání po částech kopíruje na disk po blocích.
+
+    Returns:
+        Nový řádek property_media
+
+    Raises:
+        ValueError: Pokud typ nebo velikost souboru nejsou povolené
+    """
+    if content_type not in MEDIA_CONTENT_TYPES:
+        raise ValueError(f"Nepodporovaný typ souboru: {content_type}")
+
+    os.makedirs(MEDIA_UPLOAD_DIR, exist_ok=True)
+    upload_id = str(uuid.uuid4())
+    part_path = f"{_session_path(upload_id)}.part"
+    size = 0
+
+    try:
+        with open(part_path, "wb") as f:
+            while True:
+                block = stream.read(COPY_BLOCK_SIZE)
+                if not block:
+                    break
+                size += len(block)
+                if size > MEDIA_MAX_SIZE:
+                    raise ValueError(f"Soubor je větší než povolených {MEDIA_MAX_SIZE} bajtů")
+                f.write(block)
+
+        if size == 0:
+            raise ValueError("Soubor je prázdný")
+
+        return complete_upload({
+            "upload_id": upload_id,
+            "property_id": property_id,
+            "filename": os.path.basename(filename or "")[:255],
+            "size": size,
+            "content_type": content_type,
+            "media_type": MEDIA_CONTENT_TYPES[content_type][0],
+        }, part_path)
+    except Exception:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+def _media_key(property_id: str, media_id: str, name: str) -> str:
+    return f"properties/{property_id}/{media_id}/{name}"
+
+def complete_upload(upload: Dict[str, Any], part_path: str) -> Dict[str, Any]:
+    """
+    Převzetí nahraného souboru: řádek property_media a zpracování na pozadí
+
+    Soubor se přesune do pracovního adresáře, ze kterého se ukládá originál
+    do úložiště a generují odvozené verze. Řádek vzniká hned se stavem
+    processing a sloupce url, thumbnail_url, web_url a poster_url se
+    doplňují postupně, jak jednotlivé kroky doběhnou.
+
+    Returns:
+        Nový řádek property_media
+
+    Raises:
+        Exception: Pokud vytvoření záznamu selže
+    """
+    supabase = get_supabase()
+    property_id = upload["property_id"]
+    media_id = str(uuid.uuid4())
+    extension = MEDIA_CONTENT_TYPES[upload["content_type"]][1]
+
+    work_dir = os.path.join(MEDIA_UPLOAD_DIR, f"media-{media_id}")
+    os.makedirs(work_dir)
+    source = os.path.join(work_dir, f"original{extension}")
+    os.replace(part_path, source)
+
+    try:
+        # Pořadí v galerii přiděluje databáze (sekvence z migrace 013), nové médium je na konci
+        response = supabase.table("property_media").insert({
+            "id": media_id,
+            "property_id": property_id,
+            "media_type": upload["media_type"],
+            "file_name": upload["filename"],
+            "content_type": upload["content_type"],
+            "size_bytes": upload["size"],
+            "storage_key": _media_key(property_id, media_id, f"original{extension}"),
+            "processing_status": "processing",
+        }).execute()
+    except Exception as e:
+        # Soubor zpět, aby šlo dokončení zopakovat (prázdným kusem na konci souboru)
+        os.replace(source, part_path)
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise Exception(f"Uložení média selhalo: {str(e)}")
+
+    media = response.data[0]
+    _MediaJob(media, source, work_dir).start()
+    return media
+
+class _MediaJob:
+    """
+    Zpracování jednoho média na pozadí
+
+    Originál se ukládá ve vlákně, odvozené verze se generují v procesech
+    a každá se po dokončení uloží a zapíše do řádku. Po posledním kroku
+    se smaže pracovní adresář a nastaví processing_status.
+    """
+
+    def __init__(self, media: Dict[str, Any], source: str, work_dir: str):
+        self.media = media
+        self.source = source
+        self.work_dir = work_dir
+        self.derivatives = available_derivatives(media["media_type"])
+        self.errors: List[str] = []
+        self._remaining = 1 + len(self.derivatives)
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        process_pool, store_pool = _get_pools()
+        store_pool.submit(self._store_original)
+
+        for name in self.derivatives:
+            target = os.path.join(self.work_dir, f"{name}.jpg")
+            try:
+                future = process_pool.submit(make_derivative, self.media["media_type"], name, self.source, target)
+            except Exception as e:
+                self._step_done(f"{name}: {str(e)}")
+                continue
+            future.add_done_callback(lambda future, name=name, target=target: store_pool.submit(
+                self._store_derivative, name, target, future
+            ))
+
+    # Kroky běží ve vláknech media-store mimo požadavek; každý si klienta
+    # (zápis do řádku i Supabase Storage) půjčí z poolu
+    def _store_original(self) -> None:
+        with database.pooled_client():
+            error = None
+            try:
+                url = get_storage().save_file(self.source, self.media["storage_key"], self.media["content_type"])
+                self._update({"url": url})
+            except Exception as e:
+                logger.exception("Uložení média %s selhalo", self.media["id"])
+                error = f"original: {str(e)}"
+            self._step_done(error)
+
+    def _store_derivative(self, name: str, target: str, future: Future) -> None:
+        with database.pooled_client():
+            error = None
+            try:
+                size = future.result()
+                key = _media_key(self.media["property_id"], self.media["id"], f"{name}.jpg")
+                url = get_storage().save_file(target, key, "image/jpeg")
+                update = {DERIVATIVE_COLUMNS[name]: url}
+                # Rozměry zobrazované verze (web pro fotky, plakát pro videa)
+                if name in ("web", "poster"):
+                    update.update(width=size["width"], height=size["height"])
+                self._update(update)
+            except Exception as e:
+                logger.warning("Odvozená verze %s média %s selhala: %s", name, self.media["id"], e)
+                error = f"{name}: {str(e)}"
+            self._step_done(error)
+
+    def _update(self, data: Dict[str, Any]) -> None:
+        get_supabase().table("property_media").update(data).eq("id", self.media["id"]).execute()
+
+    def _step_done(self, error: Optional[str]) -> None:
+        with self._lock:
+            if error:
+                self.errors.append(error)
+            self._remaining -= 1
+            if self._remaining:
+                return
+
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        try:
+            self._update({
+                "processing_status": "failed" if self.errors else "ready",
+                "processing_error": "; ".join(self.errors) or None,
+            })
+        except Exception:
+            logger.exception("Zápis stavu zpracování média %s selhal", self.media["id"])
+
+def get_property_media(property_id: str) -> List[Dict[str, Any]]:
+    """
+    Média inzerátu v pořadí galerie
+
+    Raises:
+        Exception: Pokud načtení selže
+    """
+    supabase = get_supabase()
+
+    try:
+        response = supabase.table("property_media").select("*").eq("property_id", property_id).order("order").execute()
+        return response.data
+    except Exception as e:
+        raise Exception(f"Načtení médií selhalo: {str(e)}")
+
+def delete_media(property_id: str, media_id: str) -> bool:
+    """
+    Smazání média i všech jeho souborů v úložišti
+
+    Returns:
+        True, pokud médium existovalo
+
+    Raises:
+        Exception: Pokud smazání selže
+    """
+    supabase = get_supabase()
+
+    try:
+        response = supabase.table("property_media").delete().eq("id", media_id).eq("property_id", property_id).execute()
+    except Exception as e:
+        raise Exception(f"Smazání média selhalo: {str(e)}")
+
+    if not response.data:
+        return False
+
+    media = response.data[0]
+    storage = get_storage()
+    keys = [media.get("storage_key")] + [
+        _media_key(property_id, media_id, f"{name}.jpg") for name in DERIVATIVE_COLUMNS
+        if media.get(DERIVATIVE_COLUMNS[name])
+    ]
+    for key in filter(None, keys):
+        try:
+            storage.delete(key)
+        except Exception:
+            logger.warning("Soubor %s se nepodařilo smazat z úložiště", key)
+
+    return True
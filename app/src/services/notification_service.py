@@ -0,0 +1,132 @@
+from typing import Dict, List, Any, Iterator
+from supabase import Client
+from src import database
+from src.notifications import interest_index
+from src.pagination import apply_keyset, paginate
+from src.services.offer_service import get_agent_from_token
+
+# Nejvýše tolik zájmů může mít jeden makléř
+MAX_AGENT_INTERESTS = 50
+
+INTERESTS_PAGE_SIZE = 1000
+
+# Supabase klient pro aktuální požadavek (z poolu v src/database.py)
+def get_supabase() -> Client:
+    """Získání instance Supabase klienta"""
+    return database.get_supabase()
+
+def iter_agent_interests(page_size: int = INTERESTS_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Postupné čtení všech zájmů makléřů (pro index v src/notifications.py)
+
+    Volá ji vlákno notifikací, proto si klienta půjčí z poolu.
+    """
+    with database.pooled_client():
+        supabase = get_supabase()
+        cursor = None
+        while True:
+            query = supabase.table("agent_interests").select("id,agent_id,city,property_type,created_at")
+            rows, cursor = paginate(apply_keyset(query, cursor, page_size).execute().data, page_size)
+            yield from rows
+            if not cursor:
+                break
+
+def get_recipients(ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Kontaktní údaje příjemců notifikací jedním dotazem (z vlákna notifikací,
+    klient se půjčí z poolu)
+
+    Raises:
+        Exception: Pokud načtení selže
+    """
+    try:
+        with database.pooled_client():
+            response = get_supabase().table("users").select("id,email,full_name").in_("id", ids).execute()
+    except Exception as e:
+        raise Exception(f"Načtení příjemců notifikací selhalo: {str(e)}")
+
+    return response.data
+
+def validate_interests(interests: Any) -> List[Dict[str, Any]]:
+    """
+    Kontrola a očištění seznamu zájmů makléře
+
+    Zájem je objekt s nepovinnými poli city a property_type; chybějící pole
+    znamená libovolnou hodnotu. Duplicitní zájmy se sloučí.
+
+    Raises:
+        ValueError: Pokud seznam není platný
+    """
+    if not isinstance(interests, list):
+        raise ValueError("Zájmy musí být seznam")
+    if len(interests) > MAX_AGENT_INTERESTS:
+        raise ValueError(f"Nejvýše {MAX_AGENT_INTERESTS} zájmů")
+
+    clean = {}
+    for interest in interests:
+        if not isinstance(interest, dict):
+            raise ValueError("Zájem musí být objekt")
+        unknown = [field for field in interest if field not in ("city", "property_type")]
+        if unknown:
+            raise ValueError(f"Neznámá pole: {', '.join(unknown)}")
+
+        values = {}
+        for field in ("city", "property_type"):
+            value = interest.get(field)
+            if value is not None and not isinstance(value, str):
+                raise ValueError(f"Pole {field} musí být text")
+            values[field] = value.strip() if value and value.strip() else None
+        clean[(values["city"], values["property_type"])] = values
+
+    return list(clean.values())
+
+def get_agent_interests(token: str) -> List[Dict[str, Any]]:
+    """
+    Zájmy přihlášeného makléře (podle nich dostává notifikace o nových inzerátech)
+
+    Raises:
+        Exception: Pokud načtení selže
+    """
+    user_data = get_agent_from_token(token)
+    supabase = get_supabase()
+
+    try:
+        response = supabase.table("agent_interests").select("*").eq("agent_id", user_data["id"]).order("created_at").execute()
+    except Exception as e:
+        raise Exception(f"Načtení zájmů selhalo: {str(e)}")
+
+    return response.data
+
+def set_agent_interests(token: str, interests: Any) -> List[Dict[str, Any]]:
+    """
+    Nahrazení všech zájmů přihlášeného makléře
+
+    Returns:
+        List s uloženými zájmy
+
+    Raises:
+        ValueError: Pokud zájmy nejsou platné
+        Exception: Pokud uložení selže
+    """
+    user_data = get_agent_from_token(token)
+    clean = validate_interests(interests)
+    supabase = get_supabase()
+
+    try:
+        # Smazání vypuštěných a vložení nových zájmů v jedné transakci (migrace 014)
+        response = supabase.rpc("replace_agent_interests", {
+            "p_agent_id": user_data["id"],
+            "p_interests": clean
+        }).execute()
+    except Exception as e:
+        raise Exception(f"Uložení zájmů selhalo: {str(e)}")
+
+    result = response.data
+
+    # Index zájmů tohoto workeru hned; ostatní workery ho dohoní při přestavbě
+    for id in result["removed"]:
+        interest_index.remove(id)
+    for row in result["interests"]:
+        interest_index.upsert(row)
+
+    return result["interests"]
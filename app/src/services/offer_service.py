@@ -0,0 +1,337 @@
+from typing import Dict, List, Any, Optional, Tuple
+from supabase import Client
+from src import database
+from src.notifications import notify
+from src.pagination import apply_keyset, paginate, clamp_page_size
+from src.services import token_service
+from src.services.property_service import get_property
+
+# Povinná pole nabídky (odpovídají typu OfferData ve frontendu)
+OFFER_REQUIRED_FIELDS = (
+    "property_id", "commission_percentage", "commission_amount",
+    "price_estimate_min", "price_estimate_max"
+)
+
+# Pole, která makléř může zadat navíc
+OFFER_OPTIONAL_FIELDS = ("included_services", "additional_services", "video_presentation_url")
+
+# Číselné údaje nabídky, ze kterých se počítá souhrn pro prodávajícího
+OFFER_METRICS = ("commission_percentage", "commission_amount", "price_estimate_min", "price_estimate_max")
+
+OFFER_STATUSES = ("pending", "approved", "rejected")
+
+# Sloupce, podle kterých lze řadit nabídky inzerátu (s '-' sestupně)
+OFFER_SORT_FIELDS = ("created_at",) + OFFER_METRICS
+DEFAULT_OFFER_SORT = "-created_at"
+
+DEFAULT_OFFERS_PAGE_SIZE = 20
+MAX_OFFERS_PAGE_SIZE = 100
+
+# Supabase klient pro aktuální požadavek (z poolu v src/database.py)
+def get_supabase() -> Client:
+    """Získání instance Supabase klienta"""
+    return database.get_supabase()
+
+def get_agent_from_token(token: str) -> Dict[str, Any]:
+    """
+    Získání přihlášeného makléře z tokenu
+
+    Raises:
+        Exception: Pokud token není platný nebo uživatel není makléř
+    """
+    try:
+        user_data = token_service.get_user_from_token(token)
+    except Exception as e:
+        raise Exception(f"Získání informací o uživateli selhalo: {str(e)}")
+
+    if user_data["user_type"] != "agent":
+        raise Exception("Nabídky mohou podávat pouze makléři")
+
+    return user_data
+
+def validate_offer(data: Dict[str, Any], current: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Kontrola a očištění dat nabídky
+
+    Args:
+        data: Data z požadavku
+        current: Stávající nabídka při úpravě (povinná pole pak nejsou potřeba)
+
+    Returns:
+        Dict s poli, která se uloží
+
+    Raises:
+        ValueError: Pokud data nejsou platná
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Nabídka musí být objekt")
+
+    allowed = OFFER_OPTIONAL_FIELDS + (OFFER_METRICS if current else OFFER_REQUIRED_FIELDS)
+    unknown = [field for field in data if field not in allowed]
+    if unknown:
+        raise ValueError(f"Neznámá nebo neměnná pole: {', '.join(unknown)}")
+
+    if current is None:
+        missing = [field for field in OFFER_REQUIRED_FIELDS if data.get(field) is None]
+        if missing:
+            raise ValueError(f"Chybí povinné pole: {', '.join(missing)}")
+
+    clean = {field: data[field] for field in allowed if field in data}
+
+    for field in OFFER_METRICS:
+        if field not in clean:
+            continue
+        value = clean[field]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f"Pole {field} musí být nezáporné číslo")
+        if field != "commission_percentage":
+            if value != int(value):
+                raise ValueError(f"Pole {field} musí být celé číslo")
+            clean[field] = int(value)
+
+    merged = {**(current or {}), **clean}
+    if merged["commission_percentage"] > 100:
+        raise ValueError("Provize v procentech musí být nejvýše 100")
+    if merged["price_estimate_min"] > merged["price_estimate_max"]:
+        raise ValueError("Minimální odhad ceny je vyšší než maximální")
+
+    return clean
+
+def create_offer(token: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Vytvoření nabídky makléře k inzerátu
+
+    Souhrn nabídek inzerátu přepočítá databázový trigger (migrace 007),
+    prodávající dostane notifikaci.
+
+    Returns:
+        Dict s vytvořenou nabídkou
+
+    Raises:
+        ValueError: Pokud data nejsou platná
+        Exception: Pokud vytvoření selže
+    """
+    user_data = get_agent_from_token(token)
+    clean = validate_offer(data)
+
+    property = get_property(clean["property_id"])
+    if property is None or property.get("status") != "active":
+        raise ValueError("Inzerát neexistuje nebo není aktivní")
+
+    supabase = get_supabase()
+
+    try:
+        response = supabase.table("agent_offers").insert({
+            **clean,
+            "agent_id": user_data["id"],
+            "status": "pending",
+        }).execute()
+    except Exception as e:
+        raise Exception(f"Vytvoření nabídky selhalo: {str(e)}")
+
+    offer = response.data[0]
+    notify("offer_created", {**offer, "seller_id": property.get("seller_id")})
+    return offer
+
+def get_agent_offer(token: str, id: str) -> Optional[Dict[str, Any]]:
+    """
+    Nabídka přihlášeného makléře (None, pokud neexistuje nebo patří jinému)
+    """
+    user_data = get_agent_from_token(token)
+    supabase = get_supabase()
+
+    try:
+        response = supabase.table("agent_offers").select("*").eq("id", id).eq("agent_id", user_data["id"]).execute()
+    except Exception as e:
+        raise Exception(f"Načtení nabídky selhalo: {str(e)}")
+
+    return response.data[0] if response.data else None
+
+def get_agent_offers(token: str, cursor: Optional[str] = None, limit: int = DEFAULT_OFFERS_PAGE_SIZE) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Stránkovaný výpis nabídek přihlášeného makléře od nejnovějších
+
+    Returns:
+        Tuple (nabídky, next_cursor)
+
+    Raises:
+        Exception: Pokud načtení selže
+    """
+    user_data = get_agent_from_token(token)
+    limit = clamp_page_size(limit, MAX_OFFERS_PAGE_SIZE)
+    supabase = get_supabase()
+
+    query = supabase.table("agent_offers").select("*").eq("agent_id", user_data["id"])
+    query = apply_keyset(query, cursor, limit)
+
+    try:
+        return paginate(query.execute().data, limit)
+    except Exception as e:
+        raise Exception(f"Načtení nabídek selhalo: {str(e)}")
+
+def update_offer(token: str, id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Úprava vlastní nabídky, dokud ji prodávající nevyřídil
+
+    Returns:
+        Dict s upravenou nabídkou, nebo None, pokud nabídka neexistuje
+
+    Raises:
+        ValueError: Pokud data nejsou platná nebo nabídka už byla vyřízena
+        Exception: Pokud úprava selže
+    """
+    current = get_agent_offer(token, id)
+    if current is None:
+        return None
+
+    if current["status"] != "pending":
+        raise ValueError("Vyřízenou nabídku nelze upravit")
+
+    clean = validate_offer(data, current)
+    if not clean:
+        return current
+
+    supabase = get_supabase()
+
+    try:
+        response = supabase.table("agent_offers").update(clean).eq("id", id).eq("status", "pending").execute()
+    except Exception as e:
+        raise Exception(f"Úprava nabídky selhala: {str(e)}")
+
+    if not response.data:
+        raise ValueError("Vyřízenou nabídku nelze upravit")
+
+    return response.data[0]
+
+def delete_offer(token: str, id: str) -> bool:
+    """
+    Smazání vlastní nabídky
+
+    Returns:
+        True, pokud nabídka existovala
+
+    Raises:
+        Exception: Pokud smazání selže
+    """
+    user_data = get_agent_from_token(token)
+    supabase = get_supabase()
+
+    try:
+        response = supabase.table("agent_offers").delete().eq("id", id).eq("agent_id", user_data["id"]).execute()
+    except Exception as e:
+        raise Exception(f"Smazání nabídky selhalo: {str(e)}")
+
+    return bool(response.data)
+
+def parse_offer_sort(sort: Optional[str]) -> Tuple[str, bool]:
+    """
+    Sloupec a směr řazení z parametru sort (např. -commission_amount)
+
+    Raises:
+        ValueError: Pokud podle sloupce nelze řadit
+    """
+    sort = sort or DEFAULT_OFFER_SORT
+    column = sort.lstrip("-")
+    if column not in OFFER_SORT_FIELDS:
+        raise ValueError(f"Nelze řadit podle: {column}. Povolené hodnoty: {', '.join(OFFER_SORT_FIELDS)}")
+    return column, sort.startswith("-")
+
+def get_property_offers(
+    property_id: str,
+    sort: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = DEFAULT_OFFERS_PAGE_SIZE,
+    offset: int = 0
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Stránkovaný a seřazený výpis nabídek k inzerátu
+
+    Při shodě hodnot se řadí podle id, aby stránky na sebe navazovaly.
+
+    Returns:
+        Tuple (nabídky, has_more)
+
+    Raises:
+        ValueError: Pokud řazení nebo stav nejsou platné
+        Exception: Pokud načtení selže
+    """
+    column, desc = parse_offer_sort(sort)
+    if status and status not in OFFER_STATUSES:
+        raise ValueError(f"Neplatný stav nabídky: {status}")
+
+    limit = clamp_page_size(limit, MAX_OFFERS_PAGE_SIZE)
+    offset = max(0, int(offset))
+    supabase = get_supabase()
+
+    query = supabase.table("agent_offers").select("*").eq("property_id", property_id)
+    if status:
+        query = query.eq("status", status)
+
+    # Řazení podle obou sloupců musí být v jednom parametru order
+    direction = ".desc" if desc else ""
+    query = query.order(f"{column}{direction}.nullslast,id", desc=desc).range(offset, offset + limit)
+
+    try:
+        rows = query.execute().data
+    except Exception as e:
+        raise Exception(f"Načtení nabídek selhalo: {str(e)}")
+
+    return rows[:limit], len(rows) > limit
+
+def build_offer_stats(row: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    # Řádek property_offer_stats -> odpověď API; bez nabídek řádek neexistuje
+    row = row or {}
+    return {
+        "offer_count": row.get("offer_count", 0),
+        "by_status": {status: row.get(f"{status}_count", 0) for status in OFFER_STATUSES},
+        **{
+            metric: {
+                "min": row.get(f"{metric}_min"),
+                "median": row.get(f"{metric}_median"),
+                "max": row.get(f"{metric}_max"),
+            }
+            for metric in OFFER_METRICS
+        },
+        "updated_at": row.get("updated_at"),
+    }
+
+def get_offer_stats(property_id: str) -> Dict[str, Any]:
+    """
+    Souhrn nabídek k inzerátu: počty podle stavu a min, medián a max
+    provize a odhadů ceny
+
+    Čte jeden řádek property_offer_stats, který udržuje databáze.
+
+    Raises:
+        Exception: Pokud načtení selže
+    """
+    supabase = get_supabase()
+
+    try:
+        response = supabase.table("property_offer_stats").select("*").eq("property_id", property_id).execute()
+    except Exception as e:
+        raise Exception(f"Načtení souhrnu nabídek selhalo: {str(e)}")
+
+    return build_offer_stats(response.data[0] if response.data else None)
+
+def check_offer_stats(fix: bool = False) -> List[Dict[str, Any]]:
+    """
+    Kontrola souhrnů nabídek proti tabulce agent_offers
+
+    Args:
+        fix: Nesouhlasící souhrny hromadně přepočítat
+
+    Returns:
+        List záznamů s property_id, stored_offer_count a actual_offer_count
+
+    Raises:
+        Exception: Pokud kontrola selže
+    """
+    supabase = get_supabase()
+
+    try:
+        response = supabase.rpc("check_property_offer_stats", {"p_fix": fix}).execute()
+    except Exception as e:
+        raise Exception(f"Kontrola souhrnů nabídek selhala: {str(e)}")
+
+    return response.data or []
@@ -1,21 +1,638 @@
-from src.database import supabase
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from src import pagination
+from src.cache import InvalidationLog, create_cache
+from src.listing_index import ListingIndex, FACET_FIELDS
+from src.search_index import SearchIndex, SEARCH_FIELDS
+from src.geo_index import GeoIndex
+from src.indexing import rebuild_indexes
+from src.geocoding import bounding_box, coordinates_for, distance_km, lookup
+from src.pagination import apply_keyset, paginate, PageStream
+from src.database import supabase, pooled_client
+from src.notifications import notify_many
+from src.singleflight import create_flight
+
+# Sloupce tabulky properties, které lze vyžádat přes fields=
+PROPERTY_FIELDS = (
+    'id', 'seller_id', 'property_type', 'description', 'street', 'house_number',
+    'city', 'postal_code', 'parcel_number', 'municipality', 'cadastral_area',
+    'created_at', 'updated_at', 'status', 'latitude', 'longitude'
+)
+
+# Sloupce, podle kterých lze seznam filtrovat na straně databáze
+FILTER_FIELDS = ('city', 'municipality', 'cadastral_area', 'property_type', 'status')
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Nejvýše tolik inzerátů v jedné stránce průběžně odesílaného výpisu (čte se po MAX_PAGE_SIZE)
+MAX_STREAM_PAGE_SIZE = int(os.getenv('LIST_STREAM_MAX_LIMIT', '5000'))
+
+# Povinná pole inzerátu (odpovídají typu PropertyData ve frontendu)
+PROPERTY_REQUIRED_FIELDS = (
+    'property_type', 'description', 'street', 'house_number', 'city',
+    'postal_code', 'parcel_number', 'municipality', 'cadastral_area'
+)
+
+# Pole, která lze při hromadném importu zadat navíc
+PROPERTY_OPTIONAL_FIELDS = ('seller_id', 'status')
+
+PROPERTY_STATUSES = ('active', 'inactive', 'sold')
+
+# Cache detailu inzerátu: {'data': řádek, 'etag': ETag odvozený z updated_at}
+_property_cache = create_cache(
+    'property',
+    maxsize=int(os.getenv('PROPERTY_CACHE_SIZE', '5000')),
+    ttl=float(os.getenv('PROPERTY_CACHE_TTL', '300'))
+)
+
+# Čtení, které začalo před změnou inzerátu, svůj už neplatný řádek do cache
+# nezapíše. Platí v rámci workeru; invalidace z jiného workeru (sdílená cache)
+# omezuje TTL.
+_property_invalidations = InvalidationLog()
+
+# Souběžná čtení stejného inzerátu při minutí cache jdou do databáze jen jednou
+_property_flight = create_flight('property')
+
+DEFAULT_BULK_CHUNK_SIZE = 500
+MAX_BULK_CHUNK_SIZE = 1000
+
+# Paměťové indexy inzerátů: výpis aktivních pro makléře (src/listing_index.py),
+# fulltext aktivních (src/search_index.py) a okolí (src/geo_index.py). Každý
+# worker má vlastní; změny z jiných workerů načte každých LISTING_INDEX_REFRESH
+# sekund podle updated_at (migrace 012). Smazané inzeráty se tak neprojeví,
+# proto se indexy jednou za LISTING_INDEX_REBUILD sekund sestaví znovu.
+LISTING_INDEX_ENABLED = os.getenv('LISTING_INDEX_ENABLED', '1') == '1'
+LISTING_INDEX_REFRESH = float(os.getenv('LISTING_INDEX_REFRESH', '30'))
+LISTING_INDEX_REBUILD = float(os.getenv('LISTING_INDEX_REBUILD', '3600'))
+# Změny se čtou i o tolik sekund zpětně: řádek zapsaný se starším updated_at
+# (transakce potvrzená později) by za pozicí jinak chyběl
+LISTING_INDEX_LAG = float(os.getenv('LISTING_INDEX_LAG', '30'))
+
+listing_index = ListingIndex()
+search_index = SearchIndex()
+geo_index = GeoIndex()
+
+DEFAULT_SEARCH_LIMIT = 20
+
+# Vyhledávání v okolí (src/geo_index.py)
+DEFAULT_NEARBY_RADIUS_KM = 10.0
+MAX_NEARBY_RADIUS_KM = 300.0
+# Náhradní dotaz do databáze čte z obdélníku nejvýše tolik nejnovějších řádků
+NEARBY_FALLBACK_ROWS = 2000
+
+# Změna těchto polí znamená nové souřadnice inzerátu
+ADDRESS_FIELDS = ('postal_code', 'municipality', 'city')
+
+logger = logging.getLogger(__name__)
+
+def with_coordinates(data):
+    # Souřadnice z PSČ a obce, pokud je klient nezadal sám
+    if data.get('latitude') is not None and data.get('longitude') is not None:
+        return data
+    return {**data, **coordinates_for(data)}
 
 def create_property(data):
-    response = supabase.table('properties').insert(data).execute()
+    response = supabase.table('properties').insert(with_coordinates(data)).execute()
+    index_properties(response.data)
+    notify_created(response.data)
     return response.data
 
-def get_properties():
-    response = supabase.table('properties').select('*').execute()
-    return response.data
+def property_columns(fields=None):
+    if not fields:
+        return PROPERTY_FIELDS
 
-def get_property(id):
+    unknown = [field for field in fields if field not in PROPERTY_FIELDS]
+    if unknown:
+        raise ValueError(f"Neznámé sloupce: {', '.join(unknown)}")
+    # Klíč stránkování musí být ve výsledku vždy
+    return list(dict.fromkeys(['id', 'created_at', *fields]))
+
+def build_properties_query(table, filters=None, fields=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    # Sestavení dotazu nad query builderem tabulky properties (sdílí synchronní i asynchronní cesta)
+    query = table.select(','.join(property_columns(fields)))
+
+    for field, value in (filters or {}).items():
+        if field not in FILTER_FIELDS:
+            raise ValueError(f'Nelze filtrovat podle sloupce: {field}')
+        query = query.eq(field, value)
+
+    return apply_keyset(query, cursor, limit)
+
+def clamp_page_size(limit):
+    return pagination.clamp_page_size(limit, MAX_PAGE_SIZE)
+
+def get_properties(filters=None, fields=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Stránkovaný výpis nemovitostí od nejnovějších (keyset podle created_at, id)
+
+    Vrací dvojici (řádky, next_cursor); next_cursor je None na poslední stránce.
+    """
+    limit = clamp_page_size(limit)
+    query = build_properties_query(supabase.table('properties'), filters, fields, cursor, limit)
+    return paginate(query.execute().data, limit)
+
+def stream_properties(filters=None, fields=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Stránka výpisu nemovitostí pro průběžné odeslání
+
+    limit může být až MAX_STREAM_PAGE_SIZE; z databáze se čte po dávkách
+    MAX_PAGE_SIZE řádků, takže paměť nezávisí na velikosti stránky.
+    Vrací PageStream, next_cursor je známý po projití řádků.
+    """
+    limit = pagination.clamp_page_size(limit, MAX_STREAM_PAGE_SIZE)
+    return PageStream(
+        lambda cursor, batch_size: get_properties(filters=filters, fields=fields, cursor=cursor, limit=batch_size),
+        cursor,
+        limit,
+        MAX_PAGE_SIZE
+    )
+
+def iter_properties(filters=None, fields=None, page_size=MAX_PAGE_SIZE):
+    # Postupné čtení všech stránek; v paměti je vždy jen jedna stránka
+    cursor = None
+    while True:
+        rows, cursor = get_properties(filters=filters, fields=fields, cursor=cursor, limit=page_size)
+        yield from rows
+        if not cursor:
+            break
+
+def validate_property(row):
+    """
+    Kontrola jednoho řádku importu proti schématu PropertyData
+
+    Vrací dvojici (očištěný řádek, seznam chyb).
+    """
+    errors = []
+    clean = {}
+
+    if not isinstance(row, dict):
+        return None, ['Řádek musí být objekt']
+
+    for field in PROPERTY_REQUIRED_FIELDS:
+        value = row.get(field)
+        if value is None or not str(value).strip():
+            errors.append(f'Chybí povinné pole: {field}')
+        else:
+            clean[field] = str(value).strip()
+
+    for field in PROPERTY_OPTIONAL_FIELDS:
+        value = row.get(field)
+        if value is not None and str(value).strip():
+            clean[field] = str(value).strip()
+
+    if clean.get('status') and clean['status'] not in PROPERTY_STATUSES:
+        errors.append(f"Neplatný stav: {clean['status']}")
+
+    unknown = [field for field in row if field not in PROPERTY_REQUIRED_FIELDS + PROPERTY_OPTIONAL_FIELDS]
+    if unknown:
+        errors.append(f"Neznámá pole: {', '.join(unknown)}")
+
+    return clean, errors
+
+def bulk_create_properties(rows, chunk_size=DEFAULT_BULK_CHUNK_SIZE):
+    """
+    Hromadné vložení inzerátů po dávkách
+
+    rows je iterátor dvojic (číslo řádku, dict nebo text chyby parsování).
+    Chybné řádky se přeskočí a nahlásí, ostatní se vloží. Pokud databáze
+    odmítne celou dávku, vloží se její řádky jednotlivě, aby šlo chybu
+    přiřadit ke konkrétnímu řádku.
+    """
+    chunk_size = max(1, min(int(chunk_size), MAX_BULK_CHUNK_SIZE))
+    result = {'inserted': 0, 'failed': 0, 'errors': []}
+    chunk = []
+
+    def report(line, errors):
+        result['failed'] += 1
+        result['errors'].append({'row': line, 'errors': errors})
+
+    def flush():
+        try:
+            response = supabase.table('properties').insert([row for _, row in chunk]).execute()
+            result['inserted'] += len(response.data)
+            index_properties(response.data)
+            notify_created(response.data)
+        except Exception:
+            for line, row in chunk:
+                try:
+                    response = supabase.table('properties').insert(row).execute()
+                    result['inserted'] += 1
+                    index_properties(response.data)
+                    notify_created(response.data)
+                except Exception as e:
+                    report(line, [str(e)])
+        chunk.clear()
+
+    for line, row in rows:
+        if isinstance(row, str):
+            report(line, [row])
+            continue
+
+        clean, errors = validate_property(row)
+        if errors:
+            report(line, errors)
+            continue
+
+        chunk.append((line, with_coordinates(clean)))
+        if len(chunk) >= chunk_size:
+            flush()
+
+    if chunk:
+        flush()
+
+    return result
+
+def property_etag(row):
+    # Silný ETag: mění se s každou změnou inzerátu (updated_at nastavuje update_property)
+    version = row.get('updated_at') or row.get('created_at')
+    return hashlib.sha1(f"{row['id']}:{version}".encode()).hexdigest()
+
+def get_cached_property(id):
+    # Záznam cache {'data', 'etag'} nebo None
+    return _property_cache.get(str(id))
+
+def property_generation(id):
+    # Značka začátku čtení z databáze, pro cache_property
+    return _property_invalidations.start()
+
+def cache_property(row, generation):
+    # Do cache jen pokud inzerát od začátku čtení nikdo nezměnil
+    entry = {'data': row, 'etag': property_etag(row)}
+    key = str(row['id'])
+    _property_invalidations.store_if_current(key, generation, lambda: _property_cache.set(key, entry))
+    return entry
+
+def invalidate_property(id):
+    key = str(id)
+    _property_invalidations.invalidate(key)
+    _property_cache.delete(key)
+    _property_flight.forget(str(id))
+
+def get_cached_property_etag(id):
+    # ETag z cache bez dotazu do databáze (None, pokud inzerát v cache není)
+    entry = get_cached_property(id)
+    return entry['etag'] if entry else None
+
+def load_property(id):
+    # Záznam cache {'data', 'etag'} přímo z databáze, nebo None
+    generation = property_generation(id)
     response = supabase.table('properties').select('*').eq('id', id).execute()
+    if not response.data:
+        return None
+    return cache_property(response.data[0], generation)
+
+def get_property_with_etag(id):
+    entry = get_cached_property(id)
+    if entry is None:
+        entry = _property_flight.do(str(id), lambda: load_property(id))
+        if entry is None:
+            return None, None
+    return entry['data'], entry['etag']
+
+def get_property(id):
+    property, _ = get_property_with_etag(id)
+    return property
+
+def address_changed(data):
+    # Změněná adresa bez nových souřadnic: souřadnice je potřeba přepočítat z PSČ a obce
+    return any(field in data for field in ADDRESS_FIELDS) and 'latitude' not in data
+
+def with_updated_at(data, current=None):
+    # current: uložené adresní sloupce inzerátu (load_address), pokud se adresa mění
+    data = {**data, 'updated_at': datetime.now(timezone.utc).isoformat()}
+    if address_changed(data):
+        # Adresa po změně je změna sloučená s uloženým řádkem (třeba jen nové město
+        # k uloženému PSČ); nenalezená adresa ponechá dosavadní souřadnice
+        coordinates = coordinates_for({**(current or {}), **data})
+        if coordinates['latitude'] is not None:
+            data.update(coordinates)
+    return data
+
+def load_address(id):
+    response = supabase.table('properties').select(','.join(ADDRESS_FIELDS)).eq('id', id).execute()
     return response.data[0] if response.data else None
 
 def update_property(id, data):
-    response = supabase.table('properties').update(data).eq('id', id).execute()
+    current = load_address(id) if address_changed(data) else None
+    response = supabase.table('properties').update(with_updated_at(data, current)).eq('id', id).execute()
+    invalidate_property(id)
+    index_properties(response.data)
     return response.data
 
 def delete_property(id):
     response = supabase.table('properties').delete().eq('id', id).execute()
-    return response.data
\ No newline at end of file
+    invalidate_property(id)
+    unindex_property(id)
+    return response.data
+
+def index_properties(rows):
+    # Promítnutí vložených nebo změněných řádků do indexů (neaktivní z výpisu pro makléře vypadnou)
+    for row in rows or []:
+        listing_index.upsert(row)
+        search_index.upsert(row)
+        geo_index.upsert(row)
+
+def notify_created(rows):
+    # Notifikace makléřům se zájmem o město a typ inzerátu (rozešle je src/notifications.py)
+    notify_many(('property_created', row) for row in rows or [])
+
+def unindex_property(id):
+    listing_index.remove(id)
+    search_index.remove(id)
+    geo_index.remove(id)
+
+# Indexy plněné z jednoho průchodu tabulkou; neaktivní inzeráty si výpis
+# a fulltext vyřadí samy
+PROPERTY_INDEXES = {
+    'listing': listing_index,
+    'search': search_index,
+    'geo': geo_index,
+}
+
+def latest_change(rows, since=None):
+    # Nejnovější updated_at mezi řádky (ISO text v UTC se řadí i jako řetězec)
+    return max(filter(None, [since, *(row.get('updated_at') for row in rows)]), default=None)
+
+def rebuild_property_indexes():
+    """
+    Sestavení všech indexů z jednoho čtení tabulky
+
+    Vrací nejnovější updated_at přečtených řádků, od kterého pokračuje
+    refresh_property_indexes.
+    """
+    started = time.monotonic()
+    latest = None
+
+    def scan():
+        nonlocal latest
+        for row in iter_properties():
+            latest = latest_change([row], latest)
+            yield row
+
+    sizes = rebuild_indexes(list(PROPERTY_INDEXES.values()), scan())
+    for name, size in zip(PROPERTY_INDEXES, sizes):
+        logger.info('Index inzerátů %s sestaven: %d inzerátů za %.2f s', name, size, time.monotonic() - started)
+    return latest
+
+def fetch_property_changes(since, page_size=MAX_PAGE_SIZE):
+    # Řádky s updated_at po since, vzestupně podle (updated_at, id) po stránkách
+    last = None
+    while True:
+        query = supabase.table('properties').select(','.join(PROPERTY_FIELDS))
+        if last:
+            query = query.or_(
+                f'updated_at.gt."{last["updated_at"]}",and(updated_at.eq."{last["updated_at"]}",id.gt.{last["id"]})'
+            )
+        elif since:
+            query = query.gt('updated_at', since)
+        rows = query.order('updated_at,id').limit(page_size).execute().data or []
+        yield from rows
+        if len(rows) < page_size:
+            break
+        last = rows[-1]
+
+def refresh_property_indexes(since):
+    """
+    Promítnutí inzerátů změněných od since (updated_at) do indexů
+
+    Čte i LISTING_INDEX_LAG sekund před since; opakované promítnutí
+    stejného řádku nic nemění. Vrací nový začátek dalšího čtení.
+    """
+    start = since
+    if since:
+        start = (datetime.fromisoformat(since) - timedelta(seconds=LISTING_INDEX_LAG)).isoformat()
+
+    latest = since
+    count = 0
+    for row in fetch_property_changes(start):
+        index_properties([row])
+        latest = latest_change([row], latest)
+        count += 1
+    if count:
+        logger.debug('Indexy inzerátů: promítnuto %d změn', count)
+    return latest
+
+def start_property_indexes():
+    """
+    Naplnění indexů na pozadí po startu workeru a jejich průběžná aktualizace
+
+    Než je index připravený, výpis pro makléře i vyhledávání čtou z databáze.
+    """
+    if not LISTING_INDEX_ENABLED:
+        return None
+
+    def run():
+        since = None
+        rebuilt_at = None
+        while True:
+            try:
+                with pooled_client():
+                    if rebuilt_at is None or time.monotonic() - rebuilt_at >= LISTING_INDEX_REBUILD:
+                        since = rebuild_property_indexes()
+                        rebuilt_at = time.monotonic()
+                    else:
+                        since = refresh_property_indexes(since)
+            except Exception:
+                logger.exception('Aktualizace indexů inzerátů selhala')
+            time.sleep(LISTING_INDEX_REFRESH)
+
+    thread = threading.Thread(target=run, name='property-indexes', daemon=True)
+    thread.start()
+    return thread
+
+def get_agent_feed(filters=None, fields=None, cursor=None, limit=DEFAULT_PAGE_SIZE, include_facets=True):
+    """
+    Výpis dostupných inzerátů pro makléře od nejnovějších
+
+    Aktivní inzeráty se čtou z paměťového indexu včetně počtů podle faset;
+    dokud index není připravený, nebo jde o jiný stav než active, čte se
+    z databáze a počty faset jsou None.
+
+    Vrací trojici (řádky, next_cursor, fasety).
+    """
+    limit = clamp_page_size(limit)
+    filters = dict(filters or {})
+    status = filters.pop('status', 'active')
+    columns = property_columns(fields)
+
+    unknown = [field for field in filters if field not in FACET_FIELDS]
+    if unknown:
+        raise ValueError(f"Nelze filtrovat podle sloupce: {', '.join(unknown)}")
+
+    if status != 'active' or not listing_index.ready:
+        rows, next_cursor = get_properties({**filters, 'status': status}, fields, cursor, limit)
+        return rows, next_cursor, None
+
+    after = pagination.decode_cursor(cursor) if cursor else None
+    rows, has_more = listing_index.search(filters, after=after, limit=limit)
+    next_cursor = pagination.encode_cursor(rows[-1]) if has_more else None
+    facets = listing_index.facet_counts(filters) if include_facets else None
+
+    return [{column: row.get(column) for column in columns} for row in rows], next_cursor, facets
+
+def build_search_query(table, q, fields=None, limit=DEFAULT_SEARCH_LIMIT, offset=0):
+    """
+    Náhradní vyhledávání v databázi (ilike), dokud není fulltextový index připravený
+
+    Jen aktivní inzeráty jako v indexu. Každé slovo musí být v některém
+    z prohledávaných sloupců; bez skládání diakritiky a bez řazení podle
+    relevance. Čte se o řádek víc kvůli has_more.
+    """
+    words = re.findall(r'\w+', q)
+    if not words:
+        return None
+
+    columns = property_columns(fields)
+    conditions = [
+        'or(' + ','.join(f'{field}.ilike.*{word}*' for field in SEARCH_FIELDS) + ')'
+        for word in words
+    ]
+    query = table.select(','.join(columns)).eq('status', 'active').or_(f"and({','.join(conditions)})")
+    return query.order('created_at.desc,id', desc=True).range(offset, offset + limit)
+
+def search_properties(q, fields=None, limit=DEFAULT_SEARCH_LIMIT, offset=0):
+    """
+    Fulltextové vyhledávání v popisu, ulici a městě inzerátu
+
+    Vrací dvojici (řádky, has_more); řádky z indexu mají navíc klíč score.
+    """
+    limit = clamp_page_size(limit)
+    offset = max(0, int(offset))
+    columns = property_columns(fields)
+
+    if not search_index.ready:
+        query = build_search_query(supabase.table('properties'), q, fields, limit, offset)
+        if query is None:
+            return [], False
+        rows = query.execute().data
+        return rows[:limit], len(rows) > limit
+
+    rows, has_more = search_index.search(q, limit=limit, offset=offset)
+    return [{**{column: row.get(column) for column in columns}, 'score': row['score']} for row in rows], has_more
+
+def parse_nearby_area(lat=None, lon=None, postal_code=None, municipality=None, radius_km=None, bbox=None):
+    """
+    Oblast hledání v okolí z parametrů dotazu
+
+    Střed je buď zadaný souřadnicemi, nebo dohledaný z PSČ či obce v offline
+    tabulce. Místo poloměru lze zadat obdélník bbox=min_lon,min_lat,max_lon,max_lat.
+
+    Returns:
+        Trojice (střed, poloměr v km nebo None, bbox (min_lat, min_lon, max_lat, max_lon) nebo None)
+
+    Raises:
+        ValueError: Pokud parametry chybí nebo jsou neplatné
+    """
+    center = None
+    if lat is not None or lon is not None:
+        try:
+            center = (float(lat), float(lon))
+        except (TypeError, ValueError):
+            raise ValueError('Neplatné souřadnice (lat, lon)')
+        if not (-90 <= center[0] <= 90 and -180 <= center[1] <= 180):
+            raise ValueError('Souřadnice mimo rozsah')
+    elif postal_code or municipality:
+        center = lookup(postal_code, municipality)
+        if center is None:
+            raise ValueError('Místo se nepodařilo dohledat')
+
+    if bbox:
+        try:
+            min_lon, min_lat, max_lon, max_lat = (float(value) for value in bbox.split(','))
+        except ValueError:
+            raise ValueError('Neplatný bbox, očekává se min_lon,min_lat,max_lon,max_lat')
+        if min_lat > max_lat or min_lon > max_lon:
+            raise ValueError('Neplatný bbox, minimum je větší než maximum')
+        return center, None, (min_lat, min_lon, max_lat, max_lon)
+
+    if center is None:
+        raise ValueError('Chybí střed hledání (lat a lon, postal_code nebo municipality) nebo bbox')
+
+    try:
+        radius_km = float(radius_km) if radius_km is not None else DEFAULT_NEARBY_RADIUS_KM
+    except ValueError:
+        raise ValueError('Neplatný poloměr (radius_km)')
+    if not 0 < radius_km <= MAX_NEARBY_RADIUS_KM:
+        raise ValueError(f'Poloměr musí být mezi 0 a {MAX_NEARBY_RADIUS_KM:g} km')
+
+    return center, radius_km, None
+
+def build_nearby_query(table, bbox, status='active', fields=None):
+    """
+    Náhradní dotaz do databáze pro hledání v okolí, dokud není prostorový index připravený
+
+    Čte inzeráty v obdélníku (index properties_coordinates_idx) od nejnovějších
+    a o řádek víc než NEARBY_FALLBACK_ROWS, aby šlo poznat oříznutí; vzdálenost
+    a řazení dopočítá rank_nearby.
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    columns = list(dict.fromkeys([*property_columns(fields), 'latitude', 'longitude']))
+    query = (
+        table.select(','.join(columns))
+        .gte('latitude', min_lat).lte('latitude', max_lat)
+        .gte('longitude', min_lon).lte('longitude', max_lon)
+    )
+    if status:
+        query = query.eq('status', status)
+    return query.order('created_at.desc,id', desc=True).limit(NEARBY_FALLBACK_ROWS + 1)
+
+def fallback_rows(rows):
+    # Řádky náhradního dotazu a příznak, že obdélník obsahuje víc inzerátů, než se přečetlo
+    return rows[:NEARBY_FALLBACK_ROWS], len(rows) > NEARBY_FALLBACK_ROWS
+
+def rank_nearby(rows, center, radius_km=None, limit=DEFAULT_PAGE_SIZE, offset=0):
+    # Řazení řádků z databáze podle vzdálenosti stejně jako v GeoIndex (novější dřív při shodě)
+    ranked = []
+    for row in rows:
+        if row.get('latitude') is None or row.get('longitude') is None:
+            continue
+        distance = distance_km(center, (float(row['latitude']), float(row['longitude'])))
+        if radius_km is None or distance <= radius_km:
+            ranked.append((row, distance))
+
+    ranked.sort(key=lambda item: (item[0].get('created_at') or '', str(item[0]['id'])), reverse=True)
+    ranked.sort(key=lambda item: item[1])
+    return ranked[offset:offset + limit], len(ranked) > offset + limit
+
+def nearby_result(ranked, fields=None):
+    columns = property_columns(fields)
+    return [
+        {**{column: row.get(column) for column in columns}, 'distance_km': round(distance, 2)}
+        for row, distance in ranked
+    ]
+
+def find_nearby_properties(center, radius_km=None, bbox=None, status='active', fields=None, limit=DEFAULT_PAGE_SIZE, offset=0):
+    """
+    Inzeráty v okruhu kolem středu nebo v obdélníku, od nejbližších
+
+    Čte z prostorového indexu; dokud není připravený, čte z databáze
+    obdélník kolem oblasti (nejvýše NEARBY_FALLBACK_ROWS nejnovějších řádků).
+
+    Vrací trojici (řádky s klíčem distance_km, has_more, truncated);
+    truncated značí, že náhradní dotaz nepřečetl celý obdélník.
+    """
+    limit = clamp_page_size(limit)
+    offset = max(0, int(offset))
+    if status and status not in PROPERTY_STATUSES:
+        raise ValueError(f'Neplatný stav: {status}')
+    if center is None:
+        center = ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
+
+    if not geo_index.ready:
+        query = build_nearby_query(supabase.table('properties'), bbox or bounding_box(center, radius_km), status, fields)
+        rows, truncated = fallback_rows(query.execute().data)
+        ranked, has_more = rank_nearby(rows, center, radius_km, limit, offset)
+        return nearby_result(ranked, fields), has_more, truncated
+
+    where = (lambda row: row.get('status') == status) if status else None
+    if bbox:
+        ranked, has_more = geo_index.within_bbox(bbox, center, limit=limit, offset=offset, where=where)
+    else:
+        ranked, has_more = geo_index.within_radius(center, radius_km, limit=limit, offset=offset, where=where)
+    return nearby_result(ranked, fields), has_more, False
@@ -0,0 +1,127 @@
+from typing import Dict, List, Any, Optional
+import os
+from datetime import date, timedelta
+from postgrest.exceptions import APIError
+from src import database
+
+# Statistiky pro administrátory z denních souhrnů (migrace 011). Souhrny
+# doplňuje job src.jobs.refresh_rollups; dotaz na libovolné období sečte
+# denní řádky v databázi (rollup_stats) a zdrojové tabulky nečte.
+
+# Souhrny a sloupce, podle kterých je lze seskupit
+ROLLUP_DIMENSIONS = {
+    "credits": ("day", "agent_id", "transaction_type"),
+    "unlocks": ("day", "agent_id", "city", "property_type"),
+    "listings": ("day", "city", "cadastral_area", "property_type"),
+}
+
+# Výchozí seskupení přehledu všech souhrnů (GET /api/stats)
+OVERVIEW_GROUP_BY = {
+    "credits": ["transaction_type"],
+    "unlocks": [],
+    "listings": [],
+}
+
+# Výchozí období: posledních tolik dní včetně dneška
+DEFAULT_STATS_DAYS = 30
+# Nejdelší období jednoho dotazu (ve dnech)
+MAX_STATS_DAYS = int(os.getenv("STATS_MAX_DAYS", "3660"))
+
+def get_supabase():
+    return database.get_supabase()
+
+def parse_stats_range(date_from: Optional[str] = None, date_to: Optional[str] = None) -> Dict[str, str]:
+    """
+    Kontrola období statistik
+
+    Args:
+        date_from: První den období (YYYY-MM-DD, včetně, výchozí DEFAULT_STATS_DAYS dní před date_to)
+        date_to: Poslední den období (YYYY-MM-DD, včetně, výchozí dnes)
+
+    Returns:
+        Dict s hranicemi období from a to (oba dny včetně)
+
+    Raises:
+        ValueError: Pokud období není platné
+    """
+    try:
+        end = date.fromisoformat(date_to) if date_to else date.today()
+        start = date.fromisoformat(date_from) if date_from else end - timedelta(days=DEFAULT_STATS_DAYS - 1)
+    except ValueError:
+        raise ValueError("Neplatné datum. Očekávaný formát: YYYY-MM-DD")
+
+    if start > end:
+        raise ValueError("Začátek období musí být před jeho koncem")
+
+    if (end - start).days + 1 > MAX_STATS_DAYS:
+        raise ValueError(f"Období může mít nejvýše {MAX_STATS_DAYS} dní")
+
+    return {"from": start.isoformat(), "to": end.isoformat()}
+
+def parse_group_by(rollup: str, group_by: Optional[str] = None) -> List[str]:
+    """
+    Kontrola seskupení souhrnu
+
+    Args:
+        rollup: Název souhrnu (credits, unlocks, listings)
+        group_by: Sloupce oddělené čárkou
+
+    Returns:
+        List sloupců seskupení
+
+    Raises:
+        ValueError: Pokud souhrn neexistuje nebo jej nelze seskupit podle zadaného sloupce
+    """
+    dimensions = ROLLUP_DIMENSIONS.get(rollup)
+    if dimensions is None:
+        raise ValueError(f"Neznámý souhrn. Povolené hodnoty: {', '.join(ROLLUP_DIMENSIONS)}")
+
+    columns = [column.strip() for column in (group_by or "").split(",") if column.strip()]
+    invalid = [column for column in columns if column not in dimensions]
+    if invalid:
+        raise ValueError(f"Souhrn {rollup} nelze seskupit podle {', '.join(invalid)}. Povolené hodnoty: {', '.join(dimensions)}")
+
+    # Bez duplicit, v zadaném pořadí
+    return list(dict.fromkeys(columns))
+
+def get_rollup_stats(rollup: str, period: Dict[str, str], group_by: List[str]) -> List[Dict[str, Any]]:
+    """
+    Součty jednoho souhrnu za období
+
+    Args:
+        rollup: Název souhrnu (credits, unlocks, listings)
+        period: Období z parse_stats_range
+        group_by: Sloupce seskupení z parse_group_by (prázdný = jeden řádek součtů)
+
+    Returns:
+        List řádků se sloupci seskupení a součty
+
+    Raises:
+        Exception: Pokud dotaz selže
+    """
+    try:
+        response = get_supabase().rpc("rollup_stats", {
+            "p_rollup": rollup,
+            "p_from": period["from"],
+            "p_to": period["to"],
+            "p_group_by": group_by
+        }).execute()
+    except APIError as e:
+        raise Exception(f"Získání statistik selhalo: {e.message}")
+    except Exception as e:
+        raise Exception(f"Získání statistik selhalo: {str(e)}")
+
+    return response.data or []
+
+def get_stats_overview(period: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Přehled všech souhrnů za období (kredity po typech transakcí, počty odemčení a nových inzerátů)
+
+    Raises:
+        Exception: Pokud dotaz selže
+    """
+    overview = {}
+    for rollup, group_by in OVERVIEW_GROUP_BY.items():
+        rows = get_rollup_stats(rollup, period, group_by)
+        overview[rollup] = rows if group_by else (rows[0] if rows else {})
+    return overview
@@ -0,0 +1,178 @@
+from typing import Dict, Any, Optional
+import os
+import threading
+import jwt
+from supabase import Client
+from src import database
+
+from src.cache import InvalidationLog, TTLCache
+from src.metrics import timed
+from src.singleflight import create_flight
+
+# Tokeny vydává Supabase Auth s touto audiencí
+JWT_AUDIENCE = "authenticated"
+
+# Tolerance rozdílu hodin mezi námi a Supabase (v sekundách)
+JWT_LEEWAY = 10
+
+# Jak dlouho držet stažené veřejné klíče (JWKS) v paměti (v sekundách)
+JWKS_LIFESPAN = int(os.getenv("SUPABASE_JWKS_TTL", "3600"))
+
+# Cache záznamů z tabulky users podle ID uživatele
+_user_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "60"))
+)
+
+# Čtení, které začalo před změnou uživatele, svůj už neplatný záznam do cache nezapíše
+_user_invalidations = InvalidationLog()
+
+# Souběžná načtení stejného uživatele (nával přihlášení) jdou do databáze jen jednou
+_user_flight = create_flight("user")
+
+_jwks_client: Optional[jwt.PyJWKClient] = None
+_jwks_lock = threading.Lock()
+
+# Supabase klient pro aktuální požadavek (z poolu v src/database.py)
+def get_supabase() -> Client:
+    """Získání instance Supabase klienta"""
+    return database.get_supabase()
+
+def _get_jwks_client() -> jwt.PyJWKClient:
+    """Získání klienta pro stahování veřejných klíčů projektu (klíče si drží v cache)"""
+    global _jwks_client
+
+    if _jwks_client is None:
+        with _jwks_lock:
+            if _jwks_client is None:
+                supabase_url = os.getenv("SUPABASE_URL")
+                if not supabase_url:
+                    raise Exception("Není nastavena proměnná SUPABASE_URL ani SUPABASE_JWT_SECRET")
+
+                _jwks_client = jwt.PyJWKClient(
+                    f"{supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json",
+                    cache_keys=True,
+                    lifespan=JWKS_LIFESPAN
+                )
+
+    return _jwks_client
+
+def verify_token(token: str) -> Dict[str, Any]:
+    """
+    Lokální ověření přístupového tokenu Supabase bez volání Auth API
+
+    Pokud je nastaven SUPABASE_JWT_SECRET, ověřuje se podpis HS256 sdíleným
+    tajemstvím projektu. Jinak se použije asymetrický podpisový klíč z JWKS
+    projektu, který se stahuje jen jednou za JWKS_LIFESPAN.
+
+    Args:
+        token: Přístupový token uživatele
+
+    Returns:
+        Dict obsahující claimy tokenu
+
+    Raises:
+        Exception: Pokud token není platný nebo vypršel
+    """
+    if not token:
+        raise Exception("Chybí přístupový token")
+
+    try:
+        jwt_secret = os.getenv("SUPABASE_JWT_SECRET")
+
+        if jwt_secret:
+            key = jwt_secret
+            algorithms = ["HS256"]
+        else:
+            key = _get_jwks_client().get_signing_key_from_jwt(token).key
+            algorithms = ["RS256", "ES256"]
+
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=algorithms,
+            audience=JWT_AUDIENCE,
+            leeway=JWT_LEEWAY,
+            options={"require": ["exp", "sub"]}
+        )
+    except jwt.ExpiredSignatureError:
+        raise Exception("Platnost přístupového tokenu vypršela")
+    except jwt.PyJWTError as e:
+        raise Exception(f"Neplatný přístupový token: {str(e)}")
+
+    return claims
+
+def get_user_profile(user_id: str) -> Dict[str, Any]:
+    """
+    Získání záznamu uživatele z tabulky users (s využitím cache)
+
+    Args:
+        user_id: ID uživatele
+
+    Returns:
+        Dict obsahující záznam uživatele (kopie, kterou lze upravovat)
+
+    Raises:
+        Exception: Pokud uživatelský profil neexistuje
+    """
+    user_data = _user_cache.get(user_id)
+
+    if user_data is None:
+        user_data = _user_flight.do(user_id, lambda: _load_user_profile(user_id))
+
+    return dict(user_data)
+
+def _load_user_profile(user_id: str) -> Dict[str, Any]:
+    started = user_profile_read_started()
+    supabase = get_supabase()
+    user_response = supabase.table("users").select("*").eq("id", user_id).execute()
+
+    if not user_response.data:
+        raise Exception("Uživatelský profil nebyl nalezen")
+
+    user_data = user_response.data[0]
+    _user_invalidations.store_if_current(user_id, started, lambda: _user_cache.set(user_id, user_data))
+    return user_data
+
+def get_user_from_token(token: str) -> Dict[str, Any]:
+    """
+    Získání záznamu uživatele z tabulky users podle přístupového tokenu
+
+    Args:
+        token: Přístupový token uživatele
+
+    Returns:
+        Dict obsahující záznam uživatele
+
+    Raises:
+        Exception: Pokud token není platný nebo profil neexistuje
+    """
+    with timed("auth"):
+        claims = verify_token(token)
+        return get_user_profile(claims["sub"])
+
+def get_cached_user_profile(user_id: str) -> Optional[Dict[str, Any]]:
+    """Záznam uživatele z cache bez dotazu do databáze (None, pokud v cache není)"""
+    user_data = _user_cache.get(user_id)
+    return None if user_data is None else dict(user_data)
+
+def user_profile_read_started():
+    """Značka začátku čtení z tabulky users, pro cache_user_profile"""
+    return _user_invalidations.start()
+
+def cache_user_profile(user_data: Dict[str, Any], started) -> None:
+    """
+    Uložení čerstvě načteného záznamu z tabulky users do cache
+
+    Záznam se neuloží, pokud uživatele od started (user_profile_read_started()
+    před dotazem) někdo změnil.
+    """
+    user_id = user_data["id"]
+    user_data = dict(user_data)
+    _user_invalidations.store_if_current(user_id, started, lambda: _user_cache.set(user_id, user_data))
+
+def invalidate_user_profile(user_id: str) -> None:
+    """Odstranění záznamu uživatele z cache (volá se po každé změně v tabulce users)"""
+    _user_invalidations.invalidate(user_id)
+    _user_cache.delete(user_id)
+    _user_flight.forget(user_id)
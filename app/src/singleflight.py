@@ -0,0 +1,173 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Slučování souběžných stejných čtení (single-flight). Když o stejný klíč
+# (např. ID inzerátu) žádá víc požadavků najednou, dotaz do databáze provede
+# jen první z nich a ostatní počkají na jeho výsledek. S SINGLEFLIGHT_SHARED=1
+# a nastaveným CACHE_REDIS_URL se čtení slučují i mezi workery: první worker
+# si klíč zamkne v Redisu a výsledek tam krátce nechá pro ostatní.
+
+# Jak dlouho čekat na výsledek prvního čtení, než ho čekající provede sám (v sekundách)
+SINGLEFLIGHT_WAIT = float(os.getenv('SINGLEFLIGHT_WAIT', '5'))
+SINGLEFLIGHT_SHARED = os.getenv('SINGLEFLIGHT_SHARED', '0') == '1'
+# Jak dlouho drží výsledek v Redisu pro workery, které čekaly (v sekundách)
+SINGLEFLIGHT_RESULT_TTL = float(os.getenv('SINGLEFLIGHT_RESULT_TTL', '1'))
+
+POLL_INTERVAL = 0.01
+
+
+class _Call:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Sloučení souběžných volání se stejným klíčem v jedno
+
+    Výsledek (i výjimku) prvního volání dostanou všichni, kdo na něj čekali.
+    Nic se neukládá: jakmile volání skončí, další požadavek se stejným
+    klíčem spustí nové (ukládání řeší cache před ním).
+    """
+
+    def __init__(self, name: str, wait: float = SINGLEFLIGHT_WAIT, redis_url: Optional[str] = None):
+        self.name = name
+        self.wait = wait
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'calls': 0,
+            'executed': 0,
+            'coalesced': 0,
+            'shared_coalesced': 0,
+            'wait_timeouts': 0,
+        }
+        self._redis = None
+        self.prefix = f'realitni:flight:{name}:'
+        if redis_url and redis is not None:
+            self._redis = redis.Redis.from_url(redis_url)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._stats['calls'] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.done.wait(self.wait):
+                # První volání visí; raději vlastní dotaz než chyba
+                self._count('wait_timeouts')
+                return fn()
+            self._count('coalesced')
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = self._run(key, fn)
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                # Po forget() už pod klíčem může běžet novější volání
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def _run(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        if self._redis is None:
+            self._count('executed')
+            return fn()
+
+        lock_key = f'{self.prefix}{key}:lock'
+        result_key = f'{self.prefix}{key}:result'
+        deadline = time.monotonic() + self.wait
+        try:
+            while True:
+                raw = self._redis.get(result_key)
+                if raw is not None:
+                    self._count('shared_coalesced')
+                    return json.loads(raw)['value']
+                if self._redis.set(lock_key, os.getpid(), nx=True, px=int(self.wait * 1000)):
+                    break
+                if time.monotonic() >= deadline:
+                    self._count('wait_timeouts')
+                    self._count('executed')
+                    return fn()
+                time.sleep(POLL_INTERVAL)
+        except redis.RedisError:
+            self._count('executed')
+            return fn()
+
+        self._count('executed')
+        try:
+            value = fn()
+            try:
+                self._redis.set(result_key, json.dumps({'value': value}), px=int(SINGLEFLIGHT_RESULT_TTL * 1000))
+            except redis.RedisError:
+                pass
+            return value
+        finally:
+            try:
+                self._redis.delete(lock_key)
+            except redis.RedisError:
+                pass
+
+    def forget(self, key: Hashable) -> None:
+        """
+        Zapomenutí probíhajícího čtení a výsledku sdíleného mezi workery (po změně záznamu)
+
+        Probíhající čtení mohlo začít před změnou, další volání proto spustí
+        nové místo čekání na něj. Kdo už na něj čeká, dostane jeho výsledek.
+        """
+        with self._lock:
+            self._calls.pop(key, None)
+        if self._redis is None:
+            return
+        try:
+            self._redis.delete(f'{self.prefix}{key}:result')
+        except redis.RedisError:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, 'in_flight': len(self._calls)}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+_flights: Dict[str, SingleFlight] = {}
+
+
+def create_flight(name: str) -> SingleFlight:
+    """Single-flight pro daný druh čtení; sdílený mezi workery podle SINGLEFLIGHT_SHARED"""
+    redis_url = os.getenv('CACHE_REDIS_URL') if SINGLEFLIGHT_SHARED else None
+    flight = _flights[name] = SingleFlight(name, redis_url=redis_url)
+    return flight
+
+
+def singleflight_stats() -> Dict[str, int]:
+    """Počty volání všech single-flightů jako plochý dict (<název>_<počet>)"""
+    return {
+        f'{name}_{key}': value
+        for name, flight in _flights.items()
+        for key, value in flight.stats().items()
+    }
@@ -0,0 +1,110 @@
+import os
+import shutil
+import threading
+from typing import Optional
+
+# Úložiště souborů médií inzerátů. Lokální disk nahrazuje Supabase Storage
+# při vývoji a na serverech se sdíleným diskem; STORAGE_BACKEND=supabase
+# nahrává hotové soubory do bucketu MEDIA_BUCKET.
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'local')
+MEDIA_ROOT = os.getenv(
+    'MEDIA_ROOT',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'media')
+)
+MEDIA_URL = os.getenv('MEDIA_URL', '/media')
+MEDIA_BUCKET = os.getenv('MEDIA_BUCKET', 'property-media')
+
+# Velikost bloku při kopírování a čtení datových proudů
+COPY_BLOCK_SIZE = 1024 * 1024
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+class LocalStorage:
+    """
+    Soubory v adresáři MEDIA_ROOT, servírované pod MEDIA_URL
+
+    Soubor se do úložiště přidává pevným odkazem (na stejném disku bez
+    kopírování dat), jinak se kopíruje po blocích; pamětí nikdy neprochází celý.
+    """
+
+    def __init__(self, root: str = MEDIA_ROOT, base_url: str = MEDIA_URL):
+        self.root = root
+        self.base_url = base_url.rstrip('/')
+
+    def path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f'Neplatný klíč souboru: {key}')
+        return path
+
+    def save_file(self, local_path: str, key: str, content_type: Optional[str] = None) -> str:
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Opakované uložení stejného klíče (nové zpracování) přepíše starý soubor
+        self.delete(key)
+        try:
+            os.link(local_path, target)
+        except OSError:
+            with open(local_path, 'rb') as src, open(target, 'wb') as dst:
+                shutil.copyfileobj(src, dst, COPY_BLOCK_SIZE)
+        return self.url(key)
+
+    def url(self, key: str) -> str:
+        return f'{self.base_url}/{key}'
+
+    def delete(self, key: str) -> None:
+        path = self.path(key)
+        try:
+            os.remove(path)
+            # Prázdný adresář média po smazání posledního souboru
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass
+
+
+class SupabaseStorage:
+    """
+    Soubory v bucketu Supabase Storage
+
+    Hotový soubor se nahraje z disku jedním požadavkem.
+    """
+
+    def __init__(self, bucket: str = MEDIA_BUCKET):
+        self.bucket = bucket
+
+    def _bucket(self):
+        from src.database import get_supabase
+        return get_supabase().storage.from_(self.bucket)
+
+    def save_file(self, local_path: str, key: str, content_type: Optional[str] = None) -> str:
+        options = {'x-upsert': 'true'}
+        if content_type:
+            options['content-type'] = content_type
+        with open(local_path, 'rb') as f:
+            self._bucket().upload(key, f, options)
+        return self.url(key)
+
+    def url(self, key: str) -> str:
+        return self._bucket().get_public_url(key)
+
+    def delete(self, key: str) -> None:
+        self._bucket().remove([key])
+
+
+def get_storage():
+    """Úložiště podle STORAGE_BACKEND (vytváří se při prvním použití)"""
+    global _storage
+
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                if STORAGE_BACKEND == 'local':
+                    _storage = LocalStorage()
+                elif STORAGE_BACKEND == 'supabase':
+                    _storage = SupabaseStorage()
+                else:
+                    raise Exception(f'Neznámé úložiště médií: {STORAGE_BACKEND}')
+
+    return _storage
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Testy se spouštějí z adresáře app (python -m pytest tests), importy jako v aplikaci: from src...
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,74 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from benchmarks.fake_airtable import FakeAirtable
+from benchmarks.fake_supabase import FakeSupabase
+from src.airtable import AirtableClient
+from src.jobs import airtable_sync
+
+STARTED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+TABLE = 'credit_transactions'
+CONFIG = airtable_sync.SYNC_TABLES[TABLE]
+
+
+def transaction(minutes, id=None):
+    return {
+        'id': id or str(uuid.uuid4()),
+        'agent_id': str(uuid.UUID(int=1)),
+        'amount': 10,
+        'transaction_type': 'purchase',
+        'description': 'Nákup 10 kreditů (card)',
+        'payment_id': None,
+        'balance_after': 10,
+        'created_at': (STARTED + timedelta(minutes=minutes)).isoformat(),
+    }
+
+
+@pytest.fixture
+def airtable():
+    server = FakeAirtable(rate=1000).start()
+    yield server
+    server.stop()
+
+
+def test_changes_after_watermark(monkeypatch):
+    monkeypatch.setattr(airtable_sync, 'PAGE_SIZE', 10)
+    # Dva řádky se stejným časem jako watermark: starší id už odešlo, novější ne
+    sent = transaction(5, id=str(uuid.UUID(int=10)))
+    same_time = transaction(5, id=str(uuid.UUID(int=20)))
+    rows = [transaction(1), sent, same_time, transaction(7), transaction(9)]
+    fake = FakeSupabase(tables={TABLE: list(reversed(rows))})
+    state = {'watermark': sent['created_at'], 'last_id': sent['id']}
+    until = rows[-1]['created_at']
+
+    changes = airtable_sync._fetch_changes(fake, TABLE, CONFIG, state, until)
+
+    # Vzestupně podle (created_at, id), bez řádků mladších než until
+    assert [row['id'] for row in changes] == [same_time['id'], rows[3]['id']]
+    assert set(changes[0]) == set(CONFIG['fields'])
+
+
+def test_sync_sends_each_row_once(airtable, monkeypatch):
+    monkeypatch.setattr(airtable_sync, 'PAGE_SIZE', 3)
+    rows = [transaction(minutes) for minutes in range(8)]
+    # Právě zapsaný řádek čeká, až bude starší než AIRTABLE_SYNC_LAG
+    recent = {**transaction(0), 'created_at': datetime.now(timezone.utc).isoformat()}
+    fake = FakeSupabase(tables={TABLE: rows + [recent], 'airtable_sync_state': []})
+    client = AirtableClient('appTEST', 'key', api_url=airtable.url)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert airtable_sync.sync_table(TABLE, client, executor, fake) == len(rows)
+        assert airtable_sync.sync_table(TABLE, client, executor, fake) == 0
+
+        added = transaction(60)
+        fake.tables[TABLE].append(added)
+        assert airtable_sync.sync_table(TABLE, client, executor, fake) == 1
+
+    records = airtable.records('appTEST', CONFIG['airtable_table'])
+    assert sorted(record['fields']['id'] for record in records) == sorted(row['id'] for row in rows + [added])
+    state = fake.tables['airtable_sync_state'][0]
+    assert (state['watermark'], state['last_id']) == (added['created_at'], added['id'])
+    assert state['rows_synced'] == len(rows) + 1
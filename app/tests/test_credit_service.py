@@ -0,0 +1,33 @@
+import uuid
+
+import pytest
+
+from benchmarks.fake_supabase import FakeSupabase, credit_functions
+from src.services import credit_service
+
+
+@pytest.fixture
+def agent_id(monkeypatch):
+    agent_id = str(uuid.uuid4())
+    fake = FakeSupabase(tables={'agent_credits': [], 'credit_transactions': []}, functions=credit_functions())
+    monkeypatch.setattr(credit_service, 'get_supabase', lambda: fake)
+    monkeypatch.setattr(credit_service, 'get_user_from_token', lambda token: {'id': agent_id, 'user_type': 'agent'})
+    return agent_id
+
+
+def test_replay_returns_stored_purchase(agent_id):
+    first = credit_service.purchase_credits('token', 10, 'card', idempotency_key='abc')
+    second = credit_service.purchase_credits('token', 10, 'card', idempotency_key='abc')
+
+    assert second['transaction_id'] == first['transaction_id']
+    assert second['amount'] == 10
+    assert second['total_price'] == 10 * credit_service.CREDIT_PRICE
+    assert second['balance'] == 10
+
+
+def test_replay_with_different_amount_is_rejected(agent_id):
+    credit_service.purchase_credits('token', 10, 'card', idempotency_key='abc')
+
+    with pytest.raises(ValueError, match='jiného počtu kreditů'):
+        credit_service.purchase_credits('token', 20, 'card', idempotency_key='abc')
+    assert credit_service.purchase_credits('token', 20, 'card', idempotency_key='def')['balance'] == 30
@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+from flask import Flask, jsonify, request, session
+
+from src import idempotency
+from src.idempotency import LocalIdempotencyStore, idempotent
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(idempotency, 'verify_token', lambda token: {'sub': token})
+    monkeypatch.setattr(idempotency, '_store', LocalIdempotencyStore())
+
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.calls = []
+
+    @app.route('/login/<user>', methods=['POST'])
+    def login(user):
+        session['token'] = user
+        return '', 204
+
+    @app.route('/purchase', methods=['POST'])
+    @idempotent('purchase')
+    def purchase():
+        body = request.get_json()
+        app.calls.append(body)
+        if body.get('fail'):
+            return jsonify({'status': 'error'}), 400
+        return jsonify({'status': 'success', 'call': len(app.calls)}), 201
+
+    return app
+
+
+def client_for(app, user='agent-1'):
+    client = app.test_client()
+    client.post(f'/login/{user}')
+    return client
+
+
+def test_replay_returns_stored_response(app):
+    client = client_for(app)
+    headers = {'Idempotency-Key': 'abc'}
+
+    first = client.post('/purchase', json={'amount': 10}, headers=headers)
+    second = client.post('/purchase', json={'amount': 10}, headers=headers)
+
+    assert first.status_code == second.status_code == 201
+    assert second.get_json() == first.get_json()
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert 'Idempotent-Replayed' not in first.headers
+    assert len(app.calls) == 1
+
+
+def test_same_key_with_different_body_is_rejected(app):
+    client = client_for(app)
+    headers = {'Idempotency-Key': 'abc'}
+
+    client.post('/purchase', json={'amount': 10}, headers=headers)
+    response = client.post('/purchase', json={'amount': 20}, headers=headers)
+
+    assert response.status_code == 422
+    assert len(app.calls) == 1
+
+
+def test_keys_are_per_user(app):
+    headers = {'Idempotency-Key': 'abc'}
+
+    client_for(app, 'agent-1').post('/purchase', json={'amount': 10}, headers=headers)
+    response = client_for(app, 'agent-2').post('/purchase', json={'amount': 10}, headers=headers)
+
+    assert response.status_code == 201
+    assert 'Idempotent-Replayed' not in response.headers
+    assert len(app.calls) == 2
+
+
+def test_failed_request_is_not_stored(app):
+    client = client_for(app)
+    headers = {'Idempotency-Key': 'abc'}
+
+    assert client.post('/purchase', json={'fail': True}, headers=headers).status_code == 400
+    assert client.post('/purchase', json={'fail': True}, headers=headers).status_code == 400
+    assert len(app.calls) == 2
+
+
+def test_invalid_key_is_rejected(app):
+    response = client_for(app).post('/purchase', json={}, headers={'Idempotency-Key': ' '})
+
+    assert response.status_code == 400
+    assert app.calls == []
+
+
+def test_retry_waits_for_running_request():
+    store = LocalIdempotencyStore()
+
+    assert store.begin('key', 'body', wait=0) is None
+    entry = store.begin('key', 'body', wait=0.05)
+    assert entry['state'] == idempotency.PENDING
+
+    # Opakování čekající na první požadavek dostane jeho uloženou odpověď
+    result = {}
+    waiter = threading.Thread(target=lambda: result.update(entry=store.begin('key', 'body', wait=5)))
+    waiter.start()
+    store.finish('key', {'state': idempotency.DONE, 'fingerprint': 'body', 'status': 201})
+    waiter.join(5)
+    assert result['entry']['state'] == idempotency.DONE
+
+
+def test_missing_redis_package_fails_at_startup(monkeypatch):
+    monkeypatch.setenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    monkeypatch.setattr(idempotency, 'redis', None)
+
+    with pytest.raises(Exception, match='redis'):
+        idempotency.init_app(Flask(__name__))
+    with pytest.raises(Exception, match='redis'):
+        idempotency.create_store()
@@ -0,0 +1,57 @@
+import os
+import time
+import uuid
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+from benchmarks.fake_supabase import FakeSupabase
+from src import database
+from src.services import media_service
+
+
+def make_stale(path, age):
+    stale = time.time() - age
+    os.utime(path, (stale, stale))
+
+
+def test_cleanup_removes_stale_uploads_and_work_dirs(tmp_path, monkeypatch):
+    fake = FakeSupabase(tables={'property_media': []})
+    monkeypatch.setattr(media_service, 'MEDIA_UPLOAD_DIR', str(tmp_path))
+    monkeypatch.setattr(media_service, '_last_cleanup', 0.0)
+    # Mimo požadavek si úklid půjčí klienta z poolu
+    monkeypatch.setattr(database, 'get_pool', lambda: SimpleNamespace(client=lambda: nullcontext(fake)))
+
+    stale_upload, fresh_upload = str(uuid.uuid4()), str(uuid.uuid4())
+    for upload_id in (stale_upload, fresh_upload):
+        for suffix in ('.json', '.part'):
+            (tmp_path / f'{upload_id}{suffix}').write_bytes(b'')
+    make_stale(tmp_path / f'{stale_upload}.part', 2 * 3600)
+
+    stale_media, fresh_media = str(uuid.uuid4()), str(uuid.uuid4())
+    fake.tables['property_media'] = [
+        {'id': stale_media, 'processing_status': 'processing'},
+        {'id': fresh_media, 'processing_status': 'processing'},
+    ]
+    for media_id in (stale_media, fresh_media):
+        work_dir = tmp_path / f'media-{media_id}'
+        work_dir.mkdir()
+        (work_dir / 'original.jpg').write_bytes(b'data')
+    make_stale(tmp_path / f'media-{stale_media}', 2 * 3600)
+
+    assert media_service.cleanup_stale_uploads(max_age=3600) == 2
+
+    assert sorted(os.listdir(tmp_path)) == sorted([f'{fresh_upload}.json', f'{fresh_upload}.part', f'media-{fresh_media}'])
+    statuses = {row['id']: row['processing_status'] for row in fake.tables['property_media']}
+    assert statuses == {stale_media: 'failed', fresh_media: 'processing'}
+
+
+def test_cleanup_runs_at_most_once_an_hour(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_service, 'MEDIA_UPLOAD_DIR', str(tmp_path))
+    monkeypatch.setattr(media_service, '_last_cleanup', time.time())
+
+    upload_id = str(uuid.uuid4())
+    (tmp_path / f'{upload_id}.part').write_bytes(b'')
+    make_stale(tmp_path / f'{upload_id}.part', 2 * 3600)
+
+    assert media_service.cleanup_stale_uploads(max_age=3600) == 0
+    assert os.listdir(tmp_path) == [f'{upload_id}.part']
@@ -0,0 +1,44 @@
+import time
+
+from flask import Flask, Response, stream_with_context
+
+from src import metrics
+
+
+def create_app():
+    app = Flask(__name__)
+    metrics.init_app(app)
+
+    @app.route('/export')
+    def export():
+        def generate():
+            # Čtení z databáze po dávkách až během odesílání těla
+            for batch in range(3):
+                time.sleep(0.02)
+                metrics.record_supabase_call('test_export', 'select', 0.02, 100)
+                yield f'{batch}\n'
+        return Response(stream_with_context(generate()), mimetype='text/plain')
+
+    return app
+
+
+def observed(histogram, labels):
+    _, total, count = histogram._values.get(labels, [None, 0.0, 0])
+    return total, count
+
+
+def test_streamed_response_is_recorded_after_body(monkeypatch):
+    labels = ('', 'export', 'GET')
+    for histogram in (metrics.request_duration, metrics.supabase_request_calls):
+        monkeypatch.setitem(histogram._values, labels, [[0] * (len(histogram.buckets) + 1), 0.0, 0])
+
+    response = create_app().test_client().get('/export', buffered=False)
+    assert observed(metrics.request_duration, labels)[1] == 0
+    assert 'Server-Timing' in response.headers
+
+    assert response.get_data() == b'0\n1\n2\n'
+    response.close()
+
+    total, count = observed(metrics.request_duration, labels)
+    assert count == 1 and total >= 0.06
+    assert observed(metrics.supabase_request_calls, labels) == (3, 1)
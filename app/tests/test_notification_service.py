@@ -0,0 +1,44 @@
+import uuid
+
+from benchmarks.fake_supabase import FakeSupabase
+from src.notifications import InterestIndex
+from src.services import notification_service
+
+
+def replace_agent_interests(client, p_agent_id, p_interests):
+    # Stejné chování jako funkce z migrace 014
+    table = client.tables.setdefault('agent_interests', [])
+    wanted = {(interest['city'], interest['property_type']) for interest in p_interests}
+    removed = [row for row in table if row['agent_id'] == p_agent_id and (row['city'], row['property_type']) not in wanted]
+    table[:] = [row for row in table if row not in removed]
+    existing = {(row['city'], row['property_type']) for row in table if row['agent_id'] == p_agent_id}
+    for interest in p_interests:
+        if (interest['city'], interest['property_type']) not in existing:
+            table.append({'id': str(uuid.uuid4()), 'agent_id': p_agent_id, **interest})
+    return {
+        'removed': [row['id'] for row in removed],
+        'interests': [row for row in table if row['agent_id'] == p_agent_id],
+    }
+
+
+def test_set_interests_replaces_in_one_call(monkeypatch):
+    agent_id = str(uuid.uuid4())
+    fake = FakeSupabase(functions={'replace_agent_interests': replace_agent_interests})
+    index = InterestIndex()
+    monkeypatch.setattr(notification_service, 'get_supabase', lambda: fake)
+    monkeypatch.setattr(notification_service, 'get_agent_from_token', lambda token: {'id': agent_id})
+    monkeypatch.setattr(notification_service, 'interest_index', index)
+
+    first = notification_service.set_agent_interests('token', [{'city': 'Brno'}, {'city': 'Praha', 'property_type': 'byt'}])
+    kept = next(row for row in first if row['city'] == 'Brno')
+
+    fake.reset_calls()
+    second = notification_service.set_agent_interests('token', [{'city': 'Brno'}, {'property_type': 'dům'}])
+
+    assert fake.calls == {'rpc:replace_agent_interests': 1}
+    assert {(row['city'], row['property_type']) for row in second} == {('Brno', None), (None, 'dům')}
+    # Ponechaný zájem si drží id, vypuštěný zmizí i z indexu
+    assert kept['id'] in {row['id'] for row in second}
+    assert len(index) == 2
+    assert index.match({'city': 'Praha', 'property_type': 'byt'}) == set()
+    assert index.match({'city': 'Ostrava', 'property_type': 'dům'}) == {agent_id}
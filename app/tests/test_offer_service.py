@@ -0,0 +1,74 @@
+import pytest
+
+from src.services.offer_service import OFFER_METRICS, OFFER_STATUSES, build_offer_stats, validate_offer
+
+OFFER = {
+    'property_id': 'c0a80121-0000-4000-8000-000000000001',
+    'commission_percentage': 3.5,
+    'commission_amount': 150000,
+    'price_estimate_min': 4000000,
+    'price_estimate_max': 4500000,
+}
+
+
+def test_stats_without_offers():
+    stats = build_offer_stats(None)
+
+    assert stats['offer_count'] == 0
+    assert stats['by_status'] == {status: 0 for status in OFFER_STATUSES}
+    assert all(stats[metric] == {'min': None, 'median': None, 'max': None} for metric in OFFER_METRICS)
+    assert stats['updated_at'] is None
+
+
+def test_stats_from_row():
+    row = {
+        'property_id': OFFER['property_id'],
+        'offer_count': 3,
+        'pending_count': 2,
+        'approved_count': 1,
+        'rejected_count': 0,
+        'commission_percentage_min': 2.5,
+        'commission_percentage_median': 3.0,
+        'commission_percentage_max': 4.0,
+        'updated_at': '2024-01-01T00:00:00+00:00',
+    }
+
+    stats = build_offer_stats(row)
+
+    assert stats['offer_count'] == 3
+    assert stats['by_status'] == {'pending': 2, 'approved': 1, 'rejected': 0}
+    assert stats['commission_percentage'] == {'min': 2.5, 'median': 3.0, 'max': 4.0}
+    assert stats['commission_amount'] == {'min': None, 'median': None, 'max': None}
+    assert stats['updated_at'] == row['updated_at']
+
+
+def test_valid_offer():
+    clean = validate_offer({**OFFER, 'commission_amount': 150000.0, 'included_services': 'Fotografie'})
+
+    assert clean == {**OFFER, 'included_services': 'Fotografie'}
+    assert isinstance(clean['commission_amount'], int)
+
+
+@pytest.mark.parametrize('data, message', [
+    ([], 'musí být objekt'),
+    ({**OFFER, 'status': 'approved'}, 'Neznámá nebo neměnná pole: status'),
+    ({key: value for key, value in OFFER.items() if key != 'commission_amount'}, 'Chybí povinné pole: commission_amount'),
+    ({**OFFER, 'commission_amount': -1}, 'nezáporné číslo'),
+    ({**OFFER, 'commission_amount': True}, 'nezáporné číslo'),
+    ({**OFFER, 'commission_amount': '150000'}, 'nezáporné číslo'),
+    ({**OFFER, 'price_estimate_min': 4000000.5}, 'celé číslo'),
+    ({**OFFER, 'commission_percentage': 101}, 'nejvýše 100'),
+    ({**OFFER, 'price_estimate_min': 5000000}, 'Minimální odhad ceny je vyšší než maximální'),
+])
+def test_invalid_offer(data, message):
+    with pytest.raises(ValueError, match=message):
+        validate_offer(data)
+
+
+def test_update_is_checked_against_current_offer():
+    # Při úpravě stačí měněná pole, kontroluje se ale výsledek po sloučení
+    assert validate_offer({'price_estimate_max': 5000000}, current=OFFER) == {'price_estimate_max': 5000000}
+    with pytest.raises(ValueError, match='Minimální odhad ceny je vyšší než maximální'):
+        validate_offer({'price_estimate_max': 3000000}, current=OFFER)
+    with pytest.raises(ValueError, match='Neznámá nebo neměnná pole: property_id'):
+        validate_offer({'property_id': OFFER['property_id']}, current=OFFER)
@@ -0,0 +1,83 @@
+import base64
+import json
+import uuid
+
+import pytest
+
+from src.pagination import PageStream, apply_keyset, decode_cursor, encode_cursor, paginate
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+class RecordingQuery:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return call
+
+
+def test_cursor_round_trip():
+    row = {'created_at': '2024-05-01T10:00:00.123456+00:00', 'id': str(uuid.uuid4())}
+    assert decode_cursor(encode_cursor(row)) == (row['created_at'], row['id'])
+
+
+def test_cursor_normalizes_uuid():
+    id = uuid.uuid4()
+    assert decode_cursor(raw_cursor(['2024-05-01T10:00:00+00:00', str(id).upper()]))[1] == str(id)
+
+
+@pytest.mark.parametrize('cursor', [
+    'není base64!',
+    raw_cursor('jen text'),
+    raw_cursor(['2024-05-01T10:00:00+00:00']),
+    raw_cursor([1714557600, str(uuid.uuid4())]),
+    raw_cursor(['2024-05-01T10:00:00+00:00', 42]),
+    raw_cursor(['2024-05-01T10:00:00+00:00', None]),
+    raw_cursor(['2024-05-01T10:00:00+00:00', 'x)),status.eq.sold']),
+    raw_cursor(['2024-05-01",status.neq."x', str(uuid.uuid4())]),
+    raw_cursor(['zítra', str(uuid.uuid4())]),
+])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match='Neplatný kurzor'):
+        decode_cursor(cursor)
+
+
+def test_apply_keyset_filters_after_cursor():
+    row = {'created_at': '2024-05-01T10:00:00+00:00', 'id': str(uuid.uuid4())}
+    query = apply_keyset(RecordingQuery(), encode_cursor(row), 20)
+
+    name, args, _ = query.calls[0]
+    assert name == 'or_'
+    assert args[0] == f'created_at.lt."{row["created_at"]}",and(created_at.eq."{row["created_at"]}",id.lt.{row["id"]})'
+    assert query.calls[-1] == ('limit', (21,), {})
+
+
+def test_paginate_returns_cursor_of_last_row_when_more_exist():
+    rows = [{'created_at': f'2024-05-0{day}T00:00:00+00:00', 'id': str(uuid.uuid4())} for day in (3, 2, 1)]
+
+    page, cursor = paginate(rows, 2)
+
+    assert page == rows[:2]
+    assert decode_cursor(cursor) == (rows[1]['created_at'], rows[1]['id'])
+    assert paginate(rows[:2], 2) == (rows[:2], None)
+
+
+def test_page_stream_reads_in_batches_up_to_limit():
+    calls = []
+
+    def fetch(cursor, limit):
+        calls.append((cursor, limit))
+        start = int(cursor or 0)
+        return list(range(start, start + limit)), str(start + limit)
+
+    page = PageStream(fetch, None, 5, 2)
+
+    assert list(page) == [0, 1, 2, 3, 4]
+    assert calls == [(None, 2), ('2', 2), ('4', 1)]
+    assert page.next_cursor == '5'
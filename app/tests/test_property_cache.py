@@ -0,0 +1,75 @@
+import uuid
+
+import pytest
+
+from benchmarks.fake_supabase import FakeSupabase
+from src import cache
+from src.cache import InvalidationLog
+from src.services import property_service
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    property_id = str(uuid.uuid4())
+    fake = FakeSupabase(tables={'properties': [
+        {'id': property_id, 'city': 'Brno', 'created_at': '2024-01-01T00:00:00+00:00', 'updated_at': None}
+    ]})
+    monkeypatch.setattr(property_service, 'supabase', fake)
+    monkeypatch.setattr(property_service, 'index_properties', lambda rows: None)
+    property_service._property_cache.clear()
+    yield fake, property_id
+    property_service._property_cache.clear()
+
+
+def test_read_is_cached(fake):
+    client, property_id = fake
+
+    first, etag = property_service.get_property_with_etag(property_id)
+    client.reset_calls()
+    second, cached_etag = property_service.get_property_with_etag(property_id)
+
+    assert second == first and cached_etag == etag
+    assert client.call_count == 0
+
+
+def test_update_invalidates_cache(fake):
+    _, property_id = fake
+
+    _, etag = property_service.get_property_with_etag(property_id)
+    property_service.update_property(property_id, {'description': 'Nový popis'})
+    row, new_etag = property_service.get_property_with_etag(property_id)
+
+    assert row['description'] == 'Nový popis'
+    assert new_etag != etag
+
+
+def test_read_started_before_update_is_not_cached(fake):
+    _, property_id = fake
+
+    # Čtení přečte starý řádek, pak proběhne změna a teprve potom zápis do cache
+    generation = property_service.property_generation(property_id)
+    stale = property_service.supabase.table('properties').select('*').eq('id', property_id).execute().data[0]
+    property_service.update_property(property_id, {'description': 'Nový popis'})
+    property_service.cache_property(stale, generation)
+
+    assert property_service.get_cached_property(property_id) is None
+    row, _ = property_service.get_property_with_etag(property_id)
+    assert row['description'] == 'Nový popis'
+
+
+def test_invalidations_are_forgotten_after_horizon(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    log = InvalidationLog(horizon=30)
+    started = log.start()
+
+    for id in range(1000):
+        log.invalidate(str(id))
+    assert not log.store_if_current('1', started, lambda: None)
+    assert log.store_if_current('1', log.start(), lambda: None)
+
+    # Log neroste s počtem změněných inzerátů; čtení delší než horizon se nezapíše
+    now[0] += 31
+    log.invalidate('last')
+    assert len(log) == 1
+    assert not log.store_if_current('1', started, lambda: None)
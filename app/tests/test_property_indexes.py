@@ -0,0 +1,219 @@
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from benchmarks.fake_supabase import FakeSupabase
+from src.geo_index import GeoIndex
+from src.geocoding import distance_km
+from src.indexing import rebuild_indexes
+from src.listing_index import FACET_FIELDS, ListingIndex
+from src.search_index import SEARCH_FIELDS, SearchIndex, tokenize
+from src.services import property_service
+
+CITIES = ['Brno', 'Praha', 'Ostrava', 'České Budějovice']
+TYPES = ['byt', 'dům', 'pozemek']
+STATUSES = ['active', 'active', 'active', 'inactive', 'sold']
+WORDS = ['balkon', 'balkony', 'sklep', 'garáž', 'zahrada', 'terasa', 'výtah', 'krb', 'půda']
+STARTED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def build_rows(count=300, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        created_at = (STARTED + timedelta(minutes=rng.randint(0, count // 2))).isoformat()
+        city = rng.choice(CITIES)
+        rows.append({
+            'id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'property_type': rng.choice(TYPES),
+            'description': ' '.join(rng.sample(WORDS, rng.randint(1, 4))),
+            'street': rng.choice(['Masarykova', 'Husova', 'Nádražní']),
+            'city': city,
+            'municipality': city,
+            'cadastral_area': rng.choice(['Střed', 'Sever', 'Jih']),
+            'created_at': created_at,
+            'updated_at': created_at,
+            'status': rng.choice(STATUSES),
+            'latitude': 49.0 + rng.random() if rng.random() < 0.8 else None,
+            'longitude': 16.0 + rng.random() if rng.random() < 0.8 else None,
+        })
+    return rows
+
+
+def newest_first(rows):
+    return sorted(rows, key=lambda row: (row['created_at'], row['id']), reverse=True)
+
+
+@pytest.fixture(scope='module')
+def rows():
+    return build_rows()
+
+
+@pytest.fixture(scope='module')
+def indexes(rows):
+    listing, search, geo = ListingIndex(), SearchIndex(), GeoIndex()
+    assert rebuild_indexes([listing, search, geo], iter(rows)) == [len(listing), len(search), len(geo)]
+    return listing, search, geo
+
+
+def test_single_scan_builds_every_index(rows, indexes):
+    listing, search, geo = indexes
+    active = [row for row in rows if row['status'] == 'active']
+
+    assert len(listing) == len(active)
+    assert len(search) == len(active)
+    assert len(geo) == sum(1 for row in rows if row['latitude'] is not None and row['longitude'] is not None)
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'city': 'Brno'},
+    {'city': 'Praha', 'property_type': 'byt'},
+    {'municipality': 'Ostrava', 'cadastral_area': 'Jih', 'property_type': 'dům'},
+    {'city': 'Plzeň'},
+])
+def test_listing_matches_brute_force(rows, indexes, filters):
+    listing, _, _ = indexes
+    expected = newest_first([
+        row for row in rows
+        if row['status'] == 'active' and all(row[field] == value for field, value in filters.items())
+    ])
+
+    # Po stránkách s kurzorem (created_at, id) jako keyset v databázi
+    found, after = [], None
+    while True:
+        page, has_more = listing.search(filters, after=after, limit=7)
+        found.extend(page)
+        if not has_more:
+            break
+        after = (page[-1]['created_at'], page[-1]['id'])
+
+    assert [row['id'] for row in found] == [row['id'] for row in expected]
+
+
+def test_facet_counts_match_brute_force(rows, indexes):
+    listing, _, _ = indexes
+    filters = {'city': 'Brno'}
+    counts = listing.facet_counts(filters)
+
+    for facet in FACET_FIELDS:
+        expected = {}
+        for row in rows:
+            others = all(row[field] == value for field, value in filters.items() if field != facet)
+            if row['status'] == 'active' and others:
+                expected[row[facet]] = expected.get(row[facet], 0) + 1
+        assert counts[facet] == expected
+
+
+def brute_force_search(rows, query):
+    tokens = list(dict.fromkeys(tokenize(query)))
+    documents = {
+        row['id']: [token for field in SEARCH_FIELDS for token in tokenize(row.get(field))]
+        for row in rows if row['status'] == 'active'
+    }
+    vocabulary = {token for document in documents.values() for token in document}
+
+    def matches(document, token, last):
+        # Přesná shoda, u posledního slova a slov bez přesné shody i prefix
+        if token in document:
+            return True
+        return (last or token not in vocabulary) and any(word.startswith(token) for word in document)
+
+    return {
+        id for id, document in documents.items()
+        if all(matches(document, token, position == len(tokens) - 1) for position, token in enumerate(tokens))
+    }
+
+
+@pytest.mark.parametrize('query', ['balkon', 'balk', 'garaz', 'sklep terasa', 'brno vytah', 'ceske bud', 'xyz'])
+def test_search_matches_brute_force(rows, indexes, query):
+    _, search, _ = indexes
+    found, has_more = search.search(query, limit=len(rows))
+
+    assert not has_more
+    assert {row['id'] for row in found} == brute_force_search(rows, query)
+
+
+@pytest.mark.parametrize('radius_km', [5.0, 20.0, 80.0])
+def test_geo_matches_brute_force(rows, indexes, radius_km):
+    _, _, geo = indexes
+    center = (49.5, 16.5)
+    expected = sorted(
+        (distance_km(center, (row['latitude'], row['longitude'])), row['id'])
+        for row in rows
+        if row['status'] == 'active' and row['latitude'] is not None and row['longitude'] is not None
+        and distance_km(center, (row['latitude'], row['longitude'])) <= radius_km
+    )
+
+    found, has_more = geo.within_radius(
+        center, radius_km, limit=len(rows), where=lambda row: row.get('status') == 'active'
+    )
+
+    assert not has_more
+    assert sorted(row['id'] for row, _ in found) == sorted(id for _, id in expected)
+    assert [distance for _, distance in found] == pytest.approx([distance for distance, _ in expected])
+
+
+def test_refresh_applies_changes_since_last_read(monkeypatch):
+    rows = build_rows(count=40, seed=3)
+    fake = FakeSupabase(tables={'properties': [dict(row) for row in rows]})
+    listing, search, geo = ListingIndex(), SearchIndex(), GeoIndex()
+    monkeypatch.setattr(property_service, 'supabase', fake)
+    monkeypatch.setattr(property_service, 'listing_index', listing)
+    monkeypatch.setattr(property_service, 'search_index', search)
+    monkeypatch.setattr(property_service, 'geo_index', geo)
+    monkeypatch.setattr(property_service, 'PROPERTY_INDEXES', {'listing': listing, 'search': search, 'geo': geo})
+    monkeypatch.setattr(property_service, 'LISTING_INDEX_LAG', 0)
+
+    since = property_service.rebuild_property_indexes()
+    assert since == max(row['updated_at'] for row in rows)
+
+    # Jiný worker mezitím jeden inzerát stáhl a jeden přidal
+    later = (datetime.fromisoformat(since) + timedelta(minutes=5)).isoformat()
+    withdrawn = next(row for row in fake.tables['properties'] if row['status'] == 'active')
+    withdrawn.update({'status': 'sold', 'updated_at': later})
+    added = {**rows[0], 'id': str(uuid.uuid4()), 'status': 'active', 'description': 'krb', 'updated_at': later}
+    fake.tables['properties'].append(added)
+
+    assert property_service.refresh_property_indexes(since) == later
+    assert withdrawn['id'] not in listing and withdrawn['id'] not in search
+    assert added['id'] in listing and added['id'] in search
+
+    # Bez dalších změn se nic nepřečte znovu
+    assert list(property_service.fetch_property_changes(later)) == []
+    assert property_service.refresh_property_indexes(later) == later
+    active = [row for row in fake.tables['properties'] if row['status'] == 'active']
+    assert len(listing) == len(active)
+
+
+def test_changes_are_read_in_keyset_pages(monkeypatch):
+    rows = build_rows(count=40, seed=5)
+    monkeypatch.setattr(property_service, 'supabase', FakeSupabase(tables={'properties': rows}))
+    since = sorted(row['updated_at'] for row in rows)[10]
+
+    changes = list(property_service.fetch_property_changes(since, page_size=7))
+
+    expected = sorted((row for row in rows if row['updated_at'] > since), key=lambda row: (row['updated_at'], row['id']))
+    assert [row['id'] for row in changes] == [row['id'] for row in expected]
+
+
+def test_nearby_fallback_reads_newest_rows_and_reports_truncation(monkeypatch):
+    rows = [row for row in build_rows(count=60, seed=11) if row['status'] == 'active' and row['latitude'] is not None and row['longitude'] is not None]
+    fake = FakeSupabase(tables={'properties': rows})
+    monkeypatch.setattr(property_service, 'supabase', fake)
+    monkeypatch.setattr(property_service, 'geo_index', GeoIndex())
+    monkeypatch.setattr(property_service, 'NEARBY_FALLBACK_ROWS', 10)
+    bbox = (49.0, 16.0, 50.0, 17.0)
+
+    found, has_more, truncated = property_service.find_nearby_properties(None, bbox=bbox, limit=len(rows))
+
+    # Bez indexu se z obdélníku přečte jen NEARBY_FALLBACK_ROWS nejnovějších řádků a odpověď to přizná
+    assert truncated and not has_more
+    assert {row['id'] for row in found} == {row['id'] for row in newest_first(rows)[:10]}
+
+    monkeypatch.setattr(property_service, 'NEARBY_FALLBACK_ROWS', len(rows))
+    found, _, truncated = property_service.find_nearby_properties(None, bbox=bbox, limit=len(rows))
+    assert not truncated
+    assert len(found) == len(rows)
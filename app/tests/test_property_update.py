@@ -0,0 +1,41 @@
+import uuid
+
+import pytest
+
+from benchmarks.fake_supabase import FakeSupabase
+from src.geocoding import lookup
+from src.services import property_service
+
+
+@pytest.fixture
+def update(monkeypatch):
+    fake = FakeSupabase(tables={'properties': []})
+    monkeypatch.setattr(property_service, 'supabase', fake)
+    monkeypatch.setattr(property_service, 'index_properties', lambda rows: None)
+
+    def update(row, data):
+        row = {'id': str(uuid.uuid4()), 'postal_code': None, 'municipality': None, 'latitude': 1.0, 'longitude': 2.0, **row}
+        fake.tables['properties'].append(row)
+        return property_service.update_property(row['id'], data)[0]
+
+    return update
+
+
+def test_city_only_update_keeps_stored_postal_code(update):
+    # Samotné nové město se geokóduje spolu s uloženým PSČ, ne samo o sobě
+    row = update({'postal_code': '602 00', 'city': 'Brno'}, {'city': 'Brno-střed'})
+
+    assert (row['latitude'], row['longitude']) == lookup('60200')
+
+
+def test_city_only_update_geocodes_new_city(update):
+    row = update({'city': 'Brno'}, {'city': 'Praha'})
+
+    assert (row['latitude'], row['longitude']) == lookup(municipality='Praha')
+
+
+def test_unknown_address_keeps_coordinates(update):
+    row = update({'city': 'Brno'}, {'city': 'Neznámá obec'})
+
+    assert row['city'] == 'Neznámá obec'
+    assert (row['latitude'], row['longitude']) == (1.0, 2.0)
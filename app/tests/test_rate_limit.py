@@ -0,0 +1,122 @@
+import mmap
+import os
+
+import pytest
+from flask import Flask
+
+from src import rate_limit
+from src.rate_limit import LimiterState, bucket_key, request_limits
+
+
+def test_bucket_allows_burst_then_denies():
+    state = LimiterState(None)
+    limits = [(bucket_key('endpoint', 'user'), 1.0, 3.0)]
+
+    assert [state.take(limits, 100.0) for _ in range(3)] == [0, 0, 0]
+    assert state.take(limits, 100.0) == pytest.approx(1.0)
+
+
+def test_bucket_refills_over_time():
+    state = LimiterState(None)
+    limits = [(bucket_key('endpoint', 'user'), 2.0, 2.0)]
+
+    state.take(limits, 100.0)
+    state.take(limits, 100.0)
+    assert state.take(limits, 100.0) == pytest.approx(0.5)
+
+    # Za 0,5 s přibude jeden token, víc než zásobník se nenaplní
+    assert state.take(limits, 100.5) == 0
+    assert state.take(limits, 100.5) > 0
+    assert state.take(limits, 1000.0) == 0
+    assert state.take(limits, 1000.0) == 0
+    assert state.take(limits, 1000.0) > 0
+
+
+def test_denied_request_takes_no_tokens():
+    state = LimiterState(None)
+    user = (bucket_key('endpoint', 'user'), 1.0, 1.0)
+    total = (bucket_key('endpoint', '*'), 1.0, 2.0)
+
+    assert state.take([user, total], 100.0) == 0
+    assert state.take([user, total], 100.0) > 0
+    # Celkový bucket si odmítnutý požadavek nezapočetl
+    other = (bucket_key('endpoint', 'other'), 1.0, 1.0)
+    assert state.take([other, total], 100.0) == 0
+
+
+def test_buckets_are_separate():
+    state = LimiterState(None)
+    first = [(bucket_key('endpoint', 'first'), 1.0, 1.0)]
+    second = [(bucket_key('endpoint', 'second'), 1.0, 1.0)]
+
+    assert state.take(first, 100.0) == 0
+    assert state.take(first, 100.0) > 0
+    assert state.take(second, 100.0) == 0
+
+
+def test_shared_file_is_shared_between_states(tmp_path):
+    path = str(tmp_path / 'rate_limit.shm')
+    limits = [(bucket_key('endpoint', 'user'), 1.0, 1.0)]
+
+    first = LimiterState(path, buckets=64)
+    second = LimiterState(path, buckets=64)
+
+    assert first.take(limits, 100.0) == 0
+    assert second.take(limits, 100.0) > 0
+
+
+def test_wrong_size_file_is_replaced_not_truncated(tmp_path):
+    path = str(tmp_path / 'rate_limit.shm')
+    old = LimiterState(path, buckets=128)
+    old_inode = os.stat(path).st_ino
+
+    new = LimiterState(path, buckets=64)
+
+    assert os.path.getsize(path) == new.size
+    assert os.stat(path).st_ino != old_inode
+    # Původní mapování zůstalo celé a dál funguje
+    assert os.fstat(old._file.fileno()).st_size == old.size
+    assert old.take([(bucket_key('endpoint', 'user'), 1.0, 1.0)], 100.0) == 0
+    assert isinstance(new._buffer, mmap.mmap)
+
+
+def test_anonymous_limit_uses_remote_address_by_default():
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    endpoint = 'properties.get_properties_route'
+
+    with app.test_request_context('/', environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+        limits = request_limits(endpoint)
+
+    assert rate_limit.RATE_LIMIT_ANONYMOUS
+    assert [key for key, _, _ in limits] == [bucket_key(endpoint, 'ip:10.0.0.1'), bucket_key(endpoint, '*')]
+
+
+def test_anonymous_limit_can_be_disabled(monkeypatch):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    monkeypatch.setattr(rate_limit, 'RATE_LIMIT_ANONYMOUS', False)
+
+    with app.test_request_context('/'):
+        limits = request_limits('properties.get_properties_route')
+
+    assert [key for key, _, _ in limits] == [bucket_key('properties.get_properties_route', '*')]
+
+
+def test_anonymous_limit_uses_forwarded_address(monkeypatch):
+    monkeypatch.setattr(rate_limit, 'RATE_LIMIT_ANONYMOUS', True)
+    monkeypatch.setattr(rate_limit, 'RATE_LIMIT_TRUSTED_PROXIES', 1)
+    monkeypatch.setattr(rate_limit, 'SUPABASE_MAX_CONCURRENCY', 0)
+    monkeypatch.setattr(rate_limit, 'USER_LIMITS', {'ping': (1.0, 1.0)})
+    monkeypatch.setattr(rate_limit, 'DEFAULT_ENDPOINT_LIMIT', None)
+    monkeypatch.setattr(rate_limit, '_state', LimiterState(None))
+
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.add_url_rule('/ping', 'ping', lambda: 'ok')
+    rate_limit.init_app(app)
+    client = app.test_client()
+
+    assert client.get('/ping', headers={'X-Forwarded-For': '10.0.0.1'}).status_code == 200
+    assert client.get('/ping', headers={'X-Forwarded-For': '10.0.0.1'}).status_code == 429
+    assert client.get('/ping', headers={'X-Forwarded-For': '10.0.0.2'}).status_code == 200
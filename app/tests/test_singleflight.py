@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+
+from src.singleflight import SingleFlight
+
+
+def start_leader(flight, key, result):
+    # Vedoucí volání, které běží, dokud test nenastaví release
+    started = threading.Event()
+    release = threading.Event()
+
+    def load():
+        started.set()
+        release.wait(5)
+        return result
+
+    thread = threading.Thread(target=lambda: flight.do(key, load))
+    thread.start()
+    assert started.wait(5)
+    return thread, release
+
+
+def test_concurrent_calls_are_coalesced():
+    flight = SingleFlight('test', wait=5)
+    thread, release = start_leader(flight, 'key', 'value')
+
+    results = []
+    followers = [threading.Thread(target=lambda: results.append(flight.do('key', lambda: 'own'))) for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    while flight.stats()['calls'] < 4:
+        time.sleep(0.001)
+    release.set()
+    for follower in followers + [thread]:
+        follower.join(5)
+
+    assert results == ['value'] * 3
+    stats = flight.stats()
+    assert stats['executed'] == 1
+    assert stats['coalesced'] == 3
+    assert stats['in_flight'] == 0
+
+
+def test_error_is_shared_and_not_kept():
+    flight = SingleFlight('test', wait=5)
+
+    def fail():
+        raise ValueError('chyba')
+
+    with pytest.raises(ValueError):
+        flight.do('key', fail)
+    assert flight.do('key', lambda: 'value') == 'value'
+
+
+def test_forget_starts_fresh_call():
+    flight = SingleFlight('test', wait=5)
+    thread, release = start_leader(flight, 'key', 'old')
+
+    flight.forget('key')
+    assert flight.do('key', lambda: 'new') == 'new'
+
+    release.set()
+    thread.join(5)
+    assert flight.stats()['executed'] == 2
+
+
+def test_finished_call_does_not_detach_newer_call():
+    flight = SingleFlight('test', wait=5)
+    old_thread, old_release = start_leader(flight, 'key', 'old')
+    flight.forget('key')
+    new_thread, new_release = start_leader(flight, 'key', 'new')
+
+    # Dokončení starého volání nesmí odpojit nové, které běží pod stejným klíčem
+    old_release.set()
+    old_thread.join(5)
+    assert flight.stats()['in_flight'] == 1
+
+    results = []
+    follower = threading.Thread(target=lambda: results.append(flight.do('key', lambda: 'own')))
+    follower.start()
+    while flight.stats()['calls'] < 3:
+        time.sleep(0.001)
+    new_release.set()
+    for thread in (new_thread, follower):
+        thread.join(5)
+
+    assert results == ['new']
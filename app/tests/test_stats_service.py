@@ -0,0 +1,55 @@
+from datetime import date, timedelta
+
+import pytest
+
+from src.services import stats_service
+from src.services.stats_service import DEFAULT_STATS_DAYS, parse_group_by, parse_stats_range
+
+
+def test_default_range_ends_today():
+    today = date.today()
+
+    assert parse_stats_range() == {
+        'from': (today - timedelta(days=DEFAULT_STATS_DAYS - 1)).isoformat(),
+        'to': today.isoformat(),
+    }
+
+
+def test_range_with_both_days_included():
+    assert parse_stats_range('2024-02-01', '2024-02-29') == {'from': '2024-02-01', 'to': '2024-02-29'}
+    assert parse_stats_range('2024-02-01', '2024-02-01') == {'from': '2024-02-01', 'to': '2024-02-01'}
+    # Bez začátku DEFAULT_STATS_DAYS dní končících zadaným dnem
+    assert parse_stats_range(date_to='2024-03-30')['from'] == (date(2024, 3, 30) - timedelta(days=DEFAULT_STATS_DAYS - 1)).isoformat()
+
+
+@pytest.mark.parametrize('date_from, date_to, message', [
+    ('2024-13-01', '2024-12-31', 'Neplatné datum'),
+    ('1. 2. 2024', None, 'Neplatné datum'),
+    ('2024-03-02', '2024-03-01', 'Začátek období musí být před jeho koncem'),
+])
+def test_invalid_range(date_from, date_to, message):
+    with pytest.raises(ValueError, match=message):
+        parse_stats_range(date_from, date_to)
+
+
+def test_longest_range(monkeypatch):
+    monkeypatch.setattr(stats_service, 'MAX_STATS_DAYS', 10)
+
+    assert parse_stats_range('2024-01-01', '2024-01-10')['to'] == '2024-01-10'
+    with pytest.raises(ValueError, match='nejvýše 10 dní'):
+        parse_stats_range('2024-01-01', '2024-01-11')
+
+
+def test_group_by():
+    assert parse_group_by('credits') == []
+    assert parse_group_by('unlocks', ' city , day,city ') == ['city', 'day']
+
+
+@pytest.mark.parametrize('rollup, group_by, message', [
+    ('offers', None, 'Neznámý souhrn'),
+    ('credits', 'city', 'Souhrn credits nelze seskupit podle city'),
+    ('listings', 'day,agent_id', 'nelze seskupit podle agent_id'),
+])
+def test_invalid_group_by(rollup, group_by, message):
+    with pytest.raises(ValueError, match=message):
+        parse_group_by(rollup, group_by)
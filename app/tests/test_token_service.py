@@ -0,0 +1,115 @@
+import base64
+import json
+import time
+import uuid
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from benchmarks.fake_supabase import FakeSupabase
+from src.services import token_service
+
+SECRET = 'test-jwt-secret-with-at-least-32-bytes'
+
+
+def claims(**overrides):
+    return {'sub': str(uuid.uuid4()), 'aud': 'authenticated', 'exp': int(time.time()) + 3600, **overrides}
+
+
+@pytest.fixture
+def hs256(monkeypatch):
+    monkeypatch.setenv('SUPABASE_JWT_SECRET', SECRET)
+
+
+@pytest.fixture
+def jwks(monkeypatch):
+    # Podpisový klíč projektu místo stahování JWKS ze Supabase
+    monkeypatch.delenv('SUPABASE_JWT_SECRET', raising=False)
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    signing_key = SimpleNamespace(key=private_key.public_key())
+    monkeypatch.setattr(token_service, '_get_jwks_client', lambda: SimpleNamespace(
+        get_signing_key_from_jwt=lambda token: signing_key
+    ))
+    return private_key
+
+
+@pytest.fixture
+def user(monkeypatch):
+    user = {'id': str(uuid.uuid4()), 'full_name': 'Jan Novák', 'user_type': 'agent'}
+    fake = FakeSupabase(tables={'users': [user]})
+    monkeypatch.setattr(token_service, 'get_supabase', lambda: fake)
+    token_service._user_cache.clear()
+    yield user
+    token_service._user_cache.clear()
+
+
+def test_hs256_token_with_project_secret(hs256):
+    payload = claims()
+    token = jwt.encode(payload, SECRET, algorithm='HS256')
+
+    assert token_service.verify_token(token)['sub'] == payload['sub']
+
+
+def test_rs256_token_from_jwks(jwks):
+    payload = claims()
+    token = jwt.encode(payload, jwks, algorithm='RS256')
+
+    assert token_service.verify_token(token)['sub'] == payload['sub']
+
+
+def test_hs256_token_is_rejected_without_secret(jwks):
+    # Bez SUPABASE_JWT_SECRET se přijímají jen asymetrické podpisy z JWKS
+    token = jwt.encode(claims(), SECRET, algorithm='HS256')
+
+    with pytest.raises(Exception, match='Neplatný přístupový token'):
+        token_service.verify_token(token)
+
+
+def test_expired_token(hs256):
+    token = jwt.encode(claims(exp=int(time.time()) - token_service.JWT_LEEWAY - 60), SECRET, algorithm='HS256')
+
+    with pytest.raises(Exception, match='vypršela'):
+        token_service.verify_token(token)
+
+
+def test_wrong_audience(hs256):
+    token = jwt.encode(claims(aud='anon'), SECRET, algorithm='HS256')
+
+    with pytest.raises(Exception, match='Neplatný přístupový token'):
+        token_service.verify_token(token)
+
+
+@pytest.mark.parametrize('signed_by', ['secret', 'jwks'])
+def test_tampered_token(request, signed_by):
+    if signed_by == 'secret':
+        request.getfixturevalue('hs256')
+        token = jwt.encode(claims(), SECRET, algorithm='HS256')
+    else:
+        token = jwt.encode(claims(), request.getfixturevalue('jwks'), algorithm='RS256')
+
+    # Jiný uživatel v payloadu s původním podpisem
+    header, _, signature = token.split('.')
+    payload = base64.urlsafe_b64encode(json.dumps(claims()).encode()).rstrip(b'=').decode()
+    with pytest.raises(Exception, match='Neplatný přístupový token'):
+        token_service.verify_token(f'{header}.{payload}.{signature}')
+
+
+def test_missing_token():
+    with pytest.raises(Exception, match='Chybí přístupový token'):
+        token_service.verify_token('')
+
+
+def test_read_started_before_invalidation_is_not_cached(user):
+    # Čtení přečte starý řádek, pak se uživatel změní a teprve potom zápis do cache
+    started = token_service.user_profile_read_started()
+    stale = dict(user)
+    user['full_name'] = 'Jan Nový'
+    token_service.invalidate_user_profile(user['id'])
+    token_service.cache_user_profile(stale, started)
+
+    assert token_service.get_cached_user_profile(user['id']) is None
+    assert token_service.get_user_profile(user['id'])['full_name'] == 'Jan Nový'
+    assert token_service.get_cached_user_profile(user['id'])['full_name'] == 'Jan Nový'
+
@@ -21,7 +21,8 @@ type ApiContextType = {
   
   // Nemovitosti
   createProperty: (propertyData: PropertyData) => Promise<ApiResponse<any>>;
-  getProperties: (filters?: any) => Promise<ApiResponse<any>>;
+  getProperties: (filters?: PropertyFilters) => Promise<ApiResponse<any>>;
+  searchProperties: (q: string, offset?: number) => Promise<ApiResponse<any>>;
   getPropertyDetail: (id: string) => Promise<ApiResponse<any>>;
   updateProperty: (id: string, propertyData: Partial<PropertyData>) => Promise<ApiResponse<any>>;
   deleteProperty: (id: string) => Promise<ApiResponse<any>>;
@@ -29,16 +30,18 @@ type ApiContextType = {
   
   // Nabídky makléřů
   createOffer: (offerData: OfferData) => Promise<ApiResponse<any>>;
-  getOffers: (propertyId?: string) => Promise<ApiResponse<any>>;
+  getOffers: (propertyId?: string, options?: OfferListOptions) => Promise<ApiResponse<any>>;
   getOfferDetail: (id: string) => Promise<ApiResponse<any>>;
   updateOffer: (id: string, offerData: Partial<OfferData>) => Promise<ApiResponse<any>>;
   deleteOffer: (id: string) => Promise<ApiResponse<any>>;
+  getAgentInterests: () => Promise<ApiResponse<any>>;
+  setAgentInterests: (interests: AgentInterest[]) => Promise<ApiResponse<any>>;
   
   // Kredity
   getCredits: () => Promise<ApiResponse<any>>;
-  purchaseCredits: (amount: number, paymentMethod: string) => Promise<ApiResponse<any>>;
-  useCredits: (propertyId: string) => Promise<ApiResponse<any>>;
-  getCreditTransactions: () => Promise<ApiResponse<any>>;
+  purchaseCredits: (amount: number, paymentMethod: string, idempotencyKey?: string) => Promise<ApiResponse<any>>;
+  useCredits: (propertyId: string, idempotencyKey?: string) => Promise<ApiResponse<any>>;
+  getCreditTransactions: (filters?: CreditTransactionFilters) => Promise<ApiResponse<any>>;
   
   // Přístupy
   grantAccess: (offerId: string) => Promise<ApiResponse<any>>;
@@ -65,6 +68,38 @@ type PropertyData = {
   cadastral_area: string;
 };
 
+type PropertyFilters = {
+  city?: string;
+  municipality?: string;
+  cadastral_area?: string;
+  property_type?: string;
+  status?: string;
+  fields?: string[];
+  cursor?: string | null;
+  limit?: number;
+};
+
+type CreditTransactionFilters = {
+  from?: string;
+  to?: string;
+  type?: 'purchase' | 'usage';
+  cursor?: string | null;
+  limit?: number;
+};
+
+// Řazení a stránkování nabídek k inzerátu (sort s '-' sestupně, např. -commission_amount)
+type OfferListOptions = {
+  sort?: string;
+  status?: 'pending' | 'approved' | 'rejected';
+  offset?: number;
+  limit?: number;
+};
+
+type AgentInterest = {
+  city?: string | null;
+  property_type?: string | null;
+};
+
 type OfferData = {
   property_id: string;
   commission_percentage: number;
@@ -82,6 +117,9 @@ const ApiContext = createContext<ApiContextType | undefined>(undefined);
 // API URL
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000/api';
 
+// Počet opakování jednoho kusu při nahrávání médií
+const MAX_UPLOAD_RETRIES = 5;
+
 // Provider komponenta
 export const ApiProvider = ({ children }: { children: ReactNode }) => {
   const [loading, setLoading] = useState(false);
@@ -151,11 +189,22 @@ export const ApiProvider = ({ children }: { children: ReactNode }) => {
     return apiCall('POST', '/seller/properties', propertyData);
   };
 
-  const getProperties = (filters?: any) => {
-    const queryParams = filters ? `?${new URLSearchParams(filters).toString()}` : '';
+  // Vrací jednu stránku; další stránku získáte předáním next_cursor jako cursor
+  const getProperties = (filters?: PropertyFilters) => {
+    const params = new URLSearchParams();
+    Object.entries(filters || {}).forEach(([key, value]) => {
+      if (value === undefined || value === null || value === '') return;
+      params.append(key, Array.isArray(value) ? value.join(',') : String(value));
+    });
+    const queryParams = params.toString() ? `?${params.toString()}` : '';
     return apiCall('GET', `/properties${queryParams}`);
   };
 
+  const searchProperties = (q: string, offset: number = 0) => {
+    const params = new URLSearchParams({ q, offset: String(offset) });
+    return apiCall('GET', `/properties/search?${params.toString()}`);
+  };
+
   const getPropertyDetail = (id: string) => {
     return apiCall('GET', `/properties/${id}`);
   };
@@ -168,31 +217,61 @@ export const ApiProvider = ({ children }: { children: ReactNode }) => {
     return apiCall('DELETE', `/seller/properties/${id}`);
   };
 
+  // Nahrání jednoho souboru po částech; po výpadku spojení se pokračuje od posledního přijatého bajtu
+  const uploadFileInChunks = async (propertyId: string, file: File) => {
+    const uploadsUrl = `${API_URL}/seller/properties/${propertyId}/media/uploads`;
+    const created = await axios.post(
+      uploadsUrl,
+      { filename: file.name, size: file.size, content_type: file.type },
+      { withCredentials: true }
+    );
+    const { upload_id: uploadId, chunk_size: chunkSize } = created.data.upload;
+
+    let offset = 0;
+    let retries = 0;
+    while (true) {
+      try {
+        const response = await axios.put(
+          `${uploadsUrl}/${uploadId}`,
+          file.slice(offset, offset + chunkSize),
+          {
+            headers: { 'Content-Type': 'application/octet-stream', 'Upload-Offset': String(offset) },
+            withCredentials: true,
+          }
+        );
+        retries = 0;
+        offset = response.data.offset;
+        if (response.data.media) {
+          return response.data.media;
+        }
+      } catch (err: any) {
+        if (err.response && err.response.status !== 409) {
+          throw err;
+        }
+        if (++retries > MAX_UPLOAD_RETRIES) {
+          throw err;
+        }
+        // Kus nenavazuje nebo spojení spadlo: server řekne, kolik dat už má
+        const state = await axios.get(`${uploadsUrl}/${uploadId}`, { withCredentials: true });
+        offset = state.data.upload.offset;
+      }
+    }
+  };
+
   const uploadPropertyMedia = async (propertyId: string, files: File[]) => {
     setLoading(true);
     setError(null);
 
     try {
-      const formData = new FormData();
-      files.forEach((file) => {
-        formData.append('files', file);
-      });
-
-      const response = await axios.post(
-        `${API_URL}/seller/properties/${propertyId}/media`,
-        formData,
-        {
-          headers: {
-            'Content-Type': 'multipart/form-data',
-          },
-          withCredentials: true,
-        }
-      );
+      const media = [];
+      for (const file of files) {
+        media.push(await uploadFileInChunks(propertyId, file));
+      }
 
       setLoading(false);
       return {
         status: 'success',
-        data: response.data,
+        data: { status: 'success', media },
       };
     } catch (err: any) {
       setLoading(false);
@@ -210,11 +289,17 @@ export const ApiProvider = ({ children }: { children: ReactNode }) => {
     return apiCall('POST', '/agent/offers', offerData);
   };
 
-  const getOffers = (propertyId?: string) => {
+  const getOffers = (propertyId?: string, options?: OfferListOptions) => {
+    const params = new URLSearchParams();
+    Object.entries(options || {}).forEach(([key, value]) => {
+      if (value === undefined || value === null || value === '') return;
+      params.append(key, String(value));
+    });
+    const queryParams = params.toString() ? `?${params.toString()}` : '';
     const endpoint = propertyId
       ? `/seller/properties/${propertyId}/offers`
       : '/agent/offers';
-    return apiCall('GET', endpoint);
+    return apiCall('GET', `${endpoint}${queryParams}`);
   };
 
   const getOfferDetail = (id: string) => {
@@ -229,21 +314,41 @@ export const ApiProvider = ({ children }: { children: ReactNode }) => {
     return apiCall('DELETE', `/agent/offers/${id}`);
   };
 
+  // Zájmy makléře pro notifikace o nových inzerátech
+  const getAgentInterests = () => {
+    return apiCall('GET', '/agent/interests');
+  };
+
+  const setAgentInterests = (interests: AgentInterest[]) => {
+    return apiCall('PUT', '/agent/interests', { interests });
+  };
+
   // Kredity
   const getCredits = () => {
     return apiCall('GET', '/credits/balance');
   };
 
-  const purchaseCredits = (amount: number, paymentMethod: string) => {
-    return apiCall('POST', '/credits/purchase', { amount, payment_method: paymentMethod });
+  // Při opakování po výpadku předejte stejný klíč, server pak nákup neprovede podruhé
+  const purchaseCredits = (amount: number, paymentMethod: string, idempotencyKey: string = crypto.randomUUID()) => {
+    return apiCall('POST', '/credits/purchase', { amount, payment_method: paymentMethod }, {
+      'Idempotency-Key': idempotencyKey,
+    });
   };
 
-  const useCredits = (propertyId: string) => {
-    return apiCall('POST', '/credits/use', { property_id: propertyId });
+  const useCredits = (propertyId: string, idempotencyKey: string = crypto.randomUUID()) => {
+    return apiCall('POST', '/credits/use', { property_id: propertyId }, {
+      'Idempotency-Key': idempotencyKey,
+    });
   };
 
-  const getCreditTransactions = () => {
-    return apiCall('GET', '/credits/transactions');
+  const getCreditTransactions = (filters?: CreditTransactionFilters) => {
+    const params = new URLSearchParams();
+    Object.entries(filters || {}).forEach(([key, value]) => {
+      if (value === undefined || value === null || value === '') return;
+      params.append(key, String(value));
+    });
+    const queryParams = params.toString() ? `?${params.toString()}` : '';
+    return apiCall('GET', `/credits/transactions${queryParams}`);
   };
 
   // Přístupy
@@ -261,6 +366,7 @@ export const ApiProvider = ({ children }: { children: ReactNode }) => {
     getCurrentUser,
     createProperty,
     getProperties,
+    searchProperties,
     getPropertyDetail,
     updateProperty,
     deleteProperty,
@@ -270,6 +376,8 @@ export const ApiProvider = ({ children }: { children: ReactNode }) => {
     getOfferDetail,
     updateOffer,
     deleteOffer,
+    getAgentInterests,
+    setAgentInterests,
     getCredits,
     purchaseCredits,
     useCredits,
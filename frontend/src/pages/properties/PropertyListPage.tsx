@@ -3,33 +3,72 @@ import { useNavigate } from 'react-router-dom';
 import { useApi } from '../../lib/api';
 
 const PropertyListPage: React.FC = () => {
-  const { getProperties } = useApi();
+  const { getProperties, searchProperties } = useApi();
   const navigate = useNavigate();
   
   const [properties, setProperties] = useState<any[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [query, setQuery] = useState('');
+  const [searchQuery, setSearchQuery] = useState('');
+  const [nextOffset, setNextOffset] = useState<number | null>(null);
   
-  useEffect(() => {
-    const fetchProperties = async () => {
-      setLoading(true);
-      try {
-        const response = await getProperties();
-        if (response.status === 'success' && response.data) {
-          setProperties(response.data.properties || []);
-        } else {
-          setError('Nepodařilo se načíst nemovitosti');
-        }
-      } catch (err: any) {
-        setError(err.message || 'Nastala chyba při načítání nemovitostí');
-      } finally {
-        setLoading(false);
+  const fetchProperties = async (cursor: string | null = null) => {
+    try {
+      const response = await getProperties({ cursor });
+      if (response.status === 'success' && response.data) {
+        const page = response.data.properties || [];
+        setProperties((current) => (cursor ? [...current, ...page] : page));
+        setNextCursor(response.data.next_cursor || null);
+        setNextOffset(null);
+      } else {
+        setError('Nepodařilo se načíst nemovitosti');
+      }
+    } catch (err: any) {
+      setError(err.message || 'Nastala chyba při načítání nemovitostí');
+    }
+  };
+  
+  const fetchSearchResults = async (q: string, offset: number = 0) => {
+    try {
+      const response = await searchProperties(q, offset);
+      if (response.status === 'success' && response.data) {
+        const page = response.data.properties || [];
+        setProperties((current) => (offset ? [...current, ...page] : page));
+        setNextOffset(response.data.next_offset ?? null);
+        setNextCursor(null);
+      } else {
+        setError('Vyhledávání se nezdařilo');
       }
-    };
-    
-    fetchProperties();
+    } catch (err: any) {
+      setError(err.message || 'Nastala chyba při vyhledávání');
+    }
+  };
+  
+  useEffect(() => {
+    setLoading(true);
+    fetchProperties().finally(() => setLoading(false));
   }, []);
   
+  const handleSearch = (event: React.FormEvent) => {
+    event.preventDefault();
+    const q = query.trim();
+    setSearchQuery(q);
+    setError(null);
+    setLoading(true);
+    (q ? fetchSearchResults(q) : fetchProperties()).finally(() => setLoading(false));
+  };
+  
+  const handleLoadMore = () => {
+    setLoadingMore(true);
+    const request = searchQuery && nextOffset !== null
+      ? fetchSearchResults(searchQuery, nextOffset)
+      : fetchProperties(nextCursor);
+    request.finally(() => setLoadingMore(false));
+  };
+  
   const handleCreateProperty = () => {
     navigate('/properties/create');
   };
@@ -54,6 +93,22 @@ const PropertyListPage: React.FC = () => {
         </button>
       </div>
       
+      <form onSubmit={handleSearch} className="flex gap-2 mb-6">
+        <input
+          type="search"
+          value={query}
+          onChange={(event) => setQuery(event.target.value)}
+          placeholder="Hledat v popisu, ulici nebo městě"
+          className="flex-1 px-4 py-2 border border-gray-300 rounded-md"
+        />
+        <button
+          type="submit"
+          className="px-4 py-2 bg-white border border-gray-300 rounded-md hover:bg-gray-50 transition-colors"
+        >
+          Hledat
+        </button>
+      </form>
+      
       {error && (
         <div className="bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded mb-4">
           {error}
@@ -160,6 +215,18 @@ const PropertyListPage: React.FC = () => {
           ))}
         </div>
       )}
+      
+      {(nextCursor || nextOffset !== null) && (
+        <div className="mt-8 flex justify-center">
+          <button
+            onClick={handleLoadMore}
+            disabled={loadingMore}
+            className="px-6 py-3 bg-white border border-gray-300 rounded-md hover:bg-gray-50 transition-colors disabled:opacity-50"
+          >
+            {loadingMore ? 'Načítání...' : 'Načíst další'}
+          </button>
+        </div>
+      )}
     </div>
   );
 };